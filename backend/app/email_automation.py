@@ -1,8 +1,9 @@
 import json
 import os
+import time
 from datetime import datetime, timezone
 
-from flask import Blueprint, g, jsonify, request
+from flask import Blueprint, Response, g, jsonify, request, stream_with_context
 
 from .extensions import api_token_required, db
 from .models import EmailConfiguration
@@ -17,6 +18,30 @@ except ImportError:
 
 email_automation = Blueprint("email_automation", __name__)
 
+# Job status event streams poll the job this often and close after the
+# job's own timeout, so a forgotten stream cannot hold a web worker forever
+JOB_EVENTS_POLL_SECONDS = 1.0
+JOB_EVENTS_MAX_SECONDS = 600
+JOB_EVENTS_KEEPALIVE_SECONDS = 15
+JOB_FINAL_STATUSES = ("finished", "failed", "stopped", "canceled")
+
+
+def _wake_email_scheduler():
+    """Wake the email scheduler so a saved configuration is scheduled now."""
+    try:
+        import redis
+
+        from shared.imports import request_scheduler_wakeup
+
+        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        request_scheduler_wakeup(redis.from_url(redis_url))
+    except Exception as e:
+        # The scheduler still picks the change up at its next pass
+        log_debug(
+            f"Could not wake the email scheduler: {e}",
+            module_name="EmailAutomation",
+        )
+
 
 @email_automation.route("/api/v1/email-automation/config", methods=["GET"])
 @api_token_required
@@ -175,6 +200,8 @@ def create_email_config():
             existing_config.polling_interval = data.get("polling_interval", "hourly")
             existing_config.sample_emails = json.dumps(data.get("sample_emails", []))
             existing_config.updated_at = datetime.now(timezone.utc)
+            # Let the scheduler recompute the next run from the new settings
+            existing_config.next_run_at = None
 
             config = existing_config
         else:
@@ -193,6 +220,7 @@ def create_email_config():
 
         try:
             db.session.commit()
+            _wake_email_scheduler()
 
             log_business_logic(
                 f"Email configuration {'updated' if is_update else 'created'} successfully",
@@ -271,9 +299,12 @@ def update_email_config():
         config.sample_emails = json.dumps(data["sample_emails"])
 
     config.updated_at = datetime.now(timezone.utc)
+    # Let the scheduler recompute the next run from the new settings
+    config.next_run_at = None
 
     try:
         db.session.commit()
+        _wake_email_scheduler()
 
         log_business_logic(
             "Email configuration updated successfully",
@@ -438,6 +469,7 @@ def get_automation_status():
             config.last_check_time.isoformat() if config.last_check_time else None
         ),
         "polling_interval": config.polling_interval,
+        "adaptive_interval_seconds": config.adaptive_interval_seconds,
         "email_address": config.email_address,
         "last_processed_email_id": config.last_processed_email_id,
     }
@@ -448,116 +480,230 @@ def get_automation_status():
 @email_automation.route("/api/v1/email-automation/trigger", methods=["POST"])
 @api_token_required
 def trigger_email_processing():
-    """Manually trigger email processing for the current user"""
+    """
+    Manually trigger email processing for the current user.
+
+    The job is queued on the high priority queue, which workers serve ahead
+    of background polling, and the response returns at once with the job ID
+    and a URL to poll for its progress.
+    """
     user_id = g.current_user.id
 
-    # Use service layer if available for direct processing, otherwise use job queue
-    if EmailProcessingService:
-        service = EmailProcessingService(user_id=user_id)
-        result = service.process_user_emails()
+    log_api_call(
+        "/api/v1/email-automation/trigger",
+        "POST",
+        user_id=user_id,
+        extra_data={"operation": "trigger_email_processing"},
+    )
 
-        if result.success:
-            return (
-                jsonify(
-                    {
-                        "success": True,
-                        "message": "Email processing completed successfully",
-                        "data": result.data,
-                        "metadata": result.metadata,
-                    }
-                ),
-                200,
-            )
-        else:
+    config = EmailConfiguration.query.filter_by(user_id=user_id).first()
+
+    if not config or not config.is_enabled:
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "error": "Email configuration not found or disabled",
+                }
+            ),
+            400,
+        )
+
+    try:
+        import redis
+        from rq import Queue
+
+        from shared.imports import (
+            HIGH_PRIORITY_QUEUE,
+            generate_job_id,
+            get_user_job_claim,
+            get_user_job_status,
+            process_user_emails_standalone,
+            release_user_job,
+            take_over_user_job_claim,
+        )
+
+        # Connect to Redis
+        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        redis_conn = redis.from_url(redis_url)
+
+        queue = Queue(HIGH_PRIORITY_QUEUE, connection=redis_conn)
+
+        # Generate consistent job ID
+        job_id = generate_job_id(user_id, datetime.now(timezone.utc))
+
+        # Claim the user's job slot so the scheduler does not add another. A
+        # background job still waiting to start is replaced by this one; a
+        # job that is already running or another manual job keeps the slot
+        if not take_over_user_job_claim(redis_conn, user_id, job_id):
             return (
                 jsonify(
                     {
                         "success": False,
-                        "error": result.error,
-                        "error_code": result.error_code,
+                        "error": "Email processing job already pending for this user",
+                        "job_id": get_user_job_claim(redis_conn, user_id),
+                        "job_status": get_user_job_status(redis_conn, user_id),
                     }
                 ),
-                400,
+                409,  # Conflict status code
             )
-    else:
-        # Fallback to original job queue implementation
-        config = EmailConfiguration.query.filter_by(user_id=user_id).first()
 
-        if not config or not config.is_enabled:
-            return (
-                jsonify({"error": "Email automation is not configured or disabled"}),
-                400,
+        # Enqueue email processing job using the standalone function
+        try:
+            job = queue.enqueue(
+                process_user_emails_standalone,
+                user_id,
+                job_id=job_id,
+                job_timeout="10m",
             )
+        except Exception:
+            release_user_job(redis_conn, user_id, job_id)
+            raise
 
-        try:
-            # Set up project paths and import using shared package to avoid path manipulation
-            import sys
-            from pathlib import Path
+        log_business_logic(
+            "Queued manual email processing job",
+            extra_data={"user_id": user_id, "job_id": job.id},
+            module_name="EmailAutomation",
+        )
 
-            project_root = Path(__file__).parent.parent.parent
-            if str(project_root) not in sys.path:
-                sys.path.insert(0, str(project_root))
+        return (
+            jsonify(
+                {
+                    "success": True,
+                    "message": "Email processing job queued successfully",
+                    "job_id": job.id,
+                    "queue": HIGH_PRIORITY_QUEUE,
+                    "status_url": f"/api/v1/email-automation/jobs/{job.id}",
+                    "events_url": f"/api/v1/email-automation/jobs/{job.id}/events",
+                }
+            ),
+            202,
+        )
 
-            import redis
-            from rq import Queue
+    except Exception as e:
+        log_error(e, module_name="EmailAutomation")
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "error": f"Failed to queue email processing job: {str(e)}",
+                }
+            ),
+            500,
+        )
 
-            from shared.imports import (
-                generate_job_id,
-                get_user_job_status,
-                has_user_job_pending,
-                process_user_emails_standalone,
-            )
 
-            # Connect to Redis
-            redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-            redis_conn = redis.from_url(redis_url)
-
-            # Check if user already has a pending job
-            if has_user_job_pending(redis_conn, user_id):
-                job_status = get_user_job_status(redis_conn, user_id)
-                return (
-                    jsonify(
-                        {
-                            "success": False,
-                            "error": "Email processing job already pending for this user",
-                            "job_status": job_status,
-                        }
-                    ),
-                    409,  # Conflict status code
-                )
+@email_automation.route("/api/v1/email-automation/jobs/<job_id>", methods=["GET"])
+@api_token_required
+def get_email_job_status(job_id):
+    """Get the status and progress of one of the current user's jobs"""
+    user_id = g.current_user.id
 
-            # Create queue
-            queue = Queue("email_processing", connection=redis_conn)
+    try:
+        import redis
 
-            # Generate consistent job ID
-            job_id = generate_job_id(user_id)
+        from shared.imports import get_job_progress
 
-            # Enqueue email processing job using the standalone function
-            job = queue.enqueue(
-                process_user_emails_standalone,
-                user_id,
-                job_id=job_id,
-                job_timeout="10m",
-            )
+        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        job = get_job_progress(redis.from_url(redis_url), job_id, user_id)
+    except Exception as e:
+        log_error(e, module_name="EmailAutomation")
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "error": f"Failed to get job status: {str(e)}",
+                }
+            ),
+            500,
+        )
 
-            return (
-                jsonify(
-                    {
-                        "success": True,
-                        "message": "Email processing job queued successfully",
-                        "job_id": job.id,
-                    }
-                ),
-                200,
-            )
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
 
-        except Exception as e:
-            return (
-                jsonify(
-                    {
-                        "success": False,
-                        "error": f"Failed to queue email processing job: {str(e)}",
-                    }
-                ),
-                500,
-            )
+    return jsonify({"success": True, "job": job}), 200
+
+
+def _job_event(event, data):
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@email_automation.route(
+    "/api/v1/email-automation/jobs/<job_id>/events", methods=["GET"]
+)
+@api_token_required
+def stream_email_job_status(job_id):
+    """
+    Stream the status and progress of one of the current user's jobs.
+
+    Sends a "progress" server-sent event whenever the job's status or
+    progress changes and a final "done" event once the job has ended.
+    """
+    user_id = g.current_user.id
+
+    try:
+        import redis
+
+        from shared.imports import get_job_progress
+
+        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        redis_conn = redis.from_url(redis_url)
+        job = get_job_progress(redis_conn, job_id, user_id)
+    except Exception as e:
+        log_error(e, module_name="EmailAutomation")
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "error": f"Failed to get job status: {str(e)}",
+                }
+            ),
+            500,
+        )
+
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+
+    log_debug(
+        f"Streaming status of job {job_id}",
+        extra_data={"user_id": user_id},
+        module_name="EmailAutomation",
+    )
+
+    def generate(job):
+        last_sent = None
+        started = last_event = time.monotonic()
+        while True:
+            if job is None:
+                # The job expired from Redis while being watched
+                yield _job_event("done", {"job_id": job_id, "status": "expired"})
+                return
+            if job != last_sent:
+                yield _job_event("progress", job)
+                last_sent = job
+                last_event = time.monotonic()
+            if job["status"] in JOB_FINAL_STATUSES:
+                yield _job_event("done", job)
+                return
+
+            now = time.monotonic()
+            if now - started >= JOB_EVENTS_MAX_SECONDS:
+                return
+            if now - last_event >= JOB_EVENTS_KEEPALIVE_SECONDS:
+                # Comment lines keep proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                last_event = now
+
+            time.sleep(JOB_EVENTS_POLL_SECONDS)
+            try:
+                job = get_job_progress(redis_conn, job_id, user_id)
+            except Exception as e:
+                yield _job_event("error", {"job_id": job_id, "error": str(e)})
+                return
+
+    return Response(
+        stream_with_context(generate(job)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
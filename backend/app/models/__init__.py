@@ -13,6 +13,7 @@ from .other import (
     ApiToken,
     BankAccountMapping,
     EmailConfiguration,
+    ExchangeRate,
     ExpenseAccountMapping,
     GlobalConfiguration,
     Preamble,
@@ -35,6 +36,7 @@ __all__ = [
     "Preamble",
     "ApiToken",
     "EmailConfiguration",
+    "ExchangeRate",
     "BankAccountMapping",
     "ExpenseAccountMapping",
     "GlobalConfiguration",
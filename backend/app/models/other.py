@@ -4,8 +4,11 @@ from datetime import datetime, timezone
 from sqlalchemy import (
     Boolean,
     Column,
+    Date,
     DateTime,
+    Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -127,10 +130,17 @@ class EmailConfiguration(db.Model):
     imap_port = Column(Integer, default=993)
     email_address = Column(String(255), nullable=False)
     app_password = Column(String(255), nullable=False)  # Will be encrypted
-    polling_interval = Column(String(50), default="hourly")  # hourly, daily, etc.
+    polling_interval = Column(String(50), default="hourly")  # hourly, daily, adaptive
     last_check_time = Column(DateTime, nullable=True)
     sample_emails = Column(Text, nullable=True)  # JSON string of sample emails
     last_processed_email_id = Column(String(255), nullable=True)
+    # When the scheduler should next process this account; None means as
+    # soon as possible (new or changed configuration)
+    next_run_at = Column(DateTime, nullable=True)
+    # Adaptive polling: exponentially weighted mean of new transactions per
+    # hour, and the interval it currently implies for "adaptive" polling
+    arrival_rate_ewma = Column(Float, nullable=True)
+    adaptive_interval_seconds = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(
         DateTime,
@@ -141,6 +151,10 @@ class EmailConfiguration(db.Model):
     # Relationships
     user = relationship("User", backref="email_configuration", lazy=True)
 
+    __table_args__ = (
+        Index("ix_email_config_enabled_next_run", "is_enabled", "next_run_at"),
+    )
+
     def to_dict(self):
         """Convert email configuration to dictionary for API responses"""
         return {
@@ -151,6 +165,7 @@ class EmailConfiguration(db.Model):
             "imap_port": self.imap_port,
             "email_address": self.email_address,
             "polling_interval": self.polling_interval,
+            "adaptive_interval_seconds": self.adaptive_interval_seconds,
             "last_check_time": (
                 self.last_check_time.isoformat() if self.last_check_time else None
             ),
@@ -345,3 +360,44 @@ class ProcessedGmailMessage(db.Model):
 
     def __repr__(self):
         return f"<ProcessedGmailMessage {self.gmail_message_id}>"
+
+
+class ExchangeRate(db.Model):
+    """
+    ExchangeRate model stores the daily rate of a currency pair, shared by
+    every worker so a rate is fetched from the provider once per date.
+    """
+
+    __tablename__ = "exchange_rates"
+
+    id = Column(Integer, primary_key=True)
+    from_currency = Column(String(3), nullable=False)
+    to_currency = Column(String(3), nullable=False)
+    rate_date = Column(Date, nullable=False)
+    rate = Column(Float, nullable=False)
+    source = Column(String(50), nullable=True)
+    fetched_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # One rate per pair and date; also serves range lookups of a pair
+    __table_args__ = (
+        UniqueConstraint(
+            "from_currency", "to_currency", "rate_date", name="uq_exchange_rate_day"
+        ),
+    )
+
+    def to_dict(self):
+        """Convert exchange rate to dictionary for API responses"""
+        return {
+            "id": self.id,
+            "from_currency": self.from_currency,
+            "to_currency": self.to_currency,
+            "rate_date": self.rate_date.isoformat() if self.rate_date else None,
+            "rate": self.rate,
+            "source": self.source,
+            "fetched_at": self.fetched_at.isoformat() if self.fetched_at else None,
+        }
+
+    def __repr__(self):
+        return (
+            f"<ExchangeRate {self.from_currency}/{self.to_currency} {self.rate_date}>"
+        )
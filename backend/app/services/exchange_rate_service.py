@@ -0,0 +1,203 @@
+"""
+Exchange Rate Service
+
+This module provides database storage for daily exchange rates, so a rate
+fetched by one worker is reused by every other worker and later backfill.
+"""
+
+import logging
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models import ExchangeRate
+from ..utils.logging_utils import (
+    log_db_error,
+    log_debug,
+    log_service_entry,
+    log_service_exit,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def load_exchange_rates(
+    from_currency: str,
+    to_currency: str,
+    start_date: date,
+    end_date: date,
+    db_session: Optional[Session] = None,
+) -> Optional[Dict[date, Dict]]:
+    """
+    Load the stored daily rates of a currency pair for a date range.
+
+    Args:
+        from_currency (str): Source currency code
+        to_currency (str): Target currency code
+        start_date (date): First date of the range
+        end_date (date): Last date of the range, inclusive
+        db_session (Session, optional): Database session to use. If None, uses db.session
+
+    Returns:
+        Optional[Dict[date, Dict]]: {"rate", "fetched_at"} by date, or None
+                                    if the lookup failed
+    """
+    log_service_entry(
+        "ExchangeRateService",
+        "load_exchange_rates",
+        pair=f"{from_currency}/{to_currency}",
+        start_date=str(start_date),
+        end_date=str(end_date),
+    )
+
+    try:
+        session = db_session or db.session
+        rows = (
+            session.query(
+                ExchangeRate.rate_date, ExchangeRate.rate, ExchangeRate.fetched_at
+            )
+            .filter(
+                ExchangeRate.from_currency == from_currency,
+                ExchangeRate.to_currency == to_currency,
+                ExchangeRate.rate_date >= start_date,
+                ExchangeRate.rate_date <= end_date,
+            )
+            .all()
+        )
+        rates = {
+            rate_date: {"rate": rate, "fetched_at": fetched_at}
+            for rate_date, rate, fetched_at in rows
+        }
+
+        log_service_exit(
+            "ExchangeRateService",
+            "load_exchange_rates",
+            f"loaded {len(rates)} rates",
+        )
+        return rates
+
+    except Exception as e:
+        log_db_error(e, operation="load", model="ExchangeRate")
+        log_service_exit(
+            "ExchangeRateService", "load_exchange_rates", "failed with error"
+        )
+        return None
+
+
+def _upsert_rates(session: Session, rows: List[dict]):
+    """
+    Insert rate rows, replacing the rate of dates that already exist.
+
+    Uses INSERT ... ON CONFLICT DO UPDATE on the (from_currency,
+    to_currency, rate_date) unique constraint where the dialect supports it.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        # Other dialects: update the dates that exist, then insert the rest
+        existing = {
+            row.rate_date: row
+            for row in session.query(ExchangeRate).filter(
+                ExchangeRate.from_currency == rows[0]["from_currency"],
+                ExchangeRate.to_currency == rows[0]["to_currency"],
+                ExchangeRate.rate_date.in_([row["rate_date"] for row in rows]),
+            )
+        }
+        for row in rows:
+            stored = existing.get(row["rate_date"])
+            if stored is None:
+                session.add(ExchangeRate(**row))
+            else:
+                stored.rate = row["rate"]
+                stored.source = row["source"]
+                stored.fetched_at = row["fetched_at"]
+        return
+
+    statement = insert(ExchangeRate.__table__).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=["from_currency", "to_currency", "rate_date"],
+        set_={
+            "rate": statement.excluded.rate,
+            "source": statement.excluded.source,
+            "fetched_at": statement.excluded.fetched_at,
+        },
+    )
+    session.execute(statement)
+
+
+def save_exchange_rates(
+    from_currency: str,
+    to_currency: str,
+    rates: Dict[date, float],
+    source: Optional[str] = None,
+    db_session: Optional[Session] = None,
+) -> Optional[int]:
+    """
+    Store daily rates of a currency pair in a single statement.
+
+    A date that is already stored gets the new rate, so a revalidated rate
+    for the current day replaces the earlier one.
+
+    Args:
+        from_currency (str): Source currency code
+        to_currency (str): Target currency code
+        rates (Dict[date, float]): Rate by date
+        source (str, optional): Provider the rates came from
+        db_session (Session, optional): Database session to use. If None, uses db.session
+
+    Returns:
+        Optional[int]: Number of rates saved, or None if the save failed
+    """
+    log_service_entry(
+        "ExchangeRateService",
+        "save_exchange_rates",
+        pair=f"{from_currency}/{to_currency}",
+        rates_count=len(rates),
+    )
+
+    if not rates:
+        log_service_exit("ExchangeRateService", "save_exchange_rates", "no rates")
+        return 0
+
+    session = db_session or db.session
+    try:
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "from_currency": from_currency,
+                "to_currency": to_currency,
+                "rate_date": rate_date,
+                "rate": rate,
+                "source": source,
+                "fetched_at": now,
+            }
+            for rate_date, rate in rates.items()
+        ]
+        _upsert_rates(session, rows)
+        session.commit()
+
+        log_debug(
+            "Saved exchange rates",
+            extra_data={
+                "pair": f"{from_currency}/{to_currency}",
+                "count": len(rows),
+            },
+            module_name="ExchangeRateService",
+        )
+        log_service_exit(
+            "ExchangeRateService", "save_exchange_rates", f"saved {len(rows)} rates"
+        )
+        return len(rows)
+
+    except Exception as e:
+        session.rollback()
+        log_db_error(e, operation="upsert", model="ExchangeRate")
+        log_service_exit(
+            "ExchangeRateService", "save_exchange_rates", "failed with error"
+        )
+        return None
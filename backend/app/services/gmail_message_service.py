@@ -7,7 +7,7 @@ It replaces the file-based approach with database storage for better scalability
 
 import logging
 from datetime import datetime, timezone
-from typing import Optional, Set
+from typing import Iterable, List, Optional, Set
 
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
@@ -23,6 +23,9 @@ from ..utils.logging_utils import (
 
 logger = logging.getLogger(__name__)
 
+# Candidate IDs per IN (...) query when checking which were processed
+EXISTENCE_CHECK_CHUNK_SIZE = 500
+
 
 def load_processed_gmail_msgids(
     user_id: int, db_session: Optional[Session] = None
@@ -164,6 +167,9 @@ def save_processed_gmail_msgids(
     """
     Save multiple processed Gmail Message IDs for a specific user to the database.
 
+    Existing IDs are skipped by the database (see insert_processed_gmail_msgids)
+    rather than by loading the user's full history to diff against.
+
     Args:
         user_id (int): The ID of the user
         msgids (Set[str]): Set of Gmail Message IDs to save
@@ -179,87 +185,185 @@ def save_processed_gmail_msgids(
         msgids_count=len(msgids),
     )
 
-    if not msgids:
-        log_debug(
-            "No Gmail Message IDs to save",
-            extra_data={"user_id": user_id},
-            module_name="GmailMessageService",
-        )
-        log_service_exit(
-            "GmailMessageService", "save_processed_gmail_msgids", "no messages to save"
-        )
-        return 0
+    saved_count = insert_processed_gmail_msgids(user_id, msgids, db_session) or 0
+
+    log_service_exit(
+        "GmailMessageService",
+        "save_processed_gmail_msgids",
+        f"saved {saved_count} new messages",
+    )
+    return saved_count
+
+
+def find_processed_gmail_msgids(
+    user_id: int, candidate_ids: Iterable[str], db_session: Optional[Session] = None
+) -> Optional[Set[str]]:
+    """
+    Return which of the candidate Gmail Message IDs were already processed.
+
+    Only the candidates are looked up, through the (user_id, gmail_message_id)
+    unique index, so the cost follows the size of the mailbox window rather
+    than the user's whole processing history.
+
+    Args:
+        user_id (int): The ID of the user
+        candidate_ids (Iterable[str]): Gmail Message IDs to check
+        db_session (Session, optional): Database session to use. If None, uses db.session
+
+    Returns:
+        Optional[Set[str]]: The processed subset, or None if the lookup failed
+    """
+    candidates = list(dict.fromkeys(candidate_ids))
+    log_service_entry(
+        "GmailMessageService",
+        "find_processed_gmail_msgids",
+        user_id=user_id,
+        candidates_count=len(candidates),
+    )
 
     try:
         session = db_session or db.session
+        processed = set()
+        for start in range(0, len(candidates), EXISTENCE_CHECK_CHUNK_SIZE):
+            chunk = candidates[start : start + EXISTENCE_CHECK_CHUNK_SIZE]
+            processed.update(
+                msgid
+                for (msgid,) in session.query(ProcessedGmailMessage.gmail_message_id)
+                .filter(
+                    ProcessedGmailMessage.user_id == user_id,
+                    ProcessedGmailMessage.gmail_message_id.in_(chunk),
+                )
+                .all()
+            )
 
-        log_debug(
-            "Loading existing message IDs to avoid duplicates",
-            extra_data={"user_id": user_id, "new_msgids_count": len(msgids)},
-            module_name="GmailMessageService",
+        log_service_exit(
+            "GmailMessageService",
+            "find_processed_gmail_msgids",
+            f"{len(processed)} of {len(candidates)} already processed",
         )
+        return processed
 
-        # Get existing message IDs for this user to avoid duplicates
-        existing_msgids = load_processed_gmail_msgids(user_id, session)
-        new_msgids = msgids - existing_msgids
+    except Exception as e:
+        log_db_error(e, operation="exists", model="ProcessedGmailMessage")
+        log_service_exit(
+            "GmailMessageService", "find_processed_gmail_msgids", "failed with error"
+        )
+        return None
 
-        if not new_msgids:
-            log_debug(
-                "All Gmail Message IDs already exist",
-                extra_data={"user_id": user_id, "total_msgids": len(msgids)},
-                module_name="GmailMessageService",
-            )
-            log_service_exit(
-                "GmailMessageService",
-                "save_processed_gmail_msgids",
-                "all messages already exist",
-            )
-            return 0
 
-        log_debug(
-            "Creating bulk insert for new message IDs",
-            extra_data={
-                "user_id": user_id,
-                "new_count": len(new_msgids),
-                "existing_count": len(existing_msgids),
-            },
-            module_name="GmailMessageService",
-        )
+def _insert_ignoring_duplicates(session: Session, rows: List[dict]) -> int:
+    """
+    Insert processed message rows, skipping ones that already exist.
+
+    Uses INSERT ... ON CONFLICT DO NOTHING on the (user_id, gmail_message_id)
+    unique constraint where the dialect supports it.
 
-        # Create new processed message records for new IDs only
-        new_records = []
-        for msgid in new_msgids:
-            processed_message = ProcessedGmailMessage(
-                user_id=user_id,
-                gmail_message_id=msgid,
-                processed_at=datetime.now(timezone.utc),
+    Returns:
+        int: Number of rows actually inserted
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        # Other dialects: skip IDs that already exist, then insert the rest
+        candidate_ids = [row["gmail_message_id"] for row in rows]
+        existing = {
+            msgid
+            for (msgid,) in session.query(ProcessedGmailMessage.gmail_message_id)
+            .filter(
+                ProcessedGmailMessage.user_id == rows[0]["user_id"],
+                ProcessedGmailMessage.gmail_message_id.in_(candidate_ids),
             )
-            new_records.append(processed_message)
+            .all()
+        }
+        new_rows = [row for row in rows if row["gmail_message_id"] not in existing]
+        if new_rows:
+            session.execute(ProcessedGmailMessage.__table__.insert(), new_rows)
+        return len(new_rows)
+
+    statement = (
+        insert(ProcessedGmailMessage.__table__)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["user_id", "gmail_message_id"])
+    )
+    return session.execute(statement).rowcount
+
+
+def insert_processed_gmail_msgids(
+    user_id: int, msgids: Iterable[str], db_session: Optional[Session] = None
+) -> Optional[int]:
+    """
+    Insert a batch of processed Gmail Message IDs in a single statement.
+
+    Duplicates (already saved, or repeated within the batch) are skipped by
+    the database instead of being loaded and diffed in Python.
 
-        # Bulk insert new records
-        session.add_all(new_records)
+    Args:
+        user_id (int): The ID of the user
+        msgids (Iterable[str]): Gmail Message IDs to save
+        db_session (Session, optional): Database session to use. If None, uses db.session
+
+    Returns:
+        Optional[int]: Number of new IDs saved, or None if the insert failed
+    """
+    unique_msgids = list(dict.fromkeys(msgids))
+    log_service_entry(
+        "GmailMessageService",
+        "insert_processed_gmail_msgids",
+        user_id=user_id,
+        msgids_count=len(unique_msgids),
+    )
+
+    if not unique_msgids:
+        log_service_exit(
+            "GmailMessageService",
+            "insert_processed_gmail_msgids",
+            "no messages to save",
+        )
+        return 0
+
+    session = db_session or db.session
+    try:
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "user_id": user_id,
+                "gmail_message_id": msgid,
+                "processed_at": now,
+                "created_at": now,
+            }
+            for msgid in unique_msgids
+        ]
+        inserted = _insert_ignoring_duplicates(session, rows)
         session.commit()
 
         log_debug(
-            "Successfully saved new processed Gmail Message IDs",
-            extra_data={"user_id": user_id, "saved_count": len(new_records)},
+            "Batch inserted processed Gmail Message IDs",
+            extra_data={
+                "user_id": user_id,
+                "batch_size": len(unique_msgids),
+                "inserted": inserted,
+            },
             module_name="GmailMessageService",
         )
-
         log_service_exit(
             "GmailMessageService",
-            "save_processed_gmail_msgids",
-            f"saved {len(new_records)} new messages",
+            "insert_processed_gmail_msgids",
+            f"inserted {inserted} new messages",
         )
-        return len(new_records)
+        return inserted
 
     except Exception as e:
         session.rollback()
-        log_db_error(e, operation="bulk_save", model="ProcessedGmailMessage")
+        log_db_error(e, operation="batch_insert", model="ProcessedGmailMessage")
         log_service_exit(
-            "GmailMessageService", "save_processed_gmail_msgids", "failed with error"
+            "GmailMessageService",
+            "insert_processed_gmail_msgids",
+            "failed with error",
         )
-        return 0
+        return None
 
 
 def is_gmail_message_processed(
@@ -2,6 +2,7 @@ from flask import Blueprint, g, jsonify, request
 
 from .extensions import api_token_required, db
 from .models import GlobalConfiguration
+from .utils.config_manager import invalidate_cached_configuration
 from .utils.encryption import decrypt_value, encrypt_value
 from .utils.logging_utils import log_api_call, log_business_logic, log_debug, log_error
 
@@ -206,6 +207,7 @@ def create_global_config():
         # Save to database
         db.session.add(new_config)
         db.session.commit()
+        invalidate_cached_configuration(data["key"])
 
         log_business_logic(
             "Global configuration created successfully",
@@ -316,6 +318,7 @@ def update_global_config(key):
     try:
         # Save to database
         db.session.commit()
+        invalidate_cached_configuration(key)
 
         log_business_logic(
             "Global configuration updated successfully",
@@ -384,6 +387,7 @@ def delete_global_config(key):
         # Delete the configuration
         db.session.delete(config)
         db.session.commit()
+        invalidate_cached_configuration(key)
 
         log_business_logic(
             "Global configuration deleted successfully",
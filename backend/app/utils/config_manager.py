@@ -39,6 +39,22 @@ def get_configuration(key, default=None):
         return default
 
 
+def invalidate_cached_configuration(key):
+    """
+    Drop process-wide state derived from a configuration value.
+
+    The email pipeline caches LLM provider keys and clients; changing their
+    configuration key must force a reload in this and every worker process.
+    """
+    try:
+        from shared.imports import llm_providers
+    except ImportError:
+        return
+
+    if llm_providers is not None:
+        llm_providers.invalidate_config_key(key)
+
+
 def set_configuration(key, value, description=None, is_encrypted=True):
     """
     Set a configuration value by key.
@@ -88,6 +104,7 @@ def set_configuration(key, value, description=None, is_encrypted=True):
             current_app.logger.info(f"Created new configuration '{key}'")
 
         db.session.commit()
+        invalidate_cached_configuration(key)
         return True
 
     except Exception as e:
@@ -111,6 +128,7 @@ def delete_configuration(key):
         if config:
             db.session.delete(config)
             db.session.commit()
+            invalidate_cached_configuration(key)
             current_app.logger.info(f"Deleted configuration '{key}'")
             return True
         else:
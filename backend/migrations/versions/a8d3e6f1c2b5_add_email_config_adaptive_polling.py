@@ -0,0 +1,32 @@
+"""add_email_config_adaptive_polling
+
+Revision ID: a8d3e6f1c2b5
+Revises: e4a7c1f9b2d6
+Create Date: 2026-10-18 23:10:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "a8d3e6f1c2b5"
+down_revision = "e4a7c1f9b2d6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Per-user arrival statistics for adaptive polling; NULL until the
+    # account's first processing run records them
+    with op.batch_alter_table("user_email_configurations", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("arrival_rate_ewma", sa.Float(), nullable=True))
+        batch_op.add_column(
+            sa.Column("adaptive_interval_seconds", sa.Integer(), nullable=True)
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("user_email_configurations", schema=None) as batch_op:
+        batch_op.drop_column("adaptive_interval_seconds")
+        batch_op.drop_column("arrival_rate_ewma")
@@ -0,0 +1,35 @@
+"""add_email_config_next_run_at
+
+Revision ID: e4a7c1f9b2d6
+Revises: b97344b3383f
+Create Date: 2026-10-18 21:40:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e4a7c1f9b2d6"
+down_revision = "b97344b3383f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Due-time index for the email scheduler; existing rows start as NULL,
+    # which the scheduler treats as due and fills in on its next pass
+    with op.batch_alter_table("user_email_configurations", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("next_run_at", sa.DateTime(), nullable=True))
+        batch_op.create_index(
+            "ix_email_config_enabled_next_run",
+            ["is_enabled", "next_run_at"],
+            unique=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("user_email_configurations", schema=None) as batch_op:
+        batch_op.drop_index("ix_email_config_enabled_next_run")
+        batch_op.drop_column("next_run_at")
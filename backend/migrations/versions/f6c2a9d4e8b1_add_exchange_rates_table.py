@@ -0,0 +1,38 @@
+"""add_exchange_rates_table
+
+Revision ID: f6c2a9d4e8b1
+Revises: a8d3e6f1c2b5
+Create Date: 2026-10-18 23:50:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "f6c2a9d4e8b1"
+down_revision = "a8d3e6f1c2b5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Daily exchange rates shared by all workers, one row per pair and date
+    op.create_table(
+        "exchange_rates",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("from_currency", sa.String(length=3), nullable=False),
+        sa.Column("to_currency", sa.String(length=3), nullable=False),
+        sa.Column("rate_date", sa.Date(), nullable=False),
+        sa.Column("rate", sa.Float(), nullable=False),
+        sa.Column("source", sa.String(length=50), nullable=True),
+        sa.Column("fetched_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "from_currency", "to_currency", "rate_date", name="uq_exchange_rate_day"
+        ),
+    )
+
+
+def downgrade():
+    op.drop_table("exchange_rates")
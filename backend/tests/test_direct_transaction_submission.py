@@ -0,0 +1,177 @@
+"""
+Tests for creating transactions and loading mappings in-process, as the
+bank email worker does in direct submit mode.
+"""
+
+import pytest
+
+from app.models import Account, BankAccountMapping, ExpenseAccountMapping, Transaction
+from banktransactions.core.api_client import DirectTransactionSubmitter
+from banktransactions.core.transaction_data import MappingSnapshot
+from shared.services.transaction import TransactionService
+
+
+@pytest.fixture
+def ledger_accounts(db_session, user):
+    """Create a bank and an expense account in the user's active book."""
+    accounts = [
+        Account(
+            user_id=user.id,
+            book_id=user.active_book_id,
+            name=name,
+            balance=balance,
+            currency="INR",
+        )
+        for name, balance in (("Assets:Bank:Axis", 1000.0), ("Expenses:Food", 0.0))
+    ]
+    db_session.add_all(accounts)
+    db_session.commit()
+    return accounts
+
+
+def _payload(amount="250.00", expense_account="Expenses:Food"):
+    return {
+        "date": "2025-03-05",
+        "payee": "SWIGGY 14:22:10",
+        "postings": [
+            {"account": "Assets:Bank:Axis", "amount": "-" + amount, "currency": "INR"},
+            {"account": expense_account, "amount": amount, "currency": "INR"},
+        ],
+    }
+
+
+def _transaction_data(amount="250.00"):
+    return {
+        "amount": amount,
+        "transaction_date": "05-03-2025",
+        "transaction_time": "14:22:10",
+        "from_account": "Assets:Bank:Axis",
+        "to_account": "Expenses:Food",
+        "recipient_name": "SWIGGY",
+    }
+
+
+class TestCreateTransactionFromPostings:
+    """Test TransactionService.create_transaction_from_postings"""
+
+    def test_creates_one_record_per_posting(self, db_session, user, ledger_accounts):
+        service = TransactionService(user_id=user.id, session=db_session)
+
+        result = service.create_transaction_from_postings(_payload())
+
+        assert result.success, result.error
+        assert len(result.data["transaction_ids"]) == 2
+        transactions = db_session.query(Transaction).filter_by(user_id=user.id).all()
+        assert sorted(t.amount for t in transactions) == [-250.0, 250.0]
+        assert {t.book_id for t in transactions} == {user.active_book_id}
+        assert ledger_accounts[0].balance == 750.0
+        assert ledger_accounts[1].balance == 250.0
+
+    def test_unknown_account_writes_nothing(self, db_session, user, ledger_accounts):
+        service = TransactionService(user_id=user.id, session=db_session)
+
+        result = service.create_transaction_from_postings(
+            _payload(expense_account="Expenses:Missing")
+        )
+
+        assert not result.success
+        assert result.error_code == "ACCOUNT_NOT_FOUND"
+        assert db_session.query(Transaction).count() == 0
+        assert ledger_accounts[0].balance == 1000.0
+
+    def test_invalid_payload_is_rejected(self, db_session, user):
+        service = TransactionService(user_id=user.id, session=db_session)
+
+        result = service.create_transaction_from_postings(
+            dict(_payload(), date="05-03-2025")
+        )
+
+        assert not result.success
+        assert result.error_code == "INVALID_DATE"
+
+    def test_same_account_debit_and_credit_is_rejected(
+        self, db_session, user, ledger_accounts
+    ):
+        service = TransactionService(user_id=user.id, session=db_session)
+
+        result = service.create_transaction_from_postings(
+            _payload(expense_account="Assets:Bank:Axis")
+        )
+
+        assert not result.success
+        assert "Cannot debit and credit the same account" in result.error
+        assert db_session.query(Transaction).count() == 0
+        assert ledger_accounts[0].balance == 1000.0
+
+
+class TestDirectTransactionSubmitter:
+    """Test the in-process submitter used by the worker"""
+
+    def test_send_batch_reports_per_transaction(
+        self, db_session, user, ledger_accounts
+    ):
+        submitter = DirectTransactionSubmitter(db_session, user.id)
+
+        results = submitter.send_batch(
+            [
+                ("gmail-1", _transaction_data()),
+                ("gmail-2", dict(_transaction_data(), amount="not a number")),
+                ("gmail-3", _transaction_data("100.00")),
+            ]
+        )
+
+        assert results == {"gmail-1": True, "gmail-2": False, "gmail-3": True}
+        assert submitter.pending == 0
+        assert db_session.query(Transaction).count() == 4
+        assert ledger_accounts[0].balance == 650.0
+
+
+class TestLoadMappingsFromDatabase:
+    """Test loading the mapping snapshot without the export API"""
+
+    def test_matches_export_format(self, db_session, user):
+        db_session.add_all(
+            [
+                BankAccountMapping(
+                    user_id=user.id,
+                    book_id=user.active_book_id,
+                    account_identifier="XX2804",
+                    ledger_account="Assets:Bank:Axis",
+                ),
+                ExpenseAccountMapping(
+                    user_id=user.id,
+                    book_id=user.active_book_id,
+                    merchant_name="SWIGGY",
+                    ledger_account="Expenses:Food",
+                    description="Food delivery",
+                ),
+            ]
+        )
+        db_session.commit()
+
+        mappings = MappingSnapshot.load_from_database(db_session, user.id)
+
+        assert mappings.get_bank_account("XX2804") == "Assets:Bank:Axis"
+        assert mappings.get_expense_account("swiggy") == [
+            "Expenses:Food",
+            "Food delivery",
+        ]
+
+    def test_unknown_user_gives_empty_snapshot(self, db_session):
+        mappings = MappingSnapshot.load_from_database(db_session, 999)
+
+        assert mappings.bank_account_map == {}
+        assert mappings.expense_account_map == {}
+
+    def test_learns_from_categorized_transactions(
+        self, db_session, user, ledger_accounts
+    ):
+        service = TransactionService(user_id=user.id, session=db_session)
+        payload = dict(_payload(), payee="ZOMATO Dinner 21:10:00")
+        assert service.create_transaction_from_postings(payload).success
+
+        mappings = MappingSnapshot.load_from_database(db_session, user.id)
+        match = mappings.match_expense_account("ZOMATO DINNER")
+
+        assert match["account"] == "Expenses:Food"
+        assert match["method"] == "learned-normalized"
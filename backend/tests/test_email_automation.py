@@ -553,7 +553,7 @@ class TestEmailProcessingTrigger:
     """Test cases for email processing trigger endpoint"""
 
     def test_trigger_processing_success(self, authenticated_client, user, db_session):
-        """Test successful email processing trigger"""
+        """Test that a manual trigger is queued on the high priority queue"""
         # Create enabled configuration
         config = EmailConfiguration(
             user_id=user.id,
@@ -574,36 +574,34 @@ class TestEmailProcessingTrigger:
         # Mock all the external dependencies
         with patch("redis.from_url", return_value=mock_redis_conn), patch(
             "rq.Queue", return_value=mock_queue
-        ), patch(
+        ) as mock_queue_class, patch(
             "shared.imports.generate_job_id",
             return_value="job_123",
         ) as mock_generate_job_id, patch(
             "shared.imports.get_user_job_status"
         ), patch(
-            "shared.imports.has_user_job_pending",
-            return_value=False,
-        ) as mock_has_pending, patch(
+            "shared.imports.take_over_user_job_claim", return_value=True
+        ) as mock_take_over, patch(
             "shared.imports.process_user_emails_standalone"
         ):
 
             response = authenticated_client.post("/api/v1/email-automation/trigger")
 
-            # The service layer may return 400 due to encryption issues in test environment
-            # This is expected behavior when the service layer can't decrypt the password
-            assert response.status_code in [200, 400]
+            assert response.status_code == 202
             data = json.loads(response.data)
-
-            if response.status_code == 200:
-                assert data["success"] is True
-                assert data["message"] == "Email processing job queued successfully"
-                assert data["job_id"] == "job_123"
-                # Verify function calls
-                mock_has_pending.assert_called_once_with(mock_redis_conn, user.id)
-                mock_generate_job_id.assert_called_once_with(user.id)
-                mock_queue.enqueue.assert_called_once()
-            else:
-                # 400 due to encryption/decryption issues in test environment
-                assert "error" in data
+            assert data["success"] is True
+            assert data["message"] == "Email processing job queued successfully"
+            assert data["job_id"] == "job_123"
+            assert data["queue"] == "email_processing_high"
+            assert data["status_url"] == "/api/v1/email-automation/jobs/job_123"
+            assert data["events_url"] == "/api/v1/email-automation/jobs/job_123/events"
+            # Verify function calls
+            mock_take_over.assert_called_once_with(mock_redis_conn, user.id, "job_123")
+            assert mock_generate_job_id.call_args[0][0] == user.id
+            mock_queue_class.assert_called_once_with(
+                "email_processing_high", connection=mock_redis_conn
+            )
+            mock_queue.enqueue.assert_called_once()
 
     def test_trigger_processing_not_configured(self, authenticated_client, user):
         """Test triggering when email automation is not configured"""
@@ -646,36 +644,22 @@ class TestEmailProcessingTrigger:
 
         mock_redis_conn = MagicMock()
 
-        # Create mock modules
-        mock_redis_module = MagicMock()
-        mock_redis_module.from_url.return_value = mock_redis_conn
-
-        mock_job_utils = MagicMock()
-        mock_job_utils.has_user_job_pending.return_value = True
-        mock_job_utils.get_user_job_status.return_value = {"status": "pending"}
-
-        mock_banktransactions = MagicMock()
-        mock_banktransactions.automation.job_utils = mock_job_utils
-
         with patch("redis.from_url", return_value=mock_redis_conn), patch(
-            "shared.imports.has_user_job_pending", return_value=True
+            "shared.imports.take_over_user_job_claim", return_value=False
         ), patch(
             "shared.imports.get_user_job_status", return_value={"status": "pending"}
+        ), patch(
+            "shared.imports.get_user_job_claim", return_value="job_456"
         ):
 
             response = authenticated_client.post("/api/v1/email-automation/trigger")
 
-            # The service layer may return 400 due to encryption issues instead of 409
-            assert response.status_code in [400, 409]
+            assert response.status_code == 409
             data = json.loads(response.data)
-
-            if response.status_code == 409:
-                assert data["success"] is False
-                assert "already pending" in data["error"]
-                assert data["job_status"]["status"] == "pending"
-            else:
-                # 400 due to encryption/decryption issues in test environment
-                assert "error" in data
+            assert data["success"] is False
+            assert "already pending" in data["error"]
+            assert data["job_id"] == "job_456"
+            assert data["job_status"]["status"] == "pending"
 
     def test_trigger_processing_redis_error(
         self, authenticated_client, user, db_session
@@ -696,17 +680,15 @@ class TestEmailProcessingTrigger:
 
             response = authenticated_client.post("/api/v1/email-automation/trigger")
 
-            # The service layer may return 400 due to encryption issues instead of 500
-            assert response.status_code in [400, 500]
+            assert response.status_code == 500
             data = json.loads(response.data)
-            assert data["success"] is False or "error" in data
-            if response.status_code == 500:
-                assert "Failed to queue email processing job" in data["error"]
+            assert data["success"] is False
+            assert "Failed to queue email processing job" in data["error"]
 
     def test_trigger_processing_queue_error(
         self, authenticated_client, user, db_session
     ):
-        """Test handling queue errors"""
+        """Test that a failed enqueue releases the user's job claim"""
         # Create enabled configuration
         config = EmailConfiguration(
             user_id=user.id,
@@ -723,24 +705,24 @@ class TestEmailProcessingTrigger:
 
         with patch("redis.from_url", return_value=mock_redis_conn), patch(
             "rq.Queue", return_value=mock_queue
-        ), patch(
-            "shared.imports.has_user_job_pending",
-            return_value=False,
         ), patch(
             "shared.imports.generate_job_id",
             return_value="job_123",
         ), patch(
+            "shared.imports.take_over_user_job_claim", return_value=True
+        ), patch(
+            "shared.imports.release_user_job"
+        ) as mock_release, patch(
             "shared.imports.process_user_emails_standalone"
         ):
 
             response = authenticated_client.post("/api/v1/email-automation/trigger")
 
-            # The service layer may return 400 due to encryption issues instead of 500
-            assert response.status_code in [400, 500]
+            assert response.status_code == 500
             data = json.loads(response.data)
-            assert data["success"] is False or "error" in data
-            if response.status_code == 500:
-                assert "Failed to queue email processing job" in data["error"]
+            assert data["success"] is False
+            assert "Failed to queue email processing job" in data["error"]
+            mock_release.assert_called_once_with(mock_redis_conn, user.id, "job_123")
 
     def test_trigger_processing_endpoint_functionality(
         self, authenticated_client, user, db_session
@@ -762,13 +744,12 @@ class TestEmailProcessingTrigger:
         data = json.loads(response.data)
 
         # The response could be:
-        # - 200: Success (job queued)
-        # - 400: Error (encryption issues in test environment)
+        # - 202: Success (job queued)
         # - 409: Conflict (job already pending)
-        # - 500: Error (missing dependencies or other errors)
-        assert response.status_code in [200, 400, 409, 500]
+        # - 500: Error (Redis unavailable or other errors)
+        assert response.status_code in [202, 409, 500]
 
-        if response.status_code == 200:
+        if response.status_code == 202:
             # Success case
             assert data["success"] is True
             assert "job_id" in data
@@ -776,15 +757,107 @@ class TestEmailProcessingTrigger:
             # Job already pending case
             assert data["success"] is False
             assert "already pending" in data["error"]
-        elif response.status_code == 400:
-            # Error case (encryption issues in test environment)
-            assert "error" in data
         else:  # 500
             # Error case (missing dependencies, etc.)
             assert data["success"] is False
             assert "Failed to queue email processing job" in data["error"]
 
 
+class TestEmailJobStatus:
+    """Test cases for the email processing job status endpoint"""
+
+    def test_job_status_reports_progress(self, authenticated_client, user):
+        """Test that the status and progress of the user's job are returned"""
+        job = {
+            "job_id": "job_123",
+            "status": "started",
+            "queue": "email_processing_high",
+            "progress": {"stage": "processing_emails"},
+        }
+
+        with patch("redis.from_url") as mock_from_url, patch(
+            "shared.imports.get_job_progress", return_value=job
+        ) as mock_progress:
+            response = authenticated_client.get("/api/v1/email-automation/jobs/job_123")
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["success"] is True
+        assert data["job"] == job
+        mock_progress.assert_called_once_with(
+            mock_from_url.return_value, "job_123", user.id
+        )
+
+    def test_unknown_or_foreign_job_is_not_found(self, authenticated_client, user):
+        """Test that jobs of other users are indistinguishable from missing ones"""
+        with patch("redis.from_url"), patch(
+            "shared.imports.get_job_progress", return_value=None
+        ):
+            response = authenticated_client.get("/api/v1/email-automation/jobs/job_999")
+
+        assert response.status_code == 404
+        data = json.loads(response.data)
+        assert data["success"] is False
+        assert data["error"] == "Job not found"
+
+    def test_redis_error(self, authenticated_client, user):
+        """Test handling Redis errors while reading job status"""
+        with patch("redis.from_url", side_effect=Exception("Redis down")):
+            response = authenticated_client.get("/api/v1/email-automation/jobs/job_123")
+
+        assert response.status_code == 500
+        assert "Redis down" in json.loads(response.data)["error"]
+
+    def test_event_stream_sends_changes_until_the_job_ends(
+        self, authenticated_client, user
+    ):
+        """Test that the event stream follows the job until it finishes"""
+        queued = {"job_id": "job_123", "status": "queued", "progress": None}
+        posting = {
+            "job_id": "job_123",
+            "status": "started",
+            "progress": {"stage": "posting", "counts": {"posted": 20}},
+        }
+        finished = {"job_id": "job_123", "status": "finished", "progress": None}
+
+        with patch("redis.from_url"), patch(
+            "shared.imports.get_job_progress",
+            side_effect=[queued, queued, posting, finished],
+        ), patch("app.email_automation.JOB_EVENTS_POLL_SECONDS", 0):
+            response = authenticated_client.get(
+                "/api/v1/email-automation/jobs/job_123/events"
+            )
+            body = response.get_data(as_text=True)
+
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        events = [
+            (
+                block.split("\n")[0].removeprefix("event: "),
+                json.loads(block.split("\n")[1].removeprefix("data: ")),
+            )
+            for block in body.strip().split("\n\n")
+        ]
+        # The repeated queued status is not sent twice
+        assert events == [
+            ("progress", queued),
+            ("progress", posting),
+            ("progress", finished),
+            ("done", finished),
+        ]
+
+    def test_event_stream_of_unknown_job_is_not_found(self, authenticated_client, user):
+        """Test that no stream is opened for a job the user cannot see"""
+        with patch("redis.from_url"), patch(
+            "shared.imports.get_job_progress", return_value=None
+        ):
+            response = authenticated_client.get(
+                "/api/v1/email-automation/jobs/job_999/events"
+            )
+
+        assert response.status_code == 404
+
+
 class TestEmailAutomationAuth:
     """Test cases for authentication and authorization"""
 
@@ -798,6 +871,8 @@ class TestEmailAutomationAuth:
             ("/api/v1/email-automation/test-connection", "POST"),
             ("/api/v1/email-automation/status", "GET"),
             ("/api/v1/email-automation/trigger", "POST"),
+            ("/api/v1/email-automation/jobs/job_123", "GET"),
+            ("/api/v1/email-automation/jobs/job_123/events", "GET"),
         ]
 
         for endpoint, method in endpoints:
@@ -0,0 +1,150 @@
+"""
+Tests for the due-time index the email scheduler pages through.
+"""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.models import EmailConfiguration
+from banktransactions.automation.scheduler import EmailScheduler
+
+
+def _config(user_id, next_run_at, is_enabled=True):
+    return EmailConfiguration(
+        user_id=user_id,
+        is_enabled=is_enabled,
+        email_address=f"user{user_id}@example.com",
+        app_password="encrypted",
+        polling_interval="hourly",
+        next_run_at=next_run_at,
+    )
+
+
+@pytest.fixture
+def scheduler(db_session):
+    redis_conn = Mock()
+    redis_conn.exists.return_value = 0
+    redis_conn.set.return_value = True
+    with patch("banktransactions.automation.scheduler.Scheduler"):
+        return EmailScheduler(redis_conn, db_session, batch_size=1)
+
+
+def _naive(value):
+    return value.replace(tzinfo=None)
+
+
+class TestDueConfigurations:
+    """Test that a pass only touches configurations that are due"""
+
+    def test_schedules_only_due_enabled_configurations(self, db_session, scheduler):
+        now = datetime.now(timezone.utc)
+        later = now + timedelta(minutes=30)
+        db_session.add_all(
+            [
+                _config(1, None),
+                _config(2, now - timedelta(minutes=5)),
+                _config(3, later),
+                _config(4, now - timedelta(minutes=5), is_enabled=False),
+            ]
+        )
+        db_session.commit()
+
+        scheduler.schedule_jobs()
+
+        scheduled_users = [
+            call.args[2] for call in scheduler.scheduler.enqueue_at.call_args_list
+        ]
+        assert scheduled_users == [1, 2]
+        configs = {
+            config.user_id: config for config in db_session.query(EmailConfiguration)
+        }
+        # Scheduled configurations move out of the due range
+        for user_id in (1, 2):
+            assert configs[user_id].next_run_at > _naive(now)
+        assert configs[3].next_run_at == _naive(later)
+
+    def test_next_pass_skips_already_scheduled(self, db_session, scheduler):
+        db_session.add(_config(1, None))
+        db_session.commit()
+
+        scheduler.schedule_jobs()
+        scheduler.schedule_jobs()
+
+        scheduler.scheduler.enqueue_at.assert_called_once()
+
+    def test_seconds_until_next_due(self, db_session, scheduler):
+        now = datetime.now(timezone.utc)
+        db_session.add_all(
+            [
+                _config(1, now + timedelta(minutes=10)),
+                _config(2, now + timedelta(minutes=1), is_enabled=False),
+            ]
+        )
+        db_session.commit()
+
+        wait = scheduler.seconds_until_next_due(max_wait=3600)
+
+        assert 590 <= wait <= 600
+        assert scheduler.seconds_until_next_due(max_wait=60) == 60
+
+    def test_nothing_due_waits_the_maximum(self, scheduler):
+        assert scheduler.seconds_until_next_due(max_wait=300) == 300
+
+
+class TestConfigurationChanges:
+    """Test that saving a configuration reschedules it right away"""
+
+    def test_update_resets_next_run_and_wakes_scheduler(
+        self, authenticated_client, user, db_session
+    ):
+        config = _config(user.id, datetime.now(timezone.utc) + timedelta(hours=1))
+        db_session.add(config)
+        db_session.commit()
+
+        with patch("app.email_automation._wake_email_scheduler") as mock_wake:
+            response = authenticated_client.put(
+                "/api/v1/email-automation/config", json={"polling_interval": "daily"}
+            )
+
+        assert response.status_code == 200
+        mock_wake.assert_called_once()
+        db_session.refresh(config)
+        assert config.next_run_at is None
+
+
+class TestShardedScheduling:
+    """Test that a sharded scheduler only touches users in its shards"""
+
+    def test_schedules_only_owned_shards(self, db_session, scheduler):
+        lease_manager = Mock(shard_count=2, owned_shards=[0])
+        lease_manager.rebalance.return_value = [0]
+        scheduler.lease_manager = lease_manager
+        scheduler.batch_size = 10
+        now = datetime.now(timezone.utc)
+        db_session.add_all([_config(user_id, None) for user_id in range(1, 5)])
+        db_session.add(_config(5, now + timedelta(minutes=10)))
+        db_session.add(_config(6, now + timedelta(minutes=20)))
+        db_session.commit()
+
+        scheduler.schedule_jobs()
+
+        scheduled_users = [
+            call.args[2] for call in scheduler.scheduler.enqueue_at.call_args_list
+        ]
+        assert scheduled_users == [2, 4]
+        # The wait only considers this instance's users
+        assert 1190 <= scheduler.seconds_until_next_due(max_wait=3600) <= 1200
+
+    def test_no_shards_held_schedules_nothing(self, db_session, scheduler):
+        lease_manager = Mock(shard_count=2, owned_shards=[])
+        lease_manager.rebalance.return_value = []
+        scheduler.lease_manager = lease_manager
+        db_session.add(_config(1, None))
+        db_session.commit()
+
+        scheduler.schedule_jobs()
+
+        scheduler.scheduler.enqueue_at.assert_not_called()
+        assert scheduler.seconds_until_next_due(max_wait=30) == 30
@@ -0,0 +1,71 @@
+"""
+Tests for exchange_rate_service module
+"""
+
+from datetime import date
+from unittest.mock import patch
+
+from app.models import ExchangeRate
+from app.services.exchange_rate_service import (
+    load_exchange_rates,
+    save_exchange_rates,
+)
+
+
+class TestExchangeRateService:
+    """Test cases for exchange rate service functions"""
+
+    def test_save_and_load_range(self, app, db_session):
+        """Test that saved rates are loaded back by pair and date range"""
+        with app.app_context():
+            saved = save_exchange_rates(
+                "USD",
+                "INR",
+                {date(2025, 3, 1): 86.9, date(2025, 3, 2): 87.1},
+                source="exchangerate-api",
+                db_session=db_session,
+            )
+            save_exchange_rates(
+                "EUR", "INR", {date(2025, 3, 1): 90.0}, db_session=db_session
+            )
+            rates = load_exchange_rates(
+                "USD", "INR", date(2025, 3, 1), date(2025, 3, 31), db_session
+            )
+
+        assert saved == 2
+        assert {day: entry["rate"] for day, entry in rates.items()} == {
+            date(2025, 3, 1): 86.9,
+            date(2025, 3, 2): 87.1,
+        }
+        assert rates[date(2025, 3, 1)]["fetched_at"] is not None
+
+    def test_save_replaces_rate_of_existing_date(self, app, db_session):
+        """Test that a revalidated rate replaces the stored one"""
+        with app.app_context():
+            save_exchange_rates(
+                "USD", "INR", {date(2025, 3, 1): 86.0}, db_session=db_session
+            )
+            save_exchange_rates(
+                "USD", "INR", {date(2025, 3, 1): 86.5}, db_session=db_session
+            )
+
+            rows = db_session.query(ExchangeRate).all()
+
+        assert len(rows) == 1
+        assert rows[0].rate == 86.5
+
+    def test_save_nothing(self, app, db_session):
+        """Test saving an empty set of rates"""
+        with app.app_context():
+            assert save_exchange_rates("USD", "INR", {}, db_session=db_session) == 0
+
+    def test_load_database_error(self, app):
+        """Test loading rates with a database error"""
+        with app.app_context():
+            with patch("app.services.exchange_rate_service.db.session") as mock_session:
+                mock_session.query.side_effect = Exception("Database error")
+                rates = load_exchange_rates(
+                    "USD", "INR", date(2025, 3, 1), date(2025, 3, 2)
+                )
+
+        assert rates is None
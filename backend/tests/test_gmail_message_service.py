@@ -11,7 +11,9 @@ from sqlalchemy.exc import IntegrityError
 from app.models import ProcessedGmailMessage
 from app.services.gmail_message_service import (
     clear_processed_gmail_msgids,
+    find_processed_gmail_msgids,
     get_processed_message_count,
+    insert_processed_gmail_msgids,
     is_gmail_message_processed,
     load_processed_gmail_msgids,
     save_processed_gmail_msgid,
@@ -156,14 +158,113 @@ class TestGmailMessageService:
 
         with app.app_context():
             with patch(
-                "app.services.gmail_message_service.load_processed_gmail_msgids"
-            ) as mock_load:
-                mock_load.side_effect = Exception("Database error")
+                "app.services.gmail_message_service._insert_ignoring_duplicates"
+            ) as mock_insert:
+                mock_insert.side_effect = Exception("Database error")
 
                 result = save_processed_gmail_msgids(user.id, msgids)
 
         assert result == 0
 
+    def test_insert_processed_gmail_msgids_skips_duplicates(
+        self, app, db_session, user
+    ):
+        """Test batch insert ignores existing and repeated message IDs"""
+        existing_msg = ProcessedGmailMessage(
+            user_id=user.id,
+            gmail_message_id="msg_existing",
+            processed_at=datetime.now(timezone.utc),
+        )
+        db_session.add(existing_msg)
+        db_session.commit()
+
+        with app.app_context():
+            result = insert_processed_gmail_msgids(
+                user.id,
+                ["msg_existing", "msg_new1", "msg_new2", "msg_new1"],
+                db_session,
+            )
+
+        assert result == 2
+        saved = {
+            msg.gmail_message_id
+            for msg in db_session.query(ProcessedGmailMessage).filter_by(
+                user_id=user.id
+            )
+        }
+        assert saved == {"msg_existing", "msg_new1", "msg_new2"}
+
+    def test_insert_processed_gmail_msgids_empty(self, app, db_session, user):
+        """Test batch insert with nothing to save"""
+        with app.app_context():
+            assert insert_processed_gmail_msgids(user.id, [], db_session) == 0
+
+    def test_insert_processed_gmail_msgids_database_error(self, app, user):
+        """Test batch insert reports failure as None"""
+        with app.app_context():
+            with patch(
+                "app.services.gmail_message_service._insert_ignoring_duplicates"
+            ) as mock_insert:
+                mock_insert.side_effect = Exception("Database error")
+
+                result = insert_processed_gmail_msgids(user.id, ["msg_error"])
+
+        assert result is None
+
+    def test_save_processed_gmail_msgids_does_not_load_history(
+        self, app, db_session, user
+    ):
+        """Test batch save skips duplicates without loading every saved ID"""
+        with app.app_context():
+            save_processed_gmail_msgids(user.id, {"msg_old"}, db_session)
+            with patch(
+                "app.services.gmail_message_service.load_processed_gmail_msgids"
+            ) as mock_load:
+                result = save_processed_gmail_msgids(
+                    user.id, {"msg_old", "msg_new"}, db_session
+                )
+
+        assert result == 1
+        mock_load.assert_not_called()
+
+    def test_find_processed_gmail_msgids_returns_processed_subset(
+        self, app, db_session, user
+    ):
+        """Test existence check only reports candidates that were processed"""
+        with app.app_context():
+            insert_processed_gmail_msgids(
+                user.id, [f"msg_{i}" for i in range(1200)], db_session
+            )
+            candidates = ["msg_5", "msg_1100", "msg_unseen", "msg_5"]
+
+            with patch(
+                "app.services.gmail_message_service.EXISTENCE_CHECK_CHUNK_SIZE", 2
+            ):
+                result = find_processed_gmail_msgids(user.id, candidates, db_session)
+
+        assert result == {"msg_5", "msg_1100"}
+
+    def test_find_processed_gmail_msgids_is_per_user(self, app, db_session, user):
+        """Test existence check ignores other users' message IDs"""
+        with app.app_context():
+            insert_processed_gmail_msgids(user.id, ["msg_shared"], db_session)
+
+            result = find_processed_gmail_msgids(
+                user.id + 1, ["msg_shared"], db_session
+            )
+
+        assert result == set()
+
+    def test_find_processed_gmail_msgids_database_error(self, app, user):
+        """Test existence check reports failure as None"""
+        with app.app_context():
+            with patch("app.services.gmail_message_service.db.session") as mock_session:
+                mock_session.query.side_effect = Exception("Database error")
+
+                result = find_processed_gmail_msgids(user.id, ["msg_1"])
+
+        assert result is None
+
     def test_is_gmail_message_processed_true(self, app, db_session, user):
         """Test checking if message is processed (exists)"""
         # Create existing message
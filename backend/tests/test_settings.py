@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from cryptography.fernet import Fernet
 
 from app.extensions import db
@@ -226,6 +228,29 @@ class TestGlobalSettings:
         data = response.get_json()
         assert "updated successfully" in data["message"]
 
+    def test_update_gemini_token_invalidates_cached_client(
+        self, authenticated_client, app
+    ):
+        """Updating the Gemini token drops the cached key and client."""
+        with app.app_context():
+            db.session.add(
+                GlobalConfiguration(
+                    key="GEMINI_API_TOKEN", value="old_token", is_encrypted=False
+                )
+            )
+            db.session.commit()
+
+        with patch(
+            "shared.imports.llm_providers.invalidate_config_key"
+        ) as mock_invalidate:
+            response = authenticated_client.put(
+                "/api/v1/settings/global/GEMINI_API_TOKEN",
+                json={"value": "AIzaSyNewGeminiToken987654321", "is_encrypted": False},
+            )
+
+        assert response.status_code == 200
+        mock_invalidate.assert_called_once_with("GEMINI_API_TOKEN")
+
     def test_update_nonexistent_config(self, authenticated_client):
         """Test updating a non-existent configuration."""
         response = authenticated_client.put(
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Thread-based concurrent worker for email automation jobs.
+
+Email jobs spend most of their time waiting on IMAP and Gemini network
+I/O, so one process can overlap many of them. ConcurrentWorker runs a
+fixed number of slots in threads of one process. Each slot is a
+SlotWorker, an RQ SimpleWorker that executes jobs in its own thread and
+is registered with RQ like any other worker, so the registries,
+heartbeats and failure handling of the email queues are unchanged.
+
+Jobs for the same user never run at the same time in one process: each
+slot takes a per-user lock around the job. Gemini requests are still
+bounded process-wide by the LLM concurrency limit in email_parser.
+
+On SIGINT/SIGTERM the slots stop taking new jobs and the in-flight jobs
+finish before the process exits (warm shutdown); a second signal exits
+immediately.
+"""
+
+import logging
+import os
+import signal
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from rq import SimpleWorker
+from rq.timeouts import TimerDeathPenalty
+from rq.worker import StopRequested
+
+from banktransactions.automation.priority_worker import WeightedDequeueMixin
+
+logger = logging.getLogger(__name__)
+
+# Number of jobs one process runs at the same time
+DEFAULT_CONCURRENCY = 8
+
+# Seconds an idle slot blocks on the queue before checking for a stop request
+SLOT_POLL_SECONDS = 5
+
+
+def get_job_user_id(job) -> Optional[int]:
+    """
+    Return the user an email job belongs to.
+
+    Every email job function takes the user ID as its first argument.
+
+    Args:
+        job: The RQ job
+
+    Returns:
+        Optional[int]: The user ID, or None if the job has no user
+    """
+    if job.args:
+        return job.args[0]
+    return job.kwargs.get("user_id")
+
+
+class UserJobLocks:
+    """Per-user locks so one process never runs two jobs for a user at once."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # user_id -> [lock, number of slots holding or waiting for it]
+        self._locks: Dict[int, list] = {}
+
+    @contextmanager
+    def hold(self, user_id: Optional[int]):
+        """Hold the user's lock for the duration of the block."""
+        if user_id is None:
+            yield
+            return
+
+        with self._lock:
+            entry = self._locks.setdefault(user_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            if not entry[0].acquire(blocking=False):
+                logger.info(f"Waiting for another job of user {user_id} to finish")
+                entry[0].acquire()
+            try:
+                yield
+            finally:
+                entry[0].release()
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[user_id]
+
+    def active_users(self) -> List[int]:
+        """Return the users with a job running or waiting in this process."""
+        with self._lock:
+            return list(self._locks)
+
+
+class SlotWorker(WeightedDequeueMixin, SimpleWorker):
+    """
+    SimpleWorker that runs as one slot of a ConcurrentWorker.
+
+    Signals are handled by the ConcurrentWorker in the main thread, and
+    job timeouts use timers because SIGALRM only reaches the main thread.
+    Like the other email workers it dequeues by queue weight.
+    """
+
+    death_penalty_class = TimerDeathPenalty
+
+    def __init__(
+        self,
+        *args,
+        user_locks: Optional[UserJobLocks] = None,
+        poll_interval: int = SLOT_POLL_SECONDS,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.user_locks = user_locks or UserJobLocks()
+        self.poll_interval = poll_interval
+
+    def _install_signal_handlers(self):
+        """Signals are handled by the ConcurrentWorker in the main thread."""
+        logger.debug(f"Slot {self.name} leaves signal handling to the main thread")
+
+    def request_graceful_stop(self):
+        """Stop taking new jobs; a job in progress is finished first."""
+        self._stop_requested = True
+
+    def dequeue_job_and_maintain_ttl(self, timeout, max_idle_time=None):
+        """Block on the queues in short polls so stop requests are noticed."""
+        if timeout is None:
+            # Burst mode returns as soon as the queues are empty
+            return super().dequeue_job_and_maintain_ttl(timeout, max_idle_time)
+
+        while not self._stop_requested:
+            result = super().dequeue_job_and_maintain_ttl(
+                self.poll_interval, max_idle_time=self.poll_interval
+            )
+            if result is not None:
+                return result
+        raise StopRequested()
+
+    def execute_job(self, job, queue):
+        """Run the job while holding its user's lock."""
+        with self.user_locks.hold(get_job_user_id(job)):
+            super().execute_job(job, queue)
+
+
+class ConcurrentWorker:
+    """Runs several SlotWorkers in threads of one process."""
+
+    def __init__(
+        self,
+        queues,
+        connection,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        name: Optional[str] = None,
+        poll_interval: int = SLOT_POLL_SECONDS,
+        worker_class=SlotWorker,
+    ):
+        """
+        Initialize the worker.
+
+        Args:
+            queues: Queues every slot listens on
+            connection: Redis connection shared by the slots
+            concurrency: Number of jobs run at the same time
+            name: Worker name; slots are named "<name>.<n>"
+            poll_interval: Seconds an idle slot waits before checking for a
+                           stop request
+            worker_class: Slot worker class
+        """
+        self.name = name or f"email_worker_{os.getpid()}"
+        self.concurrency = max(1, concurrency)
+        self.user_locks = UserJobLocks()
+        self.slots = [
+            worker_class(
+                queues,
+                connection=connection,
+                name=f"{self.name}.{n}",
+                user_locks=self.user_locks,
+                poll_interval=poll_interval,
+            )
+            for n in range(1, self.concurrency + 1)
+        ]
+        self._stop_requested = False
+        logger.debug(
+            f"ConcurrentWorker {self.name} created with {self.concurrency} slots"
+        )
+
+    def request_stop(self, signum=None, frame=None):
+        """Drain in-flight jobs and stop; a second request exits immediately."""
+        if self._stop_requested:
+            logger.warning("Second stop request, exiting without draining")
+            raise SystemExit(1)
+
+        self._stop_requested = True
+        logger.info(
+            f"Warm shutdown requested, draining jobs for "
+            f"{len(self.user_locks.active_users())} users. "
+            "Press Ctrl+C again to exit immediately."
+        )
+        for slot in self.slots:
+            slot.request_graceful_stop()
+
+    def work(
+        self,
+        burst: bool = False,
+        logging_level: str = "INFO",
+        max_jobs: Optional[int] = None,
+    ) -> bool:
+        """
+        Run the slots until they stop.
+
+        Args:
+            burst: Stop each slot once the queues are empty
+            logging_level: RQ logging level for the slots
+            max_jobs: Jobs each slot runs before it stops
+
+        Returns:
+            bool: True if any slot processed a job
+        """
+        results = [False] * len(self.slots)
+
+        def run_slot(index, slot):
+            try:
+                results[index] = slot.work(
+                    burst=burst, logging_level=logging_level, max_jobs=max_jobs
+                )
+            except Exception as e:
+                logger.error(f"Slot {slot.name} stopped with an error: {e}")
+
+        previous_handlers = self._install_signal_handlers()
+        threads = [
+            threading.Thread(
+                target=run_slot, args=(index, slot), name=slot.name, daemon=True
+            )
+            for index, slot in enumerate(self.slots)
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            logger.info(f"ConcurrentWorker {self.name} running {len(threads)} slots")
+            # Join in short steps so the main thread keeps handling signals
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=0.5)
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+        logger.info(f"ConcurrentWorker {self.name} stopped")
+        return any(results)
+
+    def _install_signal_handlers(self) -> Dict[int, object]:
+        """Route SIGINT/SIGTERM to request_stop; returns the old handlers."""
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+
+        previous = {}
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            previous[signum] = signal.getsignal(signum)
+            signal.signal(signum, self.request_stop)
+        return previous
@@ -26,28 +26,95 @@ if str(project_root) not in sys.path:
 import json
 import logging
 from datetime import datetime, timezone
-from typing import Dict
+from typing import Dict, List, Optional
 
 from rq import get_current_job
 
+from banktransactions.automation.job_utils import (
+    JobProgress,
+    hold_user_job_claim,
+    hold_user_run_lock,
+    record_arrivals,
+)
+from banktransactions.core.processed_ids_db import ProcessedIdBuffer
 from shared.imports import (
     EmailConfiguration,
+    MappingSnapshot,
+    create_transaction_submitter,
     database_session,
     decrypt_value_standalone,
+    extraction_cache,
+    find_processed_gmail_msgids,
     get_bank_emails,
-    load_processed_gmail_msgids,
-    save_processed_gmail_msgid,
+    get_transaction_submit_mode,
+    template_extractor,
 )
 
 logger = logging.getLogger(__name__)
 
 
+def get_config_bank_senders(config) -> List[str]:
+    """
+    Return the bank sender addresses to search for a configuration.
+
+    Senders come from the "from" field of the configured sample emails,
+    falling back to the default Axis Bank alerts address.
+    """
+    bank_emails = ["alerts@axisbank.com"]  # Default
+    if not config.sample_emails:
+        return bank_emails
+    try:
+        sample_emails = json.loads(config.sample_emails)
+    except json.JSONDecodeError:
+        return bank_emails
+
+    bank_emails_from_samples = [
+        sample["from"]
+        for sample in sample_emails
+        if isinstance(sample, dict) and "from" in sample
+    ]
+    if bank_emails_from_samples:
+        bank_emails = list(set(bank_emails_from_samples))  # Remove duplicates
+        logger.debug(f"Using bank emails from samples: {bank_emails}")
+    return bank_emails
+
+
 def process_user_emails_standalone(user_id: int) -> Dict:
     """
     Standalone function to process emails for a user using the proven working logic from main.py.
     This creates its own database session without Flask app context.
+
+    When run as an RQ job, the user's job claim is held for the duration of
+    the run and released when it finishes or fails, and the run waits for
+    any other job of the user (e.g. a push job) to finish first.
     """
+    with hold_user_job_claim(user_id), hold_user_run_lock(user_id):
+        return _process_user_emails(user_id)
+
+
+def process_user_messages_standalone(user_id: int, message_uids: List[int]) -> Dict:
+    """
+    Process specific INBOX messages for a user, e.g. ones the IDLE listener
+    saw arrive.
+
+    Only the given UIDs are fetched; the polling schedule and arrival
+    statistics are left to the periodic runs, which remain the safety net
+    for anything a push missed. Already processed messages are skipped as
+    in a normal run. The job claim belongs to the scheduled run, so push
+    jobs only take the run lock, waiting for a running poll to finish.
+    """
+    with hold_user_run_lock(user_id):
+        return _process_user_emails(user_id, message_uids=message_uids)
+
+
+def _process_user_emails(
+    user_id: int, message_uids: Optional[List[int]] = None
+) -> Dict:
+    """Process new bank emails for a user; see process_user_emails_standalone."""
     logger.debug(f"Starting email processing for user_id: {user_id}")
+    # Counts and stage timings are saved to the job's meta for status polling
+    progress = JobProgress()
+    cache_stats_at_start = dict(extraction_cache.stats)
     try:
         # Use database session context manager for automatic cleanup
         logger.debug("Setting up database connection")
@@ -61,6 +128,7 @@ def process_user_emails_standalone(user_id: int) -> Dict:
             )
 
             # Get user's email configuration
+            progress.update("loading_configuration")
             logger.debug(f"Fetching email configuration for user_id: {user_id}")
             config = (
                 db_session.query(EmailConfiguration).filter_by(user_id=user_id).first()
@@ -69,6 +137,7 @@ def process_user_emails_standalone(user_id: int) -> Dict:
                 logger.debug(
                     f"Email configuration not found or disabled for user_id: {user_id}"
                 )
+                progress.finish("skipped")
                 return {
                     "status": "skipped",
                     "reason": "configuration_not_found_or_disabled",
@@ -84,35 +153,27 @@ def process_user_emails_standalone(user_id: int) -> Dict:
             decrypted_password = decrypt_value_standalone(config.app_password)
             if not decrypted_password:
                 logger.error("Failed to decrypt app password")
+                progress.finish("failed", error="Failed to decrypt app password")
                 return {
                     "status": "error",
                     "error": "Failed to decrypt app password",
                 }
             logger.debug("App password decrypted successfully")
 
-            # Load processed Gmail message IDs (using the database implementation)
-            logger.debug("Loading processed Gmail message IDs from database")
-            processed_gmail_msgids = load_processed_gmail_msgids(user_id=user_id)
-            initial_msgid_count = len(processed_gmail_msgids)
-            logger.debug(
-                f"Loaded {initial_msgid_count} previously processed Gmail message IDs for user {user_id}"
-            )
-
-            # Get bank email addresses from sample emails or use default
-            bank_emails = ["alerts@axisbank.com"]  # Default
+            bank_emails = get_config_bank_senders(config)
             if config.sample_emails:
                 try:
                     sample_emails = json.loads(config.sample_emails)
-                    # Extract bank emails from sample emails if available
-                    bank_emails_from_samples = []
-                    for sample in sample_emails:
-                        if isinstance(sample, dict) and "from" in sample:
-                            bank_emails_from_samples.append(sample["from"])
-                    if bank_emails_from_samples:
-                        bank_emails = list(
-                            set(bank_emails_from_samples)
-                        )  # Remove duplicates
-                        logger.debug(f"Using bank emails from samples: {bank_emails}")
+                    # Samples seed the user's template fast path so known
+                    # layouts skip the LLM; unlabelled samples are labelled
+                    # once through the cached LLM extraction
+                    learned = template_extractor.learn_from_samples(
+                        user_id, sample_emails, bank_emails
+                    )
+                    if learned:
+                        logger.debug(
+                            f"Learned {learned} extraction templates from samples"
+                        )
                 except json.JSONDecodeError:
                     logger.warning(
                         f"Failed to parse sample emails for user {config.user_id}"
@@ -123,45 +184,68 @@ def process_user_emails_standalone(user_id: int) -> Dict:
 
             logger.debug(f"Processing emails from bank addresses: {bank_emails}")
 
-            # Create a callback function to save individual Gmail message IDs to database
-            def save_msgid_to_db(gmail_message_id):
-                """Callback function to save individual Gmail message ID to database"""
-                try:
-                    result = save_processed_gmail_msgid(
-                        gmail_message_id, user_id=user_id
-                    )
-                    if result:
-                        logger.debug(
-                            f"Saved Gmail Message ID {gmail_message_id} to database for user {user_id}"
-                        )
-                    else:
-                        logger.warning(
-                            f"Failed to save Gmail Message ID {gmail_message_id} to database for user {user_id}"
-                        )
-                    return result
-                except Exception as e:
-                    logger.error(
-                        f"Error saving Gmail Message ID {gmail_message_id} to database for user {user_id}: {e}"
-                    )
-                    return False
+            # Processed IDs are buffered and written in one batch insert per
+            # posted batch, so a crash loses at most one batch of progress.
+            # Only the fetched candidates are checked against the database
+            # instead of loading every ID the user has ever processed.
+            processed_id_buffer = ProcessedIdBuffer(user_id, db_session=db_session)
+
+            # In direct mode transactions and mappings go through the shared
+            # services with this session instead of HTTP calls to the API
+            submit_mode = get_transaction_submit_mode()
+            logger.debug(f"Transaction submit mode: {submit_mode}")
+            mappings = None
+            if submit_mode == "direct":
+                mappings = MappingSnapshot.load_from_database(db_session, user_id)
 
             # Use the proven working email processing logic from main.py with database callback
-            logger.debug("Calling get_bank_emails function with database callback")
-            updated_msgids, newly_processed_count = get_bank_emails(
-                username=config.email_address,
-                password=decrypted_password,
-                bank_email_list=bank_emails,
-                processed_gmail_msgids=processed_gmail_msgids,
-                save_msgid_callback=save_msgid_to_db,
-            )
+            logger.debug("Calling get_bank_emails function with buffered ID saves")
+            with create_transaction_submitter(
+                db_session=db_session, user_id=user_id
+            ) as transaction_submitter:
+                updated_msgids, newly_processed_count = get_bank_emails(
+                    username=config.email_address,
+                    password=decrypted_password,
+                    bank_email_list=bank_emails,
+                    save_msgid_callback=processed_id_buffer.add,
+                    mappings=mappings,
+                    transaction_submitter=transaction_submitter,
+                    checkpoint_callback=processed_id_buffer.flush,
+                    processed_id_lookup=lambda candidate_ids: find_processed_gmail_msgids(
+                        user_id, candidate_ids, db_session
+                    ),
+                    message_uids=message_uids,
+                    progress_callback=progress.update,
+                    user_id=user_id,
+                )
+            progress.update("saving")
+            if not processed_id_buffer.flush():
+                logger.warning(
+                    f"{processed_id_buffer.pending} processed Gmail Message IDs "
+                    f"could not be saved for user {user_id}"
+                )
 
             logger.debug(
                 f"Email processing completed: {newly_processed_count} new transactions processed"
             )
+            # The cache counters are process-wide; report this job's share.
+            # Jobs running concurrently in the same worker are included too.
+            cache_hits = extraction_cache.stats["hits"] - cache_stats_at_start["hits"]
+            cache_misses = (
+                extraction_cache.stats["misses"] - cache_stats_at_start["misses"]
+            )
+            logger.info(
+                f"LLM extraction cache since job start: {cache_hits} hits, "
+                f"{cache_misses} misses"
+            )
 
-            # Update last check time
-            logger.debug("Updating last check time in configuration")
-            config.last_check_time = datetime.now(timezone.utc)
+            if message_uids is None:
+                # Update arrival statistics and last check time
+                logger.debug("Updating last check time in configuration")
+                now = datetime.now(timezone.utc)
+                interval = record_arrivals(config, newly_processed_count, now)
+                config.last_check_time = now
+                config.next_run_at = now + interval
             # Note: db_session.commit() is handled automatically by the context manager
             logger.debug("Configuration updated and will be committed automatically")
 
@@ -170,10 +254,14 @@ def process_user_emails_standalone(user_id: int) -> Dict:
                 "processed_count": newly_processed_count,
                 "errors": [],
             }
+            result.update(
+                progress.finish("completed", processed_count=newly_processed_count)
+            )
             logger.debug(f"Email processing completed successfully: {result}")
             return result
 
     except Exception as e:
         logger.error(f"Error in process_user_emails_standalone: {str(e)}")
         logger.debug(f"Exception details: {type(e).__name__}: {str(e)}")
+        progress.finish("failed", error=str(e))
         return {"status": "error", "error": str(e)}
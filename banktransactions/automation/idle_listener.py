@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+IMAP IDLE listener for near-real-time email imports.
+
+Accounts with the "push" polling interval keep one IMAP connection open in
+IDLE mode. All connections are multiplexed with asyncio in a single process.
+When the server reports new mail, the listener searches for new messages
+from the account's bank senders and enqueues a job that processes only
+those messages (process_user_messages_standalone). IDLE is renewed on the
+same connection, so a watched account costs one login per connection
+rather than one per poll. A daily poll remains as a safety net.
+"""
+
+import asyncio
+import inspect
+import logging
+import re
+import ssl
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Union
+
+from banktransactions.core.imap_client import build_sender_search_criteria
+
+logger = logging.getLogger(__name__)
+
+# Polling interval that opts an account into the IDLE listener
+PUSH_POLLING = "push"
+
+# RFC 2177: clients should re-issue IDLE at least every 29 minutes
+IDLE_RENEW_SECONDS = 25 * 60
+
+# How often the set of watched accounts is reloaded from the database
+CONFIG_REFRESH_SECONDS = 60
+
+# Reconnect delays after a connection fails, doubling up to the maximum
+RECONNECT_MIN_SECONDS = 5
+RECONNECT_MAX_SECONDS = 5 * 60
+
+# Seconds to wait for a reply to any command other than IDLE
+COMMAND_TIMEOUT_SECONDS = 60
+
+_EXISTS_RE = re.compile(r"^\* \d+ EXISTS", re.IGNORECASE)
+_RESPONSE_CODE_RE = re.compile(r"\[(UIDNEXT|UIDVALIDITY) (\d+)\]", re.IGNORECASE)
+_LITERAL_RE = re.compile(r"\{(\d+)\}$")
+
+
+class IMAPCommandError(Exception):
+    """Raised when the server rejects a command or the protocol breaks down."""
+
+
+def _quote(value: str) -> str:
+    """Quote a string argument for an IMAP command."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class AsyncIMAPConnection:
+    """
+    Minimal asyncio IMAP4rev1 client.
+
+    Supports only the commands the listener needs: LOGIN, SELECT,
+    UID SEARCH, IDLE and LOGOUT.
+    """
+
+    def __init__(self, host: str, port: int = 993, use_ssl: bool = True):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._tag_counter = 0
+
+    async def connect(self):
+        """Open the connection and read the server greeting."""
+        ssl_context = ssl.create_default_context() if self.use_ssl else None
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=ssl_context),
+            COMMAND_TIMEOUT_SECONDS,
+        )
+        greeting = await self._read_line(COMMAND_TIMEOUT_SECONDS)
+        if not greeting.upper().startswith("* OK"):
+            raise IMAPCommandError(f"Unexpected greeting: {greeting}")
+        logger.debug(f"Connected to {self.host}:{self.port}")
+
+    async def close(self):
+        """Close the connection without logging out."""
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except Exception:
+                pass
+            self._writer = None
+
+    async def _read_line(self, timeout: Optional[float]) -> str:
+        """Read one response line, including any literals it announces."""
+        raw = await asyncio.wait_for(self._reader.readline(), timeout)
+        if not raw:
+            raise ConnectionError("IMAP connection closed by server")
+        line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+        literal = _LITERAL_RE.search(line)
+        while literal:
+            data = await asyncio.wait_for(
+                self._reader.readexactly(int(literal.group(1))), timeout
+            )
+            rest = await asyncio.wait_for(self._reader.readline(), timeout)
+            line = (
+                line
+                + data.decode("utf-8", errors="replace")
+                + rest.decode("utf-8", errors="replace").rstrip("\r\n")
+            )
+            literal = _LITERAL_RE.search(line)
+        return line
+
+    def _next_tag(self) -> str:
+        self._tag_counter += 1
+        return f"A{self._tag_counter:04d}"
+
+    async def _send(self, line: str):
+        self._writer.write(line.encode() + b"\r\n")
+        await self._writer.drain()
+
+    async def _command(self, command: str) -> List[str]:
+        """
+        Run a command and return its untagged responses.
+
+        Raises:
+            IMAPCommandError: If the server does not answer OK
+        """
+        tag = self._next_tag()
+        await self._send(f"{tag} {command}")
+        untagged = []
+        while True:
+            line = await self._read_line(COMMAND_TIMEOUT_SECONDS)
+            if line.startswith(f"{tag} "):
+                status = line[len(tag) + 1 :]
+                if not status.upper().startswith("OK"):
+                    raise IMAPCommandError(f"{command.split()[0]} failed: {status}")
+                return untagged
+            untagged.append(line)
+
+    async def login(self, username: str, password: str):
+        await self._command(f"LOGIN {_quote(username)} {_quote(password)}")
+
+    async def select(self, mailbox: str = "INBOX") -> Dict[str, int]:
+        """
+        Select a mailbox.
+
+        Returns:
+            dict: UIDNEXT and UIDVALIDITY values reported by the server
+        """
+        info = {}
+        for line in await self._command(f"SELECT {_quote(mailbox)}"):
+            for name, value in _RESPONSE_CODE_RE.findall(line):
+                info[name.lower()] = int(value)
+        return info
+
+    async def uid_search(self, criteria: List[str]) -> List[int]:
+        """Run UID SEARCH and return the matching UIDs."""
+        arguments = " ".join(
+            _quote(item) if " " in item or "@" in item else item for item in criteria
+        )
+        uids = []
+        for line in await self._command(f"UID SEARCH {arguments}"):
+            if line.upper().startswith("* SEARCH"):
+                uids.extend(int(uid) for uid in line.split()[2:])
+        return uids
+
+    async def idle(self, timeout: float) -> bool:
+        """
+        Wait in IDLE until the mailbox changes or the timeout passes.
+
+        Returns:
+            bool: True if new messages were reported
+        """
+        tag = self._next_tag()
+        await self._send(f"{tag} IDLE")
+        line = await self._read_line(COMMAND_TIMEOUT_SECONDS)
+        if not line.startswith("+"):
+            raise IMAPCommandError(f"IDLE rejected: {line}")
+
+        changed = False
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            while not changed:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                line = await self._read_line(remaining)
+                changed = bool(_EXISTS_RE.match(line))
+        except asyncio.TimeoutError:
+            pass
+
+        await self._send("DONE")
+        while True:
+            line = await self._read_line(COMMAND_TIMEOUT_SECONDS)
+            if line.startswith(f"{tag} "):
+                break
+            changed = changed or bool(_EXISTS_RE.match(line))
+        return changed
+
+    async def logout(self):
+        try:
+            await self._command("LOGOUT")
+        finally:
+            await self.close()
+
+
+class WatchedMailbox(NamedTuple):
+    """Connection details and bank senders for one watched account."""
+
+    user_id: int
+    host: str
+    port: int
+    username: str
+    password: str
+    senders: tuple
+
+
+NewMessagesCallback = Callable[[int, List[int]], Union[None, Awaitable[None]]]
+
+
+class MailboxWatcher:
+    """Keeps one account in IDLE and reports new bank messages."""
+
+    def __init__(
+        self,
+        mailbox: WatchedMailbox,
+        on_new_messages: NewMessagesCallback,
+        use_ssl: bool = True,
+        idle_timeout: float = IDLE_RENEW_SECONDS,
+    ):
+        self.mailbox = mailbox
+        self.on_new_messages = on_new_messages
+        self.use_ssl = use_ssl
+        self.idle_timeout = idle_timeout
+        # Highest UID already reported, and the UIDVALIDITY it belongs to
+        self.last_uid: Optional[int] = None
+        self.uid_validity: Optional[int] = None
+        self.logins = 0
+
+    async def run(self):
+        """Watch the mailbox until cancelled, reconnecting after failures."""
+        delay = RECONNECT_MIN_SECONDS
+        while True:
+            try:
+                await self._watch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(
+                    f"IDLE connection for user {self.mailbox.user_id} failed: {e}; "
+                    f"reconnecting in {delay}s"
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+            else:
+                delay = RECONNECT_MIN_SECONDS
+
+    async def _watch(self):
+        connection = AsyncIMAPConnection(
+            self.mailbox.host, self.mailbox.port, use_ssl=self.use_ssl
+        )
+        await connection.connect()
+        try:
+            await connection.login(self.mailbox.username, self.mailbox.password)
+            self.logins += 1
+            info = await connection.select("INBOX")
+            uid_validity = info.get("uidvalidity")
+            if self.last_uid is None or uid_validity != self.uid_validity:
+                # Start from the current end of the mailbox; older mail is
+                # left to the periodic poll
+                self.last_uid = info.get("uidnext", 1) - 1
+                self.uid_validity = uid_validity
+            logger.info(f"Watching INBOX for user {self.mailbox.user_id} with IDLE")
+
+            # Mail may have arrived while reconnecting
+            await self._check_new_messages(connection)
+            while True:
+                if await connection.idle(self.idle_timeout):
+                    await self._check_new_messages(connection)
+        finally:
+            await connection.close()
+
+    async def _check_new_messages(self, connection: AsyncIMAPConnection):
+        since = (datetime.now() - timedelta(days=1)).strftime("%d-%b-%Y")
+        criteria = ["UID", f"{self.last_uid + 1}:*"] + build_sender_search_criteria(
+            list(self.mailbox.senders), since
+        )
+        # "n:*" always matches the highest UID, even when it is below n
+        uids = sorted(
+            uid for uid in await connection.uid_search(criteria) if uid > self.last_uid
+        )
+        if not uids:
+            logger.debug(f"No new bank messages for user {self.mailbox.user_id}")
+            return
+
+        logger.info(f"{len(uids)} new bank message(s) for user {self.mailbox.user_id}")
+        result = self.on_new_messages(self.mailbox.user_id, uids)
+        if inspect.isawaitable(result):
+            await result
+        self.last_uid = uids[-1]
+
+
+class IdleListener:
+    """
+    Runs a MailboxWatcher per watched account in one event loop.
+
+    The account list is reloaded every refresh_interval seconds; watchers
+    are started for new accounts, restarted when an account's settings
+    change and stopped when it is no longer watched.
+    """
+
+    def __init__(
+        self,
+        load_mailboxes: Callable[[], List[WatchedMailbox]],
+        on_new_messages: NewMessagesCallback,
+        refresh_interval: float = CONFIG_REFRESH_SECONDS,
+        use_ssl: bool = True,
+        idle_timeout: float = IDLE_RENEW_SECONDS,
+    ):
+        self.load_mailboxes = load_mailboxes
+        self.on_new_messages = on_new_messages
+        self.refresh_interval = refresh_interval
+        self.use_ssl = use_ssl
+        self.idle_timeout = idle_timeout
+        self.watchers: Dict[int, MailboxWatcher] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    async def run(self, stop_event: Optional[asyncio.Event] = None):
+        """Watch accounts until stop_event is set or the task is cancelled."""
+        stop_event = stop_event or asyncio.Event()
+        try:
+            while not stop_event.is_set():
+                try:
+                    mailboxes = await asyncio.to_thread(self.load_mailboxes)
+                    self._reconcile(mailboxes)
+                except Exception as e:
+                    logger.error(f"Error loading watched mailboxes: {e}")
+                try:
+                    await asyncio.wait_for(stop_event.wait(), self.refresh_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self._stop_all()
+
+    def _reconcile(self, mailboxes: List[WatchedMailbox]):
+        wanted = {mailbox.user_id: mailbox for mailbox in mailboxes}
+        for user_id in list(self.watchers):
+            watcher = self.watchers[user_id]
+            if wanted.get(user_id) != watcher.mailbox:
+                logger.info(f"Stopping IDLE watcher for user {user_id}")
+                self._tasks.pop(user_id).cancel()
+                del self.watchers[user_id]
+
+        for user_id, mailbox in wanted.items():
+            if user_id in self.watchers:
+                continue
+            logger.info(f"Starting IDLE watcher for user {user_id}")
+            watcher = MailboxWatcher(
+                mailbox,
+                self.on_new_messages,
+                use_ssl=self.use_ssl,
+                idle_timeout=self.idle_timeout,
+            )
+            self.watchers[user_id] = watcher
+            self._tasks[user_id] = asyncio.create_task(watcher.run())
+        logger.debug(f"Watching {len(self.watchers)} mailbox(es)")
+
+    async def _stop_all(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self.watchers.clear()
+
+
+def load_push_mailboxes(db_session) -> List[WatchedMailbox]:
+    """
+    Load the enabled accounts that opted into push imports.
+
+    Args:
+        db_session: Database session
+
+    Returns:
+        List[WatchedMailbox]: Accounts to watch; ones whose password cannot
+        be decrypted are skipped
+    """
+    from banktransactions.automation.email_processor import get_config_bank_senders
+    from shared.imports import EmailConfiguration, decrypt_value_standalone
+
+    try:
+        configs = (
+            db_session.query(EmailConfiguration)
+            .filter_by(is_enabled=True, polling_interval=PUSH_POLLING)
+            .all()
+        )
+        mailboxes = []
+        for config in configs:
+            password = decrypt_value_standalone(config.app_password)
+            if not password:
+                logger.error(
+                    f"Failed to decrypt app password for user {config.user_id}"
+                )
+                continue
+            mailboxes.append(
+                WatchedMailbox(
+                    user_id=config.user_id,
+                    host=config.imap_server or "imap.gmail.com",
+                    port=config.imap_port or 993,
+                    username=config.email_address,
+                    password=password,
+                    senders=tuple(sorted(get_config_bank_senders(config))),
+                )
+            )
+        return mailboxes
+    finally:
+        # End the read transaction so the next refresh sees new rows
+        db_session.rollback()
+
+
+def enqueue_message_job(queue, user_id: int, message_uids: List[int]):
+    """
+    Enqueue a job that processes only the given messages.
+
+    Messages that were already processed, e.g. by the safety-net poll, are
+    skipped by the job itself through the processed Gmail ID history.
+
+    Args:
+        queue: RQ queue for email processing jobs
+        user_id (int): Account owner
+        message_uids (List[int]): New INBOX UIDs
+
+    Returns:
+        Job: The enqueued RQ job
+    """
+    from banktransactions.automation.email_processor import (
+        process_user_messages_standalone,
+    )
+
+    job_id = f"email_push_user_{user_id}_{message_uids[0]}_{message_uids[-1]}"
+    job = queue.enqueue(
+        process_user_messages_standalone,
+        user_id,
+        message_uids,
+        job_id=job_id,
+    )
+    logger.info(f"Enqueued push job {job_id} for {len(message_uids)} message(s)")
+    return job
@@ -5,15 +5,21 @@ Provides deduplication and status checking for email processing jobs.
 """
 
 import logging
+import math
 import os
 import sys
-from datetime import datetime, timezone
-from typing import Dict, Optional
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
 
-from rq import Queue, Worker
+from rq import Queue, Worker, get_current_job
 from rq.job import Job
 from rq.registry import FailedJobRegistry, FinishedJobRegistry, ScheduledJobRegistry
 
+from banktransactions.automation.scheduler_leases import SCHEDULER_INSTANCES_KEY
+
 logger = logging.getLogger(__name__)
 
 # Add the project root to the Python path
@@ -22,6 +28,99 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
     logger.debug(f"Added project root to sys.path: {project_root}")
 
+# Manual triggers go to the high priority queue; scheduled and push jobs use
+# the low priority queue. Workers listen on both and pick the high priority
+# queue first on EMAIL_HIGH_PRIORITY_WEIGHT of every weight + 1 dequeues, so
+# a backlog of background jobs cannot delay a user waiting on a trigger and
+# manual triggers cannot starve background polling either.
+HIGH_PRIORITY_QUEUE = "email_processing_high"
+LOW_PRIORITY_QUEUE = "email_processing"
+EMAIL_QUEUES = (HIGH_PRIORITY_QUEUE, LOW_PRIORITY_QUEUE)
+DEFAULT_HIGH_PRIORITY_WEIGHT = 4
+
+# Minimum seconds between progress saves of a job within one stage
+PROGRESS_PUBLISH_INTERVAL = 0.5
+
+# Per-user job claims: one Redis key per user holding the ID of the job that
+# is scheduled, queued or running for them. Claims are taken with SET NX when
+# a job is scheduled and released when it finishes or fails, so pending checks
+# are a single lookup instead of a scan of every RQ registry.
+USER_JOB_CLAIM_PREFIX = "email_processing:user_job:"
+
+# Claim lifetime once a job starts, and the margin added to a scheduled job's
+# delay; a safety net for jobs that die without releasing their claim
+USER_JOB_CLAIM_TTL = 2 * 60 * 60
+
+# Per-user run locks: held by every email job (scheduled, manual or push)
+# while it executes, so two workers never process the same user's mailbox
+# at once. Unlike the claim above, which is taken when a job is scheduled,
+# the lock only covers execution; a job that finds it held waits its turn.
+USER_RUN_LOCK_PREFIX = "email_processing:user_run:"
+USER_RUN_LOCK_POLL_SECONDS = 1.0
+
+# Lock lifetime beyond the job timeout, freeing users of crashed workers
+USER_RUN_LOCK_MARGIN = 60
+DEFAULT_JOB_TIMEOUT = 180
+
+# List pushed to when configurations change so the scheduler wakes up
+# before its next due time. Sharded instances each wait on their own list
+# (prefix + instance ID), so every instance sees every wake-up
+SCHEDULER_WAKEUP_KEY = "email_processing:scheduler:wakeup"
+SCHEDULER_WAKEUP_INSTANCE_PREFIX = "email_processing:scheduler:wakeup:"
+SCHEDULER_WAKEUP_TTL = 10 * 60
+
+# Global admission limit: per-minute counters of jobs released to workers.
+# For each starting minute a cursor remembers the first minute that may still
+# have room, so a backlog is appended to without rescanning full minutes
+ADMISSION_KEY_PREFIX = "email_processing:admission:"
+ADMISSION_CURSOR_PREFIX = "email_processing:admission_cursor:"
+DEFAULT_ADMISSION_RATE = 300
+
+# How far ahead a job may be pushed to find a free minute, and how long the
+# per-minute counters are kept
+MAX_ADMISSION_DELAY_MINUTES = 24 * 60
+ADMISSION_BUCKET_TTL = (MAX_ADMISSION_DELAY_MINUTES + 60) * 60
+
+# Polling interval names accepted in EmailConfiguration.polling_interval.
+# "push" accounts are watched by the IDLE listener; their daily poll is only
+# a safety net for anything a push missed
+POLLING_INTERVALS = {
+    "hourly": timedelta(hours=1),
+    "daily": timedelta(days=1),
+    "push": timedelta(days=1),
+}
+
+# Adaptive polling: the "adaptive" interval tracks an exponentially weighted
+# mean of new transactions per hour and aims for about one new transaction
+# per run, moving by at most a factor of ADAPTIVE_MAX_STEP per run and
+# staying within the configured bounds
+ADAPTIVE_POLLING = "adaptive"
+ADAPTIVE_EWMA_ALPHA = 0.3
+ADAPTIVE_TARGET_PER_RUN = 1.0
+ADAPTIVE_MAX_STEP = 2.0
+DEFAULT_ADAPTIVE_MIN_MINUTES = 15
+DEFAULT_ADAPTIVE_MAX_MINUTES = 24 * 60
+
+# Only touch the claim if it still belongs to the given job
+_RELEASE_CLAIM_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+_REPLACE_CLAIM_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('set', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+return 0
+"""
+_EXTEND_CLAIM_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
 
 def generate_job_id(user_id: int, scheduled_time: datetime) -> str:
     """
@@ -42,6 +141,543 @@ def generate_job_id(user_id: int, scheduled_time: datetime) -> str:
     return job_id
 
 
+def get_queue_weights() -> Dict[str, int]:
+    """
+    Return the dequeue weight of each email queue.
+
+    The high priority weight comes from EMAIL_HIGH_PRIORITY_WEIGHT
+    (default 4); the low priority queue always has weight 1.
+
+    Returns:
+        Dict[str, int]: Weight by queue name
+    """
+    try:
+        high_weight = int(
+            os.getenv("EMAIL_HIGH_PRIORITY_WEIGHT", DEFAULT_HIGH_PRIORITY_WEIGHT)
+        )
+    except ValueError:
+        logger.warning("Invalid EMAIL_HIGH_PRIORITY_WEIGHT, using the default")
+        high_weight = DEFAULT_HIGH_PRIORITY_WEIGHT
+    return {HIGH_PRIORITY_QUEUE: max(1, high_weight), LOW_PRIORITY_QUEUE: 1}
+
+
+def get_polling_interval(polling_interval: Optional[str]) -> timedelta:
+    """
+    Return the time between runs for a configuration's polling interval.
+
+    Args:
+        polling_interval (str): Interval name such as "hourly" or "daily"
+
+    Returns:
+        timedelta: The interval, hourly if the name is not recognized
+    """
+    interval = (polling_interval or "").lower()
+    if interval not in POLLING_INTERVALS:
+        logger.warning(
+            f"Unrecognized polling interval '{interval}', defaulting to hourly"
+        )
+        return POLLING_INTERVALS["hourly"]
+    return POLLING_INTERVALS[interval]
+
+
+def get_adaptive_bounds() -> Tuple[timedelta, timedelta]:
+    """
+    Return the shortest and longest adaptive polling intervals.
+
+    Read from EMAIL_ADAPTIVE_MIN_MINUTES and EMAIL_ADAPTIVE_MAX_MINUTES,
+    defaulting to 15 minutes and one day.
+    """
+    try:
+        minimum = int(
+            os.getenv("EMAIL_ADAPTIVE_MIN_MINUTES", DEFAULT_ADAPTIVE_MIN_MINUTES)
+        )
+        maximum = int(
+            os.getenv("EMAIL_ADAPTIVE_MAX_MINUTES", DEFAULT_ADAPTIVE_MAX_MINUTES)
+        )
+    except ValueError:
+        logger.warning("Invalid adaptive polling bounds, using the defaults")
+        minimum, maximum = DEFAULT_ADAPTIVE_MIN_MINUTES, DEFAULT_ADAPTIVE_MAX_MINUTES
+    minimum = max(1, minimum)
+    return timedelta(minutes=minimum), timedelta(minutes=max(minimum, maximum))
+
+
+def get_config_interval(config) -> timedelta:
+    """
+    Return the time between runs for an email configuration.
+
+    Fixed intervals come from POLLING_INTERVALS; adaptive configurations
+    use their current adaptive interval, starting hourly.
+
+    Args:
+        config: EmailConfiguration
+
+    Returns:
+        timedelta: The interval to wait after a run
+    """
+    if (config.polling_interval or "").lower() != ADAPTIVE_POLLING:
+        return get_polling_interval(config.polling_interval)
+
+    minimum, maximum = get_adaptive_bounds()
+    interval = POLLING_INTERVALS["hourly"]
+    if config.adaptive_interval_seconds:
+        interval = timedelta(seconds=config.adaptive_interval_seconds)
+    return min(max(interval, minimum), maximum)
+
+
+def record_arrivals(config, new_transactions: int, now: datetime) -> timedelta:
+    """
+    Update a configuration's arrival statistics after a processing run.
+
+    Statistics are kept for every configuration so switching to adaptive
+    polling starts from real data. The first run is not counted, since it
+    picks up whatever backlog the mailbox had.
+
+    Args:
+        config: EmailConfiguration; its last_check_time must still be the
+            previous run's
+        new_transactions (int): Transactions found by this run
+        now (datetime): When this run finished (UTC)
+
+    Returns:
+        timedelta: The interval until the next run
+    """
+    if config.last_check_time is None:
+        return get_config_interval(config)
+
+    minimum, maximum = get_adaptive_bounds()
+    previous = config.last_check_time
+    if previous.tzinfo is None:
+        previous = previous.replace(tzinfo=timezone.utc)
+    # Manual triggers shortly after a run must not look like a burst
+    elapsed = max(now - previous, minimum)
+    sample = new_transactions / (elapsed.total_seconds() / 3600)
+
+    if config.arrival_rate_ewma is None:
+        rate = sample
+    else:
+        rate = (
+            ADAPTIVE_EWMA_ALPHA * sample
+            + (1 - ADAPTIVE_EWMA_ALPHA) * config.arrival_rate_ewma
+        )
+    config.arrival_rate_ewma = rate
+
+    current = get_config_interval(config)
+    if (config.polling_interval or "").lower() == ADAPTIVE_POLLING:
+        target = (
+            timedelta(hours=ADAPTIVE_TARGET_PER_RUN / rate) if rate > 0 else maximum
+        )
+        target = min(
+            max(target, current / ADAPTIVE_MAX_STEP), current * ADAPTIVE_MAX_STEP
+        )
+        target = min(max(target, minimum), maximum)
+        config.adaptive_interval_seconds = int(target.total_seconds())
+        logger.debug(
+            f"Adaptive interval for user {config.user_id}: {current} -> {target} "
+            f"({rate:.3f} new transactions/hour)"
+        )
+        return target
+    return current
+
+
+def _scheduler_wakeup_key(instance_id: Optional[str] = None) -> str:
+    """Return the wake-up list of a sharded instance, or the shared one."""
+    if instance_id is None:
+        return SCHEDULER_WAKEUP_KEY
+    return f"{SCHEDULER_WAKEUP_INSTANCE_PREFIX}{instance_id}"
+
+
+def request_scheduler_wakeup(redis_conn) -> bool:
+    """
+    Wake the schedulers so a configuration change is picked up immediately.
+
+    The shared list wakes an unsharded scheduler; every sharded instance
+    with a live heartbeat also gets a wake-up on its own list, so the
+    instance owning the changed user's shard always runs a pass. Wake-ups
+    are coalesced: however many are requested, each scheduler runs one
+    scheduling pass.
+
+    Args:
+        redis_conn: Redis connection
+
+    Returns:
+        bool: True if the wake-up was sent
+    """
+    try:
+        instances = [
+            member.decode() if isinstance(member, bytes) else member
+            for member in redis_conn.zrange(SCHEDULER_INSTANCES_KEY, 0, -1)
+        ]
+        pipe = redis_conn.pipeline()
+        for instance_id in [None] + instances:
+            key = _scheduler_wakeup_key(instance_id)
+            pipe.lpush(key, 1)
+            pipe.ltrim(key, 0, 0)
+            if instance_id is not None:
+                # Instances that died leave their list behind until it expires
+                pipe.expire(key, SCHEDULER_WAKEUP_TTL)
+        pipe.execute()
+        logger.debug(
+            f"Requested scheduler wake-up ({len(instances)} sharded instance(s))"
+        )
+        return True
+    except Exception as e:
+        logger.warning(f"Could not wake the scheduler: {e}")
+        return False
+
+
+def wait_for_scheduler_wakeup(
+    redis_conn, timeout: float, instance_id: Optional[str] = None
+) -> bool:
+    """
+    Block until a wake-up is requested or the timeout passes.
+
+    Args:
+        redis_conn: Redis connection
+        timeout (float): Seconds to wait at most
+        instance_id (str, optional): ID of a sharded scheduler instance;
+                                     None waits on the shared list
+
+    Returns:
+        bool: True if woken by a request, False on timeout
+    """
+    key = _scheduler_wakeup_key(instance_id)
+    # BLPOP treats 0 as "wait forever"
+    result = redis_conn.blpop([key], timeout=max(1, math.ceil(timeout)))
+    if result:
+        redis_conn.delete(key)
+    return bool(result)
+
+
+def get_user_phase(user_id: int) -> float:
+    """
+    Return a stable per-user fraction in [0, 1).
+
+    Used to give every user the same offset within a spread window on
+    every run, so catch-up jobs do not all start at once.
+    """
+    return zlib.crc32(f"email_user:{user_id}".encode()) / 2**32
+
+
+def get_admission_rate() -> int:
+    """
+    Return how many jobs may be released per minute (0 means unlimited).
+
+    Read from EMAIL_JOB_ADMISSION_RATE; it must stay above the fleet's
+    steady demand (users / polling interval) or the backlog keeps growing.
+    """
+    try:
+        return max(
+            0, int(os.getenv("EMAIL_JOB_ADMISSION_RATE", DEFAULT_ADMISSION_RATE))
+        )
+    except ValueError:
+        logger.warning("Invalid EMAIL_JOB_ADMISSION_RATE, using the default")
+        return DEFAULT_ADMISSION_RATE
+
+
+def reserve_admission_slot(
+    redis_conn, earliest: datetime, rate_per_minute: int
+) -> datetime:
+    """
+    Reserve a start time within the global admission rate.
+
+    Each minute admits at most rate_per_minute jobs, spaced evenly across
+    the minute; once a minute is full the job moves to the next one. A job
+    admitted in the minute of its earliest time may get a slot earlier in
+    that minute, which keeps the spacing even.
+
+    Args:
+        redis_conn: Redis connection
+        earliest (datetime): Earliest acceptable start time (UTC)
+        rate_per_minute (int): Jobs allowed per minute, 0 for no limit
+
+    Returns:
+        datetime: The reserved start time (never before earliest's minute),
+        or earliest if no limit applies or Redis is unavailable
+    """
+    if rate_per_minute <= 0:
+        return earliest
+    try:
+        start = int(earliest.timestamp() // 60)
+        cursor_key = f"{ADMISSION_CURSOR_PREFIX}{start}"
+        # Minutes between start and the cursor were full, and stay full
+        cursor = redis_conn.get(cursor_key)
+        minute = max(start, int(cursor)) if cursor is not None else start
+
+        for _ in range(MAX_ADMISSION_DELAY_MINUTES):
+            key = f"{ADMISSION_KEY_PREFIX}{minute}"
+            pipe = redis_conn.pipeline()
+            pipe.incr(key)
+            pipe.expire(key, ADMISSION_BUCKET_TTL)
+            count = int(pipe.execute()[0])
+            if count <= rate_per_minute:
+                # Point the cursor past this minute once it has filled up
+                next_free = minute + 1 if count == rate_per_minute else minute
+                if next_free > start:
+                    redis_conn.set(cursor_key, next_free, ex=ADMISSION_BUCKET_TTL)
+                return datetime.fromtimestamp(
+                    minute * 60 + (count - 1) * 60 / rate_per_minute, timezone.utc
+                )
+            minute += 1
+
+        logger.warning(
+            f"No admission slot within {MAX_ADMISSION_DELAY_MINUTES} minutes, "
+            f"admitting at {earliest}"
+        )
+    except Exception as e:
+        logger.warning(f"Could not reserve an admission slot: {e}")
+    return earliest
+
+
+def get_user_job_claim_key(user_id: int) -> str:
+    """Return the Redis key holding the user's claimed job ID."""
+    return f"{USER_JOB_CLAIM_PREFIX}{user_id}"
+
+
+def claim_user_job(
+    redis_conn, user_id: int, job_id: str, ttl: int = USER_JOB_CLAIM_TTL
+) -> bool:
+    """
+    Atomically claim the user's job slot for a job.
+
+    Args:
+        redis_conn: Redis connection
+        user_id (int): The user ID
+        job_id (str): The job taking the slot
+        ttl (int): Seconds until the claim expires if never released
+
+    Returns:
+        bool: True if the claim was taken, False if another job holds it
+    """
+    claimed = bool(
+        redis_conn.set(
+            get_user_job_claim_key(user_id), job_id, nx=True, ex=max(int(ttl), 1)
+        )
+    )
+    logger.debug(f"Claim of job slot for user {user_id} by {job_id}: {claimed}")
+    return claimed
+
+
+def _withdraw_waiting_job(redis_conn, job_id: str) -> bool:
+    """
+    Remove a background job that has not started from the scheduler or its queue.
+
+    Removal is a single ZREM or LREM, so a job a worker has already picked
+    up is never withdrawn.
+
+    Returns:
+        bool: True if the job will not run (withdrawn or no longer exists)
+    """
+    from rq_scheduler import Scheduler
+
+    try:
+        job = Job.fetch(job_id, connection=redis_conn)
+    except Exception:
+        logger.debug(f"Claim holder {job_id} no longer exists")
+        return True
+
+    if job.origin == HIGH_PRIORITY_QUEUE:
+        logger.debug(f"Claim holder {job_id} is a manual job, not withdrawing it")
+        return False
+
+    withdrawn = bool(redis_conn.zrem(Scheduler.scheduled_jobs_key, job_id)) or bool(
+        Queue(job.origin, connection=redis_conn).remove(job_id)
+    )
+    if withdrawn:
+        job.delete(remove_from_queue=False)
+    return withdrawn
+
+
+def take_over_user_job_claim(
+    redis_conn, user_id: int, job_id: str, ttl: int = USER_JOB_CLAIM_TTL
+) -> bool:
+    """
+    Claim the user's job slot for a manual job, replacing a waiting background job.
+
+    The scheduler claims the slot when it schedules a job, up to the catch-up
+    spread or admission delay ahead of its start. A manual trigger should not
+    wait behind that, so a background job that has not started yet is
+    withdrawn and the claim handed to the manual job, which does the same
+    work. A running job or another manual job keeps the slot.
+
+    Args:
+        redis_conn: Redis connection
+        user_id (int): The user ID
+        job_id (str): The manual job taking the slot
+        ttl (int): Seconds until the claim expires if never released
+
+    Returns:
+        bool: True if the claim now belongs to job_id
+    """
+    if claim_user_job(redis_conn, user_id, job_id, ttl):
+        return True
+
+    holder = get_user_job_claim(redis_conn, user_id)
+    if holder is None:
+        return claim_user_job(redis_conn, user_id, job_id, ttl)
+    if not _withdraw_waiting_job(redis_conn, holder):
+        logger.debug(f"Job slot for user {user_id} stays with {holder}")
+        return False
+
+    replaced = bool(
+        redis_conn.eval(
+            _REPLACE_CLAIM_SCRIPT,
+            1,
+            get_user_job_claim_key(user_id),
+            holder,
+            job_id,
+            max(int(ttl), 1),
+        )
+    )
+    if replaced:
+        logger.info(
+            f"Withdrew waiting job {holder} of user {user_id} in favour of {job_id}"
+        )
+    return replaced
+
+
+def get_user_job_claim(redis_conn, user_id: int) -> Optional[str]:
+    """
+    Return the ID of the job holding the user's slot, if any.
+
+    Args:
+        redis_conn: Redis connection
+        user_id (int): The user ID
+
+    Returns:
+        Optional[str]: The claimed job ID or None
+    """
+    job_id = redis_conn.get(get_user_job_claim_key(user_id))
+    if isinstance(job_id, bytes):
+        job_id = job_id.decode()
+    return job_id
+
+
+def extend_user_job_claim(
+    redis_conn, user_id: int, job_id: str, ttl: int = USER_JOB_CLAIM_TTL
+) -> bool:
+    """
+    Reset the expiry of the user's claim if the given job holds it.
+
+    Returns:
+        bool: True if the claim was extended
+    """
+    return bool(
+        redis_conn.eval(
+            _EXTEND_CLAIM_SCRIPT,
+            1,
+            get_user_job_claim_key(user_id),
+            job_id,
+            max(int(ttl), 1),
+        )
+    )
+
+
+def release_user_job(redis_conn, user_id: int, job_id: str) -> bool:
+    """
+    Release the user's job slot if the given job holds it.
+
+    Args:
+        redis_conn: Redis connection
+        user_id (int): The user ID
+        job_id (str): The job releasing the slot
+
+    Returns:
+        bool: True if the claim was released
+    """
+    try:
+        released = bool(
+            redis_conn.eval(
+                _RELEASE_CLAIM_SCRIPT, 1, get_user_job_claim_key(user_id), job_id
+            )
+        )
+        logger.debug(f"Release of job slot for user {user_id} by {job_id}: {released}")
+        return released
+    except Exception as e:
+        logger.error(f"Error releasing job claim for user {user_id}: {e}")
+        return False
+
+
+@contextmanager
+def hold_user_job_claim(user_id: int):
+    """
+    Keep the user's job slot claimed while the current RQ job runs.
+
+    On start the claim is extended to cover the job timeout (or taken if the
+    job was enqueued without one); it is released when the job finishes or
+    fails. Outside an RQ job this does nothing.
+
+    Args:
+        user_id (int): The user the job processes
+    """
+    job = get_current_job()
+    if job is None:
+        yield
+        return
+
+    redis_conn = job.connection
+    ttl = (job.timeout or 0) + USER_JOB_CLAIM_TTL
+    try:
+        if not extend_user_job_claim(redis_conn, user_id, job.id, ttl):
+            if not claim_user_job(redis_conn, user_id, job.id, ttl):
+                logger.warning(
+                    f"Job slot for user {user_id} is held by "
+                    f"{get_user_job_claim(redis_conn, user_id)}, running {job.id} anyway"
+                )
+    except Exception as e:
+        logger.error(f"Error claiming job slot for user {user_id}: {e}")
+
+    try:
+        yield
+    finally:
+        release_user_job(redis_conn, user_id, job.id)
+
+
+@contextmanager
+def hold_user_run_lock(user_id: int, poll_interval: float = USER_RUN_LOCK_POLL_SECONDS):
+    """
+    Run the block while holding the user's run lock, waiting for it if needed.
+
+    Push jobs for new messages and polling jobs can be in different
+    workers at the same time; both check the processed message history
+    before either saves it, so they must not overlap. The wait is bounded
+    by the job's own timeout. Outside an RQ job this does nothing.
+
+    Args:
+        user_id (int): The user the job processes
+        poll_interval (float): Seconds between attempts to take the lock
+    """
+    job = get_current_job()
+    if job is None:
+        yield
+        return
+
+    redis_conn = job.connection
+    key = f"{USER_RUN_LOCK_PREFIX}{user_id}"
+    ttl = (job.timeout or DEFAULT_JOB_TIMEOUT) + USER_RUN_LOCK_MARGIN
+    waited = False
+    acquired = False
+    try:
+        while not redis_conn.set(key, job.id, nx=True, ex=ttl):
+            if not waited:
+                logger.info(
+                    f"Job {job.id} waiting for another job of user {user_id} to finish"
+                )
+                waited = True
+            time.sleep(poll_interval)
+        acquired = True
+    except Exception as e:
+        logger.error(f"Error taking run lock for user {user_id}, running anyway: {e}")
+
+    try:
+        yield
+    finally:
+        if acquired:
+            try:
+                redis_conn.eval(_RELEASE_CLAIM_SCRIPT, 1, key, job.id)
+            except Exception as e:
+                logger.error(f"Error releasing run lock for user {user_id}: {e}")
+
+
 def is_user_job_running(redis_conn, user_id: int) -> bool:
     """
     Check if an email processing job is already running for this user.
@@ -115,7 +751,7 @@ def is_user_job_scheduled(redis_conn, user_id: int) -> bool:
 
 
 def is_user_job_queued(
-    redis_conn, user_id: int, queue_name: str = "email_processing"
+    redis_conn, user_id: int, queue_name: str = LOW_PRIORITY_QUEUE
 ) -> bool:
     """
     Check if an email processing job is already queued for this user.
@@ -157,6 +793,9 @@ def has_user_job_pending(redis_conn, user_id: int) -> bool:
     """
     Check if a user has any pending jobs (running, queued, or scheduled).
 
+    This is a single lookup of the user's job claim; use
+    get_user_job_status for a full scan of the RQ registries.
+
     Args:
         redis_conn: Redis connection
         user_id (int): The user ID
@@ -166,16 +805,8 @@ def has_user_job_pending(redis_conn, user_id: int) -> bool:
     """
     logger.debug(f"Checking if user {user_id} has pending jobs")
     try:
-        status = get_user_job_status(redis_conn, user_id)
-        logger.debug(f"Retrieved job status for user {user_id}: {status}")
-
-        # Check if any jobs are running, queued, or scheduled
-        has_pending = bool(
-            status.get("running", [])
-            or status.get("queued", [])
-            or status.get("scheduled", [])
-        )
-
+        # EXISTS returns the number of the given keys that exist
+        has_pending = redis_conn.exists(get_user_job_claim_key(user_id)) == 1
         logger.debug(f"User {user_id} has pending jobs: {has_pending}")
         return has_pending
 
@@ -198,8 +829,8 @@ def get_user_job_status(redis_conn, user_id: int) -> Dict:
     """
     logger.debug(f"Getting job status for user {user_id}")
     try:
-        queue = Queue("email_processing", connection=redis_conn)
-        logger.debug("Created queue connection for email_processing")
+        queues = [Queue(name, connection=redis_conn) for name in EMAIL_QUEUES]
+        logger.debug(f"Created queue connections for {', '.join(EMAIL_QUEUES)}")
 
         # Check for running jobs
         logger.debug("Checking for running jobs...")
@@ -212,40 +843,41 @@ def get_user_job_status(redis_conn, user_id: int) -> Dict:
                     running_jobs.append(current_job.id)
                     logger.debug(f"Found running job: {current_job.id}")
 
-        # Check for queued jobs
-        logger.debug("Checking for queued jobs...")
         queued_jobs = []
-        for job in queue.jobs:
-            if f"user_{user_id}_" in job.id:
-                queued_jobs.append(job.id)
-                logger.debug(f"Found queued job: {job.id}")
-
-        # Check for scheduled jobs
-        logger.debug("Checking for scheduled jobs...")
-        scheduled_registry = ScheduledJobRegistry(queue=queue)
         scheduled_jobs = []
-        for job_id in scheduled_registry.get_job_ids():
-            if f"user_{user_id}_" in job_id:
-                scheduled_jobs.append(job_id)
-                logger.debug(f"Found scheduled job: {job_id}")
-
-        # Check for failed jobs
-        logger.debug("Checking for failed jobs...")
-        failed_registry = FailedJobRegistry(queue=queue)
         failed_jobs = []
-        for job_id in failed_registry.get_job_ids():
-            if f"user_{user_id}_" in job_id:
-                failed_jobs.append(job_id)
-                logger.debug(f"Found failed job: {job_id}")
-
-        # Check for finished jobs
-        logger.debug("Checking for finished jobs...")
-        finished_registry = FinishedJobRegistry(queue=queue)
         finished_jobs = []
-        for job_id in finished_registry.get_job_ids():
-            if f"user_{user_id}_" in job_id:
-                finished_jobs.append(job_id)
-                logger.debug(f"Found finished job: {job_id}")
+        for queue in queues:
+            # Check for queued jobs
+            logger.debug(f"Checking for queued jobs in {queue.name}...")
+            for job in queue.jobs:
+                if f"user_{user_id}_" in job.id:
+                    queued_jobs.append(job.id)
+                    logger.debug(f"Found queued job: {job.id}")
+
+            # Check for scheduled jobs
+            logger.debug(f"Checking for scheduled jobs in {queue.name}...")
+            scheduled_registry = ScheduledJobRegistry(queue=queue)
+            for job_id in scheduled_registry.get_job_ids():
+                if f"user_{user_id}_" in job_id:
+                    scheduled_jobs.append(job_id)
+                    logger.debug(f"Found scheduled job: {job_id}")
+
+            # Check for failed jobs
+            logger.debug(f"Checking for failed jobs in {queue.name}...")
+            failed_registry = FailedJobRegistry(queue=queue)
+            for job_id in failed_registry.get_job_ids():
+                if f"user_{user_id}_" in job_id:
+                    failed_jobs.append(job_id)
+                    logger.debug(f"Found failed job: {job_id}")
+
+            # Check for finished jobs
+            logger.debug(f"Checking for finished jobs in {queue.name}...")
+            finished_registry = FinishedJobRegistry(queue=queue)
+            for job_id in finished_registry.get_job_ids():
+                if f"user_{user_id}_" in job_id:
+                    finished_jobs.append(job_id)
+                    logger.debug(f"Found finished job: {job_id}")
 
         # Calculate if user has any pending jobs
         has_any_pending = bool(running_jobs or queued_jobs or scheduled_jobs)
@@ -306,6 +938,210 @@ def get_job_details(redis_conn, job_id: str) -> Optional[Dict]:
         return None
 
 
+def update_job_progress(stage: str, **details) -> bool:
+    """
+    Record the current job's progress in its meta for status polling.
+
+    Outside an RQ job this does nothing.
+
+    Args:
+        stage (str): Short name of the current stage, e.g. "fetching"
+        **details: Extra JSON-serializable progress fields
+
+    Returns:
+        bool: True if the progress was saved
+    """
+    job = get_current_job()
+    if job is None:
+        return False
+
+    try:
+        job.meta["progress"] = {
+            "stage": stage,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            **details,
+        }
+        job.save_meta()
+        logger.debug(f"Job {job.id} progress: {job.meta['progress']}")
+        return True
+    except Exception as e:
+        logger.error(f"Error saving progress for job {job.id}: {e}")
+        return False
+
+
+class JobProgress:
+    """
+    Message counts and per-stage timings of one email processing run.
+
+    The counts are the totals reported so far; each stage's timing runs
+    from the first update in that stage to the first update in the next.
+    Updates are saved to the current job's meta (see update_job_progress),
+    at most every min_publish_interval seconds within a stage so per-batch
+    updates of a long backfill do not flood Redis.
+    """
+
+    COUNTERS = (
+        "found",
+        "already_processed",
+        "skipped",
+        "extracted",
+        "no_transaction",
+        "posted",
+        "failed",
+    )
+
+    def __init__(
+        self,
+        publish=None,
+        clock=time.monotonic,
+        min_publish_interval: float = PROGRESS_PUBLISH_INTERVAL,
+    ):
+        """
+        Initialize the tracker.
+
+        Args:
+            publish: Callable taking (stage, **details), defaults to
+                     update_job_progress
+            clock: Monotonic clock in seconds
+            min_publish_interval: Seconds between saves within one stage
+        """
+        self.publish = publish or update_job_progress
+        self.clock = clock
+        self.min_publish_interval = min_publish_interval
+        self.counts = dict.fromkeys(self.COUNTERS, 0)
+        self.timings: Dict[str, float] = {}
+        self.stage: Optional[str] = None
+        self._stage_started = None
+        self._last_published = None
+
+    def _close_stage(self, now: float):
+        if self.stage is not None:
+            elapsed = now - self._stage_started
+            self.timings[self.stage] = round(
+                self.timings.get(self.stage, 0.0) + elapsed, 3
+            )
+
+    def update(self, stage: str, **counts):
+        """
+        Record the current stage and the counts known so far.
+
+        Args:
+            stage (str): The stage the run is in
+            **counts: Totals for any of COUNTERS
+        """
+        now = self.clock()
+        for name, value in counts.items():
+            if name not in self.counts:
+                logger.debug(f"Ignoring unknown progress counter {name}")
+                continue
+            self.counts[name] = value
+
+        changed = stage != self.stage
+        if changed:
+            self._close_stage(now)
+            self.stage = stage
+            self._stage_started = now
+
+        if (
+            changed
+            or self._last_published is None
+            or now - self._last_published >= self.min_publish_interval
+        ):
+            self._last_published = now
+            self.publish(stage, **self.snapshot(now))
+
+    def finish(self, stage: str = "completed", **details) -> Dict:
+        """
+        Close the current stage and save the final progress.
+
+        Args:
+            stage (str): Final stage, e.g. "completed" or "failed"
+            **details: Extra fields saved with the final progress
+
+        Returns:
+            Dict: The final counts and timings
+        """
+        now = self.clock()
+        self._close_stage(now)
+        self.stage = stage
+        self._stage_started = now
+        summary = {"counts": dict(self.counts), "timings": dict(self.timings)}
+        self.publish(stage, **summary, **details)
+        logger.info(f"Email processing {stage}: {summary}")
+        return summary
+
+    def snapshot(self, now: Optional[float] = None) -> Dict:
+        """Return the counts and timings, including the running stage."""
+        now = self.clock() if now is None else now
+        timings = dict(self.timings)
+        if self.stage is not None:
+            timings[self.stage] = round(
+                timings.get(self.stage, 0.0) + now - self._stage_started, 3
+            )
+        return {"counts": dict(self.counts), "timings": timings}
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def get_job_progress(redis_conn, job_id: str, user_id: int) -> Optional[Dict]:
+    """
+    Get the status and progress of one of a user's email processing jobs.
+
+    Args:
+        redis_conn: Redis connection
+        job_id (str): The job ID
+        user_id (int): The user the job must belong to
+
+    Returns:
+        Optional[Dict]: Job status, or None if the job does not exist or
+                        belongs to another user
+    """
+    logger.debug(f"Getting progress of job {job_id} for user {user_id}")
+    try:
+        job = Job.fetch(job_id, connection=redis_conn)
+    except Exception as e:
+        logger.debug(f"Job {job_id} not found: {e}")
+        return None
+
+    if not job.args or job.args[0] != user_id:
+        logger.warning(f"Job {job_id} does not belong to user {user_id}")
+        return None
+
+    status = job.get_status()
+    status = getattr(status, "value", status)
+    details = {
+        "job_id": job.id,
+        "status": status,
+        "queue": job.origin,
+        "enqueued_at": _isoformat(job.enqueued_at),
+        "started_at": _isoformat(job.started_at),
+        "ended_at": _isoformat(job.ended_at),
+        "progress": job.meta.get("progress"),
+        "position": None,
+        "result": None,
+        "error": None,
+    }
+
+    if status == "queued":
+        try:
+            queue = Queue(job.origin, connection=redis_conn)
+            details["position"] = queue.get_job_position(job.id)
+        except Exception as e:
+            logger.debug(f"Could not get queue position of job {job_id}: {e}")
+    elif status == "finished":
+        details["result"] = job.return_value()
+    elif status == "failed":
+        result = job.latest_result()
+        if result is not None and result.exc_string:
+            # Only the exception line; tracebacks stay in the worker logs
+            details["error"] = result.exc_string.strip().splitlines()[-1]
+
+    logger.debug(f"Job {job_id} status: {status}")
+    return details
+
+
 def cleanup_old_jobs(redis_conn, max_age_hours: int = 24) -> Dict:
     """
     Clean up old finished and failed jobs.
@@ -319,24 +1155,25 @@ def cleanup_old_jobs(redis_conn, max_age_hours: int = 24) -> Dict:
     """
     logger.debug(f"Starting cleanup of jobs older than {max_age_hours} hours")
     try:
-        queue = Queue("email_processing", connection=redis_conn)
-        logger.debug("Created queue connection for cleanup")
-
-        # Clean up finished jobs
-        logger.debug("Cleaning up finished jobs...")
-        finished_registry = FinishedJobRegistry(queue=queue)
-        finished_cleaned = finished_registry.cleanup(
-            max_age_hours * 3600
-        )  # Convert to seconds
-        logger.debug(f"Cleaned up {finished_cleaned} finished jobs")
-
-        # Clean up failed jobs
-        logger.debug("Cleaning up failed jobs...")
-        failed_registry = FailedJobRegistry(queue=queue)
-        failed_cleaned = failed_registry.cleanup(
-            max_age_hours * 3600
-        )  # Convert to seconds
-        logger.debug(f"Cleaned up {failed_cleaned} failed jobs")
+        finished_cleaned = 0
+        failed_cleaned = 0
+        for queue_name in EMAIL_QUEUES:
+            queue = Queue(queue_name, connection=redis_conn)
+            logger.debug(f"Created queue connection for cleanup of {queue_name}")
+
+            # Clean up finished jobs
+            logger.debug("Cleaning up finished jobs...")
+            finished_registry = FinishedJobRegistry(queue=queue)
+            cleaned = finished_registry.cleanup(max_age_hours * 3600) or 0
+            logger.debug(f"Cleaned up {cleaned} finished jobs in {queue_name}")
+            finished_cleaned += cleaned
+
+            # Clean up failed jobs
+            logger.debug("Cleaning up failed jobs...")
+            failed_registry = FailedJobRegistry(queue=queue)
+            cleaned = failed_registry.cleanup(max_age_hours * 3600) or 0
+            logger.debug(f"Cleaned up {cleaned} failed jobs in {queue_name}")
+            failed_cleaned += cleaned
 
         stats = {
             "finished_jobs_cleaned": finished_cleaned,
@@ -355,7 +1192,10 @@ def cleanup_old_jobs(redis_conn, max_age_hours: int = 24) -> Dict:
 
 def get_queue_stats(redis_conn) -> Dict:
     """
-    Get statistics about the email processing queue.
+    Get statistics about the email processing queues.
+
+    The top-level counts describe the background queue; the length of
+    every email queue is reported under "queues".
 
     Args:
         redis_conn: Redis connection
@@ -365,7 +1205,7 @@ def get_queue_stats(redis_conn) -> Dict:
     """
     logger.debug("Getting queue statistics")
     try:
-        queue = Queue("email_processing", connection=redis_conn)
+        queue = Queue(LOW_PRIORITY_QUEUE, connection=redis_conn)
         logger.debug("Created queue connection for statistics")
 
         # Get basic queue info
@@ -387,6 +1227,10 @@ def get_queue_stats(redis_conn) -> Dict:
                 "scheduled_count": len(scheduled_registry),
                 "failed_count": len(failed_registry),
                 "finished_count": len(finished_registry),
+                "queues": {
+                    name: len(Queue(name, connection=redis_conn))
+                    for name in EMAIL_QUEUES
+                },
             }
         )
 
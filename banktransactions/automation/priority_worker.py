@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Weighted priority dequeueing for email automation workers.
+
+Manual triggers are enqueued on the high priority queue and background
+polling on the low priority queue (see job_utils). RQ's default strategy
+always tries the queues in the order given, so a steady stream of manual
+triggers could keep background jobs waiting indefinitely. The workers here
+instead follow a weighted schedule: with the default weight of 4 the high
+priority queue is tried first on four of every five dequeues and the low
+priority queue first on the fifth. A queue that is empty never blocks the
+other one, so an idle high priority queue costs background jobs nothing.
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+from rq import SimpleWorker, Worker
+
+from banktransactions.automation.job_utils import get_queue_weights
+
+logger = logging.getLogger(__name__)
+
+
+def build_dequeue_schedule(
+    queue_names: List[str], weights: Optional[Dict[str, int]] = None
+) -> List[str]:
+    """
+    Build the order in which queues are preferred on successive dequeues.
+
+    Each queue appears as many times as its weight, in the order the queues
+    were given; queues without a weight get 1.
+
+    Args:
+        queue_names: Names of the queues the worker listens on
+        weights: Weight by queue name, defaults to get_queue_weights()
+
+    Returns:
+        List[str]: Queue names, one per dequeue, repeated cyclically
+    """
+    weights = get_queue_weights() if weights is None else weights
+    schedule = []
+    for name in queue_names:
+        schedule.extend([name] * max(1, int(weights.get(name, 1))))
+    logger.debug(f"Dequeue schedule: {schedule}")
+    return schedule
+
+
+class WeightedDequeueMixin:
+    """Orders the worker's queues by a weighted schedule after each dequeue."""
+
+    queue_weights: Optional[Dict[str, int]] = None
+
+    def _next_preferred_queue(self) -> Optional[str]:
+        schedule = getattr(self, "_dequeue_schedule", None)
+        if schedule is None:
+            schedule = build_dequeue_schedule(
+                [queue.name for queue in self.queues], self.queue_weights
+            )
+            self._dequeue_schedule = schedule
+            self._dequeue_count = 0
+        if not schedule:
+            return None
+
+        self._dequeue_count += 1
+        return schedule[self._dequeue_count % len(schedule)]
+
+    def reorder_queues(self, reference_queue):
+        """Put the queue the schedule prefers next in front of the others."""
+        preferred = self._next_preferred_queue()
+        if preferred is None:
+            return
+
+        self._ordered_queues = sorted(
+            self.queues, key=lambda queue: queue.name != preferred
+        )
+        logger.debug(
+            f"Worker {self.name} dequeued from {reference_queue.name}, "
+            f"trying {preferred} first next"
+        )
+
+
+class PriorityWorker(WeightedDequeueMixin, Worker):
+    """Forking worker that dequeues by queue weight."""
+
+
+class PrioritySimpleWorker(WeightedDequeueMixin, SimpleWorker):
+    """In-process worker that dequeues by queue weight."""
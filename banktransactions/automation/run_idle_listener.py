@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Email Automation IDLE Listener Script
+
+This script keeps an IMAP IDLE connection open for every account with the
+"push" polling interval and enqueues a job for each batch of new bank emails,
+so they are imported within about a minute. All connections share one
+asyncio event loop. It should be run as a separate process from the main
+web application, alongside the workers and the scheduler.
+
+Usage:
+    python run_idle_listener.py [--redis-url redis://localhost:6379/0] [--refresh-interval 60]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+import redis
+from dotenv import load_dotenv
+from rq import Queue
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables from .env file
+# Required variables: DATABASE_URL, REDIS_URL, ENCRYPTION_KEY
+logger.debug("Loading environment variables...")
+load_dotenv()
+load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+load_dotenv(os.path.join(os.path.dirname(__file__), "..", "..", ".env"))
+logger.debug("Environment variables loaded")
+
+# Set up project paths and use shared imports instead of path manipulation
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+    logger.debug(f"Added project root to sys.path: {project_root}")
+
+from shared.imports import get_database_session, setup_project_paths
+
+setup_project_paths()
+
+from banktransactions.automation.idle_listener import (
+    CONFIG_REFRESH_SECONDS,
+    IdleListener,
+    enqueue_message_job,
+    load_push_mailboxes,
+)
+from banktransactions.automation.job_utils import LOW_PRIORITY_QUEUE
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)],
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    logger.debug("Starting main function")
+
+    parser = argparse.ArgumentParser(description="Run email IMAP IDLE listener")
+    parser.add_argument(
+        "--redis-url",
+        default=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+        help="Redis URL (default: redis://localhost:6379/0)",
+    )
+    parser.add_argument(
+        "--refresh-interval",
+        type=int,
+        default=CONFIG_REFRESH_SECONDS,
+        help="Seconds between reloads of the watched accounts "
+        f"(default: {CONFIG_REFRESH_SECONDS})",
+    )
+    args = parser.parse_args()
+
+    try:
+        redis_conn = redis.from_url(args.redis_url)
+        redis_conn.ping()
+        logger.info(f"Connected to Redis at {args.redis_url}")
+        queue = Queue(LOW_PRIORITY_QUEUE, connection=redis_conn)
+
+        db_session = get_database_session()
+        logger.info("Connected to database")
+
+        listener = IdleListener(
+            load_mailboxes=lambda: load_push_mailboxes(db_session),
+            on_new_messages=lambda user_id, uids: asyncio.to_thread(
+                enqueue_message_job, queue, user_id, uids
+            ),
+            refresh_interval=args.refresh_interval,
+        )
+        logger.info("IDLE listener is ready. Press Ctrl+C to stop.")
+        asyncio.run(listener.run())
+
+    except KeyboardInterrupt:
+        logger.info("IDLE listener stopped by user")
+    except Exception as e:
+        logger.error(f"Error running IDLE listener: {str(e)}", exc_info=True)
+        sys.exit(1)
+
+    logger.debug("main function completed")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,17 @@ It should be run as a separate process from the main web application.
 
 Usage:
     python run_scheduler.py [--redis-url redis://localhost:6379/0] [--interval 300]
+                            [--shards 16] [--lease-ttl 60]
+
+Each pass schedules only the configurations that are due; between passes the
+scheduler sleeps until the next due time, or until a configuration change
+wakes it, waiting at most --interval seconds.
+
+To run several schedulers (e.g. an HA pair), start every instance with the
+same --shards count (or SCHEDULER_SHARDS). Users are split into that many
+shards and each instance schedules only the shards it holds a Redis lease on;
+when an instance stops, the others take its shards over within --lease-ttl
+seconds. Without --shards a single instance schedules every user.
 """
 
 import argparse
@@ -53,7 +64,12 @@ setup_project_paths()
 logger.debug("Project paths setup completed")
 
 logger.debug("Importing EmailScheduler...")
+from banktransactions.automation.job_utils import wait_for_scheduler_wakeup
 from banktransactions.automation.scheduler import EmailScheduler
+from banktransactions.automation.scheduler_leases import (
+    DEFAULT_LEASE_TTL,
+    ShardLeaseManager,
+)
 
 logger.debug("EmailScheduler imported successfully")
 
@@ -105,7 +121,20 @@ def main():
         "--interval",
         type=int,
         default=300,  # 5 minutes
-        help="Scheduling interval in seconds (default: 300)",
+        help="Maximum seconds to wait between scheduling passes (default: 300)",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=int(os.getenv("SCHEDULER_SHARDS", "0")),
+        help="Split users into this many leased shards to run several "
+        "schedulers; 0 disables sharding (default: SCHEDULER_SHARDS or 0)",
+    )
+    parser.add_argument(
+        "--lease-ttl",
+        type=int,
+        default=DEFAULT_LEASE_TTL,
+        help=f"Seconds a shard lease lasts without renewal (default: {DEFAULT_LEASE_TTL})",
     )
 
     args = parser.parse_args()
@@ -132,10 +161,27 @@ def main():
 
         # Create scheduler
         logger.debug("Creating EmailScheduler instance...")
-        scheduler = EmailScheduler(redis_conn, db_session)
+        lease_manager = None
+        max_wait = args.interval
+        if args.shards > 0:
+            lease_manager = ShardLeaseManager(
+                redis_conn, shard_count=args.shards, lease_ttl=args.lease_ttl
+            )
+            # Leases are renewed once per pass, so passes must come well
+            # within the lease TTL
+            max_wait = min(args.interval, args.lease_ttl / 3)
+            logger.info(
+                f"Sharding enabled: {args.shards} shards, instance "
+                f"{lease_manager.instance_id}"
+            )
+            scheduler = EmailScheduler(
+                redis_conn, db_session, lease_manager=lease_manager
+            )
+        else:
+            scheduler = EmailScheduler(redis_conn, db_session)
         logger.debug("EmailScheduler instance created successfully")
 
-        logger.info(f"Starting scheduler with {args.interval}s interval")
+        logger.info(f"Starting scheduler with {max_wait}s maximum wait")
         logger.info("Scheduler is ready. Press Ctrl+C to stop.")
         logger.debug("Entering main scheduler loop...")
 
@@ -149,12 +195,24 @@ def main():
                 scheduler.schedule_jobs()
                 logger.debug("Scheduled jobs check completed")
 
-                logger.debug(f"Sleeping for {args.interval} seconds...")
-                time.sleep(args.interval)
+                # Sleep until the next configuration is due; configuration
+                # changes push a wake-up and end the wait early
+                wait = scheduler.seconds_until_next_due(max_wait=max_wait)
+                logger.debug(
+                    f"Waiting up to {wait:.0f} seconds for the next due job..."
+                )
+                if wait_for_scheduler_wakeup(
+                    redis_conn,
+                    wait,
+                    instance_id=(lease_manager.instance_id if lease_manager else None),
+                ):
+                    logger.debug("Woken by a configuration change")
 
             except KeyboardInterrupt:
                 logger.info("Scheduler stopped by user")
                 logger.debug("KeyboardInterrupt received, breaking from main loop")
+                if lease_manager is not None:
+                    lease_manager.release_all()
                 break
             except Exception as e:
                 logger.error(f"Error in scheduler loop: {str(e)}", exc_info=True)
@@ -162,9 +220,9 @@ def main():
                     f"Exception in loop iteration {loop_count}: {type(e).__name__}: {str(e)}"
                 )
                 logger.debug(
-                    f"Continuing after error, sleeping for {args.interval} seconds..."
+                    f"Continuing after error, sleeping for {max_wait} seconds..."
                 )
-                time.sleep(args.interval)
+                time.sleep(max_wait)
 
     except KeyboardInterrupt:
         logger.info("Scheduler stopped by user")
@@ -5,8 +5,20 @@ Email Automation Worker Script
 This script runs RQ workers that process email automation jobs.
 It should be run as a separate process from the main web application.
 
+The job modules are imported once up front, so forked work horses start
+warm. With --pool-size N the worker instead runs N long-lived slots forked
+from this process, each executing jobs in-process and recycled after
+--max-jobs-per-slot jobs. With --concurrency N one process runs N jobs at
+the same time in threads, overlapping their IMAP and Gemini network waits.
+
+By default the worker listens on both the high priority queue (manual
+triggers) and the background queue, preferring the high priority queue by
+EMAIL_HIGH_PRIORITY_WEIGHT to one; --queue-name restricts it to one queue.
+
 Usage:
     python run_worker.py [--queue-name email_processing] [--redis-url redis://localhost:6379/0]
+    python run_worker.py --pool-size 4 [--max-jobs-per-slot 100]
+    python run_worker.py --concurrency 8
 """
 
 import argparse
@@ -24,7 +36,7 @@ if platform.system() == "Darwin":  # macOS
 
 import redis
 from dotenv import load_dotenv
-from rq import Queue, SimpleWorker, Worker
+from rq import Queue
 
 # Load environment variables from .env file
 # This will look for .env files in the following order:
@@ -58,6 +70,18 @@ logger.debug("Setting up project paths...")
 setup_project_paths()
 logger.debug("Project paths setup completed")
 
+from banktransactions.automation.concurrent_worker import ConcurrentWorker
+from banktransactions.automation.job_utils import EMAIL_QUEUES, get_queue_weights
+from banktransactions.automation.priority_worker import (
+    PrioritySimpleWorker,
+    PriorityWorker,
+)
+from banktransactions.automation.worker_pool import (
+    WarmWorkerPool,
+    get_max_jobs_per_slot,
+    preload_job_modules,
+)
+
 # Configure logging
 log_level = os.getenv("LOG_LEVEL", "DEBUG").upper()
 logger.debug(f"Setting log level to: {log_level}")
@@ -105,11 +129,11 @@ def get_worker_class():
     if system == "Darwin":  # macOS
         logger.info("Detected macOS - using SimpleWorker to avoid forking issues")
         logger.debug("Selected SimpleWorker for macOS compatibility")
-        return SimpleWorker
+        return PrioritySimpleWorker
     else:  # Linux, Windows, etc.
         logger.info(f"Detected {system} - using regular Worker for better performance")
         logger.debug(f"Selected regular Worker for {system}")
-        return Worker
+        return PriorityWorker
 
 
 def main():
@@ -118,8 +142,9 @@ def main():
     parser = argparse.ArgumentParser(description="Run email automation worker")
     parser.add_argument(
         "--queue-name",
-        default="email_processing",
-        help="Name of the Redis queue to process (default: email_processing)",
+        default=None,
+        help="Name of a single Redis queue to process "
+        f"(default: the weighted queues {', '.join(EMAIL_QUEUES)})",
     )
     parser.add_argument(
         "--redis-url",
@@ -134,6 +159,27 @@ def main():
         action="store_true",
         help="Force use of SimpleWorker regardless of OS (useful for debugging)",
     )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=int(os.getenv("WORKER_POOL_SIZE", "0")),
+        help="Number of preforked worker slots; 0 runs a single worker "
+        "(default: WORKER_POOL_SIZE or 0)",
+    )
+    parser.add_argument(
+        "--max-jobs-per-slot",
+        type=int,
+        default=get_max_jobs_per_slot() or 0,
+        help="Jobs a pool slot runs before it is replaced; 0 never recycles "
+        "(default: WORKER_MAX_JOBS_PER_SLOT or 100)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(os.getenv("WORKER_CONCURRENCY", "1")),
+        help="Jobs one worker process runs at the same time in threads "
+        "(default: WORKER_CONCURRENCY or 1)",
+    )
 
     args = parser.parse_args()
     logger.debug("Command line arguments parsed:")
@@ -141,6 +187,9 @@ def main():
     logger.debug(f"  redis_url: {args.redis_url}")
     logger.debug(f"  worker_name: {args.worker_name}")
     logger.debug(f"  force_simple_worker: {args.force_simple_worker}")
+    logger.debug(f"  pool_size: {args.pool_size}")
+    logger.debug(f"  max_jobs_per_slot: {args.max_jobs_per_slot}")
+    logger.debug(f"  concurrency: {args.concurrency}")
 
     try:
         # Connect to Redis
@@ -159,19 +208,62 @@ def main():
         logger.info("Connected to database")
         logger.debug("Database session created successfully")
 
-        # Create queue
-        logger.debug(f"Creating queue '{args.queue_name}'...")
-        queue = Queue(args.queue_name, connection=redis_conn)
-        logger.debug(f"Queue '{args.queue_name}' created successfully")
-        try:
-            logger.debug(f"Queue length: {len(queue)}")
-        except (TypeError, AttributeError):
-            logger.debug("Queue length: <unable to determine>")
+        # Create queues
+        queue_names = [args.queue_name] if args.queue_name else list(EMAIL_QUEUES)
+        queue_label = ", ".join(queue_names)
+        logger.debug(f"Creating queues '{queue_label}'...")
+        queues = [Queue(name, connection=redis_conn) for name in queue_names]
+        logger.debug(f"Queues '{queue_label}' created successfully")
+        if len(queues) > 1:
+            logger.info(f"Queue weights: {get_queue_weights()}")
+        for queue in queues:
+            try:
+                logger.debug(f"Queue {queue.name} length: {len(queue)}")
+            except (TypeError, AttributeError):
+                logger.debug("Queue length: <unable to determine>")
+
+        # Import the job modules once so every fork starts warm. Only the
+        # pool resets inherited connections, so only it may warm the app.
+        logger.debug("Preloading job modules...")
+        preload_job_modules(warm_app=args.pool_size > 0)
+
+        if args.pool_size > 0:
+            pool = WarmWorkerPool(
+                queues,
+                connection=redis_conn,
+                num_workers=args.pool_size,
+                max_jobs_per_slot=args.max_jobs_per_slot or None,
+            )
+            logger.info(
+                f"Starting worker pool with {args.pool_size} slots for queues "
+                f"'{queue_label}' (max jobs per slot: "
+                f"{args.max_jobs_per_slot or 'unlimited'})"
+            )
+            logger.info("Worker pool is ready to process jobs. Press Ctrl+C to stop.")
+            pool.start(logging_level=log_level)
+            logger.debug("Worker pool stopped")
+            return
+
+        if args.concurrency > 1:
+            worker = ConcurrentWorker(
+                queues,
+                connection=redis_conn,
+                concurrency=args.concurrency,
+                name=args.worker_name or f"email_worker_{os.getpid()}",
+            )
+            logger.info(
+                f"Starting concurrent worker '{worker.name}' with "
+                f"{worker.concurrency} slots for queues '{queue_label}'"
+            )
+            logger.info("Worker is ready to process jobs. Press Ctrl+C to stop.")
+            worker.work(logging_level=log_level)
+            logger.debug("Concurrent worker stopped")
+            return
 
         # Choose worker class based on OS or force flag
         logger.debug("Selecting worker class...")
         if args.force_simple_worker:
-            worker_class = SimpleWorker
+            worker_class = PrioritySimpleWorker
             worker_type = "SimpleWorker (forced)"
             logger.debug("Using SimpleWorker (forced by command line argument)")
         else:
@@ -184,11 +276,11 @@ def main():
         logger.debug(f"Process ID: {os.getpid()}")
 
         logger.debug("Creating worker instance...")
-        worker = worker_class([queue], connection=redis_conn, name=worker_name)
+        worker = worker_class(queues, connection=redis_conn, name=worker_name)
         logger.debug("Worker instance created successfully")
 
         logger.info(
-            f"Starting {worker_type} '{worker_name}' for queue '{args.queue_name}'"
+            f"Starting {worker_type} '{worker_name}' for queues '{queue_label}'"
         )
         logger.info("Worker is ready to process jobs. Press Ctrl+C to stop.")
         logger.debug("Starting worker.work() method...")
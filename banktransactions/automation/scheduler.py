@@ -1,9 +1,12 @@
 import logging
 import os
+import random
 import sys
 from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 
 from rq_scheduler import Scheduler
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
@@ -29,7 +32,7 @@ except ImportError:
         "Failed to import EmailConfiguration from app.models, using fallback"
     )
     # Fallback: define a minimal EmailConfiguration class for standalone operation
-    from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text
+    from sqlalchemy import Boolean, Column, DateTime, Float, Integer, String, Text
     from sqlalchemy.ext.declarative import declarative_base
 
     Base = declarative_base()
@@ -49,6 +52,9 @@ except ImportError:
         last_check_time = Column(DateTime, nullable=True)
         sample_emails = Column(Text, nullable=True)
         last_processed_email_id = Column(String(255), nullable=True)
+        next_run_at = Column(DateTime, nullable=True)
+        arrival_rate_ewma = Column(Float, nullable=True)
+        adaptive_interval_seconds = Column(Integer, nullable=True)
 
     logger.debug("Created fallback EmailConfiguration class")
 
@@ -57,20 +63,62 @@ from banktransactions.automation.email_processor import (
     process_user_emails_standalone,
 )
 from banktransactions.automation.job_utils import (
+    LOW_PRIORITY_QUEUE,
+    USER_JOB_CLAIM_TTL,
+    claim_user_job,
     generate_job_id,
-    get_user_job_status,
+    get_admission_rate,
+    get_config_interval,
+    get_user_job_claim,
+    get_user_phase,
     has_user_job_pending,
+    release_user_job,
+    reserve_admission_slot,
 )
+from banktransactions.automation.scheduler_leases import ShardLeaseManager
 
 logger.debug("Successfully imported automation modules")
 
+# Due configurations loaded per query; a pass pages through all of them
+SCHEDULE_BATCH_SIZE = 100
+
+# Overdue runs (e.g. after a deploy or outage) start at a stable per-user
+# offset within this window, or within the polling interval if shorter
+CATCH_UP_SPREAD = timedelta(minutes=10)
+
+# Random delay added to periodic runs, at most this many seconds and at most
+# JITTER_FRACTION of the polling interval
+MAX_JITTER_SECONDS = 30
+JITTER_FRACTION = 0.05
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes from the database as UTC."""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
 
 class EmailScheduler:
-    def __init__(self, redis_conn, db_session: Session):
+    def __init__(
+        self,
+        redis_conn,
+        db_session: Session,
+        batch_size: int = SCHEDULE_BATCH_SIZE,
+        lease_manager: Optional[ShardLeaseManager] = None,
+        admission_rate: Optional[int] = None,
+    ):
         logger.debug("Initializing EmailScheduler...")
         self.scheduler = Scheduler(connection=redis_conn)
         self.redis_conn = redis_conn
         self.db = db_session
+        self.batch_size = batch_size
+        # Without a lease manager this instance schedules every user
+        self.lease_manager = lease_manager
+        # Jobs released per minute across all schedulers; 0 means unlimited
+        self.admission_rate = (
+            get_admission_rate() if admission_rate is None else admission_rate
+        )
         logger.debug(
             f"EmailScheduler initialized with redis connection: {redis_conn is not None}"
         )
@@ -79,31 +127,127 @@ class EmailScheduler:
         )
 
     def schedule_jobs(self):
-        """Schedule email processing jobs for all enabled configurations."""
+        """
+        Schedule email processing jobs for every configuration that is due.
+
+        Only enabled configurations whose next_run_at has passed (or is not
+        set yet) are loaded, in batches of batch_size ordered by ID, so a
+        pass costs in proportion to the due accounts rather than all users.
+        With a lease manager, only users in the shards this instance holds
+        are scheduled; leases are renewed before every batch.
+        """
         logger.debug("Starting schedule_jobs method")
         try:
-            # Get all enabled configurations
-            logger.debug("Querying database for enabled email configurations...")
-            configs = self.db.query(EmailConfiguration).filter_by(is_enabled=True).all()
-            logger.debug(f"Found {len(configs)} enabled email configurations")
-
-            for i, config in enumerate(configs, 1):
+            now = datetime.now(timezone.utc)
+            scheduled = 0
+            last_id = 0
+            while True:
+                shards = self._rebalance_shards()
+                if shards == []:
+                    logger.debug("No scheduler shards held, nothing to schedule")
+                    break
+                configs = self._get_due_configurations(now, last_id, shards)
                 logger.debug(
-                    f"Processing configuration {i}/{len(configs)} for user {config.user_id}"
+                    f"Found {len(configs)} due email configurations after id {last_id}"
                 )
-                logger.debug(f"  Email: {config.email_address}")
-                logger.debug(f"  IMAP Server: {config.imap_server}:{config.imap_port}")
-                logger.debug(f"  Polling Interval: {config.polling_interval}")
-                logger.debug(f"  Last Check Time: {config.last_check_time}")
-                self._schedule_user_job(config)
 
-            logger.debug("Completed schedule_jobs method")
+                for config in configs:
+                    logger.debug(
+                        f"Processing due configuration for user {config.user_id}"
+                    )
+                    logger.debug(f"  Email: {config.email_address}")
+                    logger.debug(f"  Polling Interval: {config.polling_interval}")
+                    logger.debug(f"  Last Check Time: {config.last_check_time}")
+                    logger.debug(f"  Next Run At: {config.next_run_at}")
+                    self._schedule_user_job(config)
+
+                # Persist the new next_run_at values batch by batch
+                self.db.commit()
+                scheduled += len(configs)
+                if len(configs) < self.batch_size:
+                    break
+                last_id = configs[-1].id
+
+            logger.debug(f"Completed schedule_jobs method: {scheduled} due")
 
         except Exception as e:
             logger.error(f"Error in schedule_jobs: {str(e)}")
             logger.debug(
                 f"Exception details: {type(e).__name__}: {str(e)}", exc_info=True
             )
+            try:
+                self.db.rollback()
+            except Exception:
+                pass
+
+    def _rebalance_shards(self) -> Optional[List[int]]:
+        """Renew shard leases; None means this instance owns every user."""
+        if self.lease_manager is None:
+            return None
+        return self.lease_manager.rebalance()
+
+    def _filter_shards(self, query, shards: Optional[List[int]]):
+        """Restrict a configuration query to users in the given shards."""
+        if shards is None:
+            return query
+        return query.filter(
+            (EmailConfiguration.user_id % self.lease_manager.shard_count).in_(shards)
+        )
+
+    def _get_due_configurations(
+        self, now: datetime, after_id: int, shards: Optional[List[int]] = None
+    ):
+        """Load the next batch of enabled configurations that are due."""
+        query = (
+            self.db.query(EmailConfiguration)
+            .filter_by(is_enabled=True)
+            .filter(
+                or_(
+                    EmailConfiguration.next_run_at.is_(None),
+                    EmailConfiguration.next_run_at <= now,
+                ),
+                EmailConfiguration.id > after_id,
+            )
+        )
+        return (
+            self._filter_shards(query, shards)
+            .order_by(EmailConfiguration.id)
+            .limit(self.batch_size)
+            .all()
+        )
+
+    def seconds_until_next_due(self, max_wait: float) -> float:
+        """
+        Return how long the scheduler can sleep before a configuration is due.
+
+        Args:
+            max_wait (float): Upper bound in seconds
+
+        Returns:
+            float: Seconds until the earliest next_run_at, capped at max_wait
+        """
+        shards = None
+        if self.lease_manager is not None:
+            shards = self.lease_manager.owned_shards
+            if not shards:
+                return max_wait
+        try:
+            query = self.db.query(func.min(EmailConfiguration.next_run_at)).filter_by(
+                is_enabled=True
+            )
+            next_due = self._filter_shards(query, shards).scalar()
+            # End the read transaction so the next pass sees new rows
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"Error finding next due configuration: {e}")
+            self.db.rollback()
+            return max_wait
+
+        if next_due is None:
+            return max_wait
+        wait = (_as_utc(next_due) - datetime.now(timezone.utc)).total_seconds()
+        logger.debug(f"Next configuration due in {wait:.0f}s")
+        return min(max(wait, 0), max_wait)
 
     def _schedule_user_job(self, config: EmailConfiguration):
         """Schedule a job for a specific user's email configuration."""
@@ -112,11 +256,15 @@ class EmailScheduler:
             # Check if user already has a pending job (running, scheduled, or queued)
             logger.debug(f"Checking if user {config.user_id} has pending jobs...")
             if has_user_job_pending(self.redis_conn, config.user_id):
-                job_status = get_user_job_status(self.redis_conn, config.user_id)
+                pending_job_id = get_user_job_claim(self.redis_conn, config.user_id)
                 logger.info(
-                    f"Skipping job scheduling for user {config.user_id} - job already pending: {job_status}"
+                    f"Skipping job scheduling for user {config.user_id} - job already pending: {pending_job_id}"
+                )
+                # The pending job sets the next run when it finishes; until
+                # then check again after one interval
+                config.next_run_at = datetime.now(timezone.utc) + get_config_interval(
+                    config
                 )
-                logger.debug(f"Existing job status details: {job_status}")
                 return
 
             logger.debug(f"No pending jobs found for user {config.user_id}")
@@ -137,15 +285,37 @@ class EmailScheduler:
             job_id = generate_job_id(config.user_id, next_run)
             logger.debug(f"Generated job ID: {job_id}")
 
+            # Claim the user's job slot before scheduling; the claim must
+            # outlive the wait until next_run and is released by the job
+            delay = (next_run - datetime.now(timezone.utc)).total_seconds()
+            if not claim_user_job(
+                self.redis_conn,
+                config.user_id,
+                job_id,
+                ttl=max(delay, 0) + USER_JOB_CLAIM_TTL,
+            ):
+                logger.info(
+                    f"Skipping job scheduling for user {config.user_id} - job slot claimed concurrently"
+                )
+                return
+
             # Schedule the job using the standalone function
             logger.debug("Scheduling job with RQ scheduler...")
-            self.scheduler.enqueue_at(
-                next_run,
-                process_user_emails_standalone,
-                config.user_id,
-                job_id=job_id,
-                queue_name="email_processing",
-            )
+            try:
+                self.scheduler.enqueue_at(
+                    next_run,
+                    process_user_emails_standalone,
+                    config.user_id,
+                    job_id=job_id,
+                    queue_name=LOW_PRIORITY_QUEUE,
+                )
+            except Exception:
+                release_user_job(self.redis_conn, config.user_id, job_id)
+                raise
+
+            # Provisional: the job replaces this when it runs, so a job that
+            # is lost is retried one interval later
+            config.next_run_at = next_run + get_config_interval(config)
 
             logger.info(
                 f"Scheduled job {job_id} for user {config.user_id} ({config.email_address}) at {next_run}"
@@ -161,7 +331,14 @@ class EmailScheduler:
             )
 
     def _calculate_next_run(self, config: EmailConfiguration) -> datetime:
-        """Calculate the next run time based on the polling interval."""
+        """
+        Calculate the next run time based on the polling interval.
+
+        New configurations run right away. Overdue ones start at a stable
+        per-user offset within CATCH_UP_SPREAD instead of all at once, and
+        periodic runs get a little random jitter. The result is then fitted
+        into the global admission rate.
+        """
         logger.debug(f"Starting _calculate_next_run for user {config.user_id}")
         now = datetime.now(timezone.utc)
         logger.debug(f"Current time (UTC): {now}")
@@ -170,31 +347,24 @@ class EmailScheduler:
 
         if not config.last_check_time:
             logger.debug("No last check time found, scheduling for immediate execution")
-            return now
-
-        interval = config.polling_interval.lower()
-        logger.debug(f"Processing interval: {interval}")
-
-        if interval == "hourly":
-            next_run = config.last_check_time + timedelta(hours=1)
-            logger.debug(f"Hourly interval: next run calculated as {next_run}")
-        elif interval == "daily":
-            next_run = config.last_check_time + timedelta(days=1)
-            logger.debug(f"Daily interval: next run calculated as {next_run}")
+            earliest = now
         else:
-            # Default to hourly if interval is not recognized
-            logger.warning(
-                f"Unrecognized polling interval '{interval}', defaulting to hourly"
-            )
-            next_run = config.last_check_time + timedelta(hours=1)
-            logger.debug(f"Default hourly interval: next run calculated as {next_run}")
+            interval = get_config_interval(config)
+            earliest = _as_utc(config.last_check_time) + interval
+            logger.debug(f"Next run due at {earliest}")
 
-        # If the next run time is in the past, return now
-        if next_run < now:
-            logger.debug(
-                f"Next run time {next_run} is in the past, scheduling for immediate execution"
+            if earliest < now:
+                spread = min(interval, CATCH_UP_SPREAD)
+                earliest = now + spread * get_user_phase(config.user_id)
+                logger.debug(f"Next run is overdue, spreading catch-up to {earliest}")
+
+            jitter = random.uniform(
+                0, min(MAX_JITTER_SECONDS, interval.total_seconds() * JITTER_FRACTION)
             )
-            return now
+            earliest += timedelta(seconds=jitter)
 
+        next_run = reserve_admission_slot(
+            self.redis_conn, earliest, self.admission_rate
+        )
         logger.debug(f"Final next run time: {next_run}")
         return next_run
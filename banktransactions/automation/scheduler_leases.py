@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Shard leases for running several email schedulers side by side.
+
+Users are split into a fixed number of shards by ``user_id % shard_count``.
+Each scheduler instance holds Redis leases (SET NX with an expiry) on a fair
+share of the shards and only schedules users in the shards it holds. Leases
+are renewed on every pass; when an instance dies its leases expire and the
+survivors pick the shards up, so an HA pair keeps scheduling every user.
+
+Lease ownership decides who does the work, not correctness: the per-user job
+claim taken before every enqueue (see job_utils.claim_user_job) still stops a
+user being scheduled twice if two instances briefly overlap on a shard.
+"""
+
+import logging
+import os
+import socket
+import time
+import uuid
+import zlib
+from typing import Callable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+SHARD_LEASE_PREFIX = "email_processing:scheduler:shard:"
+SCHEDULER_INSTANCES_KEY = "email_processing:scheduler:instances"
+
+# Number of shards users are split into; must be the same for every instance
+DEFAULT_SHARD_COUNT = 16
+
+# Seconds a lease or heartbeat stays valid without renewal
+DEFAULT_LEASE_TTL = 60
+
+# Only touch a lease if it still belongs to this instance
+_RENEW_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def get_shard_count() -> int:
+    """Return the configured shard count (SCHEDULER_SHARDS, default 16)."""
+    try:
+        return max(1, int(os.getenv("SCHEDULER_SHARDS", DEFAULT_SHARD_COUNT)))
+    except ValueError:
+        logger.warning("Invalid SCHEDULER_SHARDS, using the default shard count")
+        return DEFAULT_SHARD_COUNT
+
+
+def get_user_shard(user_id: int, shard_count: int) -> int:
+    """Return the shard a user belongs to."""
+    return user_id % shard_count
+
+
+class ShardLeaseManager:
+    """
+    Acquires, renews and rebalances this instance's shard leases.
+
+    Call rebalance() at the start of every scheduling pass and schedule only
+    the shards it returns. Passes must run more often than lease_ttl, or the
+    leases lapse and other instances take the shards over.
+    """
+
+    def __init__(
+        self,
+        redis_conn,
+        shard_count: Optional[int] = None,
+        lease_ttl: int = DEFAULT_LEASE_TTL,
+        instance_id: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.redis_conn = redis_conn
+        self.shard_count = shard_count or get_shard_count()
+        self.lease_ttl = lease_ttl
+        self.instance_id = (
+            instance_id
+            or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+        self._clock = clock
+        self._owned: Set[int] = set()
+        logger.debug(
+            f"Initialized ShardLeaseManager {self.instance_id}: "
+            f"{self.shard_count} shards, lease_ttl={lease_ttl}s"
+        )
+
+    @property
+    def owned_shards(self) -> List[int]:
+        """Shards held after the last rebalance."""
+        return sorted(self._owned)
+
+    def _lease_key(self, shard: int) -> str:
+        return f"{SHARD_LEASE_PREFIX}{shard}"
+
+    def _fair_share(self) -> int:
+        """
+        Record this instance's heartbeat and return its share of the shards.
+
+        Live instances are ranked by ID; the first shard_count % live get one
+        shard more than the rest, so the shares add up to shard_count.
+        """
+        now = self._clock()
+        pipe = self.redis_conn.pipeline()
+        pipe.zadd(SCHEDULER_INSTANCES_KEY, {self.instance_id: now})
+        pipe.zremrangebyscore(SCHEDULER_INSTANCES_KEY, "-inf", now - self.lease_ttl)
+        pipe.zrange(SCHEDULER_INSTANCES_KEY, 0, -1)
+        members = sorted(
+            m.decode() if isinstance(m, bytes) else m for m in pipe.execute()[-1]
+        )
+        if self.instance_id not in members:
+            members = sorted(members + [self.instance_id])
+        base, extra = divmod(self.shard_count, len(members))
+        return base + (1 if members.index(self.instance_id) < extra else 0)
+
+    def _renew(self, shard: int) -> bool:
+        return bool(
+            self.redis_conn.eval(
+                _RENEW_LEASE_SCRIPT,
+                1,
+                self._lease_key(shard),
+                self.instance_id,
+                self.lease_ttl * 1000,
+            )
+        )
+
+    def _release(self, shard: int) -> bool:
+        return bool(
+            self.redis_conn.eval(
+                _RELEASE_LEASE_SCRIPT, 1, self._lease_key(shard), self.instance_id
+            )
+        )
+
+    def _acquire(self, shard: int) -> bool:
+        return bool(
+            self.redis_conn.set(
+                self._lease_key(shard),
+                self.instance_id,
+                nx=True,
+                px=self.lease_ttl * 1000,
+            )
+        )
+
+    def rebalance(self) -> List[int]:
+        """
+        Renew held leases and move towards a fair share of the shards.
+
+        Each instance aims for its fair share of the shards: it releases any
+        above that and takes free ones below it, starting from an
+        instance-specific offset so instances contend less.
+
+        Returns:
+            List[int]: The shards this instance now holds
+        """
+        try:
+            target = self._fair_share()
+
+            for shard in sorted(self._owned):
+                if not self._renew(shard):
+                    logger.warning(f"Lost lease on scheduler shard {shard}")
+                    self._owned.discard(shard)
+
+            for shard in sorted(self._owned, reverse=True)[
+                : max(len(self._owned) - target, 0)
+            ]:
+                self._release(shard)
+                self._owned.discard(shard)
+                logger.info(f"Released scheduler shard {shard} for rebalancing")
+
+            if len(self._owned) < target:
+                offset = zlib.crc32(self.instance_id.encode()) % self.shard_count
+                for step in range(self.shard_count):
+                    shard = (offset + step) % self.shard_count
+                    if shard in self._owned:
+                        continue
+                    if self._acquire(shard):
+                        self._owned.add(shard)
+                        logger.info(f"Acquired scheduler shard {shard}")
+                    if len(self._owned) >= target:
+                        break
+        except Exception as e:
+            # Without Redis no lease can be trusted; stop scheduling until
+            # the next pass can reach it again
+            logger.error(f"Error rebalancing scheduler shards: {e}")
+            self._owned.clear()
+
+        logger.debug(f"Instance {self.instance_id} holds shards {self.owned_shards}")
+        return self.owned_shards
+
+    def release_all(self):
+        """Give up every lease, e.g. on shutdown, so others take over at once."""
+        for shard in list(self._owned):
+            try:
+                self._release(shard)
+            except Exception as e:
+                logger.warning(f"Error releasing scheduler shard {shard}: {e}")
+        self._owned.clear()
+        try:
+            self.redis_conn.zrem(SCHEDULER_INSTANCES_KEY, self.instance_id)
+        except Exception as e:
+            logger.warning(f"Error removing scheduler heartbeat: {e}")
+        logger.info(f"Instance {self.instance_id} released all scheduler shards")
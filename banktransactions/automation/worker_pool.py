@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Preforked worker pool for email automation jobs.
+
+A plain RQ Worker forks a fresh work horse for every job, and the horse
+pays for the job's import chain (job_wrapper, shared.imports, the email
+parser with google.genai, ...) before doing any work. For short jobs that
+overhead dominates.
+
+WarmWorkerPool instead imports the job modules once in the parent, then
+forks N long-lived slots from it. Each slot runs a SimpleWorker (dequeueing
+by queue weight, see priority_worker), so jobs
+execute in an interpreter that is already warm and reuse the slot's
+database pools. A slot exits after a configurable number of jobs and the
+pool forks a fresh one from the warm parent, which bounds memory growth
+and leaked state.
+"""
+
+import importlib
+import logging
+import multiprocessing
+import os
+import platform
+import time
+from typing import Iterable, List, Optional
+
+from redis import ConnectionPool
+from rq import Queue
+from rq.job import Job
+from rq.serializers import DefaultSerializer
+from rq.worker_pool import WorkerPool
+
+from banktransactions.automation.priority_worker import PrioritySimpleWorker
+
+logger = logging.getLogger(__name__)
+
+# Modules every email job needs, imported once before the slots are forked
+WARM_MODULES = (
+    "banktransactions.automation.job_wrapper",
+    "banktransactions.automation.email_processor",
+    "banktransactions.core.imap_client",
+    "banktransactions.core.email_parser",
+    "banktransactions.core.processed_ids_db",
+    "google.genai",
+)
+
+# Jobs a slot runs before it is replaced by a fresh fork
+DEFAULT_MAX_JOBS_PER_SLOT = 100
+
+
+def get_max_jobs_per_slot() -> Optional[int]:
+    """
+    Return how many jobs a slot runs before it is recycled.
+
+    Read from WORKER_MAX_JOBS_PER_SLOT (default 100); 0 disables recycling.
+
+    Returns:
+        Optional[int]: The job limit, or None to never recycle slots
+    """
+    try:
+        max_jobs = int(os.getenv("WORKER_MAX_JOBS_PER_SLOT", DEFAULT_MAX_JOBS_PER_SLOT))
+    except ValueError:
+        logger.warning("Invalid WORKER_MAX_JOBS_PER_SLOT, using the default")
+        max_jobs = DEFAULT_MAX_JOBS_PER_SLOT
+    return max_jobs if max_jobs > 0 else None
+
+
+def preload_job_modules(
+    modules: Iterable[str] = WARM_MODULES, warm_app: bool = False
+) -> List[str]:
+    """
+    Import the job modules so processes forked afterwards start warm.
+
+    Modules that fail to import are logged and skipped; the job imports
+    them again (and reports the error) when it runs.
+
+    Args:
+        modules: Dotted module names to import
+        warm_app: Also build the Flask app used for database access when
+                  DATABASE_URL is not set. Only safe when every fork calls
+                  reset_after_fork() before using the database.
+
+    Returns:
+        List[str]: The modules that were imported
+    """
+    modules = tuple(modules)
+    start = time.monotonic()
+    loaded = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+            logger.debug(f"Preloaded module {name}")
+        except Exception as e:
+            logger.warning(f"Could not preload module {name}: {e}")
+
+    if warm_app and not os.getenv("DATABASE_URL"):
+        try:
+            from banktransactions.core.processed_ids_db import get_app
+
+            get_app()
+            logger.debug("Preloaded Flask app for database operations")
+        except Exception as e:
+            logger.warning(f"Could not preload Flask app: {e}")
+
+    logger.info(
+        f"Preloaded {len(loaded)}/{len(modules)} job modules in "
+        f"{time.monotonic() - start:.2f}s"
+    )
+    return loaded
+
+
+def reset_after_fork():
+    """Drop database connections a forked slot inherited from the parent."""
+    try:
+        from shared.database import DatabaseManager
+
+        DatabaseManager.dispose_inherited_connections()
+    except Exception as e:
+        logger.warning(f"Could not reset database connections after fork: {e}")
+
+    try:
+        from banktransactions.core.processed_ids_db import dispose_app_connections
+
+        dispose_app_connections()
+    except Exception as e:
+        logger.warning(f"Could not reset Flask app connections after fork: {e}")
+
+
+def run_pool_slot(
+    worker_name: str,
+    queue_names: Iterable[str],
+    connection_class,
+    connection_pool_class,
+    connection_pool_kwargs: dict,
+    worker_class=PrioritySimpleWorker,
+    serializer=DefaultSerializer,
+    job_class=Job,
+    queue_class=Queue,
+    burst: bool = True,
+    logging_level: str = "INFO",
+    max_jobs: Optional[int] = None,
+    _sleep: float = 0,
+):
+    """
+    Entry point of a pool slot process.
+
+    Mirrors rq.worker_pool.run_worker, but resets inherited connections
+    first and stops the worker after max_jobs so the pool recycles it.
+    """
+    reset_after_fork()
+    connection = connection_class(
+        connection_pool=ConnectionPool(
+            connection_class=connection_pool_class, **connection_pool_kwargs
+        )
+    )
+    queues = [queue_class(name, connection=connection) for name in queue_names]
+    worker = worker_class(
+        queues,
+        name=worker_name,
+        connection=connection,
+        serializer=serializer,
+        job_class=job_class,
+        queue_class=queue_class,
+    )
+    logger.info(
+        f"Pool slot {worker_name} started with PID {os.getpid()} "
+        f"(max jobs: {max_jobs or 'unlimited'})"
+    )
+    time.sleep(_sleep)
+    worker.work(burst=burst, logging_level=logging_level, max_jobs=max_jobs)
+    logger.debug(f"Pool slot {worker_name} finished")
+
+
+def _get_process_context():
+    """Fork slots where possible so they inherit the preloaded modules."""
+    if (
+        platform.system() != "Darwin"
+        and "fork" in multiprocessing.get_all_start_methods()
+    ):
+        return multiprocessing.get_context("fork")
+    # macOS cannot fork safely after the Objective-C runtime is loaded;
+    # spawned slots still work but import the job modules themselves
+    return multiprocessing.get_context()
+
+
+class WarmWorkerPool(WorkerPool):
+    """
+    RQ WorkerPool whose slots are forked from a warm parent and recycled.
+
+    The pool restarts slots that exit, so a slot leaving after
+    max_jobs_per_slot jobs is replaced within about a second.
+    """
+
+    def __init__(self, *args, max_jobs_per_slot: Optional[int] = None, **kwargs):
+        kwargs.setdefault("worker_class", PrioritySimpleWorker)
+        super().__init__(*args, **kwargs)
+        self.max_jobs_per_slot = max_jobs_per_slot
+        logger.debug(
+            f"WarmWorkerPool created with {self.num_workers} slots, "
+            f"max jobs per slot: {max_jobs_per_slot}"
+        )
+
+    def get_worker_process(
+        self,
+        name: str,
+        burst: bool,
+        _sleep: float = 0,
+        logging_level: str = "INFO",
+    ):
+        """Return the process for a new slot."""
+        return _get_process_context().Process(
+            target=run_pool_slot,
+            args=(
+                name,
+                self._queue_names,
+                self._connection_class,
+                self._pool_class,
+                self._pool_kwargs,
+            ),
+            kwargs={
+                "_sleep": _sleep,
+                "burst": burst,
+                "logging_level": logging_level,
+                "worker_class": self.worker_class,
+                "job_class": self.job_class,
+                "queue_class": self.queue_class,
+                "serializer": self.serializer,
+                "max_jobs": self.max_jobs_per_slot,
+            },
+            name=f"Worker {name} (WorkerPool {self.name})",
+        )
@@ -10,21 +10,56 @@ This package contains the core functionality for:
 """
 
 # Export main functions for easy access
-from .api_client import APIClient, send_transaction_to_api
-from .email_parser import decode_str, extract_transaction_details
+from .api_client import (
+    APIClient,
+    DirectTransactionSubmitter,
+    TransactionSubmitter,
+    create_transaction_submitter,
+    send_transaction_to_api,
+)
+from .email_parser import (
+    decode_str,
+    extract_transaction_details,
+    extract_transaction_details_batch,
+)
+from .extraction_cache import ExtractionCache, extraction_cache
 from .imap_client import CustomIMAPClient, get_bank_emails
-from .processed_ids_db import load_processed_gmail_msgids, save_processed_gmail_msgid
-from .transaction_data import construct_transaction_data, get_mappings_from_api
+from .llm_providers import LLMProviderRegistry, llm_providers
+from .merchant_matcher import MerchantMatcher
+from .processed_ids_db import (
+    ProcessedIdBuffer,
+    load_processed_gmail_msgids,
+    save_processed_gmail_msgid,
+)
+from .template_extractor import TemplateExtractor, template_extractor
+from .transaction_data import (
+    MappingSnapshot,
+    construct_transaction_data,
+    get_mappings_from_api,
+)
 
 __all__ = [
     "extract_transaction_details",
+    "extract_transaction_details_batch",
     "decode_str",
+    "ExtractionCache",
+    "extraction_cache",
     "get_bank_emails",
     "CustomIMAPClient",
+    "LLMProviderRegistry",
+    "llm_providers",
+    "MerchantMatcher",
+    "TemplateExtractor",
+    "template_extractor",
     "construct_transaction_data",
     "get_mappings_from_api",
+    "MappingSnapshot",
     "send_transaction_to_api",
     "APIClient",
+    "TransactionSubmitter",
+    "DirectTransactionSubmitter",
+    "create_transaction_submitter",
     "load_processed_gmail_msgids",
     "save_processed_gmail_msgid",
+    "ProcessedIdBuffer",
 ]
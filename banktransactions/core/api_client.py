@@ -3,52 +3,31 @@
 import json
 import logging
 import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime  # Added for date formatting
+from typing import Dict, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, NewConnectionError
 
 logger = logging.getLogger(__name__)
 
 
-def send_transaction_to_api(transaction_data):
+def build_transaction_payload(transaction_data, default_currency="INR"):
     """
-    Sends transaction data to the configured REST API endpoint using the expected format.
+    Validate transaction data and build the payload expected by the transactions API.
 
     Args:
-        transaction_data (dict): Dictionary containing transaction details.
-                                 Expected keys include:
-                                 'amount', 'transaction_date' (YYYY-MM-DD or parsable),
-                                 'payee' (or 'subject' as fallback),
-                                 'account_name' (the primary account for the posting),
-                                 'from_bank', 'body_excerpt'.
+        transaction_data (dict): Dictionary containing transaction details
+                                 (see send_transaction_to_api).
+        default_currency (str): Currency used for both postings.
 
     Returns:
-        bool: True if the API call was successful (2xx status), False otherwise.
+        dict or None: The API payload, or None if the data is invalid.
     """
-    logger.debug("Starting send_transaction_to_api function")
-    logger.debug(
-        f"Input transaction data keys: {list(transaction_data.keys()) if transaction_data else 'None'}"
-    )
-
-    # Load configuration from environment variables
-    logger.debug("Loading API configuration from environment variables...")
-    api_endpoint = os.getenv(
-        "API_ENDPOINT"
-    )  # Should be like http://host/api/v1/transactions
-    api_key = os.getenv("API_KEY")
-    default_currency = os.getenv("DEFAULT_CURRENCY", "INR")  # Default to INR if not set
-
-    logger.debug(f"API_ENDPOINT: {api_endpoint}")
-    logger.debug(f"API_KEY present: {bool(api_key)}")
-    logger.debug(f"DEFAULT_CURRENCY: {default_currency}")
-
-    if not api_endpoint or not api_key:
-        logger.error("API_ENDPOINT and API_KEY environment variables must be set.")
-        logger.debug("Missing required environment variables for API configuration")
-        return False
-
-    logger.debug("API configuration loaded successfully")
-
     # Process amount
     logger.debug("Processing transaction amount...")
     raw_amount = transaction_data.get("amount", 0)
@@ -62,7 +41,7 @@ def send_transaction_to_api(transaction_data):
     except (ValueError, TypeError) as e:
         logger.error(f"Invalid amount format: {raw_amount}. Skipping API call")
         logger.debug(f"Amount processing error: {type(e).__name__}: {str(e)}")
-        return False
+        return None
 
     # Get date and format it
     logger.debug("Processing transaction date...")
@@ -98,11 +77,11 @@ def send_transaction_to_api(transaction_data):
                 f"Invalid or unparseable date format: {raw_date}. Error: {e}. Skipping API call"
             )
             logger.debug(f"Date parsing error details: {type(e).__name__}: {str(e)}")
-            return False
+            return None
     else:
         logger.error("Missing transaction_date. Skipping API call")
         logger.debug("No transaction_date found in transaction data")
-        return False
+        return None
 
     # Get account information
     logger.debug("Processing account information...")
@@ -112,7 +91,7 @@ def send_transaction_to_api(transaction_data):
     if not from_account:
         logger.error("Missing from_account. Skipping API call")
         logger.debug("No from_account found in transaction data")
-        return False
+        return None
 
     to_account = transaction_data.get("to_account")
     logger.debug(f"To account: {to_account}")
@@ -120,17 +99,11 @@ def send_transaction_to_api(transaction_data):
     if not to_account:
         logger.error("Missing to_account. Skipping API call")
         logger.debug("No to_account found in transaction data")
-        return False
+        return None
 
     # --- Construct Payload ---
     logger.debug("Constructing API payload...")
 
-    headers = {
-        "X-API-Key": api_key,
-        "Content-Type": "application/json",
-    }
-    logger.debug("API headers prepared")
-
     # Construct the payload based on API requirements
     # NOTE: This assumes a single transaction maps to a single posting.
     # Double-entry may require creating two postings (e.g., debit Expenses, credit Assets).
@@ -182,6 +155,58 @@ def send_transaction_to_api(transaction_data):
     )
     logger.debug(f"Full payload: {json.dumps(payload)}")  # Log the actual payload
 
+    return payload
+
+
+def send_transaction_to_api(transaction_data):
+    """
+    Sends transaction data to the configured REST API endpoint using the expected format.
+
+    Args:
+        transaction_data (dict): Dictionary containing transaction details.
+                                 Expected keys include:
+                                 'amount', 'transaction_date' (YYYY-MM-DD or parsable),
+                                 'payee' (or 'subject' as fallback),
+                                 'account_name' (the primary account for the posting),
+                                 'from_bank', 'body_excerpt'.
+
+    Returns:
+        bool: True if the API call was successful (2xx status), False otherwise.
+    """
+    logger.debug("Starting send_transaction_to_api function")
+    logger.debug(
+        f"Input transaction data keys: {list(transaction_data.keys()) if transaction_data else 'None'}"
+    )
+
+    # Load configuration from environment variables
+    logger.debug("Loading API configuration from environment variables...")
+    api_endpoint = os.getenv(
+        "API_ENDPOINT"
+    )  # Should be like http://host/api/v1/transactions
+    api_key = os.getenv("API_KEY")
+    default_currency = os.getenv("DEFAULT_CURRENCY", "INR")  # Default to INR if not set
+
+    logger.debug(f"API_ENDPOINT: {api_endpoint}")
+    logger.debug(f"API_KEY present: {bool(api_key)}")
+    logger.debug(f"DEFAULT_CURRENCY: {default_currency}")
+
+    if not api_endpoint or not api_key:
+        logger.error("API_ENDPOINT and API_KEY environment variables must be set.")
+        logger.debug("Missing required environment variables for API configuration")
+        return False
+
+    logger.debug("API configuration loaded successfully")
+
+    payload = build_transaction_payload(transaction_data, default_currency)
+    if payload is None:
+        return False
+
+    headers = {
+        "X-API-Key": api_key,
+        "Content-Type": "application/json",
+    }
+    logger.debug("API headers prepared")
+
     # Make API request
     logger.debug(f"Making POST request to {api_endpoint}...")
     try:
@@ -238,6 +263,296 @@ def send_transaction_to_api(transaction_data):
         return False
 
 
+# Status codes worth retrying. The transactions API has no idempotency
+# support, so only responses that guarantee nothing was created are retried;
+# a timeout or 5xx may follow a committed transaction.
+RETRYABLE_STATUS_CODES = {429}
+
+
+def _failed_before_sending(error: requests.exceptions.RequestException) -> bool:
+    """
+    Tell whether a request failed before it could reach the server.
+
+    Only connection failures qualify: a read timeout or a connection dropped
+    mid-request may happen after the server committed the transaction.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError) or not error.args:
+        return False
+    cause = error.args[0]
+    return isinstance(cause, MaxRetryError) and isinstance(
+        cause.reason, NewConnectionError
+    )
+
+
+def submission_key_for_message(gmail_message_id) -> str:
+    """Derive the key a Gmail message's transaction is submitted under."""
+    return f"gmail-{gmail_message_id}"
+
+
+class TransactionSubmitter:
+    """
+    Submits transactions to the API over a pooled keep-alive session.
+
+    Transactions are buffered with submit() and sent concurrently by flush().
+    Requests that certainly created nothing (connection failures and 429
+    responses) are retried with jittered exponential backoff. Any other
+    failure is reported and the email is processed again on the next run.
+    The API does not deduplicate, so when the failure came after the server
+    committed (e.g. a read timeout), that run creates a duplicate transaction.
+    """
+
+    def __init__(
+        self,
+        api_endpoint: Optional[str] = None,
+        api_key: Optional[str] = None,
+        default_currency: Optional[str] = None,
+        batch_size: int = 20,
+        max_workers: int = 4,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        timeout: int = 15,
+    ):
+        self.api_endpoint = api_endpoint or os.getenv("API_ENDPOINT")
+        self.api_key = api_key or os.getenv("API_KEY")
+        self.default_currency = default_currency or os.getenv("DEFAULT_CURRENCY", "INR")
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self._buffer: List[Tuple[str, Optional[dict]]] = []
+
+        logger.debug(
+            f"Initializing TransactionSubmitter: batch_size={batch_size}, "
+            f"max_workers={max_workers}, max_retries={max_retries}"
+        )
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(
+            {"X-API-Key": self.api_key or "", "Content-Type": "application/json"}
+        )
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered transactions not yet flushed."""
+        return len(self._buffer)
+
+    def submit(self, key: str, transaction_data: dict):
+        """
+        Buffer a transaction for the next flush.
+
+        Args:
+            key (str): Key the result is reported under, e.g. from
+                submission_key_for_message
+            transaction_data (dict): Transaction data (see send_transaction_to_api)
+        """
+        payload = build_transaction_payload(transaction_data, self.default_currency)
+        self._buffer.append((key, payload))
+
+    def flush(self) -> Dict[str, bool]:
+        """
+        Send every buffered transaction.
+
+        Returns:
+            dict: Success flag keyed by submission key, in submission order
+        """
+        buffered, self._buffer = self._buffer, []
+        if not buffered:
+            return {}
+
+        if not self.api_endpoint or not self.api_key:
+            logger.error("API_ENDPOINT and API_KEY environment variables must be set.")
+            return {key: False for key, _ in buffered}
+
+        logger.debug(f"Flushing {len(buffered)} transactions to the API")
+        workers = min(self.max_workers, len(buffered))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(
+                executor.map(lambda item: self._post_with_retry(*item), buffered)
+            )
+        return {key: success for (key, _), success in zip(buffered, outcomes)}
+
+    def send_batch(self, items: List[Tuple[str, dict]]) -> Dict[str, bool]:
+        """Submit and flush a batch of (key, transaction_data)."""
+        for key, transaction_data in items:
+            self.submit(key, transaction_data)
+        return self.flush()
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for a retry attempt."""
+        return random.uniform(0, self.backoff_base * (2**attempt))
+
+    def _post_with_retry(self, key: str, payload: Optional[dict]) -> bool:
+        """POST one payload, retrying failures that cannot have created it."""
+        if payload is None:
+            return False
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(
+                    self.api_endpoint,
+                    json=payload,
+                    timeout=self.timeout,
+                )
+                if response.ok:
+                    logger.debug(f"Transaction {key} accepted: {response.status_code}")
+                    return True
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    logger.error(
+                        f"API HTTP Error {response.status_code} for {key}: "
+                        f"{response.text[:200]}"
+                    )
+                    return False
+                error = f"HTTP {response.status_code}"
+            except requests.exceptions.RequestException as e:
+                error = f"{type(e).__name__}: {e}"
+                if not _failed_before_sending(e):
+                    logger.error(
+                        f"Transaction {key} failed ({error}); not "
+                        "retried because the server may have created it"
+                    )
+                    return False
+
+            if attempt < self.max_retries:
+                delay = self._backoff_delay(attempt)
+                logger.warning(
+                    f"Transaction {key} failed ({error}), " f"retrying in {delay:.2f}s"
+                )
+                time.sleep(delay)
+            else:
+                logger.error(
+                    f"Transaction {key} failed after "
+                    f"{self.max_retries + 1} attempts: {error}"
+                )
+        return False
+
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class DirectTransactionSubmitter:
+    """
+    Creates transactions in-process through the shared TransactionService.
+
+    Drop-in replacement for TransactionSubmitter when the worker shares the
+    database with the API: the same payloads are written with the worker's
+    own session, skipping serialization, API key auth and the HTTP round
+    trip.
+    """
+
+    def __init__(
+        self,
+        db_session,
+        user_id: int,
+        default_currency: Optional[str] = None,
+        batch_size: int = 20,
+    ):
+        # Imported lazily: shared.imports itself imports this module
+        from shared.services.transaction import TransactionService
+
+        self.user_id = user_id
+        self.default_currency = default_currency or os.getenv("DEFAULT_CURRENCY", "INR")
+        self.batch_size = batch_size
+        self.service = TransactionService(user_id=user_id, session=db_session)
+        self._buffer: List[Tuple[str, Optional[dict]]] = []
+        logger.debug(
+            f"Initializing DirectTransactionSubmitter for user {user_id}: "
+            f"batch_size={batch_size}"
+        )
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered transactions not yet flushed."""
+        return len(self._buffer)
+
+    def submit(self, key: str, transaction_data: dict):
+        """Buffer a transaction for the next flush (see TransactionSubmitter)."""
+        payload = build_transaction_payload(transaction_data, self.default_currency)
+        self._buffer.append((key, payload))
+
+    def flush(self) -> Dict[str, bool]:
+        """
+        Create every buffered transaction.
+
+        Returns:
+            dict: Success flag keyed by submission key, in submission order
+        """
+        buffered, self._buffer = self._buffer, []
+        results = {}
+        for key, payload in buffered:
+            if payload is None:
+                results[key] = False
+                continue
+            result = self.service.create_transaction_from_postings(payload)
+            if result.success:
+                logger.debug(f"Transaction {key} created in-process")
+            else:
+                logger.error(f"In-process transaction {key} failed: {result.error}")
+            results[key] = result.success
+        return results
+
+    def send_batch(self, items: List[Tuple[str, dict]]) -> Dict[str, bool]:
+        """Submit and flush a batch of (key, transaction_data)."""
+        for key, transaction_data in items:
+            self.submit(key, transaction_data)
+        return self.flush()
+
+    def close(self):
+        """Nothing to release; the database session belongs to the caller."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def get_transaction_submit_mode() -> str:
+    """
+    Return how the worker creates transactions, from TRANSACTION_SUBMIT_MODE.
+
+    Returns:
+        str: "direct" to call the services in-process, otherwise "http"
+    """
+    mode = os.getenv("TRANSACTION_SUBMIT_MODE", "http").strip().lower()
+    if mode not in ("http", "direct"):
+        logger.warning(f"Unknown TRANSACTION_SUBMIT_MODE '{mode}', using http")
+        return "http"
+    return mode
+
+
+def create_transaction_submitter(db_session=None, user_id: Optional[int] = None):
+    """
+    Build the transaction submitter for the configured submit mode.
+
+    Direct mode needs the worker's database session and the user ID; without
+    them the HTTP submitter is used.
+
+    Returns:
+        TransactionSubmitter or DirectTransactionSubmitter
+    """
+    if get_transaction_submit_mode() == "direct":
+        if db_session is not None and user_id is not None:
+            logger.debug("Using in-process transaction submitter")
+            return DirectTransactionSubmitter(db_session, user_id)
+        logger.warning(
+            "Direct submit mode needs a database session and user ID, using http"
+        )
+    logger.debug("Using HTTP transaction submitter")
+    return TransactionSubmitter()
+
+
 class APIClient:
     """
     API client class for creating transactions via the Kanakku API.
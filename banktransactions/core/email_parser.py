@@ -5,13 +5,19 @@ import json
 import logging
 import os
 import re
-from datetime import datetime, timedelta
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
 from email.header import decode_header
-from typing import Dict, Optional, Tuple
+from typing import Callable, Dict, List, Optional
 
-import requests
 from google import genai
 
+from banktransactions.core.exchange_rates import exchange_rate_store
+from banktransactions.core.extraction_cache import extraction_cache
+from banktransactions.core.llm_providers import llm_providers
+from banktransactions.core.template_extractor import template_extractor
+
 logger = logging.getLogger(__name__)
 
 # Configure logging
@@ -20,75 +26,8 @@ logging.basicConfig(
 )
 
 
-class ExchangeRateCache:
-    """
-    A simple cache for exchange rates with time-based expiration.
-    """
-
-    def __init__(self, expiration_minutes: int = 60):
-        logger.debug(
-            f"Initializing ExchangeRateCache with {expiration_minutes} minute expiration"
-        )
-        self.cache: Dict[Tuple[str, str], Tuple[float, datetime]] = {}
-        self.expiration_minutes = expiration_minutes
-
-    def get(self, from_currency: str, to_currency: str) -> Optional[float]:
-        """
-        Get the exchange rate from cache if it exists and is not expired.
-
-        Args:
-            from_currency (str): Source currency code
-            to_currency (str): Target currency code
-
-        Returns:
-            Optional[float]: Cached rate if valid, None otherwise
-        """
-        logger.debug(f"Checking cache for exchange rate {from_currency}/{to_currency}")
-        key = (from_currency, to_currency)
-        if key in self.cache:
-            rate, timestamp = self.cache[key]
-            age_minutes = (datetime.now() - timestamp).total_seconds() / 60
-            logger.debug(
-                f"Found cached rate for {from_currency}/{to_currency}, age: {age_minutes:.1f} minutes"
-            )
-
-            if datetime.now() - timestamp < timedelta(minutes=self.expiration_minutes):
-                logger.debug(
-                    f"Using cached exchange rate for {from_currency}/{to_currency}: {rate}"
-                )
-                return rate
-            else:
-                logger.debug(
-                    f"Cached exchange rate for {from_currency}/{to_currency} expired (age: {age_minutes:.1f} min)"
-                )
-                del self.cache[key]
-        else:
-            logger.debug(f"No cached rate found for {from_currency}/{to_currency}")
-        return None
-
-    def set(self, from_currency: str, to_currency: str, rate: float):
-        """
-        Store an exchange rate in the cache.
-
-        Args:
-            from_currency (str): Source currency code
-            to_currency (str): Target currency code
-            rate (float): Exchange rate to cache
-        """
-        key = (from_currency, to_currency)
-        self.cache[key] = (rate, datetime.now())
-        logger.debug(f"Cached exchange rate for {from_currency}/{to_currency}: {rate}")
-
-    def clear(self):
-        """Clear all cached rates."""
-        cache_size = len(self.cache)
-        self.cache.clear()
-        logger.debug(f"Exchange rate cache cleared ({cache_size} entries removed)")
-
-
-# Create a global cache instance
-logger.debug("Creating global exchange rate cache instance")
-exchange_rate_cache = ExchangeRateCache()
+# Used when no rate can be found for USD/INR, e.g. without an API key
+FALLBACK_EXCHANGE_RATE = 83.0
 
 
 def decode_str(s):
@@ -219,73 +158,39 @@ def standardize_date_format(date_str):
         return date_str
 
 
-def get_exchange_rate(from_currency: str, to_currency: str) -> float:
+def get_exchange_rate(
+    from_currency: str, to_currency: str, on_date: Optional[date] = None
+) -> float:
     """
-    Get the current exchange rate between two currencies using a free API.
-    Uses caching to reduce API calls.
+    Get the exchange rate between two currencies on a given day.
+
+    Rates come from the shared exchange_rate_store, which only calls the
+    API for days no worker has looked up before.
 
     Args:
         from_currency (str): Source currency code (e.g., 'USD')
         to_currency (str): Target currency code (e.g., 'INR')
+        on_date (date, optional): Transaction date, defaults to today
 
     Returns:
-        float: Exchange rate or 1.0 if API call fails
+        float: Exchange rate, or the fallback rate if none is available
     """
-    logger.debug(f"Getting exchange rate from {from_currency} to {to_currency}")
-
-    # Check cache first
-    cached_rate = exchange_rate_cache.get(from_currency, to_currency)
-    if cached_rate is not None:
-        logger.debug(f"Using cached exchange rate: {cached_rate}")
-        return cached_rate
-
-    logger.debug("No cached rate found, fetching from API")
-
-    try:
-        # Using exchangerate-api.com (free tier)
-        api_key = os.environ.get("EXCHANGE_RATE_API_KEY")
-        logger.debug(f"Exchange rate API key present: {bool(api_key)}")
+    logger.debug(
+        f"Getting exchange rate from {from_currency} to {to_currency} on {on_date or 'today'}"
+    )
 
-        if not api_key:
-            logger.warning("EXCHANGE_RATE_API_KEY not found. Using fallback rate.")
-            fallback_rate = 83.0  # Fallback rate for USD to INR
-            logger.debug(f"Using fallback rate: {fallback_rate}")
-            exchange_rate_cache.set(from_currency, to_currency, fallback_rate)
-            return fallback_rate
+    rate = exchange_rate_store.get_rate(from_currency, to_currency, on_date)
+    if rate is None:
+        logger.debug(f"Using fallback rate: {FALLBACK_EXCHANGE_RATE}")
+        return FALLBACK_EXCHANGE_RATE
 
-        url = f"https://v6.exchangerate-api.com/v6/{api_key}/pair/{from_currency}/{to_currency}"
-        logger.debug(f"Making API request to: {url}")
+    logger.debug(f"Retrieved exchange rate: {rate}")
+    return rate
 
-        response = requests.get(url)
-        logger.debug(f"API response status: {response.status_code}")
-        response.raise_for_status()
 
-        data = response.json()
-        logger.debug(f"API response data keys: {list(data.keys())}")
-
-        rate = float(data.get("conversion_rate", 83.0))
-        logger.debug(f"Retrieved exchange rate: {rate}")
-
-        # Cache the rate
-        exchange_rate_cache.set(from_currency, to_currency, rate)
-        logger.debug("Cached exchange rate for future use")
-
-        return rate
-
-    except Exception as e:
-        logger.error(
-            f"Error fetching exchange rate for {from_currency}/{to_currency}: {e}"
-        )
-        logger.debug(
-            f"Exchange rate API error details: {type(e).__name__}: {str(e)}",
-            exc_info=True,
-        )
-        fallback_rate = 83.0  # Fallback rate
-        logger.debug(f"Using fallback rate due to error: {fallback_rate}")
-        return fallback_rate
-
-
-def convert_currency(amount: str, from_currency: str, to_currency: str) -> str:
+def convert_currency(
+    amount: str, from_currency: str, to_currency: str, on_date: Optional[date] = None
+) -> str:
     """
     Convert amount from one currency to another.
 
@@ -293,6 +198,7 @@ def convert_currency(amount: str, from_currency: str, to_currency: str) -> str:
         amount (str): Amount to convert
         from_currency (str): Source currency code
         to_currency (str): Target currency code
+        on_date (date, optional): Transaction date whose rate is used, defaults to today
 
     Returns:
         str: Converted amount as string
@@ -306,7 +212,7 @@ def convert_currency(amount: str, from_currency: str, to_currency: str) -> str:
             return amount
 
         # Get exchange rate
-        rate = get_exchange_rate(from_currency, to_currency)
+        rate = get_exchange_rate(from_currency, to_currency, on_date)
 
         # Convert amount
         converted_amount = amount_float * rate
@@ -319,6 +225,23 @@ def convert_currency(amount: str, from_currency: str, to_currency: str) -> str:
         return amount
 
 
+def parse_transaction_date(date_str: str) -> Optional[date]:
+    """
+    Parse a standardized DD-MM-YYYY transaction date.
+
+    Args:
+        date_str (str): Date as returned by standardize_date_format
+
+    Returns:
+        Optional[date]: The date, or None if it is unknown or unparseable
+    """
+    try:
+        return datetime.strptime(date_str, "%d-%m-%Y").date()
+    except (ValueError, TypeError):
+        logger.debug(f"Could not parse transaction date '{date_str}'")
+        return None
+
+
 def detect_currency(cleaned_body: str) -> str:
     """
     Detect the currency from the email body.
@@ -409,26 +332,191 @@ def get_gemini_api_key_from_config():
         return None
 
 
-def extract_transaction_details(body):
+# Fields the LLM is asked to extract from every bank alert
+TRANSACTION_FIELDS = [
+    "amount",
+    "date",
+    "transaction_time",
+    "account_number",
+    "recipient",
+]
+
+GEMINI_MODEL = "gemini-2.0-flash-lite"
+
+# Few-shot examples shared by the single and batched extraction prompts
+FEW_SHOT_EXAMPLES = [
+    {
+        "email": """Your HDFC Bank Credit Card ending 1234 was used for Rs.2,500.00 at AMAZON RETAIL INDIA on 2024-01-15 17:45:32. If not done by you, call 18002586161.""",
+        "extraction": {
+            "amount": "2500.00",
+            "date": "2024-01-15",
+            "transaction_time": "17:45:32",
+            "account_number": "XX1234",
+            "recipient": "AMAZON RETAIL INDIA",
+        },
+    },
+    {
+        "email": """SBI Transaction Alert: Your account XX7890 has been debited by INR 1,200 on 12-Mar-2024 at 09:30:45 for payment to FLIPKART PVT LTD.""",
+        "extraction": {
+            "amount": "1200",
+            "date": "12-Mar-2024",
+            "transaction_time": "09:30:45",
+            "account_number": "XX7890",
+            "recipient": "FLIPKART PVT LTD",
+        },
+    },
+    {
+        "email": """ICICI Bank: Rs 350.75 debited from your a/c XX5678 on 22 Apr 2024 for POS tx at SWIGGY. Avl Bal: Rs.12,456.80""",
+        "extraction": {
+            "amount": "350.75",
+            "date": "22 Apr 2024",
+            "transaction_time": "Unknown",
+            "account_number": "XX5678",
+            "recipient": "SWIGGY",
+        },
+    },
+    {
+        "email": """Your ICICI Bank Credit Card XX9005 has been used for a transaction of USD 16.52 on May 11, 2025 at 12:00:54. Info: SQSP* INV181442393.""",
+        "extraction": {
+            "amount": "16.52",
+            "date": "May 11, 2025",
+            "transaction_time": "12:00:54",
+            "account_number": "XX9005",
+            "recipient": "SQSP* INV181442393",
+        },
+    },
+]
+
+# Bump when the extraction prompts change so cached LLM results are not reused
+EXTRACTION_PROMPT_VERSION = "1"
+
+# Batch sizing: bodies are packed until the estimated prompt tokens reach the
+# budget, and the item count is capped so the JSON array fits the output limit.
+DEFAULT_BATCH_TOKEN_BUDGET = 12000
+MAX_BATCH_SIZE = 25
+_CHARS_PER_TOKEN = 4
+
+# Upper bound on in-flight requests per LLM provider, shared by all threads
+LLM_CONCURRENCY_LIMITS = {"gemini": int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))}
+_llm_slots = {
+    provider: threading.BoundedSemaphore(limit)
+    for provider, limit in LLM_CONCURRENCY_LIMITS.items()
+}
+
+
+def _default_transaction_values() -> Dict[str, str]:
+    """Return extraction results with every field set to "Unknown"."""
+    return dict.fromkeys(TRANSACTION_FIELDS, "Unknown")
+
+
+def _format_few_shot_examples() -> str:
+    """Format the few-shot examples for inclusion in a prompt."""
+    examples_text = ""
+    for idx, example in enumerate(FEW_SHOT_EXAMPLES):
+        examples_text += f"\nExample {idx+1}:\nEmail: {example['email']}\n"
+        examples_text += f"Extraction: {json.dumps(example['extraction'], indent=2)}\n"
+    return examples_text
+
+
+def _normalize_llm_fields(extracted_data: Dict) -> Dict[str, str]:
+    """Keep only the expected string fields, defaulting the rest to "Unknown"."""
+    result_data = {}
+    for field in TRANSACTION_FIELDS:
+        # Check if field exists and has a string value
+        if field in extracted_data and isinstance(extracted_data[field], str):
+            result_data[field] = extracted_data[field]
+        else:
+            result_data[field] = "Unknown"
+    return result_data
+
+
+def _load_gemini_api_key() -> Optional[str]:
+    """Load the Gemini API key from Global Configuration, then the environment."""
+    api_key = get_gemini_api_key_from_config()
+    if not api_key:
+        # Fallback to environment variable
+        api_key = os.environ.get("GEMINI_API_KEY")
+    return api_key
+
+
+def _get_gemini_api_key() -> Optional[str]:
+    """Get the Gemini API key, cached process-wide by the provider registry."""
+    return llm_providers.get_api_key("gemini")
+
+
+def _get_gemini_client(api_key: str):
+    """Get the shared Gemini client for a key, reusing its connections."""
+    return llm_providers.get_client("gemini", api_key)
+
+
+llm_providers.register(
+    "gemini",
+    key_loader=_load_gemini_api_key,
+    client_factory=lambda api_key: genai.Client(api_key=api_key),
+)
+
+
+def _run_concurrently(func: Callable, items: List, provider: str = "gemini") -> List:
+    """
+    Apply func to each item on a bounded thread pool.
+
+    Results are returned in input order regardless of completion order. The
+    pool is sized to the provider's concurrency limit.
+    """
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    max_workers = min(LLM_CONCURRENCY_LIMITS[provider], len(items))
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix=f"{provider}-extract"
+    ) as executor:
+        return list(executor.map(func, items))
+
+
+def _extraction_cache_key(cleaned_body: str) -> str:
+    """Cache key for a body under the current model, prompt and examples."""
+    prompt_version = f"{EXTRACTION_PROMPT_VERSION}\n{_format_few_shot_examples()}"
+    return extraction_cache.make_key(cleaned_body, GEMINI_MODEL, prompt_version)
+
+
+def _cache_extraction(cache_key: str, llm_details: Dict[str, str]):
+    """Cache an LLM result unless it is the all-Unknown failure default."""
+    if any(llm_details.get(field) != "Unknown" for field in TRANSACTION_FIELDS):
+        extraction_cache.set(cache_key, llm_details)
+
+
+def _extract_with_llm_cached(cleaned_body: str) -> Dict[str, str]:
+    """Run the single-email LLM extraction, reusing a cached result if present."""
+    cache_key = _extraction_cache_key(cleaned_body)
+    cached = extraction_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    llm_details = _extract_with_llm_few_shot(cleaned_body)
+    _cache_extraction(cache_key, llm_details)
+    return llm_details
+
+
+def clean_email_body(body: str) -> str:
     """
-    Extract transaction details from email body using only LLM approach,
-    with no regex fallback. Returns the same format as other extraction functions.
+    Undo quoted-printable artifacts left in bank alert bodies.
 
     Args:
-        body (str): Email body text
+        body (str): Raw email body text
 
     Returns:
-        dict: Transaction details with keys: amount, date, transaction_time, account_number, recipient, currency
+        str: Cleaned email body text
     """
-    # Clean the body first
     cleaned_body = re.sub(r"=\s*\n", "", body)
     cleaned_body = cleaned_body.replace("=20", " ")
     cleaned_body = cleaned_body.replace("=A0", " ")
     cleaned_body = cleaned_body.replace("\r", "")
+    return cleaned_body
 
-    # Use the few-shot LLM approach
-    llm_details = _extract_with_llm_few_shot(cleaned_body)
 
+def _post_process_details(
+    llm_details: Dict[str, str], cleaned_body: str
+) -> Dict[str, str]:
+    """Add currency and normalize amount and date of raw LLM extraction results."""
     # Detect currency
     currency = detect_currency(cleaned_body)
     llm_details["currency"] = currency
@@ -441,14 +529,307 @@ def extract_transaction_details(body):
     if llm_details["date"] != "Unknown":
         llm_details["date"] = standardize_date_format(llm_details["date"])
 
-    # Convert USD to INR if needed
+    # Convert USD to INR with the rate of the transaction date if needed
     if llm_details["currency"] == "USD" and llm_details["amount"] != "Unknown":
-        llm_details["amount"] = convert_currency(llm_details["amount"], "USD", "INR")
+        llm_details["amount"] = convert_currency(
+            llm_details["amount"],
+            "USD",
+            "INR",
+            parse_transaction_date(llm_details["date"]),
+        )
         llm_details["currency"] = "INR"  # Update currency after conversion
 
     return llm_details
 
 
+def extract_transaction_details(body, sender=None, user_id=None):
+    """
+    Extract transaction details from email body. Templates learned for the
+    user's sender are tried first, then cached LLM results for identical content;
+    the LLM is only called when both miss. Returns the same format as other extraction functions.
+
+    Args:
+        body (str): Email body text
+        sender (str, optional): Bank sender address, enables the template fast path
+        user_id (int, optional): User the email belongs to; templates are only
+            used and learned per user
+
+    Returns:
+        dict: Transaction details with keys: amount, date, transaction_time, account_number, recipient, currency
+    """
+    # Clean the body first
+    cleaned_body = clean_email_body(body)
+
+    llm_details = template_extractor.extract(user_id, sender, cleaned_body)
+    if llm_details is None:
+        # Use the few-shot LLM approach, memoized on the body content
+        llm_details = _extract_with_llm_cached(cleaned_body)
+        template_extractor.learn(user_id, sender, cleaned_body, llm_details)
+
+    return _post_process_details(llm_details, cleaned_body)
+
+
+def extract_transaction_details_batch(
+    bodies: Dict[str, str],
+    token_budget: int = DEFAULT_BATCH_TOKEN_BUDGET,
+    senders: Optional[Dict[str, str]] = None,
+    user_id: Optional[int] = None,
+) -> Dict[str, Dict[str, str]]:
+    """
+    Extract transaction details for many emails with as few LLM calls as possible.
+
+    Emails matching a template learned for the user's sender, or whose
+    content was already extracted (see extraction_cache), skip the LLM. The
+    rest are packed into batches that fit the token budget and each batch is
+    sent as one structured-output request. Items missing from, or unparseable
+    in, a batch response fall back to a per-email call. Batches and fallback
+    calls run concurrently, bounded by LLM_CONCURRENCY_LIMITS. Successful LLM
+    extractions are learned as templates for later emails.
+
+    Args:
+        bodies (dict): Email body text keyed by message ID
+        token_budget (int): Approximate prompt token budget per batch
+        senders (dict, optional): Bank sender address keyed by message ID
+        user_id (int, optional): User the emails belong to; templates are only
+            used and learned per user
+
+    Returns:
+        dict: Transaction details (same format as extract_transaction_details)
+              keyed by message ID
+    """
+    if not bodies:
+        return {}
+
+    cleaned_bodies = {
+        message_id: clean_email_body(body) for message_id, body in bodies.items()
+    }
+    senders = senders or {}
+    raw_results: Dict[str, Dict[str, str]] = {}
+
+    for message_id, cleaned_body in cleaned_bodies.items():
+        template_details = template_extractor.extract(
+            user_id, senders.get(message_id), cleaned_body
+        )
+        if template_details is not None:
+            raw_results[message_id] = template_details
+    if raw_results:
+        logger.info(f"Extracted {len(raw_results)} emails with learned templates")
+
+    llm_bodies = {
+        message_id: cleaned_body
+        for message_id, cleaned_body in cleaned_bodies.items()
+        if message_id not in raw_results
+    }
+
+    cache_keys = {
+        message_id: _extraction_cache_key(cleaned_body)
+        for message_id, cleaned_body in llm_bodies.items()
+    }
+    uncached_bodies = {}
+    for message_id, cleaned_body in llm_bodies.items():
+        cached = extraction_cache.get(cache_keys[message_id])
+        if cached is not None:
+            raw_results[message_id] = cached
+        else:
+            uncached_bodies[message_id] = cleaned_body
+    if len(uncached_bodies) < len(llm_bodies):
+        logger.info(
+            f"Reused {len(llm_bodies) - len(uncached_bodies)} cached LLM extractions"
+        )
+
+    if len(uncached_bodies) > 1:
+        api_key = _get_gemini_api_key()
+        if api_key:
+            client = _get_gemini_client(api_key)
+            batches = _plan_batches(uncached_bodies, token_budget)
+            logger.info(
+                f"Extracting {len(uncached_bodies)} emails in {len(batches)} LLM batch(es)"
+            )
+            for batch_results in _run_concurrently(
+                lambda batch: _extract_batch_with_llm(client, batch), batches
+            ):
+                raw_results.update(batch_results)
+
+    fallback_ids = [
+        message_id for message_id in uncached_bodies if message_id not in raw_results
+    ]
+    if fallback_ids and len(uncached_bodies) > 1:
+        logger.info(
+            f"Falling back to per-email extraction for {len(fallback_ids)} email(s)"
+        )
+    fallback_results = _run_concurrently(
+        lambda message_id: _extract_with_llm_few_shot(llm_bodies[message_id]),
+        fallback_ids,
+    )
+    raw_results.update(zip(fallback_ids, fallback_results))
+
+    for message_id in uncached_bodies:
+        _cache_extraction(cache_keys[message_id], raw_results[message_id])
+
+    # Learn templates from LLM results before post-processing rewrites values
+    for message_id, cleaned_body in llm_bodies.items():
+        template_extractor.learn(
+            user_id, senders.get(message_id), cleaned_body, raw_results[message_id]
+        )
+
+    _prefetch_exchange_rates(raw_results, cleaned_bodies)
+
+    return {
+        message_id: _post_process_details(
+            raw_results[message_id], cleaned_bodies[message_id]
+        )
+        for message_id in cleaned_bodies
+    }
+
+
+def _prefetch_exchange_rates(
+    raw_results: Dict[str, Dict[str, str]], cleaned_bodies: Dict[str, str]
+):
+    """Load the USD/INR rates of all dates in a batch with one store lookup."""
+    dates = set()
+    for message_id, cleaned_body in cleaned_bodies.items():
+        details = raw_results[message_id]
+        if details.get("date", "Unknown") == "Unknown":
+            continue
+        if detect_currency(cleaned_body) != "USD":
+            continue
+        dates.add(parse_transaction_date(standardize_date_format(details["date"])))
+    dates.discard(None)
+
+    if dates:
+        logger.debug(f"Prefetching USD/INR rates for {len(dates)} date(s)")
+        exchange_rate_store.prefetch("USD", "INR", dates)
+
+
+def _estimate_tokens(text: str) -> int:
+    """Roughly estimate the token count of a prompt fragment."""
+    return len(text) // _CHARS_PER_TOKEN + 1
+
+
+def _plan_batches(
+    cleaned_bodies: Dict[str, str],
+    token_budget: int = DEFAULT_BATCH_TOKEN_BUDGET,
+    max_batch_size: int = MAX_BATCH_SIZE,
+) -> List[Dict[str, str]]:
+    """
+    Split bodies into batches that fit the token budget.
+
+    The fixed prompt overhead (instructions and few-shot examples) is counted
+    once per batch. A body larger than the remaining budget starts a new batch
+    on its own, so every item is always placed.
+    """
+    overhead = _estimate_tokens(_format_few_shot_examples()) + 300
+    available = max(token_budget - overhead, 1)
+
+    batches: List[Dict[str, str]] = []
+    current: Dict[str, str] = {}
+    current_tokens = 0
+    for message_id, body in cleaned_bodies.items():
+        body_tokens = _estimate_tokens(body) + 10  # ID and delimiter overhead
+        if current and (
+            current_tokens + body_tokens > available or len(current) >= max_batch_size
+        ):
+            batches.append(current)
+            current, current_tokens = {}, 0
+        current[message_id] = body
+        current_tokens += body_tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _build_batch_prompt(batch: Dict[str, str]) -> str:
+    """Build the few-shot prompt asking for a JSON array of extractions."""
+    emails_text = ""
+    for message_id, body in batch.items():
+        emails_text += f"\n--- EMAIL message_id={message_id} ---\n{body}\n"
+
+    return f"""You are a specialized financial email parser. Extract transaction details from bank notification emails.
+
+Extract the following details from each bank transaction email:
+- Amount (in INR/Rs or USD format, return only the number)
+- Date (in any format)
+- Transaction time (in HH:MM:SS format if available)
+- Account number (masked as XXnnnn)
+- Recipient/merchant name
+
+Here are some examples of how to extract this information correctly:{_format_few_shot_examples()}
+
+Now extract details from each of these {len(batch)} new emails:
+{emails_text}
+
+Return ONLY a valid JSON array with one object per email. Each object must have the fields: "message_id" (copied exactly from the email header line), "amount", "date", "transaction_time", "account_number", "recipient"
+
+If any field cannot be found with high confidence, use "Unknown" as its value.
+
+Follow these rules strictly:
+1. Extract only the requested fields.
+2. Return values EXACTLY as they appear in the email, following the format shown in the examples.
+3. For amount, extract only the numeric value without currency symbols or commas.
+4. DO NOT make up or infer values not clearly stated in the email.
+5. Never mix details between emails."""
+
+
+_BATCH_RESPONSE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            field: {"type": "STRING"} for field in ["message_id", *TRANSACTION_FIELDS]
+        },
+        "required": ["message_id", *TRANSACTION_FIELDS],
+    },
+}
+
+
+def _extract_batch_with_llm(client, batch: Dict[str, str]) -> Dict[str, Dict[str, str]]:
+    """
+    Extract transaction details for a batch of emails in one Gemini call.
+
+    Args:
+        client: Gemini client
+        batch (dict): Cleaned email bodies keyed by message ID
+
+    Returns:
+        dict: Raw extraction results keyed by message ID. Items the model
+              dropped or returned malformed are omitted so the caller can retry
+              them individually.
+    """
+    try:
+        with _llm_slots["gemini"]:
+            response = client.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=_build_batch_prompt(batch),
+                config={
+                    "temperature": 0.2,
+                    "top_p": 0.9,
+                    "response_mime_type": "application/json",
+                    "response_schema": _BATCH_RESPONSE_SCHEMA,
+                },
+            )
+        extracted_items = json.loads(response.text)
+    except Exception as e:
+        logger.error(f"Batched Gemini extraction failed for {len(batch)} emails: {e}")
+        return {}
+
+    if not isinstance(extracted_items, list):
+        logger.error("Batched Gemini response was not a JSON array")
+        return {}
+
+    results = {}
+    for item in extracted_items:
+        if not isinstance(item, dict):
+            continue
+        message_id = str(item.get("message_id", ""))
+        if message_id in batch and message_id not in results:
+            results[message_id] = _normalize_llm_fields(item)
+
+    missing = len(batch) - len(results)
+    if missing:
+        logger.warning(f"Batched Gemini response missing {missing} of {len(batch)}")
+    return results
+
+
 def _extract_with_llm_few_shot(cleaned_body: str) -> Dict[str, str]:
     """
     Extract transaction details using Google's Gemini LLM with few-shot examples
@@ -460,80 +841,22 @@ def _extract_with_llm_few_shot(cleaned_body: str) -> Dict[str, str]:
         dict: Transaction details extracted by the LLM
     """
     # Default values in case of API failures
-    default_values = {
-        "amount": "Unknown",
-        "date": "Unknown",
-        "transaction_time": "Unknown",
-        "account_number": "Unknown",
-        "recipient": "Unknown",
-    }
+    default_values = _default_transaction_values()
 
     # Check if API key is available from Global Configuration Settings
-    api_key = get_gemini_api_key_from_config()
+    api_key = _get_gemini_api_key()
     if not api_key:
-        # Fallback to environment variable
-        api_key = os.environ.get("GEMINI_API_KEY")
-        if not api_key:
-            logging.warning(
-                "Gemini API key not found in Global Configuration Settings or environment variables. Using regex fallback."
-            )
-            return default_values
+        logging.warning(
+            "Gemini API key not found in Global Configuration Settings or environment variables. Using regex fallback."
+        )
+        return default_values
 
     try:
         # Configure the Gemini API
-        client = genai.Client(api_key=api_key)
-
-        # Few-shot examples
-        examples = [
-            {
-                "email": """Your HDFC Bank Credit Card ending 1234 was used for Rs.2,500.00 at AMAZON RETAIL INDIA on 2024-01-15 17:45:32. If not done by you, call 18002586161.""",
-                "extraction": {
-                    "amount": "2500.00",
-                    "date": "2024-01-15",
-                    "transaction_time": "17:45:32",
-                    "account_number": "XX1234",
-                    "recipient": "AMAZON RETAIL INDIA",
-                },
-            },
-            {
-                "email": """SBI Transaction Alert: Your account XX7890 has been debited by INR 1,200 on 12-Mar-2024 at 09:30:45 for payment to FLIPKART PVT LTD.""",
-                "extraction": {
-                    "amount": "1200",
-                    "date": "12-Mar-2024",
-                    "transaction_time": "09:30:45",
-                    "account_number": "XX7890",
-                    "recipient": "FLIPKART PVT LTD",
-                },
-            },
-            {
-                "email": """ICICI Bank: Rs 350.75 debited from your a/c XX5678 on 22 Apr 2024 for POS tx at SWIGGY. Avl Bal: Rs.12,456.80""",
-                "extraction": {
-                    "amount": "350.75",
-                    "date": "22 Apr 2024",
-                    "transaction_time": "Unknown",
-                    "account_number": "XX5678",
-                    "recipient": "SWIGGY",
-                },
-            },
-            {
-                "email": """Your ICICI Bank Credit Card XX9005 has been used for a transaction of USD 16.52 on May 11, 2025 at 12:00:54. Info: SQSP* INV181442393.""",
-                "extraction": {
-                    "amount": "16.52",
-                    "date": "May 11, 2025",
-                    "transaction_time": "12:00:54",
-                    "account_number": "XX9005",
-                    "recipient": "SQSP* INV181442393",
-                },
-            },
-        ]
+        client = _get_gemini_client(api_key)
 
         # Format examples for the prompt
-        examples_text = ""
-        for idx, example in enumerate(examples):
-            examples_text += f"\nExample {idx+1}:\nEmail: {example['email']}\n"
-            examples_text += (
-                f"Extraction: {json.dumps(example['extraction'], indent=2)}\n"
-            )
+        examples_text = _format_few_shot_examples()
 
         # Prepare the prompt with few-shot examples
         prompt = f"""You are a specialized financial email parser. Extract transaction details from bank notification emails.
@@ -561,15 +884,16 @@ Follow these rules strictly:
 4. DO NOT make up or infer values not clearly stated in the email."""
 
         # Generate response using the Gemini model
-        response = client.models.generate_content(
-            model="gemini-2.0-flash-lite",
-            contents=prompt,
-            config={
-                "temperature": 0.2,
-                "top_p": 0.9,
-                "response_mime_type": "application/json",
-            },
-        )
+        with _llm_slots["gemini"]:
+            response = client.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=prompt,
+                config={
+                    "temperature": 0.2,
+                    "top_p": 0.9,
+                    "response_mime_type": "application/json",
+                },
+            )
 
         # Try to extract JSON from the response
         try:
@@ -578,23 +902,7 @@ Follow these rules strictly:
             extracted_data = json.loads(content)
 
             # Ensure all required fields are present with proper type checking
-            result_data = {}
-            required_fields = [
-                "amount",
-                "date",
-                "transaction_time",
-                "account_number",
-                "recipient",
-            ]
-
-            for field in required_fields:
-                # Check if field exists and has a string value
-                if field in extracted_data and isinstance(extracted_data[field], str):
-                    result_data[field] = extracted_data[field]
-                else:
-                    result_data[field] = "Unknown"
-
-            return result_data
+            return _normalize_llm_fields(extracted_data)
 
         except (json.JSONDecodeError, IndexError, AttributeError, TypeError) as e:
             logging.error(f"Failed to parse Gemini response: {e}")
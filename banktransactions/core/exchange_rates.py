@@ -0,0 +1,581 @@
+#!/usr/bin/env python3
+"""
+Shared store of daily exchange rates keyed by currency pair and date.
+
+A transaction is converted with the rate of the day it happened, not the
+rate of the day its email was processed. Rates are looked up in process
+memory, then Redis (shared by every worker), then the exchange_rates table
+(shared with backfills and kept across Redis restarts), and only the dates
+still missing are requested from exchangerate-api.com.
+
+A past day's rate never changes, so it is fetched once and kept. The
+current day's rate is treated as fresh for ``fresh_seconds``; after that the
+stored rate is still returned immediately while one background refresh,
+guarded across workers by a Redis lock, replaces it (stale-while-revalidate).
+
+Dates the provider has no rate for (e.g. history on the free tier) are
+remembered as misses for ``MISS_TTL_SECONDS``, so every conversion does not
+repeat the failing requests.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from banktransactions.core.redis_store import connect_from_env
+
+logger = logging.getLogger(__name__)
+
+# One hash per currency pair: field = ISO date, value = {"rate", "fetched_at"}
+REDIS_RATES_PREFIX = "kanakku:exchange_rates:"
+REDIS_REFRESH_LOCK_PREFIX = "kanakku:exchange_rates_refresh:"
+REFRESH_LOCK_SECONDS = 60
+# One key per currency pair and date the provider had no rate for
+REDIS_MISS_PREFIX = "kanakku:exchange_rates_miss:"
+MISS_TTL_SECONDS = 60 * 60
+
+DEFAULT_FRESH_SECONDS = 60 * 60
+RATE_SOURCE = "exchangerate-api"
+API_BASE_URL = "https://v6.exchangerate-api.com/v6"
+API_TIMEOUT_SECONDS = 10
+API_CONCURRENCY = 4
+
+_missing_key_warned = False
+
+
+def _utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _fetch_api_rate(
+    api_key: str, from_currency: str, to_currency: str, rate_date: date, today: date
+) -> Optional[float]:
+    """Fetch one day's rate; today's from the pair endpoint, past days from history."""
+    if rate_date >= today:
+        url = f"{API_BASE_URL}/{api_key}/pair/{from_currency}/{to_currency}"
+    else:
+        url = (
+            f"{API_BASE_URL}/{api_key}/history/{from_currency}/"
+            f"{rate_date.year}/{rate_date.month}/{rate_date.day}"
+        )
+    try:
+        response = requests.get(url, timeout=API_TIMEOUT_SECONDS)
+        logger.debug(
+            f"Exchange rate API status for {from_currency}/{to_currency} "
+            f"on {rate_date}: {response.status_code}"
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        if rate_date >= today:
+            rate = data.get("conversion_rate")
+        else:
+            rate = data.get("conversion_rates", {}).get(to_currency)
+        if rate is None:
+            logger.warning(
+                f"No {from_currency}/{to_currency} rate for {rate_date} in API response"
+            )
+            return None
+        return float(rate)
+
+    except Exception as e:
+        logger.error(
+            f"Error fetching exchange rate for {from_currency}/{to_currency} "
+            f"on {rate_date}: {e}"
+        )
+        logger.debug(
+            f"Exchange rate API error details: {type(e).__name__}: {str(e)}",
+            exc_info=True,
+        )
+        return None
+
+
+def fetch_rates_from_api(
+    from_currency: str, to_currency: str, dates: List[date], today: date
+) -> Dict[date, float]:
+    """
+    Fetch daily rates from exchangerate-api.com.
+
+    The provider has no range endpoint, so each date is one request; the
+    requests run concurrently.
+
+    Args:
+        from_currency (str): Source currency code
+        to_currency (str): Target currency code
+        dates (List[date]): Dates to fetch
+        today (date): Current date; its rate comes from the latest-rate endpoint
+
+    Returns:
+        Dict[date, float]: Rates that could be fetched, by date
+    """
+    global _missing_key_warned
+
+    api_key = os.environ.get("EXCHANGE_RATE_API_KEY")
+    if not api_key:
+        if not _missing_key_warned:
+            logger.warning("EXCHANGE_RATE_API_KEY not found. Using fallback rate.")
+            _missing_key_warned = True
+        return {}
+    if not dates:
+        return {}
+
+    logger.debug(
+        f"Fetching {len(dates)} {from_currency}/{to_currency} rate(s) from the API"
+    )
+    with ThreadPoolExecutor(max_workers=min(API_CONCURRENCY, len(dates))) as pool:
+        rates = pool.map(
+            lambda rate_date: _fetch_api_rate(
+                api_key, from_currency, to_currency, rate_date, today
+            ),
+            dates,
+        )
+        return {
+            rate_date: rate for rate_date, rate in zip(dates, rates) if rate is not None
+        }
+
+
+@contextmanager
+def _database_session():
+    """
+    Provide a session for the exchange rate service, if one is cheaply available.
+
+    Uses the current Flask app context or a standalone DatabaseManager
+    session when DATABASE_URL is set. Unlike processed_ids_db, a Flask app
+    is never built just to look up a rate; False is yielded instead.
+
+    Yields:
+        Optional[Session]: Session for the service, None for the app's
+                           db.session, or False when there is no database
+    """
+    from flask import has_app_context
+
+    if has_app_context():
+        yield None
+        return
+
+    if os.getenv("DATABASE_URL"):
+        from shared.database import DatabaseManager
+
+        with DatabaseManager.session_scope() as session:
+            yield session
+        return
+
+    logger.debug("No database available for exchange rates")
+    yield False
+
+
+def _to_epoch(fetched_at) -> float:
+    if fetched_at is None:
+        return 0.0
+    if fetched_at.tzinfo is None:
+        fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+    return fetched_at.timestamp()
+
+
+class ExchangeRateStore:
+    """
+    Daily exchange rates shared by every worker.
+
+    Lookups go through process memory, Redis (when configured) and the
+    database (when reachable) before the API, and everything fetched is
+    written back to all of them.
+    """
+
+    def __init__(
+        self,
+        redis_conn=None,
+        fresh_seconds: int = DEFAULT_FRESH_SECONDS,
+        fetcher: Callable[
+            [str, str, List[date], date], Dict[date, float]
+        ] = fetch_rates_from_api,
+        use_database: bool = True,
+        clock: Callable[[], float] = time.time,
+        today: Callable[[], date] = _utc_today,
+    ):
+        logger.debug(
+            f"Initializing ExchangeRateStore with fresh_seconds={fresh_seconds}, "
+            f"redis={'yes' if redis_conn is not None else 'no'}"
+        )
+        self.redis_conn = redis_conn
+        self.fresh_seconds = fresh_seconds
+        self.fetcher = fetcher
+        self.use_database = use_database
+        self.clock = clock
+        self.today = today
+        self._memory: Dict[Tuple[str, str, date], Tuple[float, float]] = {}
+        # Known misses, with the clock time they expire at
+        self._misses: Dict[Tuple[str, str, date], float] = {}
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.stats = {"hits": 0, "fetched": 0, "stale": 0, "known_misses": 0}
+
+    def get_rate(
+        self, from_currency: str, to_currency: str, on_date: Optional[date] = None
+    ) -> Optional[float]:
+        """
+        Get the rate of a currency pair on a given day.
+
+        If the provider has no rate for a past day, the current rate is used.
+
+        Args:
+            from_currency (str): Source currency code
+            to_currency (str): Target currency code
+            on_date (date, optional): Transaction date, defaults to today
+
+        Returns:
+            Optional[float]: The rate, or None if no rate is available
+        """
+        today = self.today()
+        on_date = min(on_date or today, today)
+
+        rate = self.prefetch(from_currency, to_currency, [on_date]).get(on_date)
+        if rate is None and on_date != today:
+            logger.warning(
+                f"No {from_currency}/{to_currency} rate for {on_date}, "
+                "using the current rate"
+            )
+            rate = self.prefetch(from_currency, to_currency, [today]).get(today)
+        return rate
+
+    def prefetch_range(
+        self, from_currency: str, to_currency: str, start_date: date, end_date: date
+    ) -> Dict[date, float]:
+        """
+        Load the rates of every day in a date range, inclusive.
+
+        Args:
+            from_currency (str): Source currency code
+            to_currency (str): Target currency code
+            start_date (date): First date of the range
+            end_date (date): Last date of the range
+
+        Returns:
+            Dict[date, float]: Rates that are available, by date
+        """
+        days = (end_date - start_date).days
+        return self.prefetch(
+            from_currency,
+            to_currency,
+            [start_date + timedelta(days=offset) for offset in range(days + 1)],
+        )
+
+    def prefetch(
+        self, from_currency: str, to_currency: str, dates: Iterable[date]
+    ) -> Dict[date, float]:
+        """
+        Load the rates of a currency pair for many dates at once.
+
+        Each layer is asked once for everything the previous layers missed:
+        one HMGET, one database range query and API requests only for the
+        dates found nowhere and not recently missed by the API. Future dates
+        are treated as today.
+
+        Args:
+            from_currency (str): Source currency code
+            to_currency (str): Target currency code
+            dates (Iterable[date]): Dates to load
+
+        Returns:
+            Dict[date, float]: Rates that are available, by date
+        """
+        today = self.today()
+        wanted = sorted({min(rate_date, today) for rate_date in dates})
+        if not wanted:
+            return {}
+
+        found: Dict[date, Tuple[float, float]] = {}
+        with self._lock:
+            for rate_date in wanted:
+                entry = self._memory.get((from_currency, to_currency, rate_date))
+                if entry is not None:
+                    found[rate_date] = entry
+        self.stats["hits"] += len(found)
+
+        missing = [rate_date for rate_date in wanted if rate_date not in found]
+        if missing:
+            from_redis = self._get_from_redis(from_currency, to_currency, missing)
+            found.update(from_redis)
+            self._remember(from_currency, to_currency, from_redis)
+
+        missing = [rate_date for rate_date in wanted if rate_date not in found]
+        if missing:
+            from_database = self._get_from_database(from_currency, to_currency, missing)
+            found.update(from_database)
+            self._remember(from_currency, to_currency, from_database)
+            self._set_in_redis(from_currency, to_currency, from_database)
+
+        missing = [rate_date for rate_date in wanted if rate_date not in found]
+        if missing:
+            known_misses = self._get_known_misses(from_currency, to_currency, missing)
+            self.stats["known_misses"] += len(known_misses)
+            missing = [
+                rate_date for rate_date in missing if rate_date not in known_misses
+            ]
+        if missing:
+            fetched = self._fetch(from_currency, to_currency, missing, today)
+            found.update(fetched)
+            self._remember_misses(
+                from_currency,
+                to_currency,
+                [rate_date for rate_date in missing if rate_date not in fetched],
+            )
+
+        stale = found.get(today)
+        if stale is not None and self.clock() - stale[1] > self.fresh_seconds:
+            self.stats["stale"] += 1
+            self._revalidate(from_currency, to_currency, today)
+
+        logger.debug(
+            f"Prefetched {len(found)}/{len(wanted)} {from_currency}/{to_currency} rates"
+        )
+        return {rate_date: entry[0] for rate_date, entry in found.items()}
+
+    def clear(self):
+        """Forget in-memory rates and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            self._misses.clear()
+        self.stats = {"hits": 0, "fetched": 0, "stale": 0, "known_misses": 0}
+
+    def _remember(
+        self,
+        from_currency: str,
+        to_currency: str,
+        entries: Dict[date, Tuple[float, float]],
+    ):
+        with self._lock:
+            for rate_date, entry in entries.items():
+                self._memory[(from_currency, to_currency, rate_date)] = entry
+
+    def _get_known_misses(
+        self, from_currency: str, to_currency: str, dates: List[date]
+    ) -> set:
+        """Return the dates the API recently had no rate for."""
+        now = self.clock()
+        known = set()
+        with self._lock:
+            for rate_date in dates:
+                key = (from_currency, to_currency, rate_date)
+                expires_at = self._misses.get(key)
+                if expires_at is not None and expires_at > now:
+                    known.add(rate_date)
+                elif expires_at is not None:
+                    del self._misses[key]
+
+        unknown = [rate_date for rate_date in dates if rate_date not in known]
+        if self.redis_conn is None or not unknown:
+            return known
+        try:
+            values = self.redis_conn.mget(
+                [
+                    f"{REDIS_MISS_PREFIX}{from_currency}:{to_currency}:"
+                    f"{rate_date.isoformat()}"
+                    for rate_date in unknown
+                ]
+            )
+            from_redis = [
+                rate_date
+                for rate_date, value in zip(unknown, values)
+                if value is not None
+            ]
+        except Exception as e:
+            logger.warning(f"Could not read exchange rate misses from Redis: {e}")
+            return known
+
+        # Redis does not say how long is left; keep them for a full TTL here
+        with self._lock:
+            for rate_date in from_redis:
+                self._misses[(from_currency, to_currency, rate_date)] = (
+                    now + MISS_TTL_SECONDS
+                )
+        return known.union(from_redis)
+
+    def _remember_misses(self, from_currency: str, to_currency: str, dates: List[date]):
+        """Record dates the API had no rate for, in memory and Redis."""
+        if not dates:
+            return
+        logger.debug(
+            f"No {from_currency}/{to_currency} rate for {len(dates)} date(s), "
+            f"not asking again for {MISS_TTL_SECONDS}s"
+        )
+        expires_at = self.clock() + MISS_TTL_SECONDS
+        with self._lock:
+            for rate_date in dates:
+                self._misses[(from_currency, to_currency, rate_date)] = expires_at
+
+        if self.redis_conn is None:
+            return
+        try:
+            pipe = self.redis_conn.pipeline()
+            for rate_date in dates:
+                pipe.set(
+                    f"{REDIS_MISS_PREFIX}{from_currency}:{to_currency}:"
+                    f"{rate_date.isoformat()}",
+                    "1",
+                    ex=MISS_TTL_SECONDS,
+                )
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not write exchange rate misses to Redis: {e}")
+
+    def _fetch(
+        self, from_currency: str, to_currency: str, dates: List[date], today: date
+    ) -> Dict[date, Tuple[float, float]]:
+        """Fetch rates from the provider and store them in every layer."""
+        rates = self.fetcher(from_currency, to_currency, dates, today)
+        if not rates:
+            return {}
+
+        self.stats["fetched"] += len(rates)
+        now = self.clock()
+        entries = {rate_date: (rate, now) for rate_date, rate in rates.items()}
+        self._remember(from_currency, to_currency, entries)
+        self._set_in_redis(from_currency, to_currency, entries)
+        self._save_to_database(from_currency, to_currency, rates)
+        logger.info(f"Fetched {len(rates)} {from_currency}/{to_currency} rate(s)")
+        return entries
+
+    def _revalidate(self, from_currency: str, to_currency: str, today: date):
+        """Refresh today's rate in the background unless a refresh is running."""
+        key = (from_currency, to_currency, today)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        if self.redis_conn is not None:
+            lock_key = (
+                f"{REDIS_REFRESH_LOCK_PREFIX}{from_currency}:{to_currency}:"
+                f"{today.isoformat()}"
+            )
+            try:
+                acquired = self.redis_conn.set(
+                    lock_key, "1", nx=True, ex=REFRESH_LOCK_SECONDS
+                )
+            except Exception as e:
+                logger.warning(f"Could not take exchange rate refresh lock: {e}")
+                acquired = True
+            if not acquired:
+                logger.debug(
+                    f"{from_currency}/{to_currency} refresh running in another worker"
+                )
+                with self._lock:
+                    self._refreshing.discard(key)
+                return
+
+        def refresh():
+            try:
+                logger.debug(f"Revalidating {from_currency}/{to_currency} rate")
+                self._fetch(from_currency, to_currency, [today], today)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(
+            target=refresh, name="exchange-rate-refresh", daemon=True
+        ).start()
+
+    def _get_from_redis(
+        self, from_currency: str, to_currency: str, dates: List[date]
+    ) -> Dict[date, Tuple[float, float]]:
+        if self.redis_conn is None:
+            return {}
+        try:
+            values = self.redis_conn.hmget(
+                f"{REDIS_RATES_PREFIX}{from_currency}:{to_currency}",
+                [rate_date.isoformat() for rate_date in dates],
+            )
+            entries = {}
+            for rate_date, value in zip(dates, values):
+                if value is not None:
+                    stored = json.loads(value)
+                    entries[rate_date] = (stored["rate"], stored["fetched_at"])
+            logger.debug(f"Redis had {len(entries)}/{len(dates)} requested rates")
+            return entries
+        except Exception as e:
+            logger.warning(f"Could not read exchange rates from Redis: {e}")
+            return {}
+
+    def _set_in_redis(
+        self,
+        from_currency: str,
+        to_currency: str,
+        entries: Dict[date, Tuple[float, float]],
+    ):
+        if self.redis_conn is None or not entries:
+            return
+        try:
+            self.redis_conn.hset(
+                f"{REDIS_RATES_PREFIX}{from_currency}:{to_currency}",
+                mapping={
+                    rate_date.isoformat(): json.dumps(
+                        {"rate": rate, "fetched_at": fetched_at}
+                    )
+                    for rate_date, (rate, fetched_at) in entries.items()
+                },
+            )
+        except Exception as e:
+            logger.warning(f"Could not write exchange rates to Redis: {e}")
+
+    def _get_from_database(
+        self, from_currency: str, to_currency: str, dates: List[date]
+    ) -> Dict[date, Tuple[float, float]]:
+        if not self.use_database:
+            return {}
+        try:
+            from shared.imports import load_exchange_rates
+
+            with _database_session() as session:
+                if session is False:
+                    return {}
+                stored = load_exchange_rates(
+                    from_currency, to_currency, min(dates), max(dates), session
+                )
+            wanted = set(dates)
+            entries = {
+                rate_date: (row["rate"], _to_epoch(row["fetched_at"]))
+                for rate_date, row in (stored or {}).items()
+                if rate_date in wanted
+            }
+            logger.debug(f"Database had {len(entries)}/{len(dates)} requested rates")
+            return entries
+        except Exception as e:
+            logger.warning(f"Could not read exchange rates from the database: {e}")
+            return {}
+
+    def _save_to_database(
+        self, from_currency: str, to_currency: str, rates: Dict[date, float]
+    ):
+        if not self.use_database:
+            return
+        try:
+            from shared.imports import save_exchange_rates
+
+            with _database_session() as session:
+                if session is False:
+                    return
+                save_exchange_rates(
+                    from_currency,
+                    to_currency,
+                    rates,
+                    source=RATE_SOURCE,
+                    db_session=session,
+                )
+        except Exception as e:
+            logger.warning(f"Could not save exchange rates to the database: {e}")
+
+
+# Create a global store instance
+logger.debug("Creating global exchange rate store instance")
+exchange_rate_store = ExchangeRateStore(
+    redis_conn=connect_from_env("exchange rates"),
+    fresh_seconds=int(os.getenv("EXCHANGE_RATE_FRESH_SECONDS", DEFAULT_FRESH_SECONDS)),
+)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Memoization cache for LLM transaction extractions.
+
+Retried jobs, cleared message IDs and identical alert texts would otherwise
+send the same email body to Gemini again. Results are cached under a hash of
+the normalized body plus the model and prompt version, so a prompt or model
+change naturally invalidates old entries.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from banktransactions.core.redis_store import connect_from_env
+
+logger = logging.getLogger(__name__)
+
+# Cached extractions live under this prefix, with a sorted set tracking age
+REDIS_CACHE_PREFIX = "kanakku:extraction_cache:"
+REDIS_CACHE_INDEX_KEY = "kanakku:extraction_cache_index"
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 10000
+
+
+def normalize_body(cleaned_body: str) -> str:
+    """Collapse whitespace so formatting-only differences share an entry."""
+    return re.sub(r"\s+", " ", cleaned_body).strip()
+
+
+class ExtractionCache:
+    """
+    Cache of raw LLM extraction results keyed by content hash.
+
+    Entries expire after ``ttl_seconds`` and the oldest entries are evicted
+    once ``max_entries`` is exceeded. Redis is used when available so every
+    worker shares the cache; otherwise entries are kept in process memory.
+    """
+
+    def __init__(
+        self,
+        redis_conn=None,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        logger.debug(
+            f"Initializing ExtractionCache with ttl={ttl_seconds}s, max_entries={max_entries}"
+        )
+        self.redis_conn = redis_conn
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._memory: OrderedDict[str, Tuple[Dict[str, str], float]] = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def make_key(cleaned_body: str, model: str, prompt_version: str) -> str:
+        """
+        Build the cache key for a body under a given model and prompt version.
+
+        Args:
+            cleaned_body (str): Cleaned email body text
+            model (str): LLM model name
+            prompt_version (str): Identifier of the prompt and examples used
+
+        Returns:
+            str: Hex digest identifying the extraction
+        """
+        payload = f"{model}\n{prompt_version}\n{normalize_body(cleaned_body)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        """
+        Look up a cached extraction.
+
+        Returns:
+            Optional[dict]: The cached raw extraction, or None on a miss
+        """
+        if self.redis_conn is not None:
+            details = self._get_from_redis(key)
+        else:
+            details = self._get_from_memory(key)
+
+        if details is None:
+            self.stats["misses"] += 1
+            logger.debug(f"Extraction cache miss for {key[:12]}")
+            return None
+        self.stats["hits"] += 1
+        logger.debug(f"Extraction cache hit for {key[:12]}")
+        return dict(details)
+
+    def set(self, key: str, details: Dict[str, str]):
+        """
+        Store a raw extraction result.
+
+        Args:
+            key (str): Cache key from make_key
+            details (dict): Raw extraction result to cache
+        """
+        if self.redis_conn is not None:
+            self._set_in_redis(key, details)
+        else:
+            self._memory[key] = (dict(details), time.time() + self.ttl_seconds)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _get_from_memory(self, key: str) -> Optional[Dict[str, str]]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        details, expires_at = entry
+        if time.time() >= expires_at:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return details
+
+    def _get_from_redis(self, key: str) -> Optional[Dict[str, str]]:
+        try:
+            raw = self.redis_conn.get(REDIS_CACHE_PREFIX + key)
+            return json.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning(f"Could not read extraction cache: {e}")
+            return None
+
+    def _set_in_redis(self, key: str, details: Dict[str, str]):
+        try:
+            pipe = self.redis_conn.pipeline()
+            pipe.set(REDIS_CACHE_PREFIX + key, json.dumps(details), ex=self.ttl_seconds)
+            pipe.zadd(REDIS_CACHE_INDEX_KEY, {key: time.time()})
+            pipe.zcard(REDIS_CACHE_INDEX_KEY)
+            size = pipe.execute()[-1]
+
+            excess = size - self.max_entries
+            if excess > 0:
+                evicted = [
+                    member.decode() if isinstance(member, bytes) else member
+                    for member, _ in self.redis_conn.zpopmin(
+                        REDIS_CACHE_INDEX_KEY, excess
+                    )
+                ]
+                if evicted:
+                    self.redis_conn.delete(
+                        *[REDIS_CACHE_PREFIX + member for member in evicted]
+                    )
+                    logger.debug(f"Evicted {len(evicted)} extraction cache entries")
+        except Exception as e:
+            logger.warning(f"Could not write extraction cache: {e}")
+
+    def clear(self):
+        """Forget in-memory entries and reset the hit/miss counters."""
+        self._memory.clear()
+        self.stats = {"hits": 0, "misses": 0}
+
+
+# Create a global cache instance
+logger.debug("Creating global extraction cache instance")
+extraction_cache = ExtractionCache(
+    redis_conn=connect_from_env("extraction cache"),
+    ttl_seconds=int(os.getenv("EXTRACTION_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+    max_entries=int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+)
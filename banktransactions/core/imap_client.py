@@ -8,14 +8,133 @@ from datetime import datetime, timedelta
 from imapclient import IMAPClient as RealIMAPClient
 from imapclient.exceptions import LoginError
 
-from banktransactions.core.api_client import send_transaction_to_api
+from banktransactions.core.api_client import (
+    TransactionSubmitter,
+    submission_key_for_message,
+)
 
 # Import from our other modules
 from banktransactions.core.email_parser import (
     decode_str,
-    extract_transaction_details,
+    extract_transaction_details_batch,
+)
+from banktransactions.core.transaction_data import (
+    MappingSnapshot,
+    construct_transaction_data,
 )
-from banktransactions.core.transaction_data import construct_transaction_data
+
+
+def build_sender_search_criteria(bank_email_list, since_date_str):
+    """
+    Build a single IMAP SEARCH query matching mail from any of the bank senders.
+
+    IMAP's OR is a binary prefix operator, so N senders are chained as
+    ``OR FROM a OR FROM b FROM c``. The SINCE key is ANDed with the whole chain.
+
+    Parameters:
+    - bank_email_list: Non-empty list of bank email addresses
+    - since_date_str: Date in IMAP format (e.g. 01-Jan-2025)
+
+    Returns:
+    - list: Search criteria suitable for IMAPClient.search
+    """
+    criteria = []
+    for bank_email in bank_email_list[:-1]:
+        criteria.extend(["OR", "FROM", bank_email])
+    criteria.extend(["FROM", bank_email_list[-1], "SINCE", since_date_str])
+    return criteria
+
+
+def get_envelope_sender(envelope, bank_email_list):
+    """
+    Attribute a fetched message to the configured bank sender it came from.
+
+    An exact address match wins; otherwise falls back to a substring match,
+    mirroring how IMAP FROM matches (e.g. a bare "axisbank.com" entry).
+
+    Parameters:
+    - envelope: IMAP ENVELOPE response for the message
+    - bank_email_list: List of configured bank email addresses
+
+    Returns:
+    - str: The matching bank email, the raw sender address, or "Unknown"
+    """
+    senders = []
+    for address in envelope.from_ or ():
+        if address.mailbox and address.host:
+            senders.append(
+                f"{address.mailbox.decode()}@{address.host.decode()}".lower()
+            )
+
+    for bank_email in bank_email_list:
+        if bank_email.lower() in senders:
+            return bank_email
+    for bank_email in bank_email_list:
+        if any(bank_email.lower() in sender for sender in senders):
+            return bank_email
+    return senders[0] if senders else "Unknown"
+
+
+# Items fetched for each message that still needs processing
+MESSAGE_FETCH_ITEMS = ["X-GM-MSGID", "BODY.PEEK[]", "ENVELOPE"]
+
+
+def fetch_unprocessed_messages(
+    server, uids, processed_gmail_msgids=None, processed_id_lookup=None
+):
+    """
+    Fetch full messages, skipping the bodies of already processed ones.
+
+    When there is processed history to check against, only Gmail Message IDs
+    are fetched first; bodies and envelopes are then fetched for the new UIDs
+    alone, so already processed messages are never downloaded again.
+
+    Parameters:
+    - server: Logged-in IMAPClient with the folder selected
+    - uids: Message UIDs to fetch
+    - processed_gmail_msgids: Optional set of already processed Gmail Message
+                              IDs; IDs reported by processed_id_lookup are
+                              added to it
+    - processed_id_lookup: Optional callable taking the Gmail Message IDs and
+                           returning the subset already processed, or None on
+                           failure
+
+    Returns:
+    - tuple: (fetched_data, already_processed_count), or None if
+             processed_id_lookup failed
+    """
+    if processed_gmail_msgids is None:
+        processed_gmail_msgids = set()
+    if not processed_gmail_msgids and processed_id_lookup is None:
+        # Nothing to filter, one round trip is enough
+        return server.fetch(uids, MESSAGE_FETCH_ITEMS), 0
+
+    logging.debug(f"Fetching Gmail Message IDs for {len(uids)} messages...")
+    gmail_msgids = {
+        uid: str(msg_data[b"X-GM-MSGID"])
+        for uid, msg_data in server.fetch(uids, ["X-GM-MSGID"]).items()
+        if b"X-GM-MSGID" in msg_data
+    }
+
+    if processed_id_lookup is not None:
+        already_processed = processed_id_lookup(list(gmail_msgids.values()))
+        if already_processed is None:
+            return None
+        processed_gmail_msgids.update(already_processed)
+
+    new_uids = [
+        uid
+        for uid, gmail_msgid in gmail_msgids.items()
+        if gmail_msgid not in processed_gmail_msgids
+    ]
+    already_processed_count = len(gmail_msgids) - len(new_uids)
+    logging.debug(
+        f"{already_processed_count} of {len(gmail_msgids)} messages were already "
+        "processed"
+    )
+    if not new_uids:
+        return {}, already_processed_count
+    return server.fetch(new_uids, MESSAGE_FETCH_ITEMS), already_processed_count
 
 
 def get_bank_emails(
@@ -24,17 +143,53 @@ def get_bank_emails(
     bank_email_list=None,
     processed_gmail_msgids=None,
     save_msgid_callback=None,
+    mappings=None,
+    transaction_submitter=None,
+    checkpoint_callback=None,
+    processed_id_lookup=None,
+    message_uids=None,
+    progress_callback=None,
+    user_id=None,
 ):
     """
     Retrieve bank transaction emails from Gmail and send to API
 
+    Processing runs in stages: fetch (one IMAP search, then the bodies of
+    unprocessed messages only, see fetch_unprocessed_messages), parse,
+    extract (batched and concurrent, see extract_transaction_details_batch)
+    and post (batched over a pooled session). Processed-ID saves follow the
+    fetch order.
+
     Parameters:
     - username: Gmail username
     - password: Gmail password or app password
-    - bank_email_list: List of bank email addresses to filter by
+    - bank_email_list: List of bank email addresses to filter by. All senders are
+                       matched by one combined search and fetched in one round trip.
     - processed_gmail_msgids: Set of already processed Gmail Message IDs
     - save_msgid_callback: Optional callback function to save individual message IDs
                           Should accept (gmail_message_id) and return True if saved successfully
+    - mappings: Optional MappingSnapshot shared by every email; loaded once
+                for this run if not given
+    - transaction_submitter: Optional TransactionSubmitter used to post
+                             transactions; a pooled HTTP submitter is created
+                             for this run if not given
+    - checkpoint_callback: Optional callable invoked with no arguments after
+                           each posted batch, e.g. to flush buffered message
+                           ID saves
+    - processed_id_lookup: Optional callable taking the Gmail Message IDs of
+                           the found messages and returning the subset already
+                           processed (or None on failure, which aborts the
+                           run). Lets callers check only the candidates instead
+                           of preloading every processed ID into
+                           processed_gmail_msgids
+    - message_uids: Optional INBOX UIDs to fetch instead of searching for the
+                    bank senders, e.g. messages an IDLE listener saw arrive
+    - progress_callback: Optional callable invoked as (stage, **counts) when a
+                         stage starts and after each posted batch, with the
+                         totals so far of found, already_processed, skipped,
+                         extracted, no_transaction, posted and failed messages
+    - user_id: Optional ID of the user the mailbox belongs to; enables the
+               per-user learned extraction templates
     """
     logging.debug("Starting get_bank_emails function")
     logging.debug(f"Bank email list: {bank_email_list}")
@@ -50,11 +205,19 @@ def get_bank_emails(
         logging.debug("Initialized empty processed_gmail_msgids set")
 
     newly_processed_count = 0
+    report_progress = progress_callback or (lambda stage, **counts: None)
+    # Drop duplicate senders so the combined search stays minimal
+    bank_email_list = list(dict.fromkeys(bank_email_list))
+    if not bank_email_list:
+        logging.warning("Empty bank email list, nothing to search for")
+        return processed_gmail_msgids, newly_processed_count
+
     two_months_ago = datetime.now() - timedelta(days=60)
     since_date_str = two_months_ago.strftime("%d-%b-%Y")
     logging.debug(f"Search date range: since {since_date_str} (two months ago)")
 
     try:
+        report_progress("searching")
         logging.debug("Attempting to connect to Gmail IMAP server...")
         with RealIMAPClient("imap.gmail.com", ssl=True) as server:
             # Anonymize the email address in logs
@@ -70,350 +233,405 @@ def get_bank_emails(
             server.select_folder("INBOX")
             logging.debug("INBOX folder selected successfully")
 
-            for bank_email in bank_email_list:
+            if message_uids is not None:
+                messages = list(message_uids)
+                logging.info(f"Fetching {len(messages)} targeted message(s)...")
+            else:
+                search_criteria = build_sender_search_criteria(
+                    bank_email_list, since_date_str
+                )
                 logging.info(
-                    f"\nSearching for emails from {bank_email} since {since_date_str}..."
+                    f"\nSearching for emails from {len(bank_email_list)} bank sender(s) since {since_date_str}..."
                 )
-                search_criteria = ["FROM", bank_email, "SINCE", since_date_str]
                 logging.debug(f"Search criteria: {search_criteria}")
 
                 try:
-                    logging.debug(f"Executing IMAP search for {bank_email}...")
+                    logging.debug(
+                        "Executing combined IMAP search for all bank senders..."
+                    )
                     messages = server.search(search_criteria)
                     logging.info(
-                        f"Found {len(messages)} potentially matching messages from {bank_email} in the last ~2 months"
+                        f"Found {len(messages)} potentially matching messages from {len(bank_email_list)} bank sender(s) in the last ~2 months"
                     )
                     logging.debug(
                         f"Message IDs found: {messages[:10]}{'...' if len(messages) > 10 else ''}"
                     )
                 except Exception as search_err:
                     logging.error(
-                        f"Error searching messages for {bank_email}: {search_err}"
+                        f"Error searching messages for bank senders: {search_err}"
                     )
                     logging.debug(f"Search error details: {search_err}", exc_info=True)
+                    return processed_gmail_msgids, newly_processed_count
+
+            report_progress("fetching", found=len(messages))
+            if not messages:
+                logging.debug("No messages found from any bank sender")
+                return processed_gmail_msgids, newly_processed_count
+
+            try:
+                logging.debug(f"Fetching data for {len(messages)} messages...")
+                fetched = fetch_unprocessed_messages(
+                    server, messages, processed_gmail_msgids, processed_id_lookup
+                )
+            except Exception as fetch_err:
+                logging.error(f"Error fetching message details: {fetch_err}")
+                logging.debug(f"Fetch error details: {fetch_err}", exc_info=True)
+                return processed_gmail_msgids, newly_processed_count
+            if fetched is None:
+                # Without knowing what was processed, posting could duplicate
+                # transactions; the next run retries
+                logging.error("Could not check processed Gmail Message IDs, aborting")
+                return processed_gmail_msgids, newly_processed_count
+            fetched_data, already_processed_count = fetched
+            # Already processed messages are counted but were not downloaded
+            candidate_count = already_processed_count + len(fetched_data)
+            logging.debug(f"Successfully fetched data for {len(fetched_data)} messages")
+
+        # The mailbox is no longer needed once messages are fetched; parse,
+        # extract and post run after the IMAP connection is released
+        logging.info(f"Processing {len(fetched_data)} fetched messages...")
+        report_progress("parsing")
+
+        # Parse every new message first so extraction can be batched;
+        # entries are (gmail_msgid, bank_email, body)
+        pending_messages = []
+
+        for msg_id, msg_data in fetched_data.items():
+            logging.debug(f"Processing message ID: {msg_id}")
+            try:
+                if b"X-GM-MSGID" not in msg_data:
+                    logging.warning(
+                        f"X-GM-MSGID not found for message ID {msg_id}. Skipping."
+                    )
+                    logging.debug(
+                        f"Available keys in msg_data: {list(msg_data.keys())}"
+                    )
                     continue
 
-                if not messages:
+                gmail_msgid = str(msg_data[b"X-GM-MSGID"])
+                logging.debug(f"Gmail Message ID: {gmail_msgid}")
+
+                if gmail_msgid in processed_gmail_msgids:
                     logging.debug(
-                        f"No messages found for {bank_email}, continuing to next bank"
+                        f"Skipping already processed email Gmail Message ID: {gmail_msgid}"
                     )
+                    already_processed_count += 1
                     continue
 
-                fetch_items = [
-                    "X-GM-MSGID",
-                    "BODY.PEEK[]",
-                    "ENVELOPE",
-                ]
-                logging.debug(f"Fetch items: {fetch_items}")
+                logging.debug("Extracting email body...")
+                raw_email = msg_data.get(b"BODY.PEEK[]")
+                if not raw_email:
+                    raw_email = msg_data.get(b"BODY[]", b"")
+                    if raw_email:
+                        logging.debug(
+                            f"Falling back to BODY[] for {gmail_msgid} (will mark as Seen)"
+                        )
+
+                if not raw_email:
+                    logging.warning(
+                        f"Empty body fetched (checked BODY.PEEK[] and BODY[]) for message Gmail Message ID {gmail_msgid}. Skipping."
+                    )
+                    logging.debug(
+                        f"Available body keys: {[k for k in msg_data if b'BODY' in k]}"
+                    )
+                    continue
 
+                logging.debug(f"Raw email size: {len(raw_email)} bytes")
                 try:
-                    logging.debug(f"Fetching data for {len(messages)} messages...")
-                    fetched_data = server.fetch(messages, fetch_items)
+                    logging.debug("Parsing email message from bytes...")
+                    email_message = email.message_from_bytes(raw_email)
                     logging.debug(
-                        f"Successfully fetched data for {len(fetched_data)} messages"
+                        f"Email message parsed successfully. Content-Type: {email_message.get_content_type()}"
                     )
-                except Exception as fetch_err:
+                except Exception as parse_err:
                     logging.error(
-                        f"Error fetching message details for {bank_email}: {fetch_err}"
+                        f"Error parsing email bytes for {gmail_msgid}: {parse_err}. Skipping.",
+                        exc_info=True,
                     )
-                    logging.debug(f"Fetch error details: {fetch_err}", exc_info=True)
                     continue
 
-                logging.info(f"Processing {len(fetched_data)} fetched messages...")
-
-                for msg_id, msg_data in fetched_data.items():
-                    logging.debug(f"Processing message ID: {msg_id}")
-                    try:
-                        if b"X-GM-MSGID" not in msg_data:
-                            logging.warning(
-                                f"X-GM-MSGID not found for message ID {msg_id}. Skipping."
-                            )
-                            logging.debug(
-                                f"Available keys in msg_data: {list(msg_data.keys())}"
-                            )
-                            continue
-
-                        gmail_msgid = str(msg_data[b"X-GM-MSGID"])
-                        logging.debug(f"Gmail Message ID: {gmail_msgid}")
+                envelope = msg_data.get(b"ENVELOPE")
+                if not envelope:
+                    logging.warning(
+                        f"Envelope data missing for {gmail_msgid}. Skipping."
+                    )
+                    continue
 
-                        if gmail_msgid in processed_gmail_msgids:
-                            logging.debug(
-                                f"Skipping already processed email Gmail Message ID: {gmail_msgid}"
-                            )
-                            continue
+                try:
+                    logging.debug("Extracting subject and date from envelope...")
+                    subject = (
+                        decode_str(envelope.subject.decode())
+                        if envelope.subject
+                        else "No Subject"
+                    )
+                    date_received = (
+                        envelope.date.strftime("%a, %d %b %Y %H:%M:%S %z")
+                        if envelope.date
+                        else "No Date"
+                    )
+                    bank_email = get_envelope_sender(envelope, bank_email_list)
+                    logging.debug(f"Subject: {subject}")
+                    logging.debug(f"Date received: {date_received}")
+                    logging.debug(f"Bank sender: {bank_email}")
+                except Exception as envelope_err:
+                    logging.warning(
+                        f"Error decoding envelope subject/date for {gmail_msgid}: {envelope_err}. Skipping."
+                    )
+                    logging.debug(
+                        f"Envelope error details: {envelope_err}", exc_info=True
+                    )
+                    continue
 
-                        logging.debug("Extracting email body...")
-                        raw_email = msg_data.get(b"BODY.PEEK[]")
-                        if not raw_email:
-                            raw_email = msg_data.get(b"BODY[]", b"")
-                            if raw_email:
-                                logging.debug(
-                                    f"Falling back to BODY[] for {gmail_msgid} (will mark as Seen)"
-                                )
+                body = ""
+                html_body = ""
 
-                        if not raw_email:
-                            logging.warning(
-                                f"Empty body fetched (checked BODY.PEEK[] and BODY[]) for message Gmail Message ID {gmail_msgid}. Skipping."
-                            )
-                            logging.debug(
-                                f"Available body keys: {[k for k in msg_data if b'BODY' in k]}"
-                            )
-                            continue
+                logging.debug(f"Email is multipart: {email_message.is_multipart()}")
+                if email_message.is_multipart():
+                    logging.debug(
+                        f"--- Debugging Parts for Gmail Message ID: {gmail_msgid} ---"
+                    )
+                    part_count = 0
+                    for i, part in enumerate(email_message.walk()):
+                        part_count += 1
+                        ctype = part.get_content_type()
+                        cdisp = str(part.get("Content-Disposition"))
+                        fname = part.get_filename()
 
-                        logging.debug(f"Raw email size: {len(raw_email)} bytes")
                         try:
-                            logging.debug("Parsing email message from bytes...")
-                            email_message = email.message_from_bytes(raw_email)
-                            logging.debug(
-                                f"Email message parsed successfully. Content-Type: {email_message.get_content_type()}"
-                            )
-                        except Exception as parse_err:
-                            logging.error(
-                                f"Error parsing email bytes for {gmail_msgid}: {parse_err}. Skipping.",
-                                exc_info=True,
-                            )
-                            continue
-
-                        envelope = msg_data.get(b"ENVELOPE")
-                        if not envelope:
-                            logging.warning(
-                                f"Envelope data missing for {gmail_msgid}. Skipping."
-                            )
-                            continue
+                            raw_payload_sample = part.get_payload(decode=False)
+                            if isinstance(raw_payload_sample, list):
+                                raw_payload_sample = "[Payload is a list of sub-parts]"
+                            else:
+                                raw_payload_sample = str(raw_payload_sample)[:150]
+                        except Exception as e:
+                            raw_payload_sample = f"Error getting raw payload: {e}"
+                        logging.debug(
+                            f"  Part {i}: Content-Type={ctype}, Content-Disposition={cdisp}, Filename={fname}"
+                        )
+                        logging.debug(
+                            f"           Raw Payload Sample: {raw_payload_sample}..."
+                        )
 
-                        try:
+                        if "attachment" in cdisp or (fname and "." in fname):
                             logging.debug(
-                                "Extracting subject and date from envelope..."
-                            )
-                            subject = (
-                                decode_str(envelope.subject.decode())
-                                if envelope.subject
-                                else "No Subject"
-                            )
-                            date_received = (
-                                envelope.date.strftime("%a, %d %b %Y %H:%M:%S %z")
-                                if envelope.date
-                                else "No Date"
-                            )
-                            logging.debug(f"Subject: {subject}")
-                            logging.debug(f"Date received: {date_received}")
-                        except Exception as envelope_err:
-                            logging.warning(
-                                f"Error decoding envelope subject/date for {gmail_msgid}: {envelope_err}. Skipping."
-                            )
-                            logging.debug(
-                                f"Envelope error details: {envelope_err}", exc_info=True
+                                f"  Part {i}: Skipping attachment or part with filename."
                             )
                             continue
 
-                        body = ""
-                        html_body = ""
-
-                        logging.debug(
-                            f"Email is multipart: {email_message.is_multipart()}"
-                        )
-                        if email_message.is_multipart():
-                            logging.debug(
-                                f"--- Debugging Parts for Gmail Message ID: {gmail_msgid} ---"
-                            )
-                            part_count = 0
-                            for i, part in enumerate(email_message.walk()):
-                                part_count += 1
-                                ctype = part.get_content_type()
-                                cdisp = str(part.get("Content-Disposition"))
-                                fname = part.get_filename()
-
-                                try:
-                                    raw_payload_sample = part.get_payload(decode=False)
-                                    if isinstance(raw_payload_sample, list):
-                                        raw_payload_sample = (
-                                            "[Payload is a list of sub-parts]"
-                                        )
-                                    else:
-                                        raw_payload_sample = str(raw_payload_sample)[
-                                            :150
-                                        ]
-                                except Exception as e:
-                                    raw_payload_sample = (
-                                        f"Error getting raw payload: {e}"
+                        if ctype == "text/plain" and not body:
+                            logging.debug(f"  Part {i}: Processing text/plain content")
+                            try:
+                                payload = part.get_payload(decode=True)
+                                if payload:
+                                    charset = part.get_content_charset() or "utf-8"
+                                    logging.debug(
+                                        f"  Part {i}: Using charset: {charset}"
                                     )
-                                logging.debug(
-                                    f"  Part {i}: Content-Type={ctype}, Content-Disposition={cdisp}, Filename={fname}"
+                                    body = payload.decode(charset, errors="replace")
+                                    logging.debug(
+                                        f"  Part {i}: Extracted {len(body)} characters of plain text"
+                                    )
+                            except Exception as decode_err:
+                                logging.warning(
+                                    f"Could not decode text/plain part for Gmail Message ID {gmail_msgid}: {decode_err}"
                                 )
                                 logging.debug(
-                                    f"           Raw Payload Sample: {raw_payload_sample}..."
+                                    f"  Part {i}: Decode error details: {decode_err}",
+                                    exc_info=True,
                                 )
 
-                                if "attachment" in cdisp or (fname and "." in fname):
-                                    logging.debug(
-                                        f"  Part {i}: Skipping attachment or part with filename."
-                                    )
-                                    continue
-
-                                if ctype == "text/plain" and not body:
-                                    logging.debug(
-                                        f"  Part {i}: Processing text/plain content"
-                                    )
-                                    try:
-                                        payload = part.get_payload(decode=True)
-                                        if payload:
-                                            charset = (
-                                                part.get_content_charset() or "utf-8"
-                                            )
-                                            logging.debug(
-                                                f"  Part {i}: Using charset: {charset}"
-                                            )
-                                            body = payload.decode(
-                                                charset, errors="replace"
-                                            )
-                                            logging.debug(
-                                                f"  Part {i}: Extracted {len(body)} characters of plain text"
-                                            )
-                                    except Exception as decode_err:
-                                        logging.warning(
-                                            f"Could not decode text/plain part for Gmail Message ID {gmail_msgid}: {decode_err}"
-                                        )
-                                        logging.debug(
-                                            f"  Part {i}: Decode error details: {decode_err}",
-                                            exc_info=True,
-                                        )
-
-                                elif ctype == "text/html" and not html_body:
-                                    logging.debug(
-                                        f"  Part {i}: Processing text/html content"
-                                    )
-                                    try:
-                                        payload = part.get_payload(decode=True)
-                                        if payload:
-                                            charset = (
-                                                part.get_content_charset() or "utf-8"
-                                            )
-                                            logging.debug(
-                                                f"  Part {i}: Using charset: {charset}"
-                                            )
-                                            html_body = payload.decode(
-                                                charset, errors="replace"
-                                            )
-                                            logging.debug(
-                                                f"  Part {i}: Extracted {len(html_body)} characters of HTML"
-                                            )
-                                    except Exception as decode_err:
-                                        logging.warning(
-                                            f"Could not decode text/html part for Gmail Message ID {gmail_msgid}: {decode_err}"
-                                        )
-                                        logging.debug(
-                                            f"  Part {i}: Decode error details: {decode_err}",
-                                            exc_info=True,
-                                        )
-
-                            logging.debug(f"Processed {part_count} email parts total")
-                        else:
-                            # Single part message
-                            logging.debug("Processing single-part email message")
+                        elif ctype == "text/html" and not html_body:
+                            logging.debug(f"  Part {i}: Processing text/html content")
                             try:
-                                payload = email_message.get_payload(decode=True)
+                                payload = part.get_payload(decode=True)
                                 if payload:
-                                    charset = (
-                                        email_message.get_content_charset() or "utf-8"
+                                    charset = part.get_content_charset() or "utf-8"
+                                    logging.debug(
+                                        f"  Part {i}: Using charset: {charset}"
+                                    )
+                                    html_body = payload.decode(
+                                        charset, errors="replace"
                                     )
-                                    logging.debug(f"Using charset: {charset}")
-                                    body = payload.decode(charset, errors="replace")
                                     logging.debug(
-                                        f"Extracted {len(body)} characters from single-part message"
+                                        f"  Part {i}: Extracted {len(html_body)} characters of HTML"
                                     )
                             except Exception as decode_err:
                                 logging.warning(
-                                    f"Could not decode single-part message for Gmail Message ID {gmail_msgid}: {decode_err}"
+                                    f"Could not decode text/html part for Gmail Message ID {gmail_msgid}: {decode_err}"
                                 )
                                 logging.debug(
-                                    f"Single-part decode error details: {decode_err}",
+                                    f"  Part {i}: Decode error details: {decode_err}",
                                     exc_info=True,
                                 )
 
-                        if not body and html_body:
-                            logging.debug("No plain text body found, using HTML body")
-                            body = html_body
-
-                        if not body:
-                            logging.warning(
-                                f"No body content found for Gmail Message ID {gmail_msgid}. Skipping."
+                    logging.debug(f"Processed {part_count} email parts total")
+                else:
+                    # Single part message
+                    logging.debug("Processing single-part email message")
+                    try:
+                        payload = email_message.get_payload(decode=True)
+                        if payload:
+                            charset = email_message.get_content_charset() or "utf-8"
+                            logging.debug(f"Using charset: {charset}")
+                            body = payload.decode(charset, errors="replace")
+                            logging.debug(
+                                f"Extracted {len(body)} characters from single-part message"
                             )
-                            continue
-
-                        logging.debug(f"Final body length: {len(body)} characters")
+                    except Exception as decode_err:
+                        logging.warning(
+                            f"Could not decode single-part message for Gmail Message ID {gmail_msgid}: {decode_err}"
+                        )
                         logging.debug(
-                            f"Processing email from {bank_email} with subject: {subject[:50]}..."
+                            f"Single-part decode error details: {decode_err}",
+                            exc_info=True,
                         )
 
-                        # Extract transaction details using LLM few-shot approach
-                        try:
-                            logging.debug("Starting transaction extraction process...")
-                            # Use the wrapper function that handles all cleanup and processing
-                            logging.debug(
-                                "Calling extract_transaction_details_pure_llm..."
-                            )
-                            transaction_details = extract_transaction_details(body)
-                            logging.debug(
-                                f"Final transaction details: {transaction_details}"
-                            )
+                if not body and html_body:
+                    logging.debug("No plain text body found, using HTML body")
+                    body = html_body
 
-                            if not transaction_details:
-                                logging.info(
-                                    f"No transaction details extracted for Gmail Message ID {gmail_msgid}. Skipping."
-                                )
-                                processed_gmail_msgids.add(gmail_msgid)
-                                if save_msgid_callback:
-                                    save_msgid_callback(gmail_msgid)
-                                continue
-
-                            # Construct transaction data
-                            logging.debug("Constructing transaction data...")
-                            transaction_data = construct_transaction_data(
-                                transaction_details
-                            )
-                            logging.debug(
-                                f"Constructed transaction data: {transaction_data}"
-                            )
+                if not body:
+                    logging.warning(
+                        f"No body content found for Gmail Message ID {gmail_msgid}. Skipping."
+                    )
+                    continue
 
-                            # Send to API
-                            logging.debug("Sending transaction to API...")
-                            api_response = send_transaction_to_api(transaction_data)
-                            logging.debug(f"API response: {api_response}")
+                logging.debug(f"Final body length: {len(body)} characters")
+                logging.debug(
+                    f"Processing email from {bank_email} with subject: {subject[:50]}..."
+                )
 
-                            if api_response:
-                                logging.info(
-                                    f"Successfully sent transaction to API for Gmail Message ID {gmail_msgid}"
-                                )
-                                processed_gmail_msgids.add(gmail_msgid)
-                                newly_processed_count += 1
-                                logging.debug(
-                                    f"Newly processed count: {newly_processed_count}"
-                                )
-                                if save_msgid_callback:
-                                    save_msgid_callback(gmail_msgid)
-                            else:
-                                logging.error(
-                                    f"Failed to send transaction to API for Gmail Message ID {gmail_msgid}"
-                                )
+                pending_messages.append((gmail_msgid, bank_email, body))
 
-                        except Exception as processing_err:
-                            logging.error(
-                                f"Error processing transaction for Gmail Message ID {gmail_msgid}: {processing_err}",
-                                exc_info=True,
-                            )
-                            continue
+            except Exception as msg_err:
+                logging.error(
+                    f"Error processing message {msg_id}: {msg_err}",
+                    exc_info=True,
+                )
+                continue
+
+        # Messages neither processed before nor parseable are skipped
+        report_progress(
+            "extracting",
+            already_processed=already_processed_count,
+            skipped=candidate_count - already_processed_count - len(pending_messages),
+        )
 
-                    except Exception as msg_err:
+        # Extract transaction details for all new messages in batched LLM calls
+        logging.debug(
+            f"Extracting transaction details for {len(pending_messages)} new messages..."
+        )
+        try:
+            extracted_details = extract_transaction_details_batch(
+                {gmail_msgid: body for gmail_msgid, _, body in pending_messages},
+                senders={
+                    gmail_msgid: bank_email
+                    for gmail_msgid, bank_email, _ in pending_messages
+                },
+                user_id=user_id,
+            )
+        except Exception as extract_err:
+            logging.error(
+                f"Error extracting transaction details: {extract_err}",
+                exc_info=True,
+            )
+            extracted_details = {}
+
+        if pending_messages and mappings is None:
+            # One mapping export for the whole run instead of one per email
+            mappings = MappingSnapshot.load()
+
+        # Build transactions in fetch order; None marks messages with nothing to post
+        ready_messages = []
+        for gmail_msgid, bank_email, _ in pending_messages:
+            try:
+                transaction_details = extracted_details.get(gmail_msgid)
+                logging.debug(
+                    f"Final transaction details from {bank_email}: {transaction_details}"
+                )
+
+                if not transaction_details:
+                    logging.info(
+                        f"No transaction details extracted for Gmail Message ID {gmail_msgid}. Skipping."
+                    )
+                    ready_messages.append((gmail_msgid, None))
+                    continue
+
+                # Construct transaction data
+                logging.debug("Constructing transaction data...")
+                transaction_data = construct_transaction_data(
+                    transaction_details, mappings=mappings
+                )
+                logging.debug(f"Constructed transaction data: {transaction_data}")
+                ready_messages.append((gmail_msgid, transaction_data))
+
+            except Exception as processing_err:
+                logging.error(
+                    f"Error processing transaction for Gmail Message ID {gmail_msgid}: {processing_err}",
+                    exc_info=True,
+                )
+                continue
+
+        no_transaction_count = sum(
+            1 for _, transaction_data in ready_messages if transaction_data is None
+        )
+        # Messages whose transaction could not be built count as failed
+        failed_count = len(pending_messages) - len(ready_messages)
+        report_progress(
+            "posting",
+            extracted=len(ready_messages) - no_transaction_count,
+            no_transaction=no_transaction_count,
+            failed=failed_count,
+        )
+
+        # Post in batches over one pooled session. IDs are saved after each
+        # batch, in fetch order, so a long backfill checkpoints its progress.
+        submitter = transaction_submitter or TransactionSubmitter()
+        try:
+            for start in range(0, len(ready_messages), submitter.batch_size):
+                batch = ready_messages[start : start + submitter.batch_size]
+                logging.debug(f"Sending {len(batch)} transactions to API...")
+                results = submitter.send_batch(
+                    [
+                        (submission_key_for_message(gmail_msgid), transaction_data)
+                        for gmail_msgid, transaction_data in batch
+                        if transaction_data is not None
+                    ]
+                )
+
+                for gmail_msgid, transaction_data in batch:
+                    if transaction_data is None:
+                        processed_gmail_msgids.add(gmail_msgid)
+                        if save_msgid_callback:
+                            save_msgid_callback(gmail_msgid)
+                    elif results.get(submission_key_for_message(gmail_msgid)):
+                        logging.info(
+                            f"Successfully sent transaction to API for Gmail Message ID {gmail_msgid}"
+                        )
+                        processed_gmail_msgids.add(gmail_msgid)
+                        newly_processed_count += 1
+                        logging.debug(f"Newly processed count: {newly_processed_count}")
+                        if save_msgid_callback:
+                            save_msgid_callback(gmail_msgid)
+                    else:
                         logging.error(
-                            f"Error processing message {msg_id}: {msg_err}",
-                            exc_info=True,
+                            f"Failed to send transaction to API for Gmail Message ID {gmail_msgid}"
                         )
-                        continue
+                        failed_count += 1
 
-            logging.debug(
-                f"Completed processing all banks. Total newly processed: {newly_processed_count}"
-            )
-            return processed_gmail_msgids, newly_processed_count
+                if checkpoint_callback:
+                    checkpoint_callback()
+                report_progress(
+                    "posting", posted=newly_processed_count, failed=failed_count
+                )
+        finally:
+            if transaction_submitter is None:
+                submitter.close()
+
+        logging.debug(
+            f"Completed processing all banks. Total newly processed: {newly_processed_count}"
+        )
+        return processed_gmail_msgids, newly_processed_count
 
     except LoginError as e:
         logging.critical(
@@ -529,12 +747,15 @@ class CustomIMAPClient:
         else:
             logging.debug("No active IMAP connection to disconnect")
 
-    def get_unread_emails(self, since=None):
+    def get_unread_emails(self, since=None, processed_id_lookup=None):
         """
         Get unread emails from the INBOX.
 
         Args:
             since (datetime): Get emails since this date (optional)
+            processed_id_lookup (callable): Takes Gmail Message IDs and returns
+                the subset already processed; those messages are left out
+                without downloading their bodies (optional)
 
         Returns:
             list: List of email dictionaries with id, subject, body, from, date
@@ -576,14 +797,12 @@ class CustomIMAPClient:
                 return []
 
             # Fetch email data
-            fetch_items = [
-                "X-GM-MSGID",
-                "BODY.PEEK[]",
-                "ENVELOPE",
-            ]
-            logging.debug(f"Fetching data with items: {fetch_items}")
-
-            fetched_data = self._client.fetch(messages, fetch_items)
+            fetched = fetch_unprocessed_messages(
+                self._client, messages, processed_id_lookup=processed_id_lookup
+            )
+            if fetched is None:
+                raise Exception("Could not check processed Gmail Message IDs")
+            fetched_data, _ = fetched
             logging.debug(f"Fetched data for {len(fetched_data)} messages")
             emails = []
 
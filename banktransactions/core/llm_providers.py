@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Process-wide registry of LLM provider API keys and clients.
+
+Looking up the Gemini key means a database query and a Fernet decryption,
+and every new client pays a TLS handshake. The registry caches the key and a
+reusable client per provider. Updating the key through the settings API
+invalidates the cache in the backend process and, through a generation
+counter in Redis, in every worker process.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from banktransactions.core.redis_store import connect_from_env
+
+logger = logging.getLogger(__name__)
+
+# Incremented whenever a provider key changes so other processes reload it
+REDIS_GENERATION_KEY = "kanakku:llm_providers_generation"
+
+# Global configuration keys holding provider API keys
+PROVIDER_CONFIG_KEYS = {"gemini": "GEMINI_API_TOKEN"}
+
+DEFAULT_KEY_TTL_SECONDS = 300
+GENERATION_CHECK_SECONDS = 5
+
+
+class LLMProviderRegistry:
+    """
+    Cache of API keys and clients for LLM providers.
+
+    Each provider registers a key loader and a client factory. Keys are
+    reloaded after ``key_ttl_seconds`` as a safety net; invalidation is
+    normally explicit via invalidate().
+    """
+
+    def __init__(self, redis_conn=None, key_ttl_seconds: int = DEFAULT_KEY_TTL_SECONDS):
+        logger.debug(
+            f"Initializing LLMProviderRegistry with key_ttl={key_ttl_seconds}s"
+        )
+        self.redis_conn = redis_conn
+        self.key_ttl_seconds = key_ttl_seconds
+        self._lock = threading.Lock()
+        self._providers: Dict[str, Tuple[Callable, Callable]] = {}
+        self._keys: Dict[str, Tuple[Optional[str], float]] = {}
+        self._clients: Dict[str, Tuple[str, Any]] = {}
+        self._generation = None
+        self._generation_checked_at = 0.0
+        self.stats = {"key_loads": 0, "clients_created": 0}
+
+    def register(
+        self,
+        provider: str,
+        key_loader: Callable[[], Optional[str]],
+        client_factory: Callable[[str], Any],
+    ):
+        """
+        Register how to load the API key and build a client for a provider.
+
+        Args:
+            provider (str): Provider name, e.g. "gemini"
+            key_loader (callable): Returns the API key or None
+            client_factory (callable): Builds a client from an API key
+        """
+        with self._lock:
+            self._providers[provider] = (key_loader, client_factory)
+            self._keys.pop(provider, None)
+            self._clients.pop(provider, None)
+
+    def get_api_key(self, provider: str) -> Optional[str]:
+        """
+        Return the provider's API key, loading it only when not cached.
+
+        Returns:
+            Optional[str]: The API key, or None if not configured
+        """
+        self._check_generation()
+        with self._lock:
+            cached = self._keys.get(provider)
+            if cached and time.monotonic() - cached[1] < self.key_ttl_seconds:
+                return cached[0]
+
+        key_loader, _ = self._providers[provider]
+        api_key = key_loader()
+        with self._lock:
+            self._keys[provider] = (api_key, time.monotonic())
+            self.stats["key_loads"] += 1
+        logger.debug(f"Loaded API key for LLM provider {provider}")
+        return api_key
+
+    def get_client(self, provider: str, api_key: Optional[str] = None):
+        """
+        Return a reusable client for the provider.
+
+        Args:
+            provider (str): Provider name
+            api_key (str, optional): Key to use; looked up if not given
+
+        Returns:
+            The cached client for this key, or None if no key is configured
+        """
+        if api_key is None:
+            api_key = self.get_api_key(provider)
+        if not api_key:
+            return None
+
+        with self._lock:
+            cached = self._clients.get(provider)
+            if cached and cached[0] == api_key:
+                return cached[1]
+            _, client_factory = self._providers[provider]
+            client = client_factory(api_key)
+            self._clients[provider] = (api_key, client)
+            self.stats["clients_created"] += 1
+        logger.debug(f"Created new client for LLM provider {provider}")
+        return client
+
+    def invalidate(self, provider: Optional[str] = None, broadcast: bool = True):
+        """
+        Drop cached keys and clients so the next call reloads them.
+
+        Args:
+            provider (str, optional): Provider to invalidate; all if None
+            broadcast (bool): Also tell other processes through Redis
+        """
+        with self._lock:
+            if provider is None:
+                self._keys.clear()
+                self._clients.clear()
+            else:
+                self._keys.pop(provider, None)
+                self._clients.pop(provider, None)
+        logger.info(f"Invalidated cached LLM provider state ({provider or 'all'})")
+
+        if broadcast and self.redis_conn is not None:
+            try:
+                self._generation = self.redis_conn.incr(REDIS_GENERATION_KEY)
+            except Exception as e:
+                logger.warning(f"Could not broadcast LLM provider invalidation: {e}")
+
+    def invalidate_config_key(self, config_key: str) -> bool:
+        """
+        Invalidate the provider whose API key is stored under a config key.
+
+        Returns:
+            bool: True if the key belonged to a provider
+        """
+        for provider, provider_key in PROVIDER_CONFIG_KEYS.items():
+            if provider_key == config_key:
+                self.invalidate(provider)
+                return True
+        return False
+
+    def _check_generation(self):
+        """Drop local state if another process invalidated the providers."""
+        if self.redis_conn is None:
+            return
+        now = time.monotonic()
+        if now - self._generation_checked_at < GENERATION_CHECK_SECONDS:
+            return
+        self._generation_checked_at = now
+        try:
+            generation = int(self.redis_conn.get(REDIS_GENERATION_KEY) or 0)
+        except Exception as e:
+            logger.debug(f"Could not read LLM provider generation: {e}")
+            return
+        if self._generation is not None and generation != self._generation:
+            logger.debug("LLM provider state changed in another process")
+            self.invalidate(broadcast=False)
+        self._generation = generation
+
+    def clear(self):
+        """Forget cached keys, clients and statistics (registrations stay)."""
+        with self._lock:
+            self._keys.clear()
+            self._clients.clear()
+            self.stats = {"key_loads": 0, "clients_created": 0}
+
+
+# Create a global registry instance
+logger.debug("Creating global LLM provider registry instance")
+llm_providers = LLMProviderRegistry(redis_conn=connect_from_env("LLM provider state"))
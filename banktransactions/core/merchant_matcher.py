@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Fuzzy matching of extracted merchant names to expense accounts.
+
+Bank alerts rarely spell a merchant exactly as the user typed it in their
+expense account mappings ("AMAZON RETAIL INDIA PVT" vs "AMAZON RETAIL
+INDIA"). The matcher indexes the mappings by normalized tokens, token
+prefixes and character trigrams, and can also learn from past user
+categorizations. Every match carries a confidence score so callers can
+fall back to the default account when the best candidate is weak.
+"""
+
+import logging
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Legal suffixes and filler words that do not identify a merchant
+NOISE_TOKENS = {
+    "pvt",
+    "private",
+    "ltd",
+    "limited",
+    "llp",
+    "inc",
+    "co",
+    "corp",
+    "the",
+    "and",
+}
+
+# Matches below this confidence are treated as no match
+DEFAULT_MIN_CONFIDENCE = 0.6
+
+# Base scores per matching method, scaled by the entry weight
+NORMALIZED_MATCH_SCORE = 0.95
+PREFIX_MATCH_BASE = 0.6
+PREFIX_MATCH_RANGE = 0.3
+TRIGRAM_MATCH_SCALE = 0.9
+
+# Learned categorizations never outrank an equally good explicit mapping
+LEARNED_WEIGHT = 0.9
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def merchant_tokens(name) -> Tuple[str, ...]:
+    """
+    Split a merchant name into normalized tokens.
+
+    Tokens are lowercased alphanumeric runs; legal suffixes and pure numbers
+    (times, reference numbers) are dropped unless nothing else is left.
+    """
+    tokens = _TOKEN_RE.findall(str(name or "").casefold())
+    significant = tuple(
+        token for token in tokens if token not in NOISE_TOKENS and not token.isdigit()
+    )
+    return significant or tuple(tokens)
+
+
+def _trigrams(text: str) -> set:
+    padded = f" {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class _Entry:
+    """One indexed merchant name and the account it maps to."""
+
+    __slots__ = ("name", "tokens", "key", "account", "description", "source", "weight")
+
+    def __init__(self, name, tokens, account, description, source, weight):
+        self.name = name
+        self.tokens = tokens
+        self.key = " ".join(tokens)
+        self.account = account
+        self.description = description
+        self.source = source
+        self.weight = weight
+
+
+class MerchantMatcher:
+    """
+    Index of merchant names for fast approximate account lookups.
+
+    Lookups try, in order of strength, a normalized token match, a token
+    prefix match (either name extending the other) and trigram similarity.
+    Each candidate's score is scaled by its entry weight so learned
+    categorizations rank below explicit mappings.
+    """
+
+    def __init__(
+        self,
+        expense_account_map: Optional[Dict] = None,
+        min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+    ):
+        self.min_confidence = min_confidence
+        self._entries: List[_Entry] = []
+        self._by_key: Dict[str, List[int]] = defaultdict(list)
+        self._by_prefix: Dict[Tuple[str, ...], List[int]] = defaultdict(list)
+        self._by_trigram: Dict[str, List[int]] = defaultdict(list)
+        self._trigram_counts: List[int] = []
+
+        for merchant, value in (expense_account_map or {}).items():
+            account, description = self._split_mapping_value(value)
+            self.add(merchant, account, description)
+        logger.debug(f"Built merchant matcher with {len(self._entries)} entries")
+
+    @staticmethod
+    def _split_mapping_value(value) -> Tuple[str, str]:
+        """Mapping values are [ledger_account, description] or a bare account."""
+        if isinstance(value, (list, tuple)):
+            account = value[0] if value else ""
+            description = value[1] if len(value) > 1 else ""
+            return account, description
+        return value, ""
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(
+        self,
+        merchant: str,
+        account: str,
+        description: str = "",
+        source: str = "mapping",
+        weight: float = 1.0,
+    ):
+        """
+        Index a merchant name.
+
+        Args:
+            merchant (str): Merchant name as configured or seen
+            account (str): Ledger account it maps to
+            description (str): Mapping description
+            source (str): "mapping" or "learned"
+            weight (float): Multiplier applied to this entry's match scores
+        """
+        tokens = merchant_tokens(merchant)
+        if not tokens or not account:
+            return
+        entry = _Entry(merchant, tokens, account, description, source, weight)
+        index = len(self._entries)
+        self._entries.append(entry)
+
+        self._by_key[entry.key].append(index)
+        for length in range(1, len(tokens) + 1):
+            self._by_prefix[tokens[:length]].append(index)
+        trigrams = _trigrams(entry.key)
+        for trigram in trigrams:
+            self._by_trigram[trigram].append(index)
+        self._trigram_counts.append(len(trigrams))
+
+    def learn_from_history(
+        self, categorizations: Iterable[Tuple[str, str]], ignore_accounts=()
+    ) -> int:
+        """
+        Learn merchant accounts from past categorized transactions.
+
+        Each normalized payee maps to the account it was most often filed
+        under; the entry weight reflects how consistent that choice was.
+
+        Args:
+            categorizations: (payee, ledger_account) pairs
+            ignore_accounts: Accounts that carry no signal, such as the
+                fallback used when nothing matched
+
+        Returns:
+            int: Number of learned entries added
+        """
+        ignored = set(ignore_accounts)
+        votes: Dict[Tuple[str, ...], Counter] = defaultdict(Counter)
+        names: Dict[Tuple[str, ...], str] = {}
+        for payee, account in categorizations:
+            if not payee or not account or account in ignored:
+                continue
+            tokens = merchant_tokens(payee)
+            if not tokens:
+                continue
+            votes[tokens][account] += 1
+            names.setdefault(tokens, payee)
+
+        learned = 0
+        for tokens, counter in votes.items():
+            # Explicit mappings for the same name always win
+            if any(
+                self._entries[index].source == "mapping"
+                for index in self._by_key.get(" ".join(tokens), [])
+            ):
+                continue
+            account, count = counter.most_common(1)[0]
+            share = count / sum(counter.values())
+            # A split history lowers the weight, a unanimous one keeps it
+            self.add(
+                names[tokens],
+                account,
+                source="learned",
+                weight=LEARNED_WEIGHT * (0.5 + 0.5 * share),
+            )
+            learned += 1
+        logger.debug(f"Learned {learned} merchant accounts from history")
+        return learned
+
+    def match(self, merchant: str) -> Optional[Dict]:
+        """
+        Find the best account for a merchant name.
+
+        Returns:
+            Optional[dict]: {"account", "description", "confidence", "method",
+            "merchant"} for the best candidate at or above min_confidence,
+            otherwise None
+        """
+        tokens = merchant_tokens(merchant)
+        if not tokens or not self._entries:
+            return None
+
+        candidates: Dict[int, Tuple[float, str]] = {}
+
+        def consider(index: int, score: float, method: str):
+            score *= self._entries[index].weight
+            if index not in candidates or score > candidates[index][0]:
+                candidates[index] = (score, method)
+
+        key = " ".join(tokens)
+        for index in self._by_key.get(key, []):
+            consider(index, NORMALIZED_MATCH_SCORE, "normalized")
+
+        # Entries whose tokens extend the query ("swiggy" -> "swiggy instamart")
+        for index in self._by_prefix.get(tokens, []):
+            entry_length = len(self._entries[index].tokens)
+            if entry_length > len(tokens):
+                consider(index, self._prefix_score(len(tokens), entry_length), "prefix")
+        # Entries the query extends ("amazon retail india pvt" -> "amazon retail")
+        for length in range(len(tokens) - 1, 0, -1):
+            for index in self._by_key.get(" ".join(tokens[:length]), []):
+                consider(index, self._prefix_score(length, len(tokens)), "prefix")
+
+        # The trigram scan is the expensive step; skip it when it cannot win
+        best_so_far = max((score for score, _ in candidates.values()), default=0.0)
+        if best_so_far < TRIGRAM_MATCH_SCALE:
+            self._consider_trigrams(key, consider)
+
+        if not candidates:
+            return None
+        best_index, (confidence, method) = max(
+            candidates.items(), key=lambda item: item[1][0]
+        )
+        if confidence < self.min_confidence:
+            logger.debug(
+                f"Best merchant match for '{merchant}' below threshold: "
+                f"{self._entries[best_index].name} ({confidence:.2f})"
+            )
+            return None
+
+        entry = self._entries[best_index]
+        return {
+            "account": entry.account,
+            "description": entry.description,
+            "confidence": round(confidence, 3),
+            "method": method if entry.source == "mapping" else f"learned-{method}",
+            "merchant": entry.name,
+        }
+
+    def _consider_trigrams(self, key: str, consider):
+        """Score every entry sharing a trigram with the query key."""
+        query_trigrams = _trigrams(key)
+        shared = Counter()
+        for trigram in query_trigrams:
+            for index in self._by_trigram.get(trigram, []):
+                shared[index] += 1
+        for index, common in shared.items():
+            # Dice coefficient of the two trigram sets
+            similarity = (
+                2 * common / (len(query_trigrams) + self._trigram_counts[index])
+            )
+            consider(index, TRIGRAM_MATCH_SCALE * similarity, "trigram")
+
+    @staticmethod
+    def _prefix_score(shorter: int, longer: int) -> float:
+        return PREFIX_MATCH_BASE + PREFIX_MATCH_RANGE * shorter / longer
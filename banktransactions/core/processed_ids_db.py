@@ -9,13 +9,20 @@ database storage instead of file-based storage for better scalability and user i
 import logging
 import os
 import sys
-from typing import Optional, Set
+import threading
+from contextlib import contextmanager
+from typing import List, Optional, Set
 
 logger = logging.getLogger(__name__)
 
+# The Flask app is only built when an operation needs it and no lighter
+# database path is available; see get_app() and database_context()
+_app = None
+_app_lock = threading.Lock()
+
 try:
-    logger.debug("Attempting to import Flask app and database dependencies...")
-    # Set up project paths and import Flask app context and database service using shared imports
+    logger.debug("Attempting to import database dependencies...")
+    # Set up project paths and import the database service using shared imports
     from pathlib import Path
 
     project_root = Path(__file__).parent.parent.parent
@@ -23,16 +30,19 @@ try:
         sys.path.insert(0, str(project_root))
         logger.debug(f"Added project root to sys.path: {project_root}")
 
-    # Import database utilities first to avoid circular imports
-    # Import Flask app and extensions after shared imports
-    from app import create_app
-    from app.extensions import db
+    from shared.database import DatabaseManager
     from shared.imports import (
         clear_processed_gmail_msgids as db_clear_processed_gmail_msgids,
     )
+    from shared.imports import (
+        find_processed_gmail_msgids as db_find_processed_gmail_msgids,
+    )
     from shared.imports import (
         get_processed_message_count as db_get_processed_message_count,
     )
+    from shared.imports import (
+        insert_processed_gmail_msgids as db_insert_processed_gmail_msgids,
+    )
     from shared.imports import (
         is_gmail_message_processed as db_is_gmail_message_processed,
     )
@@ -46,18 +56,109 @@ try:
         save_processed_gmail_msgids as db_save_processed_gmail_msgids,
     )
 
-    # Create Flask app context for database operations
-    logger.debug("Creating Flask app for database operations...")
-    app = create_app()
-    logger.debug("Flask app created successfully")
+    database_available = db_load_processed_gmail_msgids is not None
+    logger.debug(f"Database service available: {database_available}")
 
 except ImportError as e:
-    logger.warning(f"Could not import Flask app or database service: {e}")
+    logger.warning(f"Could not import database service: {e}")
     logger.warning(
         "Database service not available - processed IDs functionality will be limited"
     )
     logger.debug(f"Import error details: {type(e).__name__}: {str(e)}")
-    app = None
+    database_available = False
+
+
+def get_app():
+    """
+    Return the Flask app used for database operations, creating it on first use.
+
+    Building the app (config, logging handlers, blueprints, limiters) takes
+    over a second, so it is deferred until an operation actually needs an
+    app context and then reused for the life of the process.
+
+    Returns:
+        Flask: The shared app, or None if it could not be created
+    """
+    global _app
+    if _app is not None:
+        return _app
+
+    with _app_lock:
+        if _app is None:
+            try:
+                from app import create_app
+
+                logger.debug("Creating Flask app for database operations...")
+                _app = create_app()
+                logger.debug("Flask app created successfully")
+            except Exception as e:
+                logger.error(f"Could not create Flask app: {e}")
+                logger.debug(
+                    f"App creation error details: {type(e).__name__}: {str(e)}",
+                    exc_info=True,
+                )
+                return None
+    return _app
+
+
+def dispose_app_connections():
+    """
+    Drop the shared app's pooled connections inherited across a fork.
+
+    Creating the app may open connections (e.g. db.create_all()), so a
+    child process forked after get_app() must not reuse them. The child
+    opens its own connections on next use.
+    """
+    if _app is None:
+        return
+
+    from app.extensions import db
+
+    with _app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    logger.debug("Dropped inherited Flask app database connections")
+
+
+@contextmanager
+def database_context(db_session=None):
+    """
+    Provide a session for the Gmail message service functions.
+
+    Uses, in order: the given session, the current Flask app context,
+    a standalone DatabaseManager session when DATABASE_URL is set, and
+    finally a context on the lazily created Flask app. None is yielded
+    when the service should use the app's db.session.
+
+    Args:
+        db_session (Session, optional): Session owned by the caller
+
+    Yields:
+        Optional[Session]: Session to pass to the service functions
+    """
+    if db_session is not None:
+        yield db_session
+        return
+
+    from flask import has_app_context
+
+    if has_app_context():
+        logger.debug("Using the current Flask app context")
+        yield None
+        return
+
+    if os.getenv("DATABASE_URL"):
+        logger.debug("Using a standalone database session")
+        with DatabaseManager.session_scope() as session:
+            yield session
+        return
+
+    flask_app = get_app()
+    if flask_app is None:
+        raise RuntimeError("No database configuration available")
+    with flask_app.app_context():
+        logger.debug("Created Flask app context")
+        yield None
 
 
 def load_processed_gmail_msgids(
@@ -75,17 +176,16 @@ def load_processed_gmail_msgids(
     """
     logger.debug(f"Starting load_processed_gmail_msgids for user_id: {user_id}")
     logger.debug(f"Filepath parameter: {filepath}")
-    logger.debug(f"App available: {app is not None}")
+    logger.debug(f"Database service available: {database_available}")
 
-    if app and user_id is not None:
+    if database_available and user_id is not None:
         # Use database-based approach
         logger.debug(
             "Using database-based approach to load processed Gmail Message IDs"
         )
         try:
-            with app.app_context():
-                logger.debug("Created Flask app context")
-                result = db_load_processed_gmail_msgids(user_id)
+            with database_context() as session:
+                result = db_load_processed_gmail_msgids(user_id, session)
                 logger.debug(
                     f"Successfully loaded {len(result)} processed Gmail Message IDs from database for user {user_id}"
                 )
@@ -122,17 +222,16 @@ def save_processed_gmail_msgids(
     logger.debug(f"Starting save_processed_gmail_msgids for user_id: {user_id}")
     logger.debug(f"Number of message IDs to save: {len(msgids)}")
     logger.debug(f"Filepath parameter: {filepath}")
-    logger.debug(f"App available: {app is not None}")
+    logger.debug(f"Database service available: {database_available}")
 
-    if app and user_id is not None:
+    if database_available and user_id is not None:
         # Use database-based approach
         logger.debug(
             "Using database-based approach to save processed Gmail Message IDs"
         )
         try:
-            with app.app_context():
-                logger.debug("Created Flask app context")
-                saved_count = db_save_processed_gmail_msgids(user_id, msgids)
+            with database_context() as session:
+                saved_count = db_save_processed_gmail_msgids(user_id, msgids, session)
                 logger.info(
                     f"Saved {saved_count} new processed Gmail Message IDs to database for user {user_id}"
                 )
@@ -168,15 +267,16 @@ def save_processed_gmail_msgid(
     """
     logger.debug(f"Starting save_processed_gmail_msgid for user_id: {user_id}")
     logger.debug(f"Gmail Message ID to save: {gmail_message_id}")
-    logger.debug(f"App available: {app is not None}")
+    logger.debug(f"Database service available: {database_available}")
 
-    if app and user_id is not None:
+    if database_available and user_id is not None:
         # Use database-based approach
         logger.debug("Using database-based approach to save single Gmail Message ID")
         try:
-            with app.app_context():
-                logger.debug("Created Flask app context")
-                result = db_save_processed_gmail_msgid(user_id, gmail_message_id)
+            with database_context() as session:
+                result = db_save_processed_gmail_msgid(
+                    user_id, gmail_message_id, session
+                )
                 if result:
                     logger.debug(
                         f"Successfully saved Gmail Message ID {gmail_message_id} to database for user {user_id}"
@@ -202,6 +302,46 @@ def save_processed_gmail_msgid(
         return False
 
 
+def find_processed_gmail_msgids(
+    candidate_ids, user_id: Optional[int] = None, db_session=None
+) -> Optional[Set[str]]:
+    """
+    Return which candidate Gmail Message IDs were already processed.
+
+    Unlike load_processed_gmail_msgids this only looks up the given IDs,
+    using the (user_id, gmail_message_id) index.
+
+    Args:
+        candidate_ids (Iterable[str]): Gmail Message IDs to check
+        user_id (int, optional): The ID of the user (required for database mode)
+        db_session (Session, optional): Session to use instead of an app context
+
+    Returns:
+        Optional[Set[str]]: The processed subset, or None if the check failed
+    """
+    candidate_ids = list(candidate_ids)
+    logger.debug(
+        f"Starting find_processed_gmail_msgids for user_id: {user_id} "
+        f"with {len(candidate_ids)} candidates"
+    )
+
+    if user_id is None or not database_available:
+        logger.error("Database service not available for checking message IDs")
+        return None
+
+    try:
+        with database_context(db_session) as session:
+            return db_find_processed_gmail_msgids(user_id, candidate_ids, session)
+    except Exception as e:
+        logger.error(
+            f"Error checking processed Gmail Message IDs for user {user_id}: {e}"
+        )
+        logger.debug(
+            f"Database error details: {type(e).__name__}: {str(e)}", exc_info=True
+        )
+        return None
+
+
 def is_gmail_message_processed(
     gmail_message_id: str,
     user_id: Optional[int] = None,
@@ -220,16 +360,17 @@ def is_gmail_message_processed(
     """
     logger.debug(f"Starting is_gmail_message_processed for user_id: {user_id}")
     logger.debug(f"Gmail Message ID to check: {gmail_message_id}")
-    logger.debug(f"App available: {app is not None}")
+    logger.debug(f"Database service available: {database_available}")
     logger.debug(f"Processed msgids set provided: {processed_msgids is not None}")
 
-    if app and user_id is not None:
+    if database_available and user_id is not None:
         # Use database-based approach
         logger.debug("Using database-based approach to check Gmail Message ID")
         try:
-            with app.app_context():
-                logger.debug("Created Flask app context")
-                result = db_is_gmail_message_processed(user_id, gmail_message_id)
+            with database_context() as session:
+                result = db_is_gmail_message_processed(
+                    user_id, gmail_message_id, session
+                )
                 logger.debug(
                     f"Database check result for Gmail Message ID {gmail_message_id}: {result}"
                 )
@@ -267,15 +408,14 @@ def get_processed_message_count(user_id: Optional[int] = None) -> int:
         int: Total count of processed messages
     """
     logger.debug(f"Starting get_processed_message_count for user_id: {user_id}")
-    logger.debug(f"App available: {app is not None}")
+    logger.debug(f"Database service available: {database_available}")
 
-    if app and user_id is not None:
+    if database_available and user_id is not None:
         # Use database-based approach
         logger.debug("Using database-based approach to get processed message count")
         try:
-            with app.app_context():
-                logger.debug("Created Flask app context")
-                count = db_get_processed_message_count(user_id)
+            with database_context() as session:
+                count = db_get_processed_message_count(user_id, session)
                 logger.debug(
                     f"Retrieved processed message count from database: {count}"
                 )
@@ -305,17 +445,16 @@ def clear_processed_gmail_msgids(user_id: Optional[int] = None) -> bool:
         bool: True if cleared successfully, False otherwise
     """
     logger.debug(f"Starting clear_processed_gmail_msgids for user_id: {user_id}")
-    logger.debug(f"App available: {app is not None}")
+    logger.debug(f"Database service available: {database_available}")
 
-    if app and user_id is not None:
+    if database_available and user_id is not None:
         # Use database-based approach
         logger.debug(
             "Using database-based approach to clear processed Gmail Message IDs"
         )
         try:
-            with app.app_context():
-                logger.debug("Created Flask app context")
-                result = db_clear_processed_gmail_msgids(user_id)
+            with database_context() as session:
+                result = db_clear_processed_gmail_msgids(user_id, session)
                 if result:
                     logger.debug(
                         f"Successfully cleared processed Gmail Message IDs for user {user_id}"
@@ -341,6 +480,88 @@ def clear_processed_gmail_msgids(user_id: Optional[int] = None) -> bool:
         return False
 
 
+class ProcessedIdBuffer:
+    """
+    Buffers processed Gmail Message IDs and saves them in batches.
+
+    Pass add() as the save callback and flush() as the checkpoint callback
+    of get_bank_emails: IDs are written with one INSERT ... ON CONFLICT DO
+    NOTHING per checkpoint (or whenever ``batch_size`` IDs are pending), so
+    a crash loses at most one batch of progress. IDs whose flush fails stay
+    buffered for the next checkpoint.
+    """
+
+    def __init__(self, user_id: int, db_session=None, batch_size: int = 50):
+        self.user_id = user_id
+        self.db_session = db_session
+        self.batch_size = batch_size
+        self._pending: List[str] = []
+        self.saved_count = 0
+        logger.debug(
+            f"Initializing ProcessedIdBuffer for user {user_id}: batch_size={batch_size}"
+        )
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered IDs not yet saved."""
+        return len(self._pending)
+
+    def add(self, gmail_message_id: str) -> bool:
+        """
+        Buffer a processed Gmail Message ID, flushing if the batch is full.
+
+        Returns:
+            bool: Always True; the ID is saved at the next flush
+        """
+        self._pending.append(gmail_message_id)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        return True
+
+    def flush(self) -> bool:
+        """
+        Save every buffered ID in one statement.
+
+        Returns:
+            bool: True if the buffer was saved (or empty), False otherwise
+        """
+        if not self._pending:
+            return True
+
+        batch = list(self._pending)
+        logger.debug(
+            f"Flushing {len(batch)} processed Gmail Message IDs for user {self.user_id}"
+        )
+        if not database_available:
+            logger.error("Database service not available for saving message IDs")
+            return False
+        try:
+            with database_context(self.db_session) as session:
+                inserted = db_insert_processed_gmail_msgids(
+                    self.user_id, batch, session
+                )
+        except Exception as e:
+            logger.error(
+                f"Error flushing processed Gmail Message IDs for user {self.user_id}: {e}"
+            )
+            logger.debug(
+                f"Database error details: {type(e).__name__}: {str(e)}", exc_info=True
+            )
+            return False
+
+        if inserted is None:
+            logger.warning(
+                f"Failed to save {len(batch)} Gmail Message IDs for user {self.user_id}, "
+                "will retry at the next checkpoint"
+            )
+            return False
+
+        del self._pending[: len(batch)]
+        self.saved_count += inserted
+        logger.debug(f"Saved {inserted} new Gmail Message IDs for user {self.user_id}")
+        return True
+
+
 def load_processed_gmail_msgids_file(filepath: Optional[str] = None) -> Set[str]:
     """
     Load processed Gmail Message IDs from file (deprecated).
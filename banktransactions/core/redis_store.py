@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Optional Redis connection for state shared between worker processes.
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def connect_from_env(purpose: str):
+    """
+    Connect to Redis if REDIS_URL is configured.
+
+    Args:
+        purpose (str): What the connection is for, used in log messages
+
+    Returns:
+        Redis connection, or None to fall back to process memory
+    """
+    redis_url = os.getenv("REDIS_URL")
+    if not redis_url:
+        logger.debug(f"REDIS_URL not set, {purpose} kept in memory only")
+        return None
+    try:
+        import redis
+
+        return redis.from_url(redis_url)
+    except Exception as e:
+        logger.warning(f"Redis unavailable for {purpose}, using memory only: {e}")
+        return None
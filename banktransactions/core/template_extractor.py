@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+Rule-based transaction extraction learned from previous extractions.
+
+Bank alerts from one sender are rendered from a handful of fixed templates.
+This module turns a body plus its known field values (from a user's sample
+emails or a successful LLM extraction) into a compiled regex template keyed
+by user and sender. Later emails from the same sender are matched against the
+learned templates in microseconds, and only misses or low-confidence matches
+need to go to the LLM.
+
+Templates keep literal text from the emails they were learned from, so they
+are never shared between users.
+"""
+
+import json
+import logging
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from banktransactions.core.redis_store import connect_from_env
+
+logger = logging.getLogger(__name__)
+
+# Fields a template can capture, mirroring the LLM extraction fields
+TEMPLATE_FIELDS = [
+    "amount",
+    "date",
+    "transaction_time",
+    "account_number",
+    "recipient",
+]
+
+# A template is only useful if it yields at least these fields
+REQUIRED_TEMPLATE_FIELDS = {"amount", "date"}
+
+# Learned templates are persisted in one Redis hash per user (prefix plus
+# user ID), one field per sender
+REDIS_TEMPLATES_PREFIX = "kanakku:extraction_templates:"
+
+# Hashes of sample emails no template could be learned from, one Redis set
+# per user, so they are not sent to the LLM again on every run
+REDIS_UNLEARNABLE_PREFIX = "kanakku:unlearnable_samples:"
+UNLEARNABLE_TTL_SECONDS = 30 * 24 * 60 * 60
+
+MAX_TEMPLATES_PER_SENDER = 20
+_PREFIX_CONTEXT_CHARS = 30
+_SUFFIX_CONTEXT_CHARS = 15
+
+# Numbers in literal text (balances, reference numbers) vary between emails
+_LITERAL_TOKEN_RE = re.compile(r"\d[\d,.]*\d|\d|\s+|[^\d\s]+")
+_TIME_RE = re.compile(r"\d{1,2}:\d{2}(?::\d{2})?")
+
+
+def _shape_pattern(value: str) -> str:
+    """Generalize a value to its character-class shape, e.g. 12-Mar-2024."""
+    parts = []
+    for token in re.findall(r"\d+|[A-Za-z]+|\s+|.", value):
+        if token.isdigit():
+            parts.append(r"\d+")
+        elif token.isalpha():
+            parts.append(r"[A-Za-z]+")
+        elif token.isspace():
+            parts.append(r"\s+")
+        else:
+            parts.append(re.escape(token))
+    return "".join(parts)
+
+
+def _field_pattern(field: str, value: str, is_last: bool) -> str:
+    """Return the capture pattern used for a field in a learned template."""
+    if field == "amount":
+        return r"\d[\d,]*(?:\.\d+)?"
+    if field == "transaction_time":
+        return r"\d{1,2}:\d{2}(?::\d{2})?"
+    if field in ("date", "account_number"):
+        return _shape_pattern(value)
+    # Free text such as merchant names is bounded by the following literal
+    return r"[^\n]+" if is_last else r"[^\n]+?"
+
+
+def _literal_pattern(text: str) -> str:
+    """Escape literal template text, generalizing numbers and whitespace."""
+    parts = []
+    for token in _LITERAL_TOKEN_RE.findall(text):
+        if token[0].isdigit():
+            parts.append(r"[\d,.]+")
+        elif token.isspace():
+            parts.append(r"\s+")
+        else:
+            parts.append(re.escape(token))
+    return "".join(parts)
+
+
+def _find_value(body: str, field: str, value: str) -> Optional[Tuple[int, int]]:
+    """Locate an extracted value in the body, returning its span."""
+    if field == "amount":
+        # The LLM strips thousands separators, the email usually keeps them
+        integer, _, fraction = value.partition(".")
+        pattern = ",?".join(re.escape(char) for char in integer)
+        if fraction:
+            pattern += re.escape("." + fraction)
+        match = re.search(rf"(?<![\d,]){pattern}(?![\d])", body)
+        return match.span() if match else None
+
+    start = body.find(value)
+    if start < 0:
+        return None
+    return start, start + len(value)
+
+
+def _validate_field(field: str, value: str) -> bool:
+    """Check that a captured value looks like a real value for its field."""
+    # Imported lazily to avoid a circular import with email_parser
+    from banktransactions.core.email_parser import standardize_date_format
+
+    value = value.strip()
+    if not value:
+        return False
+    if field == "amount":
+        try:
+            return float(value.replace(",", "")) > 0
+        except ValueError:
+            return False
+    if field == "date":
+        try:
+            datetime.strptime(standardize_date_format(value), "%d-%m-%Y")
+            return True
+        except ValueError:
+            return False
+    if field == "transaction_time":
+        return bool(_TIME_RE.fullmatch(value))
+    if field == "account_number":
+        return any(char.isdigit() for char in value)
+    return len(value) <= 100
+
+
+class ExtractionTemplate:
+    """A compiled regex template for one bank alert layout."""
+
+    def __init__(self, pattern: str, fields: List[str]):
+        self.pattern = pattern
+        self.fields = fields
+        self._regex = re.compile(pattern)
+
+    @classmethod
+    def learn(cls, body: str, extraction: Dict[str, str], min_confidence: float = 1.0):
+        """
+        Build a template from a body and the values known to be in it.
+
+        Every known value must be found in the body. A value the LLM
+        normalized (e.g. "ending 1234" extracted as "XX1234") cannot be
+        captured, and a template without it would report the field as
+        Unknown on every later email.
+
+        Args:
+            body (str): Cleaned email body text
+            extraction (dict): Field values as they appear in the body
+            min_confidence (float): Confidence the template must reach on the
+                body it is learned from
+
+        Returns:
+            Optional[ExtractionTemplate]: The template, or None if a value
+            could not be located or the template does not reproduce them
+        """
+        spans = []
+        for field in TEMPLATE_FIELDS:
+            value = extraction.get(field)
+            if not value or value == "Unknown":
+                continue
+            span = _find_value(body, field, value)
+            if span is None:
+                return None
+            spans.append((span[0], span[1], field))
+
+        spans.sort()
+        # Overlapping values cannot be captured by separate groups
+        for (_, end, _), (start, _, _) in zip(spans, spans[1:]):
+            if start < end:
+                return None
+        located = spans
+
+        fields = [field for _, _, field in located]
+        if not REQUIRED_TEMPLATE_FIELDS.issubset(fields):
+            return None
+
+        first_start = located[0][0]
+        prefix_start = max(
+            body.rfind("\n", 0, first_start) + 1,
+            first_start - _PREFIX_CONTEXT_CHARS,
+        )
+        pattern = _literal_pattern(body[prefix_start:first_start])
+
+        for index, (start, end, field) in enumerate(located):
+            is_last = index == len(located) - 1
+            pattern += f"(?P<{field}>{_field_pattern(field, body[start:end], is_last)})"
+            if not is_last:
+                pattern += _literal_pattern(body[end : located[index + 1][0]])
+
+        last_end = located[-1][1]
+        suffix = body[last_end : last_end + _SUFFIX_CONTEXT_CHARS].split("\n")[0]
+        pattern += _literal_pattern(suffix)
+
+        template = cls(pattern, fields)
+
+        # Only keep templates that reproduce the values they were learned from
+        # with enough confidence to ever be used
+        matched = template.match(body)
+        if matched is None:
+            return None
+        details, confidence = matched
+        if confidence < min_confidence:
+            return None
+        for field in fields:
+            if details[field].replace(",", "") != extraction[field].replace(",", ""):
+                return None
+        return template
+
+    def match(self, body: str) -> Optional[Tuple[Dict[str, str], float]]:
+        """
+        Apply the template to a body.
+
+        Returns:
+            Optional[tuple]: (details, confidence) where confidence is the
+            fraction of captured fields that validate, or None on no match
+        """
+        match = self._regex.search(body)
+        if not match:
+            return None
+
+        details = dict.fromkeys(TEMPLATE_FIELDS, "Unknown")
+        valid = 0
+        for field in self.fields:
+            value = match.group(field).strip()
+            details[field] = value
+            if _validate_field(field, value):
+                valid += 1
+        return details, valid / len(self.fields)
+
+    def to_dict(self) -> Dict:
+        """Serialize the template for storage."""
+        return {"pattern": self.pattern, "fields": self.fields}
+
+    @classmethod
+    def from_dict(cls, data: Dict):
+        """Rebuild a template from its serialized form."""
+        return cls(data["pattern"], data["fields"])
+
+
+class TemplateExtractor:
+    """
+    Registry of learned extraction templates keyed by user and bank sender.
+
+    Templates are kept in memory and, when a Redis connection is available,
+    persisted so every worker benefits from what any worker has learned for
+    the same user. Without a user ID templates are neither used nor learned.
+    """
+
+    def __init__(self, redis_conn=None, min_confidence: float = 1.0):
+        logger.debug(
+            f"Initializing TemplateExtractor with min_confidence={min_confidence}"
+        )
+        self.redis_conn = redis_conn
+        self.min_confidence = min_confidence
+        self._templates: Dict[Tuple[int, str], List[ExtractionTemplate]] = {}
+        self._loaded_senders = set()
+        self._unlearnable = set()
+        self.stats = {"hits": 0, "misses": 0, "learned": 0}
+
+    @staticmethod
+    def _normalize_sender(sender: str) -> str:
+        return sender.strip().lower()
+
+    def _get_templates(self, user_id: int, sender: str) -> List[ExtractionTemplate]:
+        """Return a user's templates for a sender, loading them from Redis once."""
+        key = (user_id, sender)
+        if key not in self._loaded_senders:
+            self._loaded_senders.add(key)
+            stored = self._load_from_redis(user_id, sender)
+            if stored:
+                self._templates.setdefault(key, []).extend(stored)
+        return self._templates.get(key, [])
+
+    def _load_from_redis(self, user_id: int, sender: str) -> List[ExtractionTemplate]:
+        if self.redis_conn is None:
+            return []
+        try:
+            raw = self.redis_conn.hget(f"{REDIS_TEMPLATES_PREFIX}{user_id}", sender)
+            if not raw:
+                return []
+            return [ExtractionTemplate.from_dict(item) for item in json.loads(raw)]
+        except Exception as e:
+            logger.warning(f"Could not load extraction templates for {sender}: {e}")
+            return []
+
+    def _save_to_redis(self, user_id: int, sender: str):
+        if self.redis_conn is None:
+            return
+        try:
+            payload = json.dumps(
+                [template.to_dict() for template in self._templates[(user_id, sender)]]
+            )
+            self.redis_conn.hset(f"{REDIS_TEMPLATES_PREFIX}{user_id}", sender, payload)
+        except Exception as e:
+            logger.warning(f"Could not save extraction templates for {sender}: {e}")
+
+    def _is_unlearnable(self, user_id: int, sample_key: str) -> bool:
+        """Check whether a sample already failed to produce a template."""
+        if (user_id, sample_key) in self._unlearnable:
+            return True
+        if self.redis_conn is None:
+            return False
+        try:
+            if self.redis_conn.sismember(
+                f"{REDIS_UNLEARNABLE_PREFIX}{user_id}", sample_key
+            ):
+                self._unlearnable.add((user_id, sample_key))
+                return True
+        except Exception as e:
+            logger.warning(f"Could not check unlearnable samples of {user_id}: {e}")
+        return False
+
+    def _mark_unlearnable(self, user_id: int, sample_key: str):
+        """Remember a sample no template could be learned from."""
+        self._unlearnable.add((user_id, sample_key))
+        if self.redis_conn is None:
+            return
+        try:
+            key = f"{REDIS_UNLEARNABLE_PREFIX}{user_id}"
+            pipe = self.redis_conn.pipeline()
+            pipe.sadd(key, sample_key)
+            pipe.expire(key, UNLEARNABLE_TTL_SECONDS)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not save unlearnable samples of {user_id}: {e}")
+
+    def _has_matching_template(self, user_id: int, sender: str, body: str) -> bool:
+        """Check whether an existing template already handles a body."""
+        for template in self._get_templates(user_id, sender):
+            matched = template.match(body)
+            if matched and matched[1] >= self.min_confidence:
+                return True
+        return False
+
+    def learn(
+        self,
+        user_id: Optional[int],
+        sender: str,
+        body: str,
+        extraction: Dict[str, str],
+    ) -> bool:
+        """
+        Learn a template for a sender from a body and its known field values.
+
+        Args:
+            user_id (int): User whose email the body is
+            sender (str): Bank sender address the email came from
+            body (str): Cleaned email body text
+            extraction (dict): Field values as they appear in the body
+
+        Returns:
+            bool: True if a new template was added
+        """
+        if user_id is None or not sender or not body:
+            return False
+        sender = self._normalize_sender(sender)
+
+        # Nothing to learn if an existing template already handles this email
+        if self._has_matching_template(user_id, sender, body):
+            return False
+        templates = self._get_templates(user_id, sender)
+
+        template = ExtractionTemplate.learn(body, extraction, self.min_confidence)
+        if template is None:
+            logger.debug(f"Could not learn an extraction template for {sender}")
+            return False
+        if any(existing.pattern == template.pattern for existing in templates):
+            return False
+
+        templates = self._templates.setdefault((user_id, sender), [])
+        templates.append(template)
+        del templates[:-MAX_TEMPLATES_PER_SENDER]
+        self.stats["learned"] += 1
+        logger.info(
+            f"Learned extraction template #{len(templates)} for {sender} "
+            f"(user {user_id})"
+        )
+        self._save_to_redis(user_id, sender)
+        return True
+
+    def learn_from_samples(
+        self, user_id: Optional[int], sample_emails: List, senders: Sequence[str]
+    ) -> int:
+        """
+        Learn templates from a user's sample emails.
+
+        Samples are either plain email bodies, as saved by the email
+        automation settings page, or dicts with a "body", an optional "from"
+        and an optional "extraction" dict of the expected field values.
+        Samples without a sender are learned for every configured sender, and
+        samples an existing template already handles are skipped.
+
+        Samples without expected values are labelled with the cached LLM
+        extraction. Those no template can be learned from are remembered by
+        their extraction cache key (which covers the model and prompt), so
+        they are only sent to the LLM again after a prompt or model change.
+        Labelling needs Redis: in process memory, templates, labels and
+        failures would all be lost with the forked job, costing an LLM call
+        per sample on every run.
+
+        Args:
+            user_id (int): User the samples belong to
+            sample_emails (list): Samples from the email configuration
+            senders (list): Bank sender addresses configured for the user
+
+        Returns:
+            int: Number of templates learned
+        """
+        if user_id is None:
+            return 0
+        # Imported lazily to avoid a circular import with email_parser
+        from banktransactions.core.email_parser import (
+            _extract_with_llm_cached,
+            _extraction_cache_key,
+            clean_email_body,
+        )
+
+        learned = 0
+        for sample in sample_emails or []:
+            if isinstance(sample, str):
+                sample = {"body": sample}
+            if not isinstance(sample, dict):
+                continue
+            body = clean_email_body(sample.get("body") or "")
+            if not body:
+                continue
+            sample_senders = [
+                sender
+                for sender in ([sample["from"]] if sample.get("from") else senders)
+                if sender
+                and not self._has_matching_template(
+                    user_id, self._normalize_sender(sender), body
+                )
+            ]
+            if not sample_senders:
+                continue
+
+            extraction = sample.get("extraction")
+            sample_key = None
+            if not isinstance(extraction, dict):
+                if self.redis_conn is None:
+                    logger.debug("No Redis connection, not labelling sample emails")
+                    continue
+                sample_key = _extraction_cache_key(body)
+                if self._is_unlearnable(user_id, sample_key):
+                    continue
+                logger.debug(f"Labelling a sample email of user {user_id}")
+                extraction = _extract_with_llm_cached(body)
+
+            sample_learned = 0
+            for sender in sample_senders:
+                if self.learn(user_id, sender, body, extraction):
+                    sample_learned += 1
+            if not sample_learned and sample_key is not None:
+                logger.debug(f"Could not learn from a sample email of user {user_id}")
+                self._mark_unlearnable(user_id, sample_key)
+            learned += sample_learned
+        return learned
+
+    def extract(
+        self, user_id: Optional[int], sender: str, body: str
+    ) -> Optional[Dict[str, str]]:
+        """
+        Extract transaction details with the templates learned for a user's sender.
+
+        Args:
+            user_id (int): User whose email the body is
+            sender (str): Bank sender address the email came from
+            body (str): Cleaned email body text
+
+        Returns:
+            Optional[dict]: Raw field values (as they appear in the email), or
+            None on a miss or a match below the confidence threshold
+        """
+        if user_id is None or not sender:
+            return None
+        best = None
+        for template in self._get_templates(user_id, self._normalize_sender(sender)):
+            matched = template.match(body)
+            if matched and (best is None or matched[1] > best[1]):
+                best = matched
+                if best[1] >= 1.0:
+                    break
+
+        if best is None or best[1] < self.min_confidence:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return best[0]
+
+    def clear(self):
+        """Forget all in-memory templates and statistics."""
+        self._templates.clear()
+        self._loaded_senders.clear()
+        self._unlearnable.clear()
+        self.stats = {"hits": 0, "misses": 0, "learned": 0}
+
+
+# Create a global extractor instance
+logger.debug("Creating global template extractor instance")
+template_extractor = TemplateExtractor(
+    redis_conn=connect_from_env("extraction templates")
+)
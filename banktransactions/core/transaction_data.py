@@ -4,8 +4,14 @@ from urllib.parse import urljoin
 
 import requests
 
+from banktransactions.core.merchant_matcher import MerchantMatcher
+
 logger = logging.getLogger(__name__)
 
+# Accounts used when no mapping matches
+DEFAULT_EXPENSE_ACCOUNT = "Expenses:Groceries"
+DEFAULT_BANK_ACCOUNT = "Assets:Bank:Axis"
+
 
 def get_mappings_from_api():
     """
@@ -92,10 +98,146 @@ def get_mappings_from_api():
         return None
 
 
-def construct_transaction_data(transaction):
+def _normalize_mapping_key(key):
+    """Normalize a mapping key for case- and whitespace-insensitive lookups."""
+    return " ".join(str(key).split()).casefold()
+
+
+class MappingSnapshot:
+    """
+    Account mappings loaded once and shared by every email in a job.
+
+    Lookups try the exact key first, then a normalized (case- and
+    whitespace-insensitive) index built when the snapshot is created.
+    Merchants without an exact mapping are resolved by a fuzzy
+    MerchantMatcher, optionally seeded with past categorizations.
+    """
+
+    def __init__(
+        self, bank_account_map=None, expense_account_map=None, categorizations=None
+    ):
+        self.bank_account_map = dict(bank_account_map or {})
+        self.expense_account_map = dict(expense_account_map or {})
+        self._bank_index = {
+            _normalize_mapping_key(key): value
+            for key, value in self.bank_account_map.items()
+        }
+        self._expense_index = {
+            _normalize_mapping_key(key): value
+            for key, value in self.expense_account_map.items()
+        }
+        self.merchant_matcher = MerchantMatcher(self.expense_account_map)
+        if categorizations:
+            self.merchant_matcher.learn_from_history(
+                categorizations, ignore_accounts=[DEFAULT_EXPENSE_ACCOUNT]
+            )
+        logger.debug(
+            f"Built mapping snapshot: {len(self.bank_account_map)} bank accounts, "
+            f"{len(self.expense_account_map)} merchants"
+        )
+
+    @classmethod
+    def load(cls):
+        """
+        Load the mappings with a single API call.
+
+        Returns:
+            MappingSnapshot: The snapshot, empty if the API request failed
+        """
+        logger.debug("Fetching mappings from API...")
+        config = get_mappings_from_api()
+
+        # Default mappings if API request fails
+        if not config:
+            logger.error("Failed to load configuration from API")
+            logger.debug("Using default empty mappings")
+            return cls()
+        return cls(
+            config.get("bank-account-map", {}), config.get("expense-account-map", {})
+        )
+
+    @classmethod
+    def load_from_database(cls, db_session, user_id):
+        """
+        Load the mappings in-process through the shared TransactionService.
+
+        Args:
+            db_session: The worker's database session
+            user_id (int): User whose active-book mappings to load
+
+        Returns:
+            MappingSnapshot: The snapshot, empty if the query failed
+        """
+        # Imported lazily: shared.imports itself imports this module
+        from shared.services.transaction import TransactionService
+
+        logger.debug(f"Loading mappings from the database for user {user_id}")
+        service = TransactionService(user_id=user_id, session=db_session)
+        result = service.get_account_mappings()
+        if not result.success:
+            logger.error(f"Failed to load mappings from database: {result.error}")
+            return cls()
+
+        history = service.get_expense_categorizations()
+        categorizations = history.data if history.success else None
+        return cls(
+            result.data.get("bank-account-map", {}),
+            result.data.get("expense-account-map", {}),
+            categorizations,
+        )
+
+    def get_bank_account(self, account_number, default=None):
+        """Look up the ledger account for a bank account identifier."""
+        if account_number in self.bank_account_map:
+            return self.bank_account_map[account_number]
+        return self._bank_index.get(_normalize_mapping_key(account_number), default)
+
+    def get_expense_account(self, merchant, default=None):
+        """Look up the [ledger account, description] pair for a merchant."""
+        match = self.match_expense_account(merchant)
+        if match is None:
+            return default
+        if match["method"] == "exact":
+            return match["value"]
+        return [match["account"], match["description"]]
+
+    def match_expense_account(self, merchant):
+        """
+        Resolve a merchant to an expense account with a confidence score.
+
+        Returns:
+            Optional[dict]: {"account", "description", "confidence", "method",
+            "merchant"}, or None if no candidate is confident enough. Exact
+            and case-insensitive hits have confidence 1.0, method "exact" and
+            also carry the raw mapping "value".
+        """
+        value = self.expense_account_map.get(merchant)
+        if value is None:
+            value = self._expense_index.get(_normalize_mapping_key(merchant))
+        if value is not None:
+            account, description = MerchantMatcher._split_mapping_value(value)
+            return {
+                "account": account,
+                "description": description,
+                "confidence": 1.0,
+                "method": "exact",
+                "merchant": merchant,
+                "value": value,
+            }
+        return self.merchant_matcher.match(merchant)
+
+
+def construct_transaction_data(transaction, mappings=None):
     """
     Construct transaction data from transaction details.
-    Uses mappings from API.
+
+    Args:
+        transaction (dict): Extracted transaction details
+        mappings (MappingSnapshot, optional): Job-scoped mappings; loaded from
+            the API for this call only if not given
+
+    Returns:
+        dict: Transaction data ready to send to the API
     """
     logger.debug("Starting construct_transaction_data function")
     logger.debug(
@@ -108,27 +250,12 @@ def construct_transaction_data(transaction):
         f"Transaction account_number: {transaction.get('account_number', 'Not found')}"
     )
 
-    # Get mappings from API
-    logger.debug("Fetching mappings from API...")
-    config = get_mappings_from_api()
-
-    # Default mappings if API request fails
-    if not config:
-        logger.error("Failed to load configuration from API")
-        logger.debug("Using default empty mappings")
-        bank_account_map = {}
-        expense_account_map = {}
-    else:
-        bank_account_map = config.get("bank-account-map", {})
-        expense_account_map = config.get("expense-account-map", {})
-        logger.debug(f"Loaded bank account mappings: {len(bank_account_map)} entries")
-        logger.debug(
-            f"Loaded expense account mappings: {len(expense_account_map)} entries"
-        )
+    if mappings is None:
+        mappings = MappingSnapshot.load()
 
     # Default account if no mapping found
-    default_expense_account = "Expenses:Groceries"
-    default_bank_account = "Assets:Bank:Axis"
+    default_expense_account = DEFAULT_EXPENSE_ACCOUNT
+    default_bank_account = DEFAULT_BANK_ACCOUNT
     logger.debug(f"Default expense account: {default_expense_account}")
     logger.debug(f"Default bank account: {default_bank_account}")
 
@@ -137,9 +264,21 @@ def construct_transaction_data(transaction):
     logger.debug(
         f"Looking up recipient '{recipient_name}' in expense account mappings..."
     )
-    recipient_info = expense_account_map.get(
-        recipient_name, [default_expense_account, "Unknown"]
-    )
+    match = mappings.match_expense_account(recipient_name)
+    if match is None:
+        recipient_info = [default_expense_account, "Unknown"]
+        match_confidence = 0.0
+    else:
+        recipient_info = match.get("value") or [
+            match["account"],
+            match["description"],
+        ]
+        match_confidence = match["confidence"]
+        if match["method"] != "exact":
+            logger.info(
+                f"Matched merchant '{recipient_name}' to '{match['merchant']}' "
+                f"({match['method']}, confidence {match_confidence:.2f})"
+            )
     logger.debug(f"Recipient mapping result: {recipient_info}")
 
     # Get account info from the mapping or use default
@@ -147,7 +286,7 @@ def construct_transaction_data(transaction):
     logger.debug(
         f"Looking up account number '{account_number}' in bank account mappings..."
     )
-    from_account = bank_account_map.get(account_number, default_bank_account)
+    from_account = mappings.get_bank_account(account_number, default_bank_account)
     logger.debug(f"Bank account mapping result: {from_account}")
 
     # Build the transaction data structure
@@ -160,6 +299,7 @@ def construct_transaction_data(transaction):
         "recipient_name": recipient_name
         + " "
         + (recipient_info[1] if len(recipient_info) > 1 else ""),
+        "expense_match_confidence": match_confidence,
     }
 
     logger.debug("Constructed transaction data:")
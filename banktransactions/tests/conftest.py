@@ -0,0 +1,17 @@
+import pytest
+
+from banktransactions.core.extraction_cache import extraction_cache
+from banktransactions.core.llm_providers import llm_providers
+from banktransactions.core.template_extractor import template_extractor
+
+
+@pytest.fixture(autouse=True)
+def clear_extraction_state():
+    """Reset process-wide extraction caches so tests do not leak into each other"""
+    template_extractor.clear()
+    extraction_cache.clear()
+    llm_providers.clear()
+    yield
+    template_extractor.clear()
+    extraction_cache.clear()
+    llm_providers.clear()
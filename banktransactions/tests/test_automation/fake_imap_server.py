@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Local IMAP server test double for the IDLE listener.
+
+Speaks just enough plain-text IMAP4rev1 for AsyncIMAPConnection: LOGIN,
+SELECT, UID SEARCH (UID ranges, FROM, OR and SINCE), IDLE/DONE and LOGOUT.
+Messages are delivered with deliver(), which notifies idling sessions the
+way a real server does.
+"""
+
+import asyncio
+import shlex
+
+
+class FakeIMAPServer:
+    """An in-process IMAP server holding one INBOX per account."""
+
+    def __init__(self, accounts, uid_validity=1):
+        # username -> password
+        self.accounts = dict(accounts)
+        self.uid_validity = uid_validity
+        # username -> list of (uid, sender)
+        self.mailboxes = {username: [] for username in self.accounts}
+        self.next_uid = dict.fromkeys(self.accounts, 1)
+        self.logins = dict.fromkeys(self.accounts, 0)
+        self.idle_commands = 0
+        self._idling = {}
+        self._writers = set()
+        self._server = None
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def stop(self):
+        self.drop_connections()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def drop_connections(self):
+        """Close every client connection, like a server restart."""
+        for writer in list(self._writers):
+            writer.close()
+        self._writers.clear()
+        self._idling.clear()
+
+    def deliver(self, username, sender):
+        """Add a message to an INBOX and notify idling sessions."""
+        uid = self.next_uid[username]
+        self.next_uid[username] += 1
+        self.mailboxes[username].append((uid, sender))
+        exists = len(self.mailboxes[username])
+        for writer, idle_user in list(self._idling.items()):
+            if idle_user == username:
+                writer.write(f"* {exists} EXISTS\r\n".encode())
+        return uid
+
+    async def _handle(self, reader, writer):
+        self._writers.add(writer)
+        user = None
+        idle_tag = None
+        writer.write(b"* OK Fake IMAP ready\r\n")
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                line = raw.decode().rstrip("\r\n")
+                if line == "DONE":
+                    self._idling.pop(writer, None)
+                    writer.write(f"{idle_tag} OK IDLE terminated\r\n".encode())
+                    continue
+                tag, command, *args = shlex.split(line)
+                command = command.upper()
+
+                if command == "LOGIN":
+                    if self.accounts.get(args[0]) == args[1]:
+                        user = args[0]
+                        self.logins[user] += 1
+                        writer.write(f"{tag} OK LOGIN completed\r\n".encode())
+                    else:
+                        writer.write(f"{tag} NO [AUTHENTICATIONFAILED]\r\n".encode())
+                elif command == "SELECT":
+                    mailbox = self.mailboxes[user]
+                    writer.write(
+                        f"* {len(mailbox)} EXISTS\r\n"
+                        f"* OK [UIDVALIDITY {self.uid_validity}] UIDs valid\r\n"
+                        f"* OK [UIDNEXT {self.next_uid[user]}] Predicted next UID\r\n"
+                        f"{tag} OK [READ-WRITE] SELECT completed\r\n".encode()
+                    )
+                elif command == "UID" and args[0].upper() == "SEARCH":
+                    uids = self._search(user, args[1:])
+                    writer.write(
+                        f"* SEARCH {' '.join(map(str, uids))}\r\n"
+                        f"{tag} OK SEARCH completed\r\n".encode()
+                    )
+                elif command == "IDLE":
+                    self.idle_commands += 1
+                    idle_tag = tag
+                    self._idling[writer] = user
+                    writer.write(b"+ idling\r\n")
+                elif command == "LOGOUT":
+                    writer.write(f"* BYE\r\n{tag} OK LOGOUT completed\r\n".encode())
+                    break
+                else:
+                    writer.write(f"{tag} BAD Unknown command\r\n".encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._idling.pop(writer, None)
+            self._writers.discard(writer)
+            writer.close()
+
+    def _search(self, user, criteria):
+        mailbox = self.mailboxes[user]
+        highest = mailbox[-1][0] if mailbox else 0
+        matcher, rest = self._parse(criteria, highest)
+        while rest:
+            next_matcher, rest = self._parse(rest, highest)
+            matcher = _and(matcher, next_matcher)
+        return [uid for uid, sender in mailbox if matcher(uid, sender)]
+
+    def _parse(self, criteria, highest):
+        """Parse one search key; returns (matcher, remaining criteria)."""
+        key = criteria[0].upper()
+        if key == "OR":
+            left, rest = self._parse(criteria[1:], highest)
+            right, rest = self._parse(rest, highest)
+            return (lambda uid, sender: left(uid, sender) or right(uid, sender)), rest
+        if key == "FROM":
+            address = criteria[1].lower()
+            return (lambda uid, sender: address in sender.lower()), criteria[2:]
+        if key == "SINCE":
+            return (lambda uid, sender: True), criteria[2:]
+        if key == "UID":
+            start, _, end = criteria[1].partition(":")
+            low = int(start)
+            if end == "*":
+                # Like real servers, "n:*" also matches the highest UID when
+                # it is below n
+                return (lambda uid, sender: uid >= low or uid == highest), criteria[2:]
+            high = int(end or start)
+            return (lambda uid, sender: low <= uid <= high), criteria[2:]
+        raise ValueError(f"Unsupported search key {key}")
+
+
+def _and(left, right):
+    return lambda uid, sender: left(uid, sender) and right(uid, sender)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Tests for adaptive polling intervals driven by per-user arrival rates.
+"""
+
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+# Add banktransactions directory to Python path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from banktransactions.automation.job_utils import (
+    get_adaptive_bounds,
+    get_config_interval,
+    record_arrivals,
+)
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _config(polling_interval="adaptive", last_check_time=START):
+    return SimpleNamespace(
+        user_id=1,
+        polling_interval=polling_interval,
+        last_check_time=last_check_time,
+        arrival_rate_ewma=None,
+        adaptive_interval_seconds=None,
+    )
+
+
+def _run(config, new_transactions):
+    """Process one run at the configuration's next due time."""
+    now = config.last_check_time + get_config_interval(config)
+    interval = record_arrivals(config, new_transactions, now)
+    config.last_check_time = now
+    return interval
+
+
+class TestRecordArrivals:
+    """Test cases for updating arrival statistics after a run."""
+
+    def test_first_run_is_not_counted(self):
+        config = _config(last_check_time=None)
+
+        interval = record_arrivals(config, 50, START)
+
+        assert interval == timedelta(hours=1)
+        assert config.arrival_rate_ewma is None
+
+    def test_busy_account_shortens_in_bounded_steps(self):
+        config = _config()
+
+        intervals = [_run(config, 4) for _ in range(3)]
+
+        # Four transactions an hour call for a run every 15 minutes, reached
+        # by halving at most once per run
+        assert intervals == [
+            timedelta(minutes=30),
+            timedelta(minutes=15),
+            timedelta(minutes=15),
+        ]
+        assert config.arrival_rate_ewma > 4
+
+    def test_quiet_account_lengthens_up_to_the_maximum(self):
+        config = _config()
+
+        intervals = [_run(config, 0) for _ in range(8)]
+
+        assert intervals[:3] == [
+            timedelta(hours=2),
+            timedelta(hours=4),
+            timedelta(hours=8),
+        ]
+        assert intervals[-1] == timedelta(days=1)
+        assert config.arrival_rate_ewma == 0
+
+    def test_manual_trigger_right_after_a_run_is_not_a_burst(self):
+        config = _config()
+
+        record_arrivals(config, 1, START + timedelta(seconds=5))
+
+        # Counted over the minimum interval, not over five seconds
+        assert config.arrival_rate_ewma == 4
+
+    def test_fixed_intervals_keep_their_interval(self):
+        config = _config(polling_interval="daily")
+
+        interval = record_arrivals(config, 30, START + timedelta(days=1))
+
+        assert interval == timedelta(days=1)
+        assert config.arrival_rate_ewma == 30 / 24
+        assert config.adaptive_interval_seconds is None
+
+
+class TestAdaptiveBounds:
+    """Test cases for the configured adaptive interval bounds."""
+
+    def test_bounds_from_environment(self, monkeypatch):
+        monkeypatch.setenv("EMAIL_ADAPTIVE_MIN_MINUTES", "5")
+        monkeypatch.setenv("EMAIL_ADAPTIVE_MAX_MINUTES", "120")
+
+        assert get_adaptive_bounds() == (timedelta(minutes=5), timedelta(hours=2))
+        config = _config()
+        config.adaptive_interval_seconds = 24 * 60 * 60
+        assert get_config_interval(config) == timedelta(hours=2)
+
+    def test_invalid_bounds_fall_back_to_defaults(self, monkeypatch):
+        monkeypatch.setenv("EMAIL_ADAPTIVE_MIN_MINUTES", "soon")
+
+        assert get_adaptive_bounds() == (timedelta(minutes=15), timedelta(days=1))
+
+
+def test_fleet_simulation_cuts_logins_and_latency():
+    """A mostly quiet fleet logs in far less and busy accounts are seen sooner"""
+    rng = random.Random(7)
+    # Nine quiet accounts (one alert every ~2 days) for every busy one
+    rates = [0.02] * 90 + [3.0] * 10
+    days = 7
+    logins = {"hourly": 0, "adaptive": 0}
+    busy_wait_hours = {"hourly": [], "adaptive": []}
+
+    for mode in logins:
+        for rate in rates:
+            config = _config(polling_interval=mode)
+            end = START + timedelta(days=days)
+            while config.last_check_time < end:
+                interval = get_config_interval(config)
+                hours = interval.total_seconds() / 3600
+                arrivals = sum(
+                    1 for _ in range(int(rate * hours * 10)) if rng.random() < 0.1
+                )
+                record_arrivals(config, arrivals, config.last_check_time + interval)
+                config.last_check_time += interval
+                logins[mode] += 1
+                if rate > 1:
+                    # Alerts wait half an interval on average
+                    busy_wait_hours[mode].append(hours / 2)
+
+    assert logins["adaptive"] < 0.4 * logins["hourly"]
+    adaptive_wait = sum(busy_wait_hours["adaptive"]) / len(busy_wait_hours["adaptive"])
+    hourly_wait = sum(busy_wait_hours["hourly"]) / len(busy_wait_hours["hourly"])
+    assert adaptive_wait < 0.5 * hourly_wait
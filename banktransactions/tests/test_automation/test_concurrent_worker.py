@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Tests for running several email jobs concurrently in one worker process.
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+
+# Add banktransactions directory to Python path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from rq import SimpleWorker
+from rq.worker import StopRequested
+
+from banktransactions.automation.concurrent_worker import (
+    ConcurrentWorker,
+    SlotWorker,
+    UserJobLocks,
+    get_job_user_id,
+)
+
+
+def _slot(**kwargs):
+    return SlotWorker(
+        ["email_processing"],
+        connection=Mock(connection_pool=Mock(connection_kwargs={})),
+        prepare_for_work=False,
+        **kwargs,
+    )
+
+
+def _job(*args, **kwargs):
+    return SimpleNamespace(id="job", args=args, kwargs=kwargs)
+
+
+class _FakeSlot:
+    """A slot that runs jobs from an in-memory queue like a SlotWorker."""
+
+    stats = None
+
+    def __init__(self, queues, connection, name, user_locks, poll_interval, **kwargs):
+        self.jobs = queues[0]
+        self.name = name
+        self.user_locks = user_locks
+        self._stop_requested = False
+
+    def request_graceful_stop(self):
+        self._stop_requested = True
+
+    def work(self, burst=False, logging_level="INFO", max_jobs=None):
+        worked = False
+        while not self._stop_requested:
+            try:
+                user_id, duration = self.jobs.get(timeout=0.01)
+            except queue.Empty:
+                if burst:
+                    break
+                continue
+            with self.user_locks.hold(user_id):
+                self.stats.started(user_id)
+                time.sleep(duration)
+                self.stats.finished(user_id)
+            worked = True
+        return worked
+
+
+class _Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = []
+        self.peak = 0
+        self.same_user_overlap = False
+        self.completed = 0
+
+    def started(self, user_id):
+        with self.lock:
+            if user_id in self.running:
+                self.same_user_overlap = True
+            self.running.append(user_id)
+            self.peak = max(self.peak, len(self.running))
+
+    def finished(self, user_id):
+        with self.lock:
+            self.running.remove(user_id)
+            self.completed += 1
+
+
+@pytest.fixture
+def stats():
+    _FakeSlot.stats = _Stats()
+    return _FakeSlot.stats
+
+
+def _worker(jobs, concurrency):
+    return ConcurrentWorker(
+        [jobs], connection=Mock(), concurrency=concurrency, worker_class=_FakeSlot
+    )
+
+
+class TestGetJobUserId:
+    def test_user_from_args_or_kwargs(self):
+        assert get_job_user_id(_job(7, [1, 2])) == 7
+        assert get_job_user_id(_job(user_id=9)) == 9
+        assert get_job_user_id(_job()) is None
+
+
+class TestUserJobLocks:
+    def test_same_user_is_serialized_and_released(self):
+        locks = UserJobLocks()
+        order = []
+        first_holding = threading.Event()
+
+        def first():
+            with locks.hold(1):
+                first_holding.set()
+                time.sleep(0.05)
+                order.append("first")
+
+        def second():
+            first_holding.wait()
+            with locks.hold(1):
+                order.append("second")
+
+        threads = [threading.Thread(target=first), threading.Thread(target=second)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert order == ["first", "second"]
+        assert locks.active_users() == []
+
+    def test_different_users_do_not_wait(self):
+        locks = UserJobLocks()
+
+        with locks.hold(1):
+            with locks.hold(2):
+                assert sorted(locks.active_users()) == [1, 2]
+            with locks.hold(None):
+                pass
+
+        assert locks.active_users() == []
+
+
+class TestSlotWorker:
+    def test_job_runs_under_its_user_lock(self):
+        locks = UserJobLocks()
+        slot = _slot(user_locks=locks)
+        seen = []
+
+        with patch.object(
+            SimpleWorker,
+            "execute_job",
+            lambda self, job, queue: seen.append(locks.active_users()),
+        ):
+            slot.execute_job(_job(5), Mock())
+
+        assert seen == [[5]]
+        assert locks.active_users() == []
+
+    def test_idle_slot_notices_stop_requests(self):
+        slot = _slot(poll_interval=1)
+        polls = []
+
+        def dequeue(self, timeout, max_idle_time=None):
+            polls.append((timeout, max_idle_time))
+            if len(polls) == 2:
+                slot.request_graceful_stop()
+            return None
+
+        with patch.object(SimpleWorker, "dequeue_job_and_maintain_ttl", dequeue):
+            with pytest.raises(StopRequested):
+                slot.dequeue_job_and_maintain_ttl(405)
+
+        assert polls == [(1, 1), (1, 1)]
+
+    def test_slot_uses_thread_safe_timeouts(self):
+        from rq.timeouts import TimerDeathPenalty
+
+        assert SlotWorker.death_penalty_class is TimerDeathPenalty
+
+
+class TestConcurrentWorker:
+    def test_overlaps_jobs_up_to_the_concurrency(self, stats):
+        jobs = queue.Queue()
+        for user_id in range(24):
+            jobs.put((user_id, 0.05))
+        worker = _worker(jobs, concurrency=8)
+
+        start = time.monotonic()
+        assert worker.work(burst=True) is True
+        elapsed = time.monotonic() - start
+
+        assert stats.completed == 24
+        assert stats.peak == 8
+        # Three rounds of overlapped waits rather than 24 sequential ones
+        assert elapsed < 24 * 0.05 / 2
+        assert [slot.name for slot in worker.slots][:2] == [
+            f"{worker.name}.1",
+            f"{worker.name}.2",
+        ]
+
+    def test_jobs_of_one_user_never_overlap(self, stats):
+        jobs = queue.Queue()
+        for _ in range(6):
+            jobs.put((1, 0.02))
+        jobs.put((2, 0.02))
+
+        _worker(jobs, concurrency=4).work(burst=True)
+
+        assert stats.completed == 7
+        assert not stats.same_user_overlap
+
+    def test_warm_shutdown_drains_in_flight_jobs(self, stats):
+        jobs = queue.Queue()
+        for user_id in range(4):
+            jobs.put((user_id, 0.2))
+        for user_id in range(4, 10):
+            jobs.put((user_id, 0.2))
+        worker = _worker(jobs, concurrency=4)
+
+        def stop_when_busy():
+            while stats.peak < 4:
+                time.sleep(0.005)
+            worker.request_stop()
+
+        stopper = threading.Thread(target=stop_when_busy)
+        stopper.start()
+        worker.work()
+        stopper.join()
+
+        # The four running jobs finished; nothing new was started
+        assert stats.completed == 4
+        assert stats.running == []
+        assert jobs.qsize() == 6
+
+    def test_second_stop_request_exits(self, stats):
+        worker = _worker(queue.Queue(), concurrency=2)
+
+        worker.request_stop()
+
+        assert all(slot._stop_requested for slot in worker.slots)
+        with pytest.raises(SystemExit):
+            worker.request_stop()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Tests for the IMAP IDLE listener, run against a local IMAP test double.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+
+# Add banktransactions directory to Python path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from banktransactions.automation import idle_listener
+from banktransactions.automation.idle_listener import (
+    AsyncIMAPConnection,
+    IdleListener,
+    IMAPCommandError,
+    MailboxWatcher,
+    WatchedMailbox,
+    enqueue_message_job,
+    load_push_mailboxes,
+)
+from banktransactions.tests.test_automation.fake_imap_server import FakeIMAPServer
+
+BANK = "alerts@axisbank.com"
+PASSWORD = "app-password"
+
+
+@pytest.fixture(autouse=True)
+def fast_reconnect(monkeypatch):
+    monkeypatch.setattr(idle_listener, "RECONNECT_MIN_SECONDS", 0.05)
+    monkeypatch.setattr(idle_listener, "COMMAND_TIMEOUT_SECONDS", 5)
+
+
+def _mailbox(server, user_id=1, username="user1@example.com", password=PASSWORD):
+    return WatchedMailbox(
+        user_id=user_id,
+        host="127.0.0.1",
+        port=server.port,
+        username=username,
+        password=password,
+        senders=(BANK,),
+    )
+
+
+async def _wait_for(condition, timeout=5):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        if loop.time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+class _Recorder:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, user_id, uids):
+        self.batches.append((user_id, uids))
+
+
+def test_connection_commands():
+    async def scenario():
+        server = await FakeIMAPServer({"user1@example.com": PASSWORD}).start()
+        server.deliver("user1@example.com", BANK)
+        server.deliver("user1@example.com", "friend@example.com")
+        connection = AsyncIMAPConnection("127.0.0.1", server.port, use_ssl=False)
+        await connection.connect()
+        try:
+            await connection.login("user1@example.com", PASSWORD)
+            info = await connection.select("INBOX")
+            uids = await connection.uid_search(["UID", "1:*", "FROM", BANK])
+            await connection.logout()
+        finally:
+            await server.stop()
+        return info, uids
+
+    info, uids = asyncio.run(scenario())
+
+    assert info == {"uidvalidity": 1, "uidnext": 3}
+    assert uids == [1]
+
+
+def test_login_failure_raises():
+    async def scenario():
+        server = await FakeIMAPServer({"user1@example.com": PASSWORD}).start()
+        connection = AsyncIMAPConnection("127.0.0.1", server.port, use_ssl=False)
+        await connection.connect()
+        try:
+            await connection.login("user1@example.com", "wrong")
+        finally:
+            await connection.close()
+            await server.stop()
+
+    with pytest.raises(IMAPCommandError):
+        asyncio.run(scenario())
+
+
+def test_watcher_reports_only_new_bank_messages():
+    async def scenario():
+        server = await FakeIMAPServer({"user1@example.com": PASSWORD}).start()
+        # Mail from before the listener started is left to the periodic poll
+        server.deliver("user1@example.com", BANK)
+        recorder = _Recorder()
+        watcher = MailboxWatcher(_mailbox(server), recorder, use_ssl=False)
+        task = asyncio.create_task(watcher.run())
+        try:
+            await _wait_for(lambda: server.idle_commands == 1)
+            server.deliver("user1@example.com", "friend@example.com")
+            await _wait_for(lambda: server.idle_commands == 2)
+            server.deliver("user1@example.com", BANK)
+            await _wait_for(lambda: recorder.batches)
+        finally:
+            task.cancel()
+            await server.stop()
+        return recorder.batches
+
+    assert asyncio.run(scenario()) == [(1, [3])]
+
+
+def test_idle_renewal_reuses_the_login():
+    async def scenario():
+        server = await FakeIMAPServer({"user1@example.com": PASSWORD}).start()
+        recorder = _Recorder()
+        watcher = MailboxWatcher(
+            _mailbox(server), recorder, use_ssl=False, idle_timeout=0.05
+        )
+        task = asyncio.create_task(watcher.run())
+        try:
+            await _wait_for(lambda: server.idle_commands >= 5)
+            server.deliver("user1@example.com", BANK)
+            await _wait_for(lambda: recorder.batches)
+        finally:
+            task.cancel()
+            await server.stop()
+        return server, recorder.batches
+
+    server, batches = asyncio.run(scenario())
+
+    assert batches == [(1, [1])]
+    assert server.logins["user1@example.com"] == 1
+
+
+def test_watcher_catches_up_after_reconnect():
+    async def scenario():
+        server = await FakeIMAPServer({"user1@example.com": PASSWORD}).start()
+        recorder = _Recorder()
+        watcher = MailboxWatcher(_mailbox(server), recorder, use_ssl=False)
+        task = asyncio.create_task(watcher.run())
+        try:
+            await _wait_for(lambda: server.idle_commands == 1)
+            server.drop_connections()
+            # Arrives while nobody is listening
+            server.deliver("user1@example.com", BANK)
+            await _wait_for(lambda: recorder.batches)
+        finally:
+            task.cancel()
+            await server.stop()
+        return server, recorder.batches
+
+    server, batches = asyncio.run(scenario())
+
+    assert batches == [(1, [1])]
+    assert server.logins["user1@example.com"] == 2
+
+
+def test_failed_enqueue_is_retried():
+    async def scenario():
+        server = await FakeIMAPServer({"user1@example.com": PASSWORD}).start()
+        batches = []
+
+        def flaky(user_id, uids):
+            batches.append(uids)
+            if len(batches) == 1:
+                raise ConnectionError("redis down")
+
+        watcher = MailboxWatcher(_mailbox(server), flaky, use_ssl=False)
+        task = asyncio.create_task(watcher.run())
+        try:
+            await _wait_for(lambda: server.idle_commands == 1)
+            server.deliver("user1@example.com", BANK)
+            await _wait_for(lambda: len(batches) == 2)
+        finally:
+            task.cancel()
+            await server.stop()
+        return batches
+
+    assert asyncio.run(scenario()) == [[1], [1]]
+
+
+def test_listener_multiplexes_and_reconciles_mailboxes():
+    async def scenario():
+        accounts = {f"user{n}@example.com": PASSWORD for n in range(1, 21)}
+        server = await FakeIMAPServer(accounts).start()
+        mailboxes = [
+            _mailbox(server, user_id=n, username=f"user{n}@example.com")
+            for n in range(1, 21)
+        ]
+        recorder = _Recorder()
+        listener = IdleListener(
+            lambda: list(mailboxes), recorder, refresh_interval=0.05, use_ssl=False
+        )
+        stop = asyncio.Event()
+        task = asyncio.create_task(listener.run(stop))
+        try:
+            await _wait_for(lambda: server.idle_commands == 20)
+            for n in range(1, 21):
+                server.deliver(f"user{n}@example.com", BANK)
+            await _wait_for(lambda: len(recorder.batches) == 20)
+
+            # Removed accounts stop being watched
+            del mailboxes[10:]
+            await _wait_for(lambda: len(listener.watchers) == 10)
+        finally:
+            stop.set()
+            await task
+            await server.stop()
+        return recorder.batches, listener
+
+    batches, listener = asyncio.run(scenario())
+
+    assert sorted(user_id for user_id, _ in batches) == list(range(1, 21))
+    assert listener.watchers == {}
+
+
+def test_enqueue_message_job():
+    queue = Mock()
+
+    enqueue_message_job(queue, 7, [12, 15])
+
+    args, kwargs = queue.enqueue.call_args
+    assert args[0].__name__ == "process_user_messages_standalone"
+    assert args[1:] == (7, [12, 15])
+    assert kwargs["job_id"] == "email_push_user_7_12_15"
+
+
+def test_load_push_mailboxes_skips_undecryptable_accounts():
+    configs = [
+        SimpleNamespace(
+            user_id=1,
+            imap_server="imap.gmail.com",
+            imap_port=993,
+            email_address="user1@example.com",
+            app_password="encrypted-1",
+            sample_emails=json.dumps([{"from": "alerts@hdfcbank.net"}]),
+        ),
+        SimpleNamespace(
+            user_id=2,
+            imap_server=None,
+            imap_port=None,
+            email_address="user2@example.com",
+            app_password="broken",
+            sample_emails=None,
+        ),
+    ]
+    db_session = Mock()
+    db_session.query.return_value.filter_by.return_value.all.return_value = configs
+
+    with patch(
+        "shared.imports.decrypt_value_standalone",
+        side_effect=lambda value: None if value == "broken" else "secret",
+    ):
+        mailboxes = load_push_mailboxes(db_session)
+
+    assert mailboxes == [
+        WatchedMailbox(
+            user_id=1,
+            host="imap.gmail.com",
+            port=993,
+            username="user1@example.com",
+            password="secret",
+            senders=("alerts@hdfcbank.net",),
+        )
+    ]
+    db_session.query.return_value.filter_by.assert_called_once_with(
+        is_enabled=True, polling_interval="push"
+    )
+    db_session.rollback.assert_called_once()
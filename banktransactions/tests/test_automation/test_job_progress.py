@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for the message counts and stage timings of email processing jobs.
+"""
+
+import os
+import sys
+
+# Add banktransactions directory to Python path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from banktransactions.automation.job_utils import JobProgress
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _progress(min_publish_interval=0.5):
+    clock = _Clock()
+    published = []
+    progress = JobProgress(
+        publish=lambda stage, **details: published.append((stage, details)),
+        clock=clock,
+        min_publish_interval=min_publish_interval,
+    )
+    return progress, clock, published
+
+
+class TestJobProgress:
+    def test_stage_timings_and_counts(self):
+        progress, clock, published = _progress()
+
+        progress.update("searching")
+        clock.now += 1.5
+        progress.update("fetching", found=12)
+        clock.now += 3.0
+        progress.update("extracting", already_processed=2, skipped=1)
+        clock.now += 0.25
+        summary = progress.finish("completed", processed_count=9)
+
+        assert summary["timings"] == {
+            "searching": 1.5,
+            "fetching": 3.0,
+            "extracting": 0.25,
+        }
+        assert summary["counts"]["found"] == 12
+        assert summary["counts"]["already_processed"] == 2
+        assert summary["counts"]["posted"] == 0
+        assert published[-1] == ("completed", {**summary, "processed_count": 9})
+
+    def test_running_stage_is_included_in_published_timings(self):
+        progress, clock, published = _progress(min_publish_interval=0)
+
+        progress.update("posting", posted=0)
+        clock.now += 2.0
+        progress.update("posting", posted=20)
+
+        stage, details = published[-1]
+        assert stage == "posting"
+        assert details["counts"]["posted"] == 20
+        assert details["timings"] == {"posting": 2.0}
+
+    def test_updates_within_a_stage_are_throttled(self):
+        progress, clock, published = _progress(min_publish_interval=1.0)
+
+        progress.update("posting", posted=20)
+        for posted in (40, 60, 80):
+            clock.now += 0.2
+            progress.update("posting", posted=posted)
+        clock.now += 0.5
+        progress.update("posting", posted=100)
+        progress.update("saving")
+
+        assert [details["counts"]["posted"] for _, details in published] == [
+            20,
+            100,
+            100,
+        ]
+        assert published[-1][0] == "saving"
+
+    def test_repeated_stage_accumulates_and_unknown_counters_are_ignored(self):
+        progress, clock, _ = _progress()
+
+        progress.update("posting", posted=1, bogus=5)
+        clock.now += 1.0
+        progress.update("saving")
+        clock.now += 1.0
+        progress.update("posting")
+        clock.now += 1.0
+        summary = progress.finish()
+
+        assert summary["timings"] == {"posting": 2.0, "saving": 1.0}
+        assert "bogus" not in summary["counts"]
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Tests for the weighted high/low priority email queues and job progress.
+"""
+
+import os
+import sys
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+# Add banktransactions directory to Python path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from rq.job import JobStatus
+
+from banktransactions.automation.job_utils import (
+    EMAIL_QUEUES,
+    HIGH_PRIORITY_QUEUE,
+    LOW_PRIORITY_QUEUE,
+    get_job_progress,
+    get_queue_weights,
+    take_over_user_job_claim,
+    update_job_progress,
+)
+from banktransactions.automation.priority_worker import (
+    PrioritySimpleWorker,
+    build_dequeue_schedule,
+)
+
+
+def _worker(weights=None):
+    worker = PrioritySimpleWorker(
+        list(EMAIL_QUEUES),
+        connection=Mock(connection_pool=Mock(connection_kwargs={})),
+        prepare_for_work=False,
+    )
+    worker.queue_weights = weights
+    return worker
+
+
+def _serve(worker, dequeues):
+    """Dequeue from two always-backlogged queues; returns the queues served."""
+    served = []
+    for _ in range(dequeues):
+        queue = worker._ordered_queues[0]
+        served.append(queue.name)
+        worker.reorder_queues(reference_queue=queue)
+    return served
+
+
+class TestQueueWeights:
+    def test_default_and_environment(self, monkeypatch):
+        monkeypatch.delenv("EMAIL_HIGH_PRIORITY_WEIGHT", raising=False)
+        assert get_queue_weights() == {HIGH_PRIORITY_QUEUE: 4, LOW_PRIORITY_QUEUE: 1}
+
+        monkeypatch.setenv("EMAIL_HIGH_PRIORITY_WEIGHT", "9")
+        assert get_queue_weights()[HIGH_PRIORITY_QUEUE] == 9
+
+    def test_invalid_weights_fall_back(self, monkeypatch):
+        monkeypatch.setenv("EMAIL_HIGH_PRIORITY_WEIGHT", "high")
+        assert get_queue_weights()[HIGH_PRIORITY_QUEUE] == 4
+
+        monkeypatch.setenv("EMAIL_HIGH_PRIORITY_WEIGHT", "0")
+        assert get_queue_weights()[HIGH_PRIORITY_QUEUE] == 1
+
+    def test_schedule_repeats_queues_by_weight(self):
+        assert build_dequeue_schedule(["high", "low", "other"], {"high": 3}) == [
+            "high",
+            "high",
+            "high",
+            "low",
+            "other",
+        ]
+
+
+class TestWeightedDequeue:
+    def test_backlogged_queues_are_served_by_weight(self):
+        worker = _worker({HIGH_PRIORITY_QUEUE: 4, LOW_PRIORITY_QUEUE: 1})
+
+        served = _serve(worker, 20)
+
+        assert served.count(HIGH_PRIORITY_QUEUE) == 16
+        assert served.count(LOW_PRIORITY_QUEUE) == 4
+        # Background jobs are never kept waiting longer than one cycle
+        assert LOW_PRIORITY_QUEUE in served[:5]
+
+    def test_high_priority_queue_is_tried_first_initially(self):
+        worker = _worker()
+
+        assert [queue.name for queue in worker._ordered_queues] == list(EMAIL_QUEUES)
+
+    def test_every_queue_stays_in_the_dequeue_order(self):
+        worker = _worker({HIGH_PRIORITY_QUEUE: 2, LOW_PRIORITY_QUEUE: 1})
+
+        for _ in range(5):
+            worker.reorder_queues(reference_queue=worker._ordered_queues[0])
+            assert sorted(queue.name for queue in worker._ordered_queues) == sorted(
+                EMAIL_QUEUES
+            )
+
+
+class TestJobProgress:
+    def test_progress_is_saved_to_the_current_job(self):
+        job = Mock(id="job_1", meta={})
+
+        with patch(
+            "banktransactions.automation.job_utils.get_current_job", return_value=job
+        ):
+            assert update_job_progress("processing_emails", bank_senders=2) is True
+
+        assert job.meta["progress"]["stage"] == "processing_emails"
+        assert job.meta["progress"]["bank_senders"] == 2
+        job.save_meta.assert_called_once()
+
+    def test_progress_outside_a_job_is_ignored(self):
+        with patch(
+            "banktransactions.automation.job_utils.get_current_job", return_value=None
+        ):
+            assert update_job_progress("processing_emails") is False
+
+    def _job(self, status, user_id=7, **kwargs):
+        attrs = {
+            "id": "job_1",
+            "args": (user_id,),
+            "origin": HIGH_PRIORITY_QUEUE,
+            "enqueued_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+            "started_at": None,
+            "ended_at": None,
+            "meta": {"progress": {"stage": "processing_emails"}},
+            "get_status": Mock(return_value=status),
+        }
+        attrs.update(kwargs)
+        return SimpleNamespace(**attrs)
+
+    def test_queued_job_reports_its_position(self):
+        job = self._job(JobStatus.QUEUED)
+
+        with patch(
+            "banktransactions.automation.job_utils.Job.fetch", return_value=job
+        ), patch("banktransactions.automation.job_utils.Queue") as mock_queue:
+            mock_queue.return_value.get_job_position.return_value = 2
+            progress = get_job_progress(Mock(), "job_1", 7)
+
+        assert progress["status"] == "queued"
+        assert progress["queue"] == HIGH_PRIORITY_QUEUE
+        assert progress["position"] == 2
+        assert progress["progress"] == {"stage": "processing_emails"}
+        assert progress["enqueued_at"] == "2024-01-01T00:00:00+00:00"
+
+    def test_finished_and_failed_jobs_report_outcome(self):
+        finished = self._job(
+            JobStatus.FINISHED, return_value=Mock(return_value={"status": "success"})
+        )
+        failed = self._job(
+            JobStatus.FAILED,
+            latest_result=Mock(
+                return_value=SimpleNamespace(
+                    exc_string="Traceback ...\nValueError: bad password\n"
+                )
+            ),
+        )
+
+        with patch(
+            "banktransactions.automation.job_utils.Job.fetch",
+            side_effect=[finished, failed],
+        ):
+            assert get_job_progress(Mock(), "job_1", 7)["result"] == {
+                "status": "success"
+            }
+            assert (
+                get_job_progress(Mock(), "job_1", 7)["error"]
+                == "ValueError: bad password"
+            )
+
+    def test_missing_and_foreign_jobs_are_hidden(self):
+        with patch(
+            "banktransactions.automation.job_utils.Job.fetch",
+            side_effect=Exception("No such job"),
+        ):
+            assert get_job_progress(Mock(), "job_1", 7) is None
+
+        with patch(
+            "banktransactions.automation.job_utils.Job.fetch",
+            return_value=self._job(JobStatus.QUEUED, user_id=8),
+        ):
+            assert get_job_progress(Mock(), "job_1", 7) is None
+
+
+class TestManualTriggerTakeOver:
+    def _redis(self, holder):
+        redis_conn = Mock()
+        redis_conn.set.return_value = None
+        redis_conn.get.return_value = holder.encode() if holder else None
+        redis_conn.eval.return_value = b"OK"
+        return redis_conn
+
+    def test_free_slot_is_claimed(self):
+        redis_conn = self._redis(None)
+        redis_conn.set.return_value = True
+
+        assert take_over_user_job_claim(redis_conn, 7, "manual") is True
+        redis_conn.eval.assert_not_called()
+
+    def test_scheduled_background_job_is_withdrawn(self):
+        redis_conn = self._redis("scheduled")
+        redis_conn.zrem.return_value = 1
+        job = Mock(origin=LOW_PRIORITY_QUEUE)
+
+        with patch("banktransactions.automation.job_utils.Job.fetch", return_value=job):
+            assert take_over_user_job_claim(redis_conn, 7, "manual") is True
+
+        redis_conn.zrem.assert_called_once_with(
+            "rq:scheduler:scheduled_jobs", "scheduled"
+        )
+        job.delete.assert_called_once_with(remove_from_queue=False)
+        args = redis_conn.eval.call_args.args
+        assert args[2:5] == ("email_processing:user_job:7", "scheduled", "manual")
+
+    def test_queued_background_job_is_withdrawn(self):
+        redis_conn = self._redis("queued")
+        redis_conn.zrem.return_value = 0
+        job = Mock(origin=LOW_PRIORITY_QUEUE)
+
+        with patch(
+            "banktransactions.automation.job_utils.Job.fetch", return_value=job
+        ), patch("banktransactions.automation.job_utils.Queue") as mock_queue:
+            mock_queue.return_value.remove.return_value = 1
+            assert take_over_user_job_claim(redis_conn, 7, "manual") is True
+
+        mock_queue.assert_called_once_with(LOW_PRIORITY_QUEUE, connection=redis_conn)
+        mock_queue.return_value.remove.assert_called_once_with("queued")
+
+    def test_running_job_keeps_the_slot(self):
+        redis_conn = self._redis("running")
+        redis_conn.zrem.return_value = 0
+        job = Mock(origin=LOW_PRIORITY_QUEUE)
+
+        with patch(
+            "banktransactions.automation.job_utils.Job.fetch", return_value=job
+        ), patch("banktransactions.automation.job_utils.Queue") as mock_queue:
+            mock_queue.return_value.remove.return_value = 0
+            assert take_over_user_job_claim(redis_conn, 7, "manual") is False
+
+        job.delete.assert_not_called()
+        redis_conn.eval.assert_not_called()
+
+    def test_queued_manual_job_keeps_the_slot(self):
+        redis_conn = self._redis("earlier_manual")
+
+        with patch(
+            "banktransactions.automation.job_utils.Job.fetch",
+            return_value=Mock(origin=HIGH_PRIORITY_QUEUE),
+        ):
+            assert take_over_user_job_claim(redis_conn, 7, "manual") is False
+
+        redis_conn.zrem.assert_not_called()
@@ -39,10 +39,10 @@ class TestRunScheduler:
     @patch("banktransactions.automation.run_scheduler.redis.from_url")
     @patch("banktransactions.automation.run_scheduler.create_db_session")
     @patch("banktransactions.automation.run_scheduler.EmailScheduler")
-    @patch("banktransactions.automation.run_scheduler.time.sleep")
+    @patch("banktransactions.automation.run_scheduler.wait_for_scheduler_wakeup")
     def test_main_success_single_iteration(
         self,
-        mock_sleep,
+        mock_wait,
         mock_scheduler_class,
         mock_create_db_session,
         mock_redis_from_url,
@@ -54,6 +54,7 @@ class TestRunScheduler:
         mock_parser_class.return_value = mock_parser
 
         mock_args = Mock()
+        mock_args.shards = 0
         mock_args.redis_url = "redis://localhost:6379/0"
         mock_args.interval = 300
         mock_parser.parse_args.return_value = mock_args
@@ -68,10 +69,11 @@ class TestRunScheduler:
 
         # Mock scheduler
         mock_scheduler = Mock()
+        mock_scheduler.seconds_until_next_due.side_effect = lambda max_wait: max_wait
         mock_scheduler_class.return_value = mock_scheduler
 
-        # Mock sleep to raise KeyboardInterrupt after first iteration
-        mock_sleep.side_effect = KeyboardInterrupt()
+        # Mock the wait to raise KeyboardInterrupt after first iteration
+        mock_wait.side_effect = KeyboardInterrupt()
 
         main()
 
@@ -84,8 +86,8 @@ class TestRunScheduler:
         # Verify schedule_jobs was called
         mock_scheduler.schedule_jobs.assert_called_once()
 
-        # Verify sleep was called with correct interval
-        mock_sleep.assert_called_once_with(300)
+        # Verify the scheduler waited at most the configured interval
+        mock_wait.assert_called_once_with(mock_redis_conn, 300, instance_id=None)
 
     @patch("banktransactions.automation.run_scheduler.argparse.ArgumentParser")
     @patch("banktransactions.automation.run_scheduler.redis.from_url")
@@ -96,6 +98,7 @@ class TestRunScheduler:
         mock_parser_class.return_value = mock_parser
 
         mock_args = Mock()
+        mock_args.shards = 0
         mock_args.redis_url = "redis://localhost:6379/0"
         mock_parser.parse_args.return_value = mock_args
 
@@ -119,6 +122,7 @@ class TestRunScheduler:
         mock_parser_class.return_value = mock_parser
 
         mock_args = Mock()
+        mock_args.shards = 0
         mock_args.redis_url = "redis://localhost:6379/0"
         mock_parser.parse_args.return_value = mock_args
 
@@ -151,6 +155,7 @@ class TestRunScheduler:
         mock_parser_class.return_value = mock_parser
 
         mock_args = Mock()
+        mock_args.shards = 0
         mock_args.redis_url = "redis://localhost:6379/0"
         mock_args.interval = 300
         mock_parser.parse_args.return_value = mock_args
@@ -182,10 +187,12 @@ class TestRunScheduler:
     @patch("banktransactions.automation.run_scheduler.redis.from_url")
     @patch("banktransactions.automation.run_scheduler.create_db_session")
     @patch("banktransactions.automation.run_scheduler.EmailScheduler")
+    @patch("banktransactions.automation.run_scheduler.wait_for_scheduler_wakeup")
     @patch("banktransactions.automation.run_scheduler.time.sleep")
     def test_main_scheduler_exception_recovery(
         self,
         mock_sleep,
+        mock_wait,
         mock_scheduler_class,
         mock_create_db_session,
         mock_redis_from_url,
@@ -197,6 +204,7 @@ class TestRunScheduler:
         mock_parser_class.return_value = mock_parser
 
         mock_args = Mock()
+        mock_args.shards = 0
         mock_args.redis_url = "redis://localhost:6379/0"
         mock_args.interval = 300
         mock_parser.parse_args.return_value = mock_args
@@ -211,6 +219,7 @@ class TestRunScheduler:
 
         # Mock scheduler to fail first time, then succeed, then KeyboardInterrupt
         mock_scheduler = Mock()
+        mock_scheduler.seconds_until_next_due.side_effect = lambda max_wait: max_wait
         mock_scheduler.schedule_jobs.side_effect = [
             Exception("Scheduler error"),  # First call fails
             None,  # Second call succeeds
@@ -218,16 +227,15 @@ class TestRunScheduler:
         ]
         mock_scheduler_class.return_value = mock_scheduler
 
-        # Mock sleep to not interrupt the first two iterations
-        mock_sleep.side_effect = [None, None, KeyboardInterrupt()]
-
         main()
 
         # Verify scheduler was called multiple times (recovered from error)
         assert mock_scheduler.schedule_jobs.call_count == 3
 
-        # Verify sleep was called for error recovery
-        assert mock_sleep.call_count == 2
+        # Verify the error was followed by a full back-off sleep and the
+        # successful pass by a wait for the next due job
+        mock_sleep.assert_called_once_with(300)
+        assert mock_wait.call_count == 1
 
     @patch("banktransactions.automation.run_scheduler.argparse.ArgumentParser")
     def test_main_argument_parsing(self, mock_parser_class):
@@ -253,10 +261,10 @@ class TestRunScheduler:
     @patch("banktransactions.automation.run_scheduler.redis.from_url")
     @patch("banktransactions.automation.run_scheduler.create_db_session")
     @patch("banktransactions.automation.run_scheduler.EmailScheduler")
-    @patch("banktransactions.automation.run_scheduler.time.sleep")
+    @patch("banktransactions.automation.run_scheduler.wait_for_scheduler_wakeup")
     def test_main_default_arguments(
         self,
-        mock_sleep,
+        mock_wait,
         mock_scheduler_class,
         mock_create_db_session,
         mock_redis_from_url,
@@ -268,6 +276,7 @@ class TestRunScheduler:
         mock_parser_class.return_value = mock_parser
 
         mock_args = Mock()
+        mock_args.shards = 0
         mock_args.redis_url = "redis://localhost:6379/0"  # Default value
         mock_args.interval = 300  # Default value (5 minutes)
         mock_parser.parse_args.return_value = mock_args
@@ -280,15 +289,16 @@ class TestRunScheduler:
         mock_create_db_session.return_value = mock_db_session
 
         mock_scheduler = Mock()
+        mock_scheduler.seconds_until_next_due.side_effect = lambda max_wait: max_wait
         mock_scheduler_class.return_value = mock_scheduler
 
-        # Mock sleep to raise KeyboardInterrupt after first iteration
-        mock_sleep.side_effect = KeyboardInterrupt()
+        # Mock the wait to raise KeyboardInterrupt after first iteration
+        mock_wait.side_effect = KeyboardInterrupt()
 
         main()
 
         # Verify default interval was used
-        mock_sleep.assert_called_once_with(300)
+        mock_wait.assert_called_once_with(mock_redis_conn, 300, instance_id=None)
 
     @patch.dict(os.environ, {"REDIS_URL": "redis://custom:6379/1"})
     @patch("banktransactions.automation.run_scheduler.argparse.ArgumentParser")
@@ -321,10 +331,10 @@ class TestRunScheduler:
     @patch("banktransactions.automation.run_scheduler.redis.from_url")
     @patch("banktransactions.automation.run_scheduler.create_db_session")
     @patch("banktransactions.automation.run_scheduler.EmailScheduler")
-    @patch("banktransactions.automation.run_scheduler.time.sleep")
+    @patch("banktransactions.automation.run_scheduler.wait_for_scheduler_wakeup")
     def test_main_custom_interval(
         self,
-        mock_sleep,
+        mock_wait,
         mock_scheduler_class,
         mock_create_db_session,
         mock_redis_from_url,
@@ -336,6 +346,7 @@ class TestRunScheduler:
         mock_parser_class.return_value = mock_parser
 
         mock_args = Mock()
+        mock_args.shards = 0
         mock_args.redis_url = "redis://localhost:6379/0"
         mock_args.interval = 600  # Custom 10-minute interval
         mock_parser.parse_args.return_value = mock_args
@@ -348,24 +359,25 @@ class TestRunScheduler:
         mock_create_db_session.return_value = mock_db_session
 
         mock_scheduler = Mock()
+        mock_scheduler.seconds_until_next_due.side_effect = lambda max_wait: max_wait
         mock_scheduler_class.return_value = mock_scheduler
 
-        # Mock sleep to raise KeyboardInterrupt after first iteration
-        mock_sleep.side_effect = KeyboardInterrupt()
+        # Mock the wait to raise KeyboardInterrupt after first iteration
+        mock_wait.side_effect = KeyboardInterrupt()
 
         main()
 
         # Verify custom interval was used
-        mock_sleep.assert_called_once_with(600)
+        mock_wait.assert_called_once_with(mock_redis_conn, 600, instance_id=None)
 
     @patch("banktransactions.automation.run_scheduler.argparse.ArgumentParser")
     @patch("banktransactions.automation.run_scheduler.redis.from_url")
     @patch("banktransactions.automation.run_scheduler.create_db_session")
     @patch("banktransactions.automation.run_scheduler.EmailScheduler")
-    @patch("banktransactions.automation.run_scheduler.time.sleep")
+    @patch("banktransactions.automation.run_scheduler.wait_for_scheduler_wakeup")
     def test_main_multiple_iterations(
         self,
-        mock_sleep,
+        mock_wait,
         mock_scheduler_class,
         mock_create_db_session,
         mock_redis_from_url,
@@ -377,6 +389,7 @@ class TestRunScheduler:
         mock_parser_class.return_value = mock_parser
 
         mock_args = Mock()
+        mock_args.shards = 0
         mock_args.redis_url = "redis://localhost:6379/0"
         mock_args.interval = 100  # Short interval for testing
         mock_parser.parse_args.return_value = mock_args
@@ -389,15 +402,67 @@ class TestRunScheduler:
         mock_create_db_session.return_value = mock_db_session
 
         mock_scheduler = Mock()
+        mock_scheduler.seconds_until_next_due.side_effect = lambda max_wait: max_wait
         mock_scheduler_class.return_value = mock_scheduler
 
-        # Mock sleep to allow 3 iterations before KeyboardInterrupt
-        mock_sleep.side_effect = [None, None, KeyboardInterrupt()]
+        # Mock the wait to allow 3 iterations before KeyboardInterrupt
+        mock_wait.side_effect = [None, None, KeyboardInterrupt()]
 
         main()
 
         # Verify scheduler was called 3 times
         assert mock_scheduler.schedule_jobs.call_count == 3
 
-        # Verify sleep was called 3 times (including the interrupted one)
-        assert mock_sleep.call_count == 3
+        # Verify the wait was called 3 times (including the interrupted one)
+        assert mock_wait.call_count == 3
+
+    @patch("banktransactions.automation.run_scheduler.argparse.ArgumentParser")
+    @patch("banktransactions.automation.run_scheduler.redis.from_url")
+    @patch("banktransactions.automation.run_scheduler.create_db_session")
+    @patch("banktransactions.automation.run_scheduler.EmailScheduler")
+    @patch("banktransactions.automation.run_scheduler.ShardLeaseManager")
+    @patch("banktransactions.automation.run_scheduler.wait_for_scheduler_wakeup")
+    def test_main_with_shards(
+        self,
+        mock_wait,
+        mock_lease_manager_class,
+        mock_scheduler_class,
+        mock_create_db_session,
+        mock_redis_from_url,
+        mock_parser_class,
+    ):
+        """Test sharded scheduling renews leases within the TTL and releases them."""
+        mock_parser = Mock()
+        mock_parser_class.return_value = mock_parser
+
+        mock_args = Mock()
+        mock_args.shards = 16
+        mock_args.lease_ttl = 60
+        mock_args.redis_url = "redis://localhost:6379/0"
+        mock_args.interval = 300
+        mock_parser.parse_args.return_value = mock_args
+
+        mock_redis_conn = Mock()
+        mock_redis_from_url.return_value = mock_redis_conn
+        mock_db_session = Mock()
+        mock_create_db_session.return_value = mock_db_session
+
+        mock_lease_manager = mock_lease_manager_class.return_value
+        mock_scheduler = Mock()
+        mock_scheduler.seconds_until_next_due.side_effect = lambda max_wait: max_wait
+        mock_scheduler_class.return_value = mock_scheduler
+        mock_wait.side_effect = KeyboardInterrupt()
+
+        main()
+
+        mock_lease_manager_class.assert_called_once_with(
+            mock_redis_conn, shard_count=16, lease_ttl=60
+        )
+        mock_scheduler_class.assert_called_once_with(
+            mock_redis_conn, mock_db_session, lease_manager=mock_lease_manager
+        )
+        # Passes run at least three times per lease TTL
+        mock_wait.assert_called_once_with(
+            mock_redis_conn, 20, instance_id=mock_lease_manager.instance_id
+        )
+        mock_lease_manager.release_all.assert_called_once()
@@ -35,6 +35,7 @@ class TestRunWorker:
         with pytest.raises(Exception, match="Database connection failed"):
             create_db_session()
 
+    @patch("banktransactions.automation.run_worker.preload_job_modules")
     @patch("banktransactions.automation.run_worker.argparse.ArgumentParser")
     @patch("banktransactions.automation.run_worker.redis.from_url")
     @patch("banktransactions.automation.run_worker.create_db_session")
@@ -47,6 +48,7 @@ class TestRunWorker:
         mock_create_db_session,
         mock_redis_from_url,
         mock_parser_class,
+        mock_preload,
     ):
         """Test successful worker startup and execution."""
         # Mock argument parser
@@ -58,6 +60,8 @@ class TestRunWorker:
         mock_args.redis_url = "redis://localhost:6379/0"
         mock_args.worker_name = "test_worker"
         mock_args.force_simple_worker = False
+        mock_args.pool_size = 0
+        mock_args.concurrency = 1
         mock_parser.parse_args.return_value = mock_args
 
         # Mock Redis connection
@@ -95,6 +99,100 @@ class TestRunWorker:
         )
         mock_worker.work.assert_called_once()
 
+    @patch("banktransactions.automation.run_worker.preload_job_modules")
+    @patch("banktransactions.automation.run_worker.WarmWorkerPool")
+    @patch("banktransactions.automation.run_worker.argparse.ArgumentParser")
+    @patch("banktransactions.automation.run_worker.redis.from_url")
+    @patch("banktransactions.automation.run_worker.create_db_session")
+    @patch("banktransactions.automation.run_worker.Queue")
+    @patch("banktransactions.automation.run_worker.get_worker_class")
+    def test_main_with_pool(
+        self,
+        mock_get_worker_class,
+        mock_queue_class,
+        mock_create_db_session,
+        mock_redis_from_url,
+        mock_parser_class,
+        mock_pool_class,
+        mock_preload,
+    ):
+        """Test that --pool-size starts a preforked pool instead of a worker."""
+        mock_parser = Mock()
+        mock_parser_class.return_value = mock_parser
+
+        mock_args = Mock()
+        mock_args.queue_name = "email_processing"
+        mock_args.redis_url = "redis://localhost:6379/0"
+        mock_args.worker_name = None
+        mock_args.force_simple_worker = False
+        mock_args.pool_size = 4
+        mock_args.max_jobs_per_slot = 50
+        mock_parser.parse_args.return_value = mock_args
+
+        mock_redis_conn = Mock()
+        mock_redis_from_url.return_value = mock_redis_conn
+        mock_queue = Mock()
+        mock_queue_class.return_value = mock_queue
+
+        main()
+
+        mock_preload.assert_called_once_with(warm_app=True)
+        mock_pool_class.assert_called_once_with(
+            [mock_queue],
+            connection=mock_redis_conn,
+            num_workers=4,
+            max_jobs_per_slot=50,
+        )
+        mock_pool_class.return_value.start.assert_called_once()
+        mock_get_worker_class.assert_not_called()
+
+    @patch("banktransactions.automation.run_worker.preload_job_modules")
+    @patch("banktransactions.automation.run_worker.ConcurrentWorker")
+    @patch("banktransactions.automation.run_worker.argparse.ArgumentParser")
+    @patch("banktransactions.automation.run_worker.redis.from_url")
+    @patch("banktransactions.automation.run_worker.create_db_session")
+    @patch("banktransactions.automation.run_worker.Queue")
+    @patch("banktransactions.automation.run_worker.get_worker_class")
+    def test_main_with_concurrency(
+        self,
+        mock_get_worker_class,
+        mock_queue_class,
+        mock_create_db_session,
+        mock_redis_from_url,
+        mock_parser_class,
+        mock_concurrent_class,
+        mock_preload,
+    ):
+        """Test that --concurrency runs several jobs in one process."""
+        mock_parser = Mock()
+        mock_parser_class.return_value = mock_parser
+
+        mock_args = Mock()
+        mock_args.queue_name = "email_processing"
+        mock_args.redis_url = "redis://localhost:6379/0"
+        mock_args.worker_name = "test_worker"
+        mock_args.force_simple_worker = False
+        mock_args.pool_size = 0
+        mock_args.concurrency = 8
+        mock_parser.parse_args.return_value = mock_args
+
+        mock_redis_conn = Mock()
+        mock_redis_from_url.return_value = mock_redis_conn
+        mock_queue = Mock()
+        mock_queue_class.return_value = mock_queue
+
+        main()
+
+        mock_preload.assert_called_once_with(warm_app=False)
+        mock_concurrent_class.assert_called_once_with(
+            [mock_queue],
+            connection=mock_redis_conn,
+            concurrency=8,
+            name="test_worker",
+        )
+        mock_concurrent_class.return_value.work.assert_called_once()
+        mock_get_worker_class.assert_not_called()
+
     @patch("banktransactions.automation.run_worker.argparse.ArgumentParser")
     @patch("banktransactions.automation.run_worker.redis.from_url")
     def test_main_redis_connection_error(self, mock_redis_from_url, mock_parser_class):
@@ -140,6 +238,7 @@ class TestRunWorker:
         with pytest.raises(SystemExit):
             main()
 
+    @patch("banktransactions.automation.run_worker.preload_job_modules")
     @patch("banktransactions.automation.run_worker.argparse.ArgumentParser")
     @patch("banktransactions.automation.run_worker.redis.from_url")
     @patch("banktransactions.automation.run_worker.create_db_session")
@@ -152,6 +251,7 @@ class TestRunWorker:
         mock_create_db_session,
         mock_redis_from_url,
         mock_parser_class,
+        mock_preload,
     ):
         """Test handling of keyboard interrupt (Ctrl+C)."""
         # Mock argument parser
@@ -163,6 +263,8 @@ class TestRunWorker:
         mock_args.redis_url = "redis://localhost:6379/0"
         mock_args.worker_name = None  # Test auto-generated name
         mock_args.force_simple_worker = False
+        mock_args.pool_size = 0
+        mock_args.concurrency = 1
         mock_parser.parse_args.return_value = mock_args
 
         # Mock Redis connection
@@ -214,6 +316,7 @@ class TestRunWorker:
         assert "--redis-url" in arg_names
         assert "--worker-name" in arg_names
 
+    @patch("banktransactions.automation.run_worker.preload_job_modules")
     @patch("banktransactions.automation.run_worker.argparse.ArgumentParser")
     @patch("banktransactions.automation.run_worker.redis.from_url")
     @patch("banktransactions.automation.run_worker.create_db_session")
@@ -226,6 +329,7 @@ class TestRunWorker:
         mock_create_db_session,
         mock_redis_from_url,
         mock_parser_class,
+        mock_preload,
     ):
         """Test that default arguments are used correctly."""
         # Mock argument parser with default values
@@ -237,6 +341,8 @@ class TestRunWorker:
         mock_args.redis_url = "redis://localhost:6379/0"  # Default value
         mock_args.worker_name = None  # Default value (auto-generated)
         mock_args.force_simple_worker = False
+        mock_args.pool_size = 0
+        mock_args.concurrency = 1
         mock_parser.parse_args.return_value = mock_args
 
         # Mock other dependencies
@@ -11,7 +11,14 @@ from sqlalchemy.orm import Session
 # Add banktransactions directory to Python path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
 
-from banktransactions.automation.scheduler import EmailScheduler
+from banktransactions.automation.scheduler import (
+    CATCH_UP_SPREAD,
+    MAX_JITTER_SECONDS,
+    EmailScheduler,
+)
+
+# Overdue runs start within the catch-up window instead of immediately
+MAX_CATCH_UP_DELAY = CATCH_UP_SPREAD.total_seconds() + MAX_JITTER_SECONDS
 
 
 class TestEmailScheduler:
@@ -81,7 +88,7 @@ class TestEmailScheduler:
         email_scheduler.scheduler = mock_scheduler
 
         # Mock database query
-        email_scheduler.db.query.return_value.filter_by.return_value.all.return_value = (
+        email_scheduler.db.query.return_value.filter_by.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = (
             mock_email_configs
         )
 
@@ -98,7 +105,7 @@ class TestEmailScheduler:
     def test_schedule_jobs_no_configs(self, email_scheduler):
         """Test scheduling when no enabled configurations exist."""
         # Mock database query to return empty list
-        email_scheduler.db.query.return_value.filter_by.return_value.all.return_value = (
+        email_scheduler.db.query.return_value.filter_by.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = (
             []
         )
 
@@ -199,11 +206,10 @@ class TestEmailScheduler:
 
         result = email_scheduler._calculate_next_run(config)
 
-        # Should return current time since it's overdue
+        # Should start within the catch-up window since it's overdue
         assert result is not None
-        assert (
-            abs((result - datetime.now(timezone.utc)).total_seconds()) < 60
-        )  # Within 1 minute
+        delay = (result - datetime.now(timezone.utc)).total_seconds()
+        assert -60 < delay <= MAX_CATCH_UP_DELAY
 
     def test_calculate_next_run_hourly_future(self, email_scheduler):
         """Test calculating next run time for hourly polling not yet due."""
@@ -225,11 +231,10 @@ class TestEmailScheduler:
 
         result = email_scheduler._calculate_next_run(config)
 
-        # Should return current time since it's overdue
+        # Should start within the catch-up window since it's overdue
         assert result is not None
-        assert (
-            abs((result - datetime.now(timezone.utc)).total_seconds()) < 60
-        )  # Within 1 minute
+        delay = (result - datetime.now(timezone.utc)).total_seconds()
+        assert -60 < delay <= MAX_CATCH_UP_DELAY
 
     def test_calculate_next_run_daily_future(self, email_scheduler):
         """Test calculating next run time for daily polling not yet due."""
@@ -265,11 +270,10 @@ class TestEmailScheduler:
 
         result = email_scheduler._calculate_next_run(config)
 
-        # Should default to hourly and return current time since overdue
+        # Should default to hourly and start within the catch-up window
         assert result is not None
-        assert (
-            abs((result - datetime.now(timezone.utc)).total_seconds()) < 60
-        )  # Within 1 minute
+        delay = (result - datetime.now(timezone.utc)).total_seconds()
+        assert -60 < delay <= MAX_CATCH_UP_DELAY
 
     def test_calculate_next_run_case_insensitive(self, email_scheduler):
         """Test that polling interval comparison is case insensitive."""
@@ -5,6 +5,7 @@ Test script for scheduler deduplication functionality.
 
 import os
 import sys
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
 from unittest.mock import Mock, patch
 
@@ -15,9 +16,15 @@ project_root = os.path.join(os.path.dirname(__file__), "..", "..")
 sys.path.insert(0, project_root)
 
 from banktransactions.automation.job_utils import (
+    USER_JOB_CLAIM_TTL,
+    claim_user_job,
     generate_job_id,
+    get_user_job_claim,
     get_user_job_status,
     has_user_job_pending,
+    hold_user_job_claim,
+    hold_user_run_lock,
+    release_user_job,
 )
 from banktransactions.automation.scheduler import EmailScheduler
 
@@ -60,16 +67,12 @@ class TestSchedulerDeduplication:
             "banktransactions.automation.scheduler.has_user_job_pending"
         ) as mock_has_pending:
             with patch(
-                "banktransactions.automation.scheduler.get_user_job_status"
-            ) as mock_get_status:
+                "banktransactions.automation.scheduler.get_user_job_claim"
+            ) as mock_get_claim:
                 mock_has_pending.return_value = True
-                mock_get_status.return_value = {
-                    "user_id": 123,
-                    "has_running_job": True,
-                    "has_scheduled_job": False,
-                    "has_queued_job": False,
-                    "has_any_pending": True,
-                }
+                mock_get_claim.return_value = (
+                    "email_processing_user_123_20240101_120000"
+                )
 
                 # Mock _calculate_next_run to ensure it would normally schedule
                 with patch.object(
@@ -167,7 +170,7 @@ class TestSchedulerDeduplication:
         configs = [config_1, config_2, config_3]
 
         # Mock database query
-        email_scheduler.db.query.return_value.filter_by.return_value.all.return_value = (
+        email_scheduler.db.query.return_value.filter_by.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = (
             configs
         )
 
@@ -199,6 +202,155 @@ class TestSchedulerDeduplication:
             mock_has_pending.assert_called_once()
 
 
+class _FakeRedis:
+    """Just enough of a Redis client for the job claim commands."""
+
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value.encode()
+        self.ttls[key] = ex
+        return True
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def exists(self, key):
+        return int(key in self.values)
+
+    def eval(self, script, numkeys, key, job_id, *args):
+        if self.values.get(key) != job_id.encode():
+            return 0
+        if "del" in script:
+            del self.values[key]
+        else:
+            self.ttls[key] = int(args[0])
+        return 1
+
+
+class TestUserJobClaims:
+    """Test cases for the per-user job claim index."""
+
+    def test_claim_is_exclusive_until_released(self):
+        redis_conn = _FakeRedis()
+
+        assert claim_user_job(redis_conn, 7, "job-a")
+        assert not claim_user_job(redis_conn, 7, "job-b")
+        assert has_user_job_pending(redis_conn, 7)
+        assert get_user_job_claim(redis_conn, 7) == "job-a"
+        assert not has_user_job_pending(redis_conn, 8)
+
+        # Only the holder can release the claim
+        assert not release_user_job(redis_conn, 7, "job-b")
+        assert release_user_job(redis_conn, 7, "job-a")
+        assert not has_user_job_pending(redis_conn, 7)
+        assert claim_user_job(redis_conn, 7, "job-b")
+
+    def test_running_job_extends_and_releases_its_claim(self):
+        redis_conn = _FakeRedis()
+        claim_user_job(redis_conn, 7, "job-a", ttl=60)
+        job = Mock(id="job-a", connection=redis_conn, timeout=600)
+
+        with patch(
+            "banktransactions.automation.job_utils.get_current_job", return_value=job
+        ):
+            with pytest.raises(RuntimeError):
+                with hold_user_job_claim(7):
+                    assert redis_conn.ttls["email_processing:user_job:7"] == (
+                        600 + USER_JOB_CLAIM_TTL
+                    )
+                    raise RuntimeError("job failed")
+
+        assert not has_user_job_pending(redis_conn, 7)
+
+    def test_unclaimed_job_claims_while_running(self):
+        redis_conn = _FakeRedis()
+        job = Mock(id="job-a", connection=redis_conn, timeout=None)
+
+        with patch(
+            "banktransactions.automation.job_utils.get_current_job", return_value=job
+        ):
+            with hold_user_job_claim(7):
+                assert get_user_job_claim(redis_conn, 7) == "job-a"
+
+        assert not has_user_job_pending(redis_conn, 7)
+
+    def test_run_lock_serializes_jobs_of_a_user(self):
+        redis_conn = _FakeRedis()
+        redis_conn.set("email_processing:user_run:7", "push-job", nx=True, ex=240)
+        job = Mock(id="poll-job", connection=redis_conn, timeout=600)
+
+        def sleep(seconds):
+            # The push job finishes while the poll job waits
+            redis_conn.eval("del", 1, "email_processing:user_run:7", "push-job")
+
+        with patch(
+            "banktransactions.automation.job_utils.get_current_job", return_value=job
+        ), patch(
+            "banktransactions.automation.job_utils.time.sleep", side_effect=sleep
+        ) as mock_sleep:
+            with hold_user_run_lock(7):
+                assert redis_conn.values["email_processing:user_run:7"] == (b"poll-job")
+                assert redis_conn.ttls["email_processing:user_run:7"] == 660
+
+        mock_sleep.assert_called_once()
+        assert "email_processing:user_run:7" not in redis_conn.values
+
+    def test_push_and_poll_jobs_take_the_run_lock(self):
+        from banktransactions.automation import email_processor
+
+        held = []
+
+        @contextmanager
+        def run_lock(user_id):
+            held.append(user_id)
+            yield
+
+        with patch.object(
+            email_processor, "hold_user_run_lock", run_lock
+        ), patch.object(
+            email_processor, "_process_user_emails", return_value={}
+        ) as mock_process:
+            email_processor.process_user_messages_standalone(7, [10, 11])
+            email_processor.process_user_emails_standalone(8)
+
+        assert held == [7, 8]
+        assert mock_process.call_count == 2
+
+    def test_scheduler_claims_slot_once(self):
+        redis_conn = _FakeRedis()
+        with patch("banktransactions.automation.scheduler.Scheduler"):
+            scheduler = EmailScheduler(redis_conn, Mock())
+        config = Mock(
+            user_id=7,
+            email_address="test@example.com",
+            polling_interval="hourly",
+            last_check_time=None,
+        )
+
+        scheduler._schedule_user_job(config)
+        scheduler._schedule_user_job(config)
+
+        scheduler.scheduler.enqueue_at.assert_called_once()
+        job_id = scheduler.scheduler.enqueue_at.call_args.kwargs["job_id"]
+        assert get_user_job_claim(redis_conn, 7) == job_id
+
+    def test_failed_scheduling_releases_claim(self):
+        redis_conn = _FakeRedis()
+        with patch("banktransactions.automation.scheduler.Scheduler"):
+            scheduler = EmailScheduler(redis_conn, Mock())
+        scheduler.scheduler.enqueue_at.side_effect = Exception("redis down")
+        config = Mock(user_id=7, last_check_time=None)
+
+        scheduler._schedule_user_job(config)
+
+        assert not has_user_job_pending(redis_conn, 7)
+
+
 def run_integration_test():
     """Run an integration test with real Redis (if available)."""
     print("\nRunning integration test...")
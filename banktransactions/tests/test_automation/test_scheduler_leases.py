@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Tests for the shard leases that let several schedulers run side by side.
+"""
+
+import os
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+# Add banktransactions directory to Python path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from banktransactions.automation.job_utils import (
+    SCHEDULER_WAKEUP_INSTANCE_PREFIX,
+    SCHEDULER_WAKEUP_KEY,
+    request_scheduler_wakeup,
+    wait_for_scheduler_wakeup,
+)
+from banktransactions.automation.scheduler_leases import (
+    SCHEDULER_INSTANCES_KEY,
+    ShardLeaseManager,
+    get_shard_count,
+    get_user_shard,
+)
+
+SHARDS = 16
+LEASE_TTL = 60
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _FakeRedis:
+    """Just enough of a Redis client for leases that expire on a fake clock."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.values = {}
+        self.expiry = {}
+        self.zsets = {}
+        self.fail = False
+
+    def _check(self):
+        if self.fail:
+            raise ConnectionError("redis down")
+
+    def _live(self, key):
+        if key in self.expiry and self.expiry[key] <= self.clock():
+            del self.values[key]
+            del self.expiry[key]
+        return self.values.get(key)
+
+    def set(self, key, value, nx=False, px=None):
+        self._check()
+        if nx and self._live(key) is not None:
+            return None
+        self.values[key] = value.encode()
+        self.expiry[key] = self.clock() + px / 1000
+        return True
+
+    def eval(self, script, numkeys, key, owner, *args):
+        self._check()
+        if self._live(key) != owner.encode():
+            return 0
+        if "pexpire" in script:
+            self.expiry[key] = self.clock() + int(args[0]) / 1000
+        else:
+            del self.values[key]
+            del self.expiry[key]
+        return 1
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+    def zrem(self, key, member):
+        self.zsets.get(key, {}).pop(member, None)
+
+
+class _FakePipeline:
+    def __init__(self, redis_conn):
+        self.redis_conn = redis_conn
+        self.results = []
+
+    def zadd(self, key, mapping):
+        self.redis_conn.zsets.setdefault(key, {}).update(mapping)
+
+    def zremrangebyscore(self, key, low, high):
+        zset = self.redis_conn.zsets.get(key, {})
+        for member in [m for m, score in zset.items() if score <= high]:
+            del zset[member]
+
+    def zrange(self, key, start, end):
+        members = self.redis_conn.zsets.get(key, {})
+        self.results.append([member.encode() for member in members])
+
+    def execute(self):
+        self.redis_conn._check()
+        return self.results
+
+
+@pytest.fixture
+def clock():
+    return _Clock()
+
+
+@pytest.fixture
+def redis_conn(clock):
+    return _FakeRedis(clock)
+
+
+def _manager(redis_conn, clock, name):
+    return ShardLeaseManager(
+        redis_conn,
+        shard_count=SHARDS,
+        lease_ttl=LEASE_TTL,
+        instance_id=name,
+        clock=clock,
+    )
+
+
+def _assert_disjoint(*managers):
+    owned = [set(manager.owned_shards) for manager in managers]
+    for index, shards in enumerate(owned):
+        for other in owned[index + 1 :]:
+            assert not shards & other
+
+
+class TestShardLeaseManager:
+    """Test cases for acquiring, rebalancing and failing over shard leases."""
+
+    def test_single_instance_owns_every_shard(self, redis_conn, clock):
+        manager = _manager(redis_conn, clock, "a")
+
+        assert manager.rebalance() == list(range(SHARDS))
+
+    def test_second_instance_converges_to_an_even_split(self, redis_conn, clock):
+        first = _manager(redis_conn, clock, "a")
+        second = _manager(redis_conn, clock, "b")
+        first.rebalance()
+
+        # The newcomer finds every shard taken until the owner gives some up
+        assert second.rebalance() == []
+        _assert_disjoint(first, second)
+        first.rebalance()
+        _assert_disjoint(first, second)
+        second.rebalance()
+
+        _assert_disjoint(first, second)
+        assert len(first.owned_shards) == len(second.owned_shards) == SHARDS // 2
+        assert set(first.owned_shards) | set(second.owned_shards) == set(range(SHARDS))
+
+    def test_survivor_takes_over_after_node_loss(self, redis_conn, clock):
+        first = _manager(redis_conn, clock, "a")
+        second = _manager(redis_conn, clock, "b")
+        for _ in range(3):
+            first.rebalance()
+            second.rebalance()
+
+        # "a" stops renewing; its shards stay unowned until the leases expire
+        clock.now += LEASE_TTL / 2
+        assert len(second.rebalance()) == SHARDS // 2
+        clock.now += LEASE_TTL / 2 + 1
+        assert second.rebalance() == list(range(SHARDS))
+
+        # The old owner cannot renew leases it lost and drops them
+        assert first.rebalance() == []
+        _assert_disjoint(first, second)
+
+    def test_release_all_hands_shards_over_immediately(self, redis_conn, clock):
+        first = _manager(redis_conn, clock, "a")
+        second = _manager(redis_conn, clock, "b")
+        first.rebalance()
+        second.rebalance()
+
+        first.release_all()
+
+        assert first.owned_shards == []
+        assert "a" not in redis_conn.zsets[SCHEDULER_INSTANCES_KEY]
+        assert second.rebalance() == list(range(SHARDS))
+
+    def test_redis_failure_drops_all_shards(self, redis_conn, clock):
+        manager = _manager(redis_conn, clock, "a")
+        manager.rebalance()
+
+        redis_conn.fail = True
+
+        assert manager.rebalance() == []
+
+    def test_three_instances_never_overlap(self, redis_conn, clock):
+        managers = [_manager(redis_conn, clock, name) for name in "abc"]
+        for _ in range(4):
+            for manager in managers:
+                manager.rebalance()
+                _assert_disjoint(*managers)
+            clock.now += 1
+
+        assert sorted(len(manager.owned_shards) for manager in managers) == [5, 5, 6]
+
+
+class TestShardHelpers:
+    """Test cases for shard assignment and configuration."""
+
+    def test_user_shard_is_stable(self):
+        assert get_user_shard(35, 16) == 3
+        assert get_user_shard(35, 16) == get_user_shard(35, 16)
+
+    def test_shard_count_from_environment(self, monkeypatch):
+        monkeypatch.setenv("SCHEDULER_SHARDS", "4")
+        assert get_shard_count() == 4
+        monkeypatch.setenv("SCHEDULER_SHARDS", "nope")
+        assert get_shard_count() == 16
+
+
+class TestSchedulerWakeup:
+    """Test cases for waking every scheduler instance on a configuration change."""
+
+    def test_wakeup_reaches_every_live_instance(self):
+        redis_conn = MagicMock()
+        redis_conn.zrange.return_value = [b"node-a", b"node-b"]
+
+        assert request_scheduler_wakeup(redis_conn) is True
+
+        redis_conn.zrange.assert_called_once_with(SCHEDULER_INSTANCES_KEY, 0, -1)
+        pipe = redis_conn.pipeline.return_value
+        pushed = [call.args[0] for call in pipe.lpush.call_args_list]
+        assert pushed == [
+            SCHEDULER_WAKEUP_KEY,
+            SCHEDULER_WAKEUP_INSTANCE_PREFIX + "node-a",
+            SCHEDULER_WAKEUP_INSTANCE_PREFIX + "node-b",
+        ]
+        assert pipe.expire.call_count == 2
+        pipe.execute.assert_called_once()
+
+    def test_instance_waits_on_its_own_list(self):
+        redis_conn = MagicMock()
+        redis_conn.blpop.return_value = (b"key", b"1")
+
+        assert wait_for_scheduler_wakeup(redis_conn, 19.5, instance_id="node-a")
+
+        key = SCHEDULER_WAKEUP_INSTANCE_PREFIX + "node-a"
+        redis_conn.blpop.assert_called_once_with([key], timeout=20)
+        redis_conn.delete.assert_called_once_with(key)
+
+    def test_unsharded_scheduler_uses_the_shared_list(self):
+        redis_conn = MagicMock()
+        redis_conn.blpop.return_value = None
+
+        assert wait_for_scheduler_wakeup(redis_conn, 0.2) is False
+
+        redis_conn.blpop.assert_called_once_with([SCHEDULER_WAKEUP_KEY], timeout=1)
+        redis_conn.delete.assert_not_called()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Tests for spreading scheduled jobs over time instead of releasing them at once.
+"""
+
+import os
+import sys
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+
+# Add banktransactions directory to Python path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from banktransactions.automation.job_utils import (
+    get_admission_rate,
+    get_user_phase,
+    reserve_admission_slot,
+)
+from banktransactions.automation.scheduler import CATCH_UP_SPREAD, EmailScheduler
+
+FLEET_SIZE = 10_000
+
+
+class _FakeRedis:
+    """Just enough of a Redis client for the admission counters."""
+
+    def __init__(self):
+        self.values = {}
+        self.commands = 0
+
+    def get(self, key):
+        self.commands += 1
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.commands += 1
+        self.values[key] = str(value).encode()
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, redis_conn):
+        self.redis_conn = redis_conn
+        self.results = []
+
+    def incr(self, key):
+        value = int(self.redis_conn.values.get(key, 0)) + 1
+        self.redis_conn.values[key] = str(value).encode()
+        self.results.append(value)
+
+    def expire(self, key, ttl):
+        self.results.append(True)
+
+    def execute(self):
+        self.redis_conn.commands += 1
+        return self.results
+
+
+def _overdue_fleet(size=FLEET_SIZE):
+    """A fleet that was last checked before an outage: every run is overdue."""
+    last_check = datetime.now(timezone.utc) - timedelta(hours=3)
+    return [
+        SimpleNamespace(
+            user_id=user_id, last_check_time=last_check, polling_interval="hourly"
+        )
+        for user_id in range(1, size + 1)
+    ]
+
+
+def _plan(admission_rate):
+    with patch("banktransactions.automation.scheduler.Scheduler"):
+        scheduler = EmailScheduler(_FakeRedis(), Mock(), admission_rate=admission_rate)
+    start = datetime.now(timezone.utc)
+    runs = [scheduler._calculate_next_run(config) for config in _overdue_fleet()]
+    return start, runs
+
+
+def _per_minute(start, runs):
+    return Counter(int((run - start).total_seconds() // 60) for run in runs)
+
+
+class TestFleetSimulation:
+    """Simulate a 10k-user catch-up after an outage."""
+
+    def test_phase_offsets_alone_flatten_the_herd(self):
+        start, runs = _plan(admission_rate=0)
+
+        per_minute = _per_minute(start, runs)
+        window = int(CATCH_UP_SPREAD.total_seconds() // 60)
+        # Without spreading all 10k jobs would start in the same instant
+        assert len(per_minute) >= window
+        assert max(per_minute.values()) < 1.3 * FLEET_SIZE / window
+        assert max(runs) - start <= CATCH_UP_SPREAD + timedelta(minutes=1)
+
+    def test_admission_rate_caps_jobs_per_minute(self):
+        rate = 300
+        start, runs = _plan(admission_rate=rate)
+
+        per_minute = Counter(int(run.timestamp() // 60) for run in runs)
+        assert sum(per_minute.values()) == FLEET_SIZE
+        assert max(per_minute.values()) <= rate
+        # The backlog drains at the admission rate, without gaps
+        minutes = sorted(per_minute)
+        assert minutes[-1] - minutes[0] + 1 == len(minutes)
+        assert len(minutes) <= FLEET_SIZE // rate + 2
+
+        # Within a minute, admitted jobs are spaced out rather than bunched
+        per_second = Counter(int(run.timestamp()) for run in runs)
+        assert max(per_second.values()) <= 2 * rate // 60
+
+    def test_phase_is_stable_per_user(self):
+        assert get_user_phase(42) == get_user_phase(42)
+        phases = [get_user_phase(user_id) for user_id in range(1, 1001)]
+        assert all(0 <= phase < 1 for phase in phases)
+        # Spread across the whole window, not clustered
+        assert len({int(phase * 10) for phase in phases}) == 10
+
+
+class TestAdmissionSlots:
+    """Test cases for the global admission counters."""
+
+    def test_full_minute_moves_jobs_to_the_next(self):
+        redis_conn = _FakeRedis()
+        earliest = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+        slots = [reserve_admission_slot(redis_conn, earliest, 2) for _ in range(5)]
+
+        assert slots == [
+            earliest,
+            earliest + timedelta(seconds=30),
+            earliest + timedelta(minutes=1),
+            earliest + timedelta(minutes=1, seconds=30),
+            earliest + timedelta(minutes=2),
+        ]
+
+    def test_cursor_skips_minutes_known_to_be_full(self):
+        redis_conn = _FakeRedis()
+        earliest = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+        for _ in range(20):
+            reserve_admission_slot(redis_conn, earliest, 1)
+
+        redis_conn.commands = 0
+        reserve_admission_slot(redis_conn, earliest, 1)
+
+        # One cursor read, one counter increment, one cursor update
+        assert redis_conn.commands == 3
+
+    def test_later_start_is_not_pushed_behind_an_earlier_backlog(self):
+        redis_conn = _FakeRedis()
+        backlog_start = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+        for _ in range(10):
+            reserve_admission_slot(redis_conn, backlog_start, 1)
+
+        later = datetime(2024, 1, 1, 15, 0, tzinfo=timezone.utc)
+        assert reserve_admission_slot(redis_conn, later, 1) == later
+
+    def test_unlimited_rate_and_redis_errors_admit_at_once(self):
+        earliest = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+        broken = Mock()
+        broken.get.side_effect = ConnectionError("redis down")
+
+        assert reserve_admission_slot(_FakeRedis(), earliest, 0) == earliest
+        assert reserve_admission_slot(broken, earliest, 10) == earliest
+
+    @pytest.mark.parametrize(
+        "value, expected", [("120", 120), ("0", 0), ("nope", 300), ("-5", 0)]
+    )
+    def test_admission_rate_from_environment(self, monkeypatch, value, expected):
+        monkeypatch.setenv("EMAIL_JOB_ADMISSION_RATE", value)
+        assert get_admission_rate() == expected
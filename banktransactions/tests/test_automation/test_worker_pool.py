@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests for the preforked email worker pool.
+"""
+
+import os
+import sys
+from unittest.mock import Mock, patch
+
+# Add banktransactions directory to Python path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from rq.worker_pool import WorkerData
+
+from banktransactions.automation import worker_pool
+from banktransactions.automation.priority_worker import PrioritySimpleWorker
+from banktransactions.automation.worker_pool import (
+    WarmWorkerPool,
+    get_max_jobs_per_slot,
+    preload_job_modules,
+    run_pool_slot,
+)
+
+
+class TestPreloadJobModules:
+    """Test cases for importing job modules before forking."""
+
+    def test_missing_modules_are_skipped(self):
+        loaded = preload_job_modules(["json", "no_such_module_for_tests", "csv"])
+
+        assert loaded == ["json", "csv"]
+        assert "csv" in sys.modules
+
+    def test_app_is_only_warmed_without_database_url(self, monkeypatch):
+        get_app = Mock()
+        monkeypatch.setattr(
+            "banktransactions.core.processed_ids_db.get_app", get_app, raising=True
+        )
+
+        monkeypatch.setenv("DATABASE_URL", "postgresql://db/kanakku")
+        preload_job_modules([], warm_app=True)
+        get_app.assert_not_called()
+
+        monkeypatch.delenv("DATABASE_URL")
+        preload_job_modules([], warm_app=False)
+        get_app.assert_not_called()
+        preload_job_modules([], warm_app=True)
+        get_app.assert_called_once()
+
+
+class TestMaxJobsPerSlot:
+    """Test cases for the slot recycling limit."""
+
+    def test_default_and_environment(self, monkeypatch):
+        monkeypatch.delenv("WORKER_MAX_JOBS_PER_SLOT", raising=False)
+        assert get_max_jobs_per_slot() == 100
+
+        monkeypatch.setenv("WORKER_MAX_JOBS_PER_SLOT", "25")
+        assert get_max_jobs_per_slot() == 25
+
+    def test_zero_disables_and_invalid_falls_back(self, monkeypatch):
+        monkeypatch.setenv("WORKER_MAX_JOBS_PER_SLOT", "0")
+        assert get_max_jobs_per_slot() is None
+
+        monkeypatch.setenv("WORKER_MAX_JOBS_PER_SLOT", "lots")
+        assert get_max_jobs_per_slot() == 100
+
+
+class TestRunPoolSlot:
+    """Test cases for the slot process entry point."""
+
+    @patch("banktransactions.automation.worker_pool.reset_after_fork")
+    def test_slot_resets_connections_and_stops_after_max_jobs(self, mock_reset):
+        worker_class = Mock()
+        queue_class = Mock()
+        connection_class = Mock()
+
+        run_pool_slot(
+            "slot-1",
+            ["email_processing"],
+            connection_class,
+            Mock(),
+            {},
+            worker_class=worker_class,
+            queue_class=queue_class,
+            burst=False,
+            max_jobs=10,
+        )
+
+        mock_reset.assert_called_once()
+        queue_class.assert_called_once_with(
+            "email_processing", connection=connection_class.return_value
+        )
+        worker_class.return_value.work.assert_called_once_with(
+            burst=False, logging_level="INFO", max_jobs=10
+        )
+
+    def test_reset_after_fork_survives_errors(self):
+        with patch(
+            "shared.database.DatabaseManager.dispose_inherited_connections",
+            side_effect=RuntimeError("boom"),
+        ) as mock_dispose, patch(
+            "banktransactions.core.processed_ids_db.dispose_app_connections"
+        ) as mock_app_dispose:
+            worker_pool.reset_after_fork()
+
+        mock_dispose.assert_called_once()
+        mock_app_dispose.assert_called_once()
+
+
+class TestWarmWorkerPool:
+    """Test cases for the pool's slot processes."""
+
+    def test_slots_run_in_process_and_are_recycled(self):
+        pool = WarmWorkerPool(
+            ["email_processing"],
+            connection=Mock(connection_pool=Mock(connection_kwargs={})),
+            num_workers=3,
+            max_jobs_per_slot=20,
+        )
+
+        process = pool.get_worker_process("slot-1", burst=False)
+
+        assert pool.worker_class is PrioritySimpleWorker
+        assert process._target is run_pool_slot
+        assert process._args[:2] == ("slot-1", ["email_processing"])
+        assert process._kwargs["max_jobs"] == 20
+        assert process._kwargs["worker_class"] is PrioritySimpleWorker
+        if sys.platform.startswith("linux"):
+            # Forked, so the slot inherits the preloaded modules
+            assert process._start_method in (None, "fork")
+
+    def test_dead_slots_are_replaced(self):
+        pool = WarmWorkerPool(
+            ["email_processing"],
+            connection=Mock(connection_pool=Mock(connection_kwargs={})),
+            num_workers=2,
+        )
+        pool.status = WarmWorkerPool.Status.STARTED
+        pool._burst = False
+        started = []
+        pool.start_worker = lambda **kwargs: started.append(kwargs)
+        finished = WorkerData("finished", 101, Mock(**{"is_alive.return_value": False}))
+        running = WorkerData("running", 102, Mock(**{"is_alive.return_value": True}))
+        pool.worker_dict = {"finished": finished, "running": running}
+
+        pool.check_workers()
+
+        assert list(pool.worker_dict) == ["running"]
+        assert len(started) == 1
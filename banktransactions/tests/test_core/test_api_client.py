@@ -5,14 +5,29 @@ import sys
 from datetime import date, datetime
 from unittest.mock import Mock, patch
 
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
 # Add banktransactions directory to Python path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 try:
-    from banktransactions.core.api_client import APIClient, send_transaction_to_api
+    from banktransactions.core.api_client import (
+        APIClient,
+        DirectTransactionSubmitter,
+        TransactionSubmitter,
+        create_transaction_submitter,
+        send_transaction_to_api,
+    )
 except ImportError:
     # Fallback to relative import if running from within the directory
-    from api_client import APIClient, send_transaction_to_api
+    from api_client import (
+        APIClient,
+        DirectTransactionSubmitter,
+        TransactionSubmitter,
+        create_transaction_submitter,
+        send_transaction_to_api,
+    )
 
 
 class TestSendTransactionToApi:
@@ -484,3 +499,174 @@ class TestAPIClient:
         assert result["success"] is False
         assert result["error"] == "Test exception"
         assert "Error in APIClient.create_transaction" in caplog.text
+
+
+def _transaction(amount=500.0):
+    return {
+        "amount": amount,
+        "transaction_date": "18-05-25",
+        "from_account": "Assets:Bank:Axis",
+        "to_account": "Expenses:Food:Restaurant",
+        "recipient_name": "CAFE",
+    }
+
+
+def _response(status_code):
+    return Mock(ok=200 <= status_code < 300, status_code=status_code, text="")
+
+
+class TestTransactionSubmitter:
+    """Test cases for the pooled, batched TransactionSubmitter."""
+
+    def _submitter(self, **kwargs):
+        submitter = TransactionSubmitter(
+            api_endpoint="http://localhost:5000/api/v1/transactions",
+            api_key="test_api_key",
+            backoff_base=0,
+            **kwargs,
+        )
+        submitter.session = Mock()
+        return submitter
+
+    def test_session_is_reused_for_every_transaction(self):
+        """Test that all transactions go through one session."""
+        submitter = self._submitter()
+        submitter.session.post.return_value = _response(201)
+
+        results = submitter.send_batch(
+            [("gmail-1", _transaction(100)), ("gmail-2", _transaction(200))]
+        )
+
+        assert results == {"gmail-1": True, "gmail-2": True}
+        assert submitter.session.post.call_count == 2
+        # The API has no idempotency support, so no key header is sent
+        for call in submitter.session.post.call_args_list:
+            assert "headers" not in call.kwargs
+        payload = submitter.session.post.call_args_list[0].kwargs["json"]
+        assert payload["postings"][0]["account"] == "Assets:Bank:Axis"
+
+    def test_buffer_is_flushed_in_submission_order(self):
+        """Test that flush reports results in submission order."""
+        submitter = self._submitter()
+        submitter.session.post.return_value = _response(201)
+        for index in range(5):
+            submitter.submit(f"gmail-{index}", _transaction(index + 1))
+
+        assert submitter.pending == 5
+        results = submitter.flush()
+
+        assert list(results) == [f"gmail-{index}" for index in range(5)]
+        assert submitter.pending == 0
+        assert submitter.flush() == {}
+
+    @patch("banktransactions.core.api_client.time.sleep")
+    def test_errors_before_sending_are_retried(self, mock_sleep):
+        """Test that 429 responses and connection failures are retried."""
+        submitter = self._submitter(max_retries=3)
+        submitter.session.post.side_effect = [
+            _response(429),
+            requests.exceptions.ConnectionError(
+                MaxRetryError(None, "/", NewConnectionError(None, "refused"))
+            ),
+            requests.exceptions.ConnectTimeout("connect timeout"),
+            _response(201),
+        ]
+
+        assert submitter.send_batch([("gmail-1", _transaction())]) == {"gmail-1": True}
+        assert submitter.session.post.call_count == 4
+        assert mock_sleep.call_count == 3
+
+    @patch("banktransactions.core.api_client.time.sleep")
+    def test_errors_after_sending_are_not_retried(self, mock_sleep):
+        """Test that failures which may follow a committed transaction are not retried."""
+        for failure in (
+            _response(503),
+            requests.exceptions.ReadTimeout("read timeout"),
+            requests.exceptions.ConnectionError("Connection aborted"),
+        ):
+            submitter = self._submitter(max_retries=3)
+            submitter.session.post.side_effect = [failure, _response(201)]
+
+            assert submitter.send_batch([("gmail-1", _transaction())]) == {
+                "gmail-1": False
+            }
+            submitter.session.post.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    @patch("banktransactions.core.api_client.time.sleep")
+    def test_client_errors_are_not_retried(self, mock_sleep):
+        """Test that a 400 response fails immediately."""
+        submitter = self._submitter()
+        submitter.session.post.return_value = _response(400)
+
+        assert submitter.send_batch([("gmail-1", _transaction())]) == {"gmail-1": False}
+        submitter.session.post.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    @patch("banktransactions.core.api_client.time.sleep")
+    def test_gives_up_after_max_retries(self, mock_sleep):
+        """Test that persistent failures stop after max_retries."""
+        submitter = self._submitter(max_retries=2)
+        submitter.session.post.return_value = _response(429)
+
+        assert submitter.send_batch([("gmail-1", _transaction())]) == {"gmail-1": False}
+        assert submitter.session.post.call_count == 3
+
+    def test_backoff_is_jittered_and_grows(self):
+        """Test that the backoff delay is random within a growing bound."""
+        submitter = self._submitter()
+        submitter.backoff_base = 1.0
+
+        delays = [submitter._backoff_delay(3) for _ in range(50)]
+
+        assert all(0 <= delay <= 8 for delay in delays)
+        assert len(set(delays)) > 1
+
+    def test_invalid_transaction_is_not_sent(self):
+        """Test that a transaction failing validation is reported as failed."""
+        submitter = self._submitter()
+        submitter.session.post.return_value = _response(201)
+
+        results = submitter.send_batch(
+            [("gmail-1", _transaction("bad")), ("gmail-2", _transaction())]
+        )
+
+        assert results == {"gmail-1": False, "gmail-2": True}
+        submitter.session.post.assert_called_once()
+
+    def test_missing_configuration_fails_batch(self):
+        """Test that a missing API endpoint fails every transaction."""
+        with patch.dict(os.environ, {}, clear=True):
+            submitter = TransactionSubmitter()
+        submitter.session = Mock()
+
+        assert submitter.send_batch([("gmail-1", _transaction())]) == {"gmail-1": False}
+        submitter.session.post.assert_not_called()
+
+
+class TestCreateTransactionSubmitter:
+    """Test choosing between HTTP and in-process submission"""
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_defaults_to_http(self):
+        submitter = create_transaction_submitter(db_session=Mock(), user_id=1)
+        assert isinstance(submitter, TransactionSubmitter)
+
+    @patch.dict(os.environ, {"TRANSACTION_SUBMIT_MODE": "direct"})
+    def test_direct_mode_uses_worker_session(self):
+        db_session = Mock()
+
+        submitter = create_transaction_submitter(db_session=db_session, user_id=7)
+
+        assert isinstance(submitter, DirectTransactionSubmitter)
+        assert submitter.service.session is db_session
+        assert submitter.service.user_id == 7
+
+    @patch.dict(os.environ, {"TRANSACTION_SUBMIT_MODE": "direct"})
+    def test_direct_mode_without_session_falls_back_to_http(self):
+        assert isinstance(create_transaction_submitter(), TransactionSubmitter)
+
+    @patch.dict(os.environ, {"TRANSACTION_SUBMIT_MODE": "carrier-pigeon"})
+    def test_unknown_mode_uses_http(self):
+        submitter = create_transaction_submitter(db_session=Mock(), user_id=1)
+        assert isinstance(submitter, TransactionSubmitter)
@@ -1,8 +1,16 @@
+import json
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
 import pytest
 
 from banktransactions.core.email_parser import (
+    LLM_CONCURRENCY_LIMITS,
+    _plan_batches,
     convert_currency,
     detect_currency,
+    extract_transaction_details_batch,
     standardize_date_format,
 )
 
@@ -139,3 +147,138 @@ ion: =20
 
         for input_date, expected in test_cases:
             assert standardize_date_format(input_date) == expected
+
+
+def _llm_item(message_id, amount, recipient):
+    """Build one element of a batched Gemini JSON response."""
+    return {
+        "message_id": message_id,
+        "amount": amount,
+        "date": "21-04-25",
+        "transaction_time": "10:48:08",
+        "account_number": "XX1648",
+        "recipient": recipient,
+    }
+
+
+class TestBatchExtraction:
+    """Test batched LLM extraction of many emails per call"""
+
+    def test_plan_batches_respects_token_budget_and_size(self):
+        """Bodies are split by estimated tokens and capped by item count"""
+        bodies = {str(i): "x" * 4000 for i in range(10)}
+
+        by_budget = _plan_batches(bodies, token_budget=2700)
+        assert [len(batch) for batch in by_budget] == [2, 2, 2, 2, 2]
+
+        by_size = _plan_batches(bodies, token_budget=10**6, max_batch_size=4)
+        assert [len(batch) for batch in by_size] == [4, 4, 2]
+
+        oversized = _plan_batches({"big": "x" * 10**6}, token_budget=1000)
+        assert oversized == [{"big": "x" * 10**6}]
+
+    @patch("banktransactions.core.email_parser._extract_with_llm_few_shot")
+    @patch("banktransactions.core.email_parser.genai.Client")
+    @patch(
+        "banktransactions.core.email_parser._get_gemini_api_key",
+        return_value="test-key",
+    )
+    def test_batch_single_call_with_per_email_fallback(
+        self, mock_key, mock_client_class, mock_single
+    ):
+        """One LLM call covers the batch; only missing items are retried"""
+        client = MagicMock()
+        mock_client_class.return_value = client
+        client.models.generate_content.return_value = MagicMock(
+            text=json.dumps(
+                [
+                    _llm_item("m1", "1,500.00", "MERCHANT_A"),
+                    _llm_item("m2", "250", "MERCHANT_B"),
+                    "not an object",
+                ]
+            )
+        )
+        mock_single.return_value = {
+            "amount": "99",
+            "date": "Unknown",
+            "transaction_time": "Unknown",
+            "account_number": "XX0001",
+            "recipient": "MERCHANT_C",
+        }
+
+        results = extract_transaction_details_batch(
+            {"m1": "INR 1500 debited", "m2": "INR 250 =20debited", "m3": "INR 99"}
+        )
+
+        client.models.generate_content.assert_called_once()
+        prompt = client.models.generate_content.call_args[1]["contents"]
+        assert "message_id=m1" in prompt and "message_id=m3" in prompt
+        mock_single.assert_called_once_with("INR 99")
+        assert results["m1"]["amount"] == "1500.00"
+        assert results["m1"]["date"] == "21-04-2025"
+        assert results["m1"]["currency"] == "INR"
+        assert results["m2"]["recipient"] == "MERCHANT_B"
+        assert results["m3"]["amount"] == "99"
+
+    @patch("banktransactions.core.email_parser._extract_with_llm_few_shot")
+    @patch("banktransactions.core.email_parser.genai.Client")
+    @patch(
+        "banktransactions.core.email_parser._get_gemini_api_key",
+        return_value="test-key",
+    )
+    def test_batch_unparseable_response_falls_back(
+        self, mock_key, mock_client_class, mock_single
+    ):
+        """A malformed batch response retries every item individually"""
+        client = MagicMock()
+        mock_client_class.return_value = client
+        client.models.generate_content.return_value = MagicMock(text="not json")
+        mock_single.return_value = {
+            "amount": "Unknown",
+            "date": "Unknown",
+            "transaction_time": "Unknown",
+            "account_number": "Unknown",
+            "recipient": "Unknown",
+        }
+
+        results = extract_transaction_details_batch({"a": "body a", "b": "body b"})
+
+        assert mock_single.call_count == 2
+        assert set(results) == {"a", "b"}
+
+    @patch.dict(LLM_CONCURRENCY_LIMITS, {"gemini": 3})
+    @patch("banktransactions.core.email_parser._extract_with_llm_few_shot")
+    @patch("banktransactions.core.email_parser._get_gemini_api_key", return_value=None)
+    def test_per_email_calls_run_concurrently(self, mock_key, mock_single):
+        """Per-email calls overlap up to the provider limit"""
+        lock = threading.Lock()
+        in_flight = {"now": 0, "peak": 0}
+
+        def slow_extract(body):
+            with lock:
+                in_flight["now"] += 1
+                in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+            time.sleep(0.05)
+            with lock:
+                in_flight["now"] -= 1
+            return {
+                "amount": body.split()[1],
+                "date": "Unknown",
+                "transaction_time": "Unknown",
+                "account_number": "Unknown",
+                "recipient": "Unknown",
+            }
+
+        mock_single.side_effect = slow_extract
+        bodies = {f"c{i}": f"INR {i}7 debited concurrently" for i in range(9)}
+
+        results = extract_transaction_details_batch(bodies)
+
+        assert mock_single.call_count == 9
+        assert in_flight["peak"] == 3
+        assert list(results) == list(bodies)
+        assert results["c4"]["amount"] == "47"
+
+    def test_batch_empty_input(self):
+        """No bodies means no LLM calls"""
+        assert extract_transaction_details_batch({}) == {}
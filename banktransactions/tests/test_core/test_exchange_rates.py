@@ -0,0 +1,330 @@
+import json
+import threading
+from contextlib import contextmanager
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+from banktransactions.core.email_parser import (
+    convert_currency,
+    extract_transaction_details_batch,
+)
+from banktransactions.core.exchange_rates import (
+    MISS_TTL_SECONDS,
+    REDIS_MISS_PREFIX,
+    REDIS_RATES_PREFIX,
+    ExchangeRateStore,
+    fetch_rates_from_api,
+)
+
+TODAY = date(2025, 6, 10)
+
+
+class _Fetcher:
+    """Records requested dates and answers with a rate derived from the day."""
+
+    def __init__(self, rates=None):
+        self.calls = []
+        self.rates = rates
+
+    def __call__(self, from_currency, to_currency, dates, today):
+        self.calls.append(list(dates))
+        if self.rates is not None:
+            return {day: self.rates[day] for day in dates if day in self.rates}
+        return {day: 80.0 + day.day / 100 for day in dates}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _store(redis_conn=None, fetcher=None, clock=None, fresh_seconds=3600):
+    return ExchangeRateStore(
+        redis_conn=redis_conn,
+        fresh_seconds=fresh_seconds,
+        fetcher=fetcher or _Fetcher(),
+        use_database=False,
+        clock=clock or _Clock(),
+        today=lambda: TODAY,
+    )
+
+
+class TestExchangeRateStore:
+    """Test the date-keyed exchange rate store"""
+
+    def test_rates_are_keyed_by_date_and_fetched_once(self):
+        fetcher = _Fetcher()
+        store = _store(fetcher=fetcher)
+
+        assert store.get_rate("USD", "INR", date(2025, 3, 1)) == 80.01
+        assert store.get_rate("USD", "INR", date(2025, 3, 2)) == 80.02
+        assert store.get_rate("USD", "INR", date(2025, 3, 1)) == 80.01
+
+        assert fetcher.calls == [[date(2025, 3, 1)], [date(2025, 3, 2)]]
+        assert store.stats["hits"] == 1
+
+    def test_prefetch_only_fetches_missing_dates(self):
+        fetcher = _Fetcher()
+        store = _store(fetcher=fetcher)
+        store.get_rate("USD", "INR", date(2025, 3, 2))
+
+        rates = store.prefetch_range("USD", "INR", date(2025, 3, 1), date(2025, 3, 3))
+
+        assert sorted(rates) == [date(2025, 3, 1), date(2025, 3, 2), date(2025, 3, 3)]
+        assert fetcher.calls[-1] == [date(2025, 3, 1), date(2025, 3, 3)]
+
+    def test_future_dates_use_today_and_missing_history_falls_back(self):
+        fetcher = _Fetcher(rates={TODAY: 85.5})
+        store = _store(fetcher=fetcher)
+
+        assert store.get_rate("USD", "INR", date(2025, 7, 1)) == 85.5
+        assert store.get_rate("USD", "INR", date(2025, 1, 1)) == 85.5
+        assert store.get_rate("USD", "INR") == 85.5
+        assert fetcher.calls == [[TODAY], [date(2025, 1, 1)]]
+
+    def test_missing_history_is_not_requested_again(self):
+        clock = _Clock()
+        fetcher = _Fetcher(rates={TODAY: 85.5})
+        # Today's rate stays fresh, so no background refresh joins the calls
+        store = _store(
+            fetcher=fetcher, clock=clock, fresh_seconds=10 * MISS_TTL_SECONDS
+        )
+
+        assert store.get_rate("USD", "INR", date(2025, 1, 1)) == 85.5
+        assert store.get_rate("USD", "INR", date(2025, 1, 1)) == 85.5
+        assert fetcher.calls == [[date(2025, 1, 1)], [TODAY]]
+        assert store.stats["known_misses"] == 1
+
+        # Misses are only remembered for a short while
+        clock.now += MISS_TTL_SECONDS + 1
+        store.get_rate("USD", "INR", date(2025, 1, 1))
+        assert fetcher.calls[-1] == [date(2025, 1, 1)]
+
+    def test_misses_are_shared_through_redis(self):
+        redis_conn = MagicMock()
+        redis_conn.hmget.return_value = [None, None]
+        redis_conn.mget.return_value = [b"1", None]
+        fetcher = _Fetcher(rates={})
+        store = _store(redis_conn=redis_conn, fetcher=fetcher)
+
+        rates = store.prefetch("USD", "INR", [date(2025, 1, 1), date(2025, 1, 2)])
+
+        assert rates == {}
+        redis_conn.mget.assert_called_once_with(
+            [
+                REDIS_MISS_PREFIX + "USD:INR:2025-01-01",
+                REDIS_MISS_PREFIX + "USD:INR:2025-01-02",
+            ]
+        )
+        assert fetcher.calls == [[date(2025, 1, 2)]]
+        pipe = redis_conn.pipeline.return_value
+        pipe.set.assert_called_once_with(
+            REDIS_MISS_PREFIX + "USD:INR:2025-01-02", "1", ex=MISS_TTL_SECONDS
+        )
+
+    def test_unavailable_rate_is_none(self):
+        assert _store(fetcher=_Fetcher(rates={})).get_rate("USD", "INR") is None
+
+    def test_redis_is_read_in_one_call_and_filled_from_the_api(self):
+        redis_conn = MagicMock()
+        redis_conn.hmget.return_value = [
+            json.dumps({"rate": 86.1, "fetched_at": 500.0}),
+            None,
+        ]
+        fetcher = _Fetcher()
+        store = _store(redis_conn=redis_conn, fetcher=fetcher)
+
+        rates = store.prefetch("USD", "INR", [date(2025, 3, 2), date(2025, 3, 1)])
+
+        assert rates == {date(2025, 3, 1): 86.1, date(2025, 3, 2): 80.02}
+        redis_conn.hmget.assert_called_once_with(
+            REDIS_RATES_PREFIX + "USD:INR", ["2025-03-01", "2025-03-02"]
+        )
+        assert fetcher.calls == [[date(2025, 3, 2)]]
+        mapping = redis_conn.hset.call_args.kwargs["mapping"]
+        assert json.loads(mapping["2025-03-02"])["rate"] == 80.02
+
+    def test_redis_errors_fall_through_to_the_api(self):
+        redis_conn = MagicMock()
+        redis_conn.hmget.side_effect = Exception("Connection refused")
+        redis_conn.hset.side_effect = Exception("Connection refused")
+
+        store = _store(redis_conn=redis_conn)
+
+        assert store.get_rate("USD", "INR", date(2025, 3, 1)) == 80.01
+
+    def test_database_rates_are_used_and_fetched_rates_saved(self):
+        stored = {
+            date(2025, 3, 1): {"rate": 86.4, "fetched_at": None},
+            date(2025, 3, 5): {"rate": 87.0, "fetched_at": None},
+        }
+
+        @contextmanager
+        def session():
+            yield "session"
+
+        fetcher = _Fetcher()
+        store = _store(fetcher=fetcher)
+        store.use_database = True
+        with patch(
+            "banktransactions.core.exchange_rates._database_session", session
+        ), patch(
+            "shared.imports.load_exchange_rates", return_value=stored
+        ) as mock_load, patch(
+            "shared.imports.save_exchange_rates", return_value=1
+        ) as mock_save:
+            rates = store.prefetch("USD", "INR", [date(2025, 3, 1), date(2025, 3, 2)])
+
+        assert rates == {date(2025, 3, 1): 86.4, date(2025, 3, 2): 80.02}
+        mock_load.assert_called_once_with(
+            "USD", "INR", date(2025, 3, 1), date(2025, 3, 2), "session"
+        )
+        mock_save.assert_called_once_with(
+            "USD",
+            "INR",
+            {date(2025, 3, 2): 80.02},
+            source="exchangerate-api",
+            db_session="session",
+        )
+
+    def test_stale_rate_is_returned_while_refreshing(self):
+        clock = _Clock()
+        refreshed = threading.Event()
+        rates = iter([85.0, 85.7])
+
+        def fetcher(from_currency, to_currency, dates, today):
+            rate = next(rates)
+            if rate == 85.7:
+                refreshed.set()
+            return {TODAY: rate}
+
+        store = _store(fetcher=fetcher, clock=clock)
+        assert store.get_rate("USD", "INR") == 85.0
+
+        clock.now += 7200
+        assert store.get_rate("USD", "INR") == 85.0
+        assert refreshed.wait(5)
+        for thread in threading.enumerate():
+            if thread.name == "exchange-rate-refresh":
+                thread.join(5)
+
+        assert store.get_rate("USD", "INR") == 85.7
+        assert store.stats["stale"] == 1
+
+    def test_past_rates_are_never_refreshed(self):
+        clock = _Clock()
+        fetcher = _Fetcher()
+        store = _store(fetcher=fetcher, clock=clock)
+        store.get_rate("USD", "INR", date(2025, 3, 1))
+
+        clock.now += 10 * 86400
+        store.get_rate("USD", "INR", date(2025, 3, 1))
+
+        assert fetcher.calls == [[date(2025, 3, 1)]]
+
+    def test_refresh_running_in_another_worker_is_not_repeated(self):
+        redis_conn = MagicMock()
+        redis_conn.hmget.return_value = [json.dumps({"rate": 85.0, "fetched_at": 0.0})]
+        redis_conn.set.return_value = None
+        fetcher = _Fetcher()
+        store = _store(redis_conn=redis_conn, fetcher=fetcher, fresh_seconds=60)
+
+        assert store.get_rate("USD", "INR") == 85.0
+
+        assert store.stats["stale"] == 1
+        assert fetcher.calls == []
+        assert redis_conn.set.call_args.kwargs["nx"] is True
+
+
+class TestFetchRatesFromApi:
+    """Test the exchangerate-api.com client"""
+
+    def test_missing_api_key_fetches_nothing(self, monkeypatch):
+        monkeypatch.delenv("EXCHANGE_RATE_API_KEY", raising=False)
+
+        with patch("banktransactions.core.exchange_rates.requests.get") as mock_get:
+            assert fetch_rates_from_api("USD", "INR", [TODAY], TODAY) == {}
+
+        mock_get.assert_not_called()
+
+    def test_history_and_latest_endpoints(self, monkeypatch):
+        monkeypatch.setenv("EXCHANGE_RATE_API_KEY", "key")
+
+        def get(url, timeout):
+            response = MagicMock()
+            if "/history/" in url:
+                assert url.endswith("/history/USD/2025/3/1")
+                response.json.return_value = {"conversion_rates": {"INR": 86.9}}
+            else:
+                assert url.endswith("/pair/USD/INR")
+                response.json.return_value = {"conversion_rate": 85.6}
+            return response
+
+        with patch("banktransactions.core.exchange_rates.requests.get", get):
+            rates = fetch_rates_from_api("USD", "INR", [date(2025, 3, 1), TODAY], TODAY)
+
+        assert rates == {date(2025, 3, 1): 86.9, TODAY: 85.6}
+
+    def test_failed_requests_are_left_out(self, monkeypatch):
+        monkeypatch.setenv("EXCHANGE_RATE_API_KEY", "key")
+
+        with patch(
+            "banktransactions.core.exchange_rates.requests.get",
+            side_effect=Exception("timeout"),
+        ):
+            assert fetch_rates_from_api("USD", "INR", [TODAY], TODAY) == {}
+
+
+class TestTransactionDateConversion:
+    """Test that conversions use the rate of the transaction date"""
+
+    def test_convert_currency_passes_the_date(self):
+        with patch(
+            "banktransactions.core.email_parser.exchange_rate_store"
+        ) as mock_store:
+            mock_store.get_rate.return_value = 86.0
+            assert convert_currency("10.00", "USD", "INR", date(2025, 3, 1)) == "860.00"
+
+        mock_store.get_rate.assert_called_once_with("USD", "INR", date(2025, 3, 1))
+
+    def test_batch_prefetches_the_dates_of_usd_transactions(self):
+        bodies = {
+            "m1": "USD 10.00 spent on card XX1234 on 01-03-2025",
+            "m2": "USD 20.00 spent on card XX1234 on 02-03-2025",
+            "m3": "INR 500.00 spent on card XX1234 on 03-03-2025",
+        }
+        results = {
+            message_id: {
+                "amount": amount,
+                "date": day,
+                "transaction_time": "Unknown",
+                "account_number": "XX1234",
+                "recipient": "SHOP",
+            }
+            for message_id, amount, day in [
+                ("m1", "10.00", "01-03-2025"),
+                ("m2", "20.00", "02-03-2025"),
+                ("m3", "500.00", "03-03-2025"),
+            ]
+        }
+
+        with patch(
+            "banktransactions.core.email_parser.template_extractor"
+        ) as mock_templates, patch(
+            "banktransactions.core.email_parser.exchange_rate_store"
+        ) as mock_store:
+            mock_templates.extract.side_effect = lambda user_id, sender, body: dict(
+                results[next(m for m, b in bodies.items() if b == body)]
+            )
+            mock_store.get_rate.side_effect = lambda f, t, day: 80.0 + day.day
+            details = extract_transaction_details_batch(bodies)
+
+        mock_store.prefetch.assert_called_once_with(
+            "USD", "INR", {date(2025, 3, 1), date(2025, 3, 2)}
+        )
+        assert details["m1"]["amount"] == "810.00"
+        assert details["m2"]["amount"] == "1640.00"
+        assert details["m3"]["amount"] == "500.00"
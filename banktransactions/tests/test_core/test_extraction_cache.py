@@ -0,0 +1,122 @@
+import json
+from unittest.mock import MagicMock, patch
+
+from banktransactions.core.email_parser import (
+    extract_transaction_details,
+    extract_transaction_details_batch,
+)
+from banktransactions.core.extraction_cache import (
+    REDIS_CACHE_INDEX_KEY,
+    REDIS_CACHE_PREFIX,
+    ExtractionCache,
+    extraction_cache,
+)
+
+BODY = "INR 500.00 spent on card XX1234 on 01-02-2025 at AMAZON"
+LLM_RESULT = {
+    "amount": "500.00",
+    "date": "01-02-2025",
+    "transaction_time": "Unknown",
+    "account_number": "XX1234",
+    "recipient": "AMAZON",
+}
+
+
+class TestExtractionCache:
+    """Test the content-hash extraction cache"""
+
+    def test_key_ignores_whitespace_but_not_model_or_prompt(self):
+        key = ExtractionCache.make_key(BODY, "model-a", "1")
+
+        assert ExtractionCache.make_key(f"  {BODY}\n\n", "model-a", "1") == key
+        assert ExtractionCache.make_key(BODY, "model-b", "1") != key
+        assert ExtractionCache.make_key(BODY, "model-a", "2") != key
+
+    def test_hit_and_miss_counters(self):
+        cache = ExtractionCache()
+        key = cache.make_key(BODY, "model", "1")
+
+        assert cache.get(key) is None
+        cache.set(key, LLM_RESULT)
+        assert cache.get(key) == LLM_RESULT
+        assert cache.stats == {"hits": 1, "misses": 1}
+
+    def test_entries_expire(self):
+        cache = ExtractionCache(ttl_seconds=60)
+        cache.set("key", LLM_RESULT)
+
+        with patch("banktransactions.core.extraction_cache.time.time") as mock_time:
+            mock_time.return_value = 10**12
+            assert cache.get("key") is None
+
+    def test_oldest_entries_are_evicted(self):
+        cache = ExtractionCache(max_entries=2)
+        for key in ["a", "b", "c"]:
+            cache.set(key, LLM_RESULT)
+
+        assert cache.get("a") is None
+        assert cache.get("b") == LLM_RESULT
+        assert cache.get("c") == LLM_RESULT
+
+    def test_redis_storage_with_eviction(self):
+        redis_conn = MagicMock()
+        pipe = redis_conn.pipeline.return_value
+        pipe.execute.return_value = [True, 1, 3]
+        redis_conn.zpopmin.return_value = [(b"old", 1.0)]
+        cache = ExtractionCache(redis_conn=redis_conn, ttl_seconds=60, max_entries=2)
+
+        cache.set("new", LLM_RESULT)
+
+        pipe.set.assert_called_once_with(
+            REDIS_CACHE_PREFIX + "new", json.dumps(LLM_RESULT), ex=60
+        )
+        redis_conn.zpopmin.assert_called_once_with(REDIS_CACHE_INDEX_KEY, 1)
+        redis_conn.delete.assert_called_once_with(REDIS_CACHE_PREFIX + "old")
+
+        redis_conn.get.return_value = json.dumps(LLM_RESULT)
+        assert cache.get("new") == LLM_RESULT
+
+    def test_redis_errors_are_misses(self):
+        redis_conn = MagicMock()
+        redis_conn.get.side_effect = Exception("connection refused")
+        redis_conn.pipeline.side_effect = Exception("connection refused")
+        cache = ExtractionCache(redis_conn=redis_conn)
+
+        cache.set("key", LLM_RESULT)
+        assert cache.get("key") is None
+
+
+class TestCachedExtraction:
+    """Test that repeated bodies do not call the LLM again"""
+
+    @patch("banktransactions.core.email_parser._extract_with_llm_few_shot")
+    def test_single_extraction_is_memoized(self, mock_few_shot):
+        mock_few_shot.return_value = dict(LLM_RESULT)
+
+        first = extract_transaction_details(BODY)
+        second = extract_transaction_details(BODY)
+
+        mock_few_shot.assert_called_once()
+        assert first == second
+        assert extraction_cache.stats == {"hits": 1, "misses": 1}
+
+    @patch("banktransactions.core.email_parser._extract_with_llm_few_shot")
+    def test_failed_extractions_are_not_cached(self, mock_few_shot):
+        mock_few_shot.return_value = dict.fromkeys(LLM_RESULT, "Unknown")
+
+        extract_transaction_details(BODY)
+        extract_transaction_details(BODY)
+
+        assert mock_few_shot.call_count == 2
+
+    @patch("banktransactions.core.email_parser._extract_with_llm_few_shot")
+    @patch("banktransactions.core.email_parser._get_gemini_api_key")
+    def test_batch_reuses_cached_results(self, mock_api_key, mock_few_shot):
+        mock_api_key.return_value = None
+        mock_few_shot.return_value = dict(LLM_RESULT)
+        extract_transaction_details(BODY)
+
+        results = extract_transaction_details_batch({"1": BODY, "2": f"\n{BODY}  "})
+
+        mock_few_shot.assert_called_once()
+        assert results["1"]["amount"] == results["2"]["amount"] == "500.00"
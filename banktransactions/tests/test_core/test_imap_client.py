@@ -1,4 +1,5 @@
-from unittest.mock import MagicMock, patch
+from datetime import date
+from unittest.mock import MagicMock, call, patch
 
 import pytest
 
@@ -85,7 +86,7 @@ class TestEmailParserIntegration:
         assert result["amount"] == "1371.16"
 
         # Verify conversion was called
-        mock_convert.assert_called_once_with("16.52", "USD", "INR")
+        mock_convert.assert_called_once_with("16.52", "USD", "INR", date(2025, 5, 11))
 
     @patch("banktransactions.core.email_parser._extract_with_llm_few_shot")
     def test_extract_transaction_details_llm_failure(self, mock_llm_extract):
@@ -138,3 +139,437 @@ ion: =20
         assert "transaction" in cleaned_body
         assert "=20" not in cleaned_body
         assert "INR 1500.00" in cleaned_body
+
+
+def _make_envelope(sender, subject=b"Transaction Alert"):
+    """Build an IMAP ENVELOPE for a message from the given address."""
+    from datetime import datetime
+
+    from imapclient.response_types import Address, Envelope
+
+    mailbox, host = sender.split("@")
+    return Envelope(
+        date=datetime(2025, 5, 11, 12, 0, 54),
+        subject=subject,
+        from_=(Address(b"Bank", None, mailbox.encode(), host.encode()),),
+        sender=None,
+        reply_to=None,
+        to=None,
+        cc=None,
+        bcc=None,
+        in_reply_to=None,
+        message_id=None,
+    )
+
+
+def _accepting_submitter(batch_size=20):
+    """A transaction submitter double that accepts every transaction."""
+    submitter = MagicMock(batch_size=batch_size)
+    submitter.send_batch.side_effect = lambda items: {key: True for key, _ in items}
+    return submitter
+
+
+def _serve_fetch(server, messages):
+    """Answer server.fetch with only the requested UIDs and items."""
+
+    def fetch(uids, items):
+        wanted = {item.encode() for item in items}
+        return {
+            uid: {key: value for key, value in messages[uid].items() if key in wanted}
+            for uid in uids
+            if uid in messages
+        }
+
+    server.fetch.side_effect = fetch
+
+
+class TestCombinedSenderSearch:
+    """Test the single combined IMAP search across all bank senders"""
+
+    def test_build_sender_search_criteria_single_sender(self):
+        from banktransactions.core.imap_client import build_sender_search_criteria
+
+        criteria = build_sender_search_criteria(["alerts@axisbank.com"], "01-Jan-2025")
+
+        assert criteria == ["FROM", "alerts@axisbank.com", "SINCE", "01-Jan-2025"]
+
+    def test_build_sender_search_criteria_multiple_senders(self):
+        from banktransactions.core.imap_client import build_sender_search_criteria
+
+        criteria = build_sender_search_criteria(
+            ["a@bank.com", "b@bank.com", "c@bank.com"], "01-Jan-2025"
+        )
+
+        assert criteria == [
+            "OR",
+            "FROM",
+            "a@bank.com",
+            "OR",
+            "FROM",
+            "b@bank.com",
+            "FROM",
+            "c@bank.com",
+            "SINCE",
+            "01-Jan-2025",
+        ]
+
+    def test_get_envelope_sender_exact_and_substring_match(self):
+        from banktransactions.core.imap_client import get_envelope_sender
+
+        bank_emails = ["hdfcbank.net", "alerts@axisbank.com"]
+
+        assert (
+            get_envelope_sender(_make_envelope("Alerts@AxisBank.com"), bank_emails)
+            == "alerts@axisbank.com"
+        )
+        assert (
+            get_envelope_sender(_make_envelope("alerts@hdfcbank.net"), bank_emails)
+            == "hdfcbank.net"
+        )
+        assert (
+            get_envelope_sender(_make_envelope("news@other.com"), bank_emails)
+            == "news@other.com"
+        )
+
+    @patch("banktransactions.core.imap_client.construct_transaction_data")
+    @patch("banktransactions.core.imap_client.extract_transaction_details_batch")
+    @patch("banktransactions.core.imap_client.RealIMAPClient")
+    def test_get_bank_emails_single_search_and_fetch(
+        self, mock_imap_class, mock_extract, mock_construct
+    ):
+        from banktransactions.core.imap_client import get_bank_emails
+
+        server = MagicMock()
+        mock_imap_class.return_value.__enter__.return_value = server
+        server.search.return_value = [1, 2]
+        messages = {
+            1: {
+                b"X-GM-MSGID": 111,
+                b"BODY.PEEK[]": b"Subject: a\r\n\r\nRs 100 debited",
+                b"ENVELOPE": _make_envelope("alerts@axisbank.com"),
+            },
+            2: {
+                b"X-GM-MSGID": 222,
+                b"BODY.PEEK[]": b"Subject: b\r\n\r\nRs 200 debited",
+                b"ENVELOPE": _make_envelope("alerts@icicibank.com"),
+            },
+        }
+        _serve_fetch(server, messages)
+        mock_extract.return_value = {"111": {"amount": "100", "date": "01-01-2025"}}
+        mock_construct.return_value = {"amount": "100"}
+        submitter = _accepting_submitter()
+        saved = []
+
+        msgids, count = get_bank_emails(
+            "user@gmail.com",
+            "password",
+            bank_email_list=[
+                "alerts@axisbank.com",
+                "alerts@icicibank.com",
+                "alerts@axisbank.com",
+            ],
+            processed_gmail_msgids={"222"},
+            save_msgid_callback=saved.append,
+            transaction_submitter=submitter,
+            user_id=7,
+        )
+
+        server.search.assert_called_once()
+        criteria = server.search.call_args[0][0]
+        assert criteria[:6] == [
+            "OR",
+            "FROM",
+            "alerts@axisbank.com",
+            "FROM",
+            "alerts@icicibank.com",
+            "SINCE",
+        ]
+        # The body of the already processed message is never downloaded
+        assert server.fetch.call_args_list == [
+            call([1, 2], ["X-GM-MSGID"]),
+            call([1], ["X-GM-MSGID", "BODY.PEEK[]", "ENVELOPE"]),
+        ]
+        mock_extract.assert_called_once_with(
+            {"111": "Rs 100 debited"},
+            senders={"111": "alerts@axisbank.com"},
+            user_id=7,
+        )
+        assert count == 1
+        assert saved == ["111"]
+        assert msgids == {"111", "222"}
+
+    @patch("banktransactions.core.imap_client.MappingSnapshot")
+    @patch("banktransactions.core.imap_client.construct_transaction_data")
+    @patch("banktransactions.core.imap_client.extract_transaction_details_batch")
+    @patch("banktransactions.core.imap_client.RealIMAPClient")
+    def test_get_bank_emails_saves_in_fetch_order(
+        self, mock_imap_class, mock_extract, mock_construct, mock_snapshot
+    ):
+        from banktransactions.core.imap_client import get_bank_emails
+
+        server = MagicMock()
+        mock_imap_class.return_value.__enter__.return_value = server
+        server.search.return_value = [1, 2, 3]
+        messages = {
+            seq: {
+                b"X-GM-MSGID": seq * 111,
+                b"BODY.PEEK[]": f"Subject: s\r\n\r\nRs {seq}00 debited".encode(),
+                b"ENVELOPE": _make_envelope("alerts@axisbank.com"),
+            }
+            for seq in [1, 2, 3]
+        }
+        _serve_fetch(server, messages)
+        # Concurrent extraction may finish in any order
+        mock_extract.return_value = {
+            "333": {"amount": "300"},
+            "111": {"amount": "100"},
+            "222": {"amount": "200"},
+        }
+        mock_construct.side_effect = lambda details, mappings: details
+        submitter = _accepting_submitter(batch_size=2)
+        saved = []
+        checkpoints = []
+
+        _, count = get_bank_emails(
+            "user@gmail.com",
+            "password",
+            bank_email_list=["alerts@axisbank.com"],
+            save_msgid_callback=saved.append,
+            transaction_submitter=submitter,
+            checkpoint_callback=lambda: checkpoints.append(list(saved)),
+        )
+
+        assert count == 3
+        assert saved == ["111", "222", "333"]
+        # A checkpoint follows every posted batch
+        assert checkpoints == [["111", "222"], ["111", "222", "333"]]
+        # Mappings are loaded once and shared by every email
+        mock_snapshot.load.assert_called_once()
+        for construct_call in mock_construct.call_args_list:
+            assert construct_call.kwargs["mappings"] is mock_snapshot.load.return_value
+        sent = [
+            (key, data["amount"])
+            for batch_call in submitter.send_batch.call_args_list
+            for key, data in batch_call.args[0]
+        ]
+        assert sent == [
+            ("gmail-111", "100"),
+            ("gmail-222", "200"),
+            ("gmail-333", "300"),
+        ]
+        assert submitter.send_batch.call_count == 2
+
+    @patch("banktransactions.core.imap_client.RealIMAPClient")
+    def test_get_bank_emails_no_messages_skips_fetch(self, mock_imap_class):
+        from banktransactions.core.imap_client import get_bank_emails
+
+        server = MagicMock()
+        mock_imap_class.return_value.__enter__.return_value = server
+        server.search.return_value = []
+
+        msgids, count = get_bank_emails(
+            "user@gmail.com", "password", bank_email_list=["a@bank.com", "b@bank.com"]
+        )
+
+        server.search.assert_called_once()
+        server.fetch.assert_not_called()
+        assert count == 0
+        assert msgids == set()
+
+    @patch("banktransactions.core.imap_client.construct_transaction_data")
+    @patch("banktransactions.core.imap_client.extract_transaction_details_batch")
+    @patch("banktransactions.core.imap_client.RealIMAPClient")
+    def test_get_bank_emails_targeted_uids_skip_search(
+        self, mock_imap_class, mock_extract, mock_construct
+    ):
+        from banktransactions.core.imap_client import get_bank_emails
+
+        server = MagicMock()
+        mock_imap_class.return_value.__enter__.return_value = server
+        messages = {
+            42: {
+                b"X-GM-MSGID": 111,
+                b"BODY.PEEK[]": b"Subject: a\r\n\r\nRs 100 debited",
+                b"ENVELOPE": _make_envelope("alerts@axisbank.com"),
+            }
+        }
+        _serve_fetch(server, messages)
+        mock_extract.return_value = {"111": {"amount": "100"}}
+        mock_construct.return_value = {"amount": "100"}
+        submitter = _accepting_submitter()
+
+        msgids, count = get_bank_emails(
+            "user@gmail.com",
+            "password",
+            bank_email_list=["alerts@axisbank.com"],
+            transaction_submitter=submitter,
+            message_uids=[42],
+        )
+
+        server.search.assert_not_called()
+        server.fetch.assert_called_once_with(
+            [42], ["X-GM-MSGID", "BODY.PEEK[]", "ENVELOPE"]
+        )
+        assert count == 1
+        assert msgids == {"111"}
+
+    @patch("banktransactions.core.imap_client.construct_transaction_data")
+    @patch("banktransactions.core.imap_client.extract_transaction_details_batch")
+    @patch("banktransactions.core.imap_client.RealIMAPClient")
+    def test_get_bank_emails_checks_only_fetched_candidates(
+        self, mock_imap_class, mock_extract, mock_construct
+    ):
+        from banktransactions.core.imap_client import get_bank_emails
+
+        server = MagicMock()
+        mock_imap_class.return_value.__enter__.return_value = server
+        server.search.return_value = [1, 2]
+        messages = {
+            seq: {
+                b"X-GM-MSGID": seq * 111,
+                b"BODY.PEEK[]": f"Subject: s\r\n\r\nRs {seq}00 debited".encode(),
+                b"ENVELOPE": _make_envelope("alerts@axisbank.com"),
+            }
+            for seq in [1, 2]
+        }
+        _serve_fetch(server, messages)
+        mock_extract.return_value = {"222": {"amount": "200"}}
+        mock_construct.return_value = {"amount": "200"}
+        submitter = _accepting_submitter()
+        lookups = []
+
+        def lookup(candidate_ids):
+            lookups.append(sorted(candidate_ids))
+            return {"111"}
+
+        msgids, count = get_bank_emails(
+            "user@gmail.com",
+            "password",
+            bank_email_list=["alerts@axisbank.com"],
+            transaction_submitter=submitter,
+            processed_id_lookup=lookup,
+        )
+
+        assert lookups == [["111", "222"]]
+        assert server.fetch.call_args_list == [
+            call([1, 2], ["X-GM-MSGID"]),
+            call([2], ["X-GM-MSGID", "BODY.PEEK[]", "ENVELOPE"]),
+        ]
+        mock_extract.assert_called_once_with(
+            {"222": "Rs 200 debited"},
+            senders={"222": "alerts@axisbank.com"},
+            user_id=None,
+        )
+        assert count == 1
+        assert msgids == {"111", "222"}
+
+    @patch("banktransactions.core.imap_client.extract_transaction_details_batch")
+    @patch("banktransactions.core.imap_client.RealIMAPClient")
+    def test_get_bank_emails_failed_lookup_aborts(self, mock_imap_class, mock_extract):
+        from banktransactions.core.imap_client import get_bank_emails
+
+        server = MagicMock()
+        mock_imap_class.return_value.__enter__.return_value = server
+        server.search.return_value = [1]
+        messages = {
+            1: {
+                b"X-GM-MSGID": 111,
+                b"BODY.PEEK[]": b"Subject: a\r\n\r\nRs 100 debited",
+                b"ENVELOPE": _make_envelope("alerts@axisbank.com"),
+            }
+        }
+        _serve_fetch(server, messages)
+        submitter = _accepting_submitter()
+
+        msgids, count = get_bank_emails(
+            "user@gmail.com",
+            "password",
+            bank_email_list=["alerts@axisbank.com"],
+            transaction_submitter=submitter,
+            processed_id_lookup=lambda candidate_ids: None,
+        )
+
+        assert count == 0
+        assert msgids == set()
+        server.fetch.assert_called_once_with([1], ["X-GM-MSGID"])
+        mock_extract.assert_not_called()
+        submitter.send_batch.assert_not_called()
+
+    @patch("banktransactions.core.imap_client.MappingSnapshot")
+    @patch("banktransactions.core.imap_client.construct_transaction_data")
+    @patch("banktransactions.core.imap_client.extract_transaction_details_batch")
+    @patch("banktransactions.core.imap_client.RealIMAPClient")
+    def test_get_bank_emails_reports_progress(
+        self, mock_imap_class, mock_extract, mock_construct, mock_snapshot
+    ):
+        from banktransactions.core.imap_client import get_bank_emails
+
+        server = MagicMock()
+        mock_imap_class.return_value.__enter__.return_value = server
+        server.search.return_value = [1, 2, 3, 4, 5]
+        messages = {
+            seq: {
+                b"X-GM-MSGID": seq * 111,
+                b"BODY.PEEK[]": f"Subject: s\r\n\r\nRs {seq}00 debited".encode(),
+                b"ENVELOPE": _make_envelope("alerts@axisbank.com"),
+            }
+            for seq in [1, 2, 3, 4, 5]
+        }
+        _serve_fetch(server, messages)
+        # No envelope, so it cannot be parsed
+        del messages[4][b"ENVELOPE"]
+        mock_extract.return_value = {"222": {"amount": "200"}, "555": {"amount": "5"}}
+        mock_construct.side_effect = lambda details, mappings: details
+        submitter = MagicMock(batch_size=20)
+        submitter.send_batch.return_value = {"gmail-222": True}
+        reports = []
+
+        _, count = get_bank_emails(
+            "user@gmail.com",
+            "password",
+            bank_email_list=["alerts@axisbank.com"],
+            processed_gmail_msgids={"111"},
+            transaction_submitter=submitter,
+            progress_callback=lambda stage, **counts: reports.append((stage, counts)),
+        )
+
+        assert count == 1
+        assert [stage for stage, _ in reports] == [
+            "searching",
+            "fetching",
+            "parsing",
+            "extracting",
+            "posting",
+            "posting",
+        ]
+        assert reports[1][1] == {"found": 5}
+        assert reports[3][1] == {"already_processed": 1, "skipped": 1}
+        assert reports[4][1] == {"extracted": 2, "no_transaction": 1, "failed": 0}
+        assert reports[5][1] == {"posted": 1, "failed": 1}
+
+    def test_get_unread_emails_skips_bodies_of_processed_messages(self):
+        from banktransactions.core.imap_client import CustomIMAPClient
+
+        server = MagicMock()
+        server.search.return_value = [1, 2]
+        messages = {
+            seq: {
+                b"X-GM-MSGID": seq * 111,
+                b"BODY.PEEK[]": f"Subject: s\r\n\r\nRs {seq}00 debited".encode(),
+                b"ENVELOPE": _make_envelope("alerts@axisbank.com"),
+            }
+            for seq in [1, 2]
+        }
+        _serve_fetch(server, messages)
+        client = CustomIMAPClient()
+        client._client = server
+
+        emails = client.get_unread_emails(
+            processed_id_lookup=lambda candidate_ids: {"111"}
+        )
+
+        assert [message["id"] for message in emails] == ["222"]
+        assert server.fetch.call_args_list == [
+            call([1, 2], ["X-GM-MSGID"]),
+            call([2], ["X-GM-MSGID", "BODY.PEEK[]", "ENVELOPE"]),
+        ]
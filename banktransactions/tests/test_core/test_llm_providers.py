@@ -0,0 +1,105 @@
+from unittest.mock import MagicMock, patch
+
+from banktransactions.core.llm_providers import (
+    REDIS_GENERATION_KEY,
+    LLMProviderRegistry,
+)
+
+
+def _registry(redis_conn=None):
+    registry = LLMProviderRegistry(redis_conn=redis_conn)
+    key_loader = MagicMock(return_value="key-1")
+    client_factory = MagicMock(side_effect=lambda api_key: MagicMock(api_key=api_key))
+    registry.register("gemini", key_loader, client_factory)
+    return registry, key_loader, client_factory
+
+
+class TestLLMProviderRegistry:
+    """Test caching of provider keys and clients"""
+
+    def test_key_and_client_are_loaded_once(self):
+        registry, key_loader, client_factory = _registry()
+
+        first = registry.get_client("gemini")
+        for _ in range(5):
+            assert registry.get_client("gemini") is first
+
+        key_loader.assert_called_once()
+        client_factory.assert_called_once_with("key-1")
+
+    def test_missing_key_returns_no_client(self):
+        registry, key_loader, client_factory = _registry()
+        key_loader.return_value = None
+
+        assert registry.get_client("gemini") is None
+        assert registry.get_api_key("gemini") is None
+        key_loader.assert_called_once()
+        client_factory.assert_not_called()
+
+    def test_new_key_builds_new_client(self):
+        registry, _, client_factory = _registry()
+
+        first = registry.get_client("gemini", "key-1")
+        second = registry.get_client("gemini", "key-2")
+
+        assert first is not second
+        assert client_factory.call_count == 2
+
+    def test_invalidate_config_key_reloads(self):
+        registry, key_loader, _ = _registry()
+        registry.get_client("gemini")
+        key_loader.return_value = "key-2"
+
+        assert registry.invalidate_config_key("GEMINI_API_TOKEN")
+        assert not registry.invalidate_config_key("OTHER_SETTING")
+        assert registry.get_client("gemini").api_key == "key-2"
+
+    def test_key_expires_after_ttl(self):
+        registry, key_loader, _ = _registry()
+        registry.get_api_key("gemini")
+
+        with patch("banktransactions.core.llm_providers.time.monotonic") as now:
+            now.return_value = 10**9
+            registry.get_api_key("gemini")
+
+        assert key_loader.call_count == 2
+
+    def test_invalidation_is_broadcast_through_redis(self):
+        redis_conn = MagicMock()
+        redis_conn.get.return_value = b"1"
+        redis_conn.incr.return_value = 2
+        registry, key_loader, _ = _registry(redis_conn)
+        registry.get_api_key("gemini")
+
+        registry.invalidate("gemini")
+        redis_conn.incr.assert_called_once_with(REDIS_GENERATION_KEY)
+
+        # Another process sees the new generation on its next check
+        other, other_loader, _ = _registry(redis_conn)
+        other.get_api_key("gemini")
+        redis_conn.get.return_value = b"2"
+        other._generation_checked_at = 0.0
+        other.get_api_key("gemini")
+        assert other_loader.call_count == 2
+
+
+class TestGeminiClientReuse:
+    """Test that extraction reuses one Gemini client"""
+
+    @patch("banktransactions.core.email_parser.genai.Client")
+    @patch("banktransactions.core.email_parser.get_gemini_api_key_from_config")
+    def test_single_key_lookup_and_client_for_many_emails(
+        self, mock_config_key, mock_client_class
+    ):
+        from banktransactions.core.email_parser import _extract_with_llm_few_shot
+
+        mock_config_key.return_value = "test-key"
+        mock_client_class.return_value.models.generate_content.return_value = MagicMock(
+            text='{"amount": "10"}'
+        )
+
+        for index in range(3):
+            _extract_with_llm_few_shot(f"INR {index} debited")
+
+        mock_config_key.assert_called_once()
+        mock_client_class.assert_called_once_with(api_key="test-key")
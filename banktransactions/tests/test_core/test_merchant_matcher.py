@@ -0,0 +1,166 @@
+import random
+import time
+
+import pytest
+
+from banktransactions.core.merchant_matcher import MerchantMatcher, merchant_tokens
+from banktransactions.core.transaction_data import (
+    MappingSnapshot,
+    construct_transaction_data,
+)
+
+EXPENSE_MAP = {
+    "AMAZON RETAIL INDIA": ["Expenses:Shopping", "Amazon"],
+    "SWIGGY": ["Expenses:Food", "Food delivery"],
+    "BAKE HOUSE": ["Expenses:Food:Restaurant", "Bakery"],
+    "UBER INDIA SYSTEMS": ["Expenses:Travel", "Cab"],
+    "IRCTC": ["Expenses:Travel:Train", "Train tickets"],
+}
+
+
+class TestMerchantTokens:
+    """Test merchant name normalization"""
+
+    def test_drops_legal_suffixes_and_numbers(self):
+        assert merchant_tokens("Amazon Retail India Pvt. Ltd.") == (
+            "amazon",
+            "retail",
+            "india",
+        )
+        assert merchant_tokens("SWIGGY Food delivery 14:22:10") == (
+            "swiggy",
+            "food",
+            "delivery",
+        )
+
+    def test_keeps_numbers_when_nothing_else_is_left(self):
+        assert merchant_tokens("1234") == ("1234",)
+        assert merchant_tokens("") == ()
+
+
+class TestMerchantMatcher:
+    """Test fuzzy merchant resolution"""
+
+    def test_legal_suffix_is_a_normalized_match(self):
+        match = MerchantMatcher(EXPENSE_MAP).match("AMAZON RETAIL INDIA PVT")
+
+        assert match["account"] == "Expenses:Shopping"
+        assert match["method"] == "normalized"
+        assert match["confidence"] == 0.95
+
+    def test_query_extending_a_mapping_is_a_prefix_match(self):
+        match = MerchantMatcher(EXPENSE_MAP).match("SWIGGY INSTAMART BANGALORE")
+
+        assert match["account"] == "Expenses:Food"
+        assert match["method"] == "prefix"
+        assert 0.6 < match["confidence"] < 0.95
+
+    def test_typo_is_a_trigram_match(self):
+        match = MerchantMatcher(EXPENSE_MAP).match("BAKEHOUSE")
+
+        assert match["account"] == "Expenses:Food:Restaurant"
+        assert match["method"] == "trigram"
+
+    def test_unrelated_merchant_does_not_match(self):
+        matcher = MerchantMatcher(EXPENSE_MAP)
+
+        assert matcher.match("ZOMATO") is None
+        assert matcher.match("") is None
+
+    def test_threshold_is_configurable(self):
+        assert (
+            MerchantMatcher(EXPENSE_MAP, min_confidence=0.99).match(
+                "AMAZON RETAIL INDIA PVT"
+            )
+            is None
+        )
+
+    def test_learned_categorizations(self):
+        matcher = MerchantMatcher(EXPENSE_MAP)
+        history = [
+            ("ZOMATO Dinner 21:10:00", "Expenses:Food"),
+            ("ZOMATO Dinner 20:45:12", "Expenses:Food"),
+            ("ZOMATO Dinner 13:02:40", "Expenses:Entertainment"),
+            ("BIGBASKET 09:00:00", "Expenses:Groceries"),
+        ]
+
+        learned = matcher.learn_from_history(
+            history, ignore_accounts=["Expenses:Groceries"]
+        )
+        match = matcher.match("ZOMATO DINNER")
+
+        assert learned == 1
+        assert match["account"] == "Expenses:Food"
+        assert match["method"] == "learned-normalized"
+        assert match["confidence"] < 0.95
+        assert matcher.match("BIGBASKET") is None
+
+    def test_explicit_mapping_beats_learned(self):
+        matcher = MerchantMatcher(EXPENSE_MAP)
+        matcher.learn_from_history([("IRCTC", "Expenses:Misc")] * 3)
+
+        assert matcher.match("IRCTC LTD")["account"] == "Expenses:Travel:Train"
+
+    @pytest.mark.slow
+    def test_lookup_is_sub_millisecond(self):
+        rng = random.Random(7)
+        words = [
+            "".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(4, 9)))
+            for _ in range(2000)
+        ]
+        expense_map = {
+            " ".join(rng.sample(words, 3)).upper(): [f"Expenses:Cat{i % 40}", ""]
+            for i in range(5000)
+        }
+        matcher = MerchantMatcher(expense_map)
+        names = list(expense_map)[:300]
+        # Suffix variants, extended names and single-character typos
+        queries = (
+            [name + " PVT LTD" for name in names]
+            + [name + " BANGALORE" for name in names]
+            + [name[:-1] for name in names]
+        )
+
+        start = time.perf_counter()
+        for query in queries:
+            assert matcher.match(query) is not None
+        per_lookup = (time.perf_counter() - start) / len(queries)
+
+        assert per_lookup < 0.001
+
+
+class TestSnapshotMerchantMatching:
+    """Test fuzzy matching through construct_transaction_data"""
+
+    def test_fuzzy_match_replaces_default_account(self):
+        mappings = MappingSnapshot({}, EXPENSE_MAP)
+
+        result = construct_transaction_data(
+            {
+                "amount": 99,
+                "date": "2025-05-18",
+                "recipient": "AMAZON RETAIL INDIA PVT",
+            },
+            mappings=mappings,
+        )
+
+        assert result["to_account"] == "Expenses:Shopping"
+        assert result["recipient_name"] == "AMAZON RETAIL INDIA PVT Amazon"
+        assert result["expense_match_confidence"] == 0.95
+
+    def test_exact_match_has_full_confidence(self):
+        result = construct_transaction_data(
+            {"amount": 99, "date": "2025-05-18", "recipient": "SWIGGY"},
+            mappings=MappingSnapshot({}, EXPENSE_MAP),
+        )
+
+        assert result["expense_match_confidence"] == 1.0
+
+    def test_no_match_reports_zero_confidence(self):
+        result = construct_transaction_data(
+            {"amount": 99, "date": "2025-05-18", "recipient": "ZOMATO"},
+            mappings=MappingSnapshot({}, EXPENSE_MAP),
+        )
+
+        assert result["to_account"] == "Expenses:Groceries"
+        assert result["expense_match_confidence"] == 0.0
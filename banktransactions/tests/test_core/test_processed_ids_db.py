@@ -0,0 +1,138 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from banktransactions.core import processed_ids_db
+from banktransactions.core.processed_ids_db import ProcessedIdBuffer, database_context
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+# Module body budget for `import banktransactions.core.processed_ids_db`;
+# building the Flask app at import time alone took well over a second
+IMPORT_SELF_TIME_BUDGET_US = 250_000
+
+
+@patch("banktransactions.core.processed_ids_db.db_insert_processed_gmail_msgids")
+class TestProcessedIdBuffer:
+    """Test batched saving of processed Gmail message IDs"""
+
+    def test_ids_are_saved_in_one_batch_at_flush(self, mock_insert):
+        db_session = MagicMock()
+        mock_insert.return_value = 3
+        buffer = ProcessedIdBuffer(7, db_session=db_session)
+
+        for msgid in ["111", "222", "333"]:
+            assert buffer.add(msgid)
+        mock_insert.assert_not_called()
+
+        assert buffer.flush()
+        mock_insert.assert_called_once_with(7, ["111", "222", "333"], db_session)
+        assert buffer.pending == 0
+        assert buffer.saved_count == 3
+
+    def test_full_buffer_flushes_itself(self, mock_insert):
+        mock_insert.side_effect = lambda user_id, batch, session: len(batch)
+        buffer = ProcessedIdBuffer(7, db_session=MagicMock(), batch_size=2)
+
+        for msgid in ["1", "2", "3", "4", "5"]:
+            buffer.add(msgid)
+
+        assert [call.args[1] for call in mock_insert.call_args_list] == [
+            ["1", "2"],
+            ["3", "4"],
+        ]
+        assert buffer.pending == 1
+
+    def test_failed_flush_keeps_ids_for_next_checkpoint(self, mock_insert):
+        mock_insert.side_effect = [None, 2]
+        buffer = ProcessedIdBuffer(7, db_session=MagicMock())
+        buffer.add("111")
+        buffer.add("222")
+
+        assert not buffer.flush()
+        assert buffer.pending == 2
+        assert buffer.flush()
+        assert mock_insert.call_args.args[1] == ["111", "222"]
+        assert buffer.pending == 0
+
+    def test_empty_flush_does_not_touch_database(self, mock_insert):
+        assert ProcessedIdBuffer(7, db_session=MagicMock()).flush()
+        mock_insert.assert_not_called()
+
+
+class TestDatabaseContext:
+    """Test how processed ID operations reach the database"""
+
+    def test_given_session_is_used_as_is(self):
+        db_session = MagicMock()
+
+        with database_context(db_session) as session:
+            assert session is db_session
+
+    @patch("banktransactions.core.processed_ids_db.get_app")
+    @patch("banktransactions.core.processed_ids_db.DatabaseManager")
+    def test_database_url_uses_standalone_session(
+        self, mock_manager, mock_get_app, monkeypatch
+    ):
+        monkeypatch.setenv("DATABASE_URL", "sqlite:///:memory:")
+        standalone = mock_manager.session_scope.return_value.__enter__.return_value
+
+        with database_context() as session:
+            assert session is standalone
+
+        mock_get_app.assert_not_called()
+
+    @patch("banktransactions.core.processed_ids_db.get_app")
+    def test_flask_app_is_the_last_resort(self, mock_get_app, monkeypatch):
+        monkeypatch.delenv("DATABASE_URL", raising=False)
+
+        with database_context() as session:
+            assert session is None
+
+        mock_get_app.return_value.app_context.assert_called_once()
+
+    def test_app_is_created_once_and_reused(self, monkeypatch):
+        monkeypatch.setattr(processed_ids_db, "_app", None)
+        with patch("app.create_app") as mock_create_app:
+            first = processed_ids_db.get_app()
+            second = processed_ids_db.get_app()
+
+        mock_create_app.assert_called_once()
+        assert first is second is mock_create_app.return_value
+
+
+def test_import_does_not_build_flask_app():
+    """Guard worker and scheduler cold start with python -X importtime"""
+    env = dict(os.environ)
+    env.pop("DATABASE_URL", None)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(PROJECT_ROOT), str(PROJECT_ROOT / "backend")]
+    )
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "import banktransactions.core.processed_ids_db as m; "
+            "print('app created:', m._app is not None)",
+        ],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert "app created: False" in result.stdout
+    self_times = [
+        int(line.split("|")[0].split(":")[1])
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:")
+        and line.rstrip().endswith(" banktransactions.core.processed_ids_db")
+    ]
+    assert self_times, "processed_ids_db missing from -X importtime output"
+    assert self_times[0] < IMPORT_SELF_TIME_BUDGET_US
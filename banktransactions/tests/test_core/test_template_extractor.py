@@ -0,0 +1,381 @@
+import json
+import random
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from banktransactions.core.email_parser import extract_transaction_details_batch
+from banktransactions.core.template_extractor import (
+    REDIS_TEMPLATES_PREFIX,
+    REDIS_UNLEARNABLE_PREFIX,
+    ExtractionTemplate,
+    TemplateExtractor,
+)
+
+USER_ID = 1
+AXIS_SENDER = "alerts@axisbank.com"
+AXIS_BODY = (
+    "Dear Customer, INR 1,234.50 was debited from your A/c no. XX2804 "
+    "on 05-03-2025 at 14:22:10 towards SWIGGY BANGALORE. Available balance INR 45,210.00"
+)
+AXIS_EXTRACTION = {
+    "amount": "1234.50",
+    "date": "05-03-2025",
+    "transaction_time": "14:22:10",
+    "account_number": "XX2804",
+    "recipient": "SWIGGY BANGALORE",
+}
+
+# HDFC writes the last digits of the account, which the LLM normalizes
+HDFC_SENDER = "alerts@hdfcbank.net"
+HDFC_ENDING_BODY = (
+    "Dear Customer, Rs.500.00 has been debited from account ending 1234 "
+    "to VPA swiggy@icici on 05-03-2025. Your UPI transaction reference number is 9876."
+)
+HDFC_ENDING_EXTRACTION = {
+    "amount": "500.00",
+    "date": "05-03-2025",
+    "transaction_time": "Unknown",
+    "account_number": "XX1234",
+    "recipient": "swiggy@icici",
+}
+
+# Synthetic alert layouts for the accuracy and throughput benchmark
+BANK_LAYOUTS = {
+    "alerts@hdfcbank.net": (
+        "Dear Customer, Rs.{amount} has been debited from account **{account} "
+        "to VPA {recipient} on {date}. Your UPI transaction reference number is {ref}."
+    ),
+    "cbssbi.cas@alerts.sbi.co.in": (
+        "Dear Customer, Your a/c no. {account} is debited for Rs.{amount} on {date} "
+        "at {time} and credited to {recipient} (UPI Ref no {ref})."
+    ),
+    "credit_cards@icicibank.com": (
+        "Dear Customer, Your ICICI Bank Credit Card {account} has been used for a "
+        "transaction of INR {amount} on {date} at {time}. Info: {recipient}. "
+        "The Available Credit Limit on your card is INR {ref}.00"
+    ),
+    AXIS_SENDER: (
+        "Dear Customer, INR {amount} was debited from your A/c no. {account} "
+        "on {date} at {time} towards {recipient}. Available balance INR {ref}.00"
+    ),
+}
+MERCHANTS = [
+    "SWIGGY BANGALORE",
+    "AMAZON PAY",
+    "zomato@hdfcbank",
+    "BIGBASKET",
+    "UBER INDIA",
+    "IRCTC WEB",
+    "paytm-4412@ptys",
+]
+
+
+def _empty_redis():
+    redis_conn = MagicMock()
+    redis_conn.hget.return_value = None
+    redis_conn.sismember.return_value = False
+    return redis_conn
+
+
+def _render(layout, rng):
+    amount = f"{rng.randint(1, 250000):,}.{rng.randint(0, 99):02d}"
+    values = {
+        "amount": amount,
+        "account": f"XX{rng.randint(1000, 9999)}",
+        "recipient": rng.choice(MERCHANTS),
+        "date": f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-2025",
+        "time": f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}",
+        "ref": str(rng.randint(100000, 999999999)),
+    }
+    body = layout.format(**values)
+    expected = {
+        "amount": amount,
+        "date": values["date"],
+        "account_number": values["account"],
+        "recipient": values["recipient"],
+    }
+    if "{time}" in layout:
+        expected["transaction_time"] = values["time"]
+    return body, expected
+
+
+def _corpus(size, seed=42):
+    rng = random.Random(seed)
+    senders = list(BANK_LAYOUTS)
+    corpus = []
+    for index in range(size):
+        sender = senders[index % len(senders)]
+        body, expected = _render(BANK_LAYOUTS[sender], rng)
+        corpus.append((sender, body, expected))
+    return corpus
+
+
+class TestExtractionTemplate:
+    """Test learning and applying a single template"""
+
+    def test_learned_template_reproduces_values(self):
+        template = ExtractionTemplate.learn(AXIS_BODY, AXIS_EXTRACTION)
+
+        assert template is not None
+        details, confidence = template.match(AXIS_BODY)
+        assert confidence == 1.0
+        assert details["amount"] == "1,234.50"
+        assert details["recipient"] == "SWIGGY BANGALORE"
+        assert details["transaction_time"] == "14:22:10"
+
+    def test_template_generalizes_to_new_values(self):
+        template = ExtractionTemplate.learn(AXIS_BODY, AXIS_EXTRACTION)
+        new_body = (
+            "Dear Customer, INR 99.00 was debited from your A/c no. XX2804 "
+            "on 17-11-2025 at 09:05:33 towards AMAZON PAY. Available balance INR 1,010.00"
+        )
+
+        details, confidence = template.match(new_body)
+
+        assert confidence == 1.0
+        assert details["amount"] == "99.00"
+        assert details["date"] == "17-11-2025"
+        assert details["recipient"] == "AMAZON PAY"
+
+    def test_requires_amount_and_date(self):
+        extraction = dict(AXIS_EXTRACTION, date="Unknown")
+        assert ExtractionTemplate.learn(AXIS_BODY, extraction) is None
+
+    def test_values_not_in_body_are_rejected(self):
+        extraction = dict(AXIS_EXTRACTION, amount="777.00", date="01-01-2020")
+        assert ExtractionTemplate.learn(AXIS_BODY, extraction) is None
+
+    def test_normalized_values_are_not_learned(self):
+        # A template without the account would post every later alert from
+        # the sender to the default account
+        assert (
+            ExtractionTemplate.learn(HDFC_ENDING_BODY, HDFC_ENDING_EXTRACTION) is None
+        )
+
+    def test_overlapping_values_are_not_learned(self):
+        extraction = dict(AXIS_EXTRACTION, recipient="SWIGGY BANGALORE. Available")
+        extraction["account_number"] = "XX2804 on 05-03-2025"
+        assert ExtractionTemplate.learn(AXIS_BODY, extraction) is None
+
+    def test_template_below_min_confidence_is_not_learned(self):
+        # ISO dates are captured but do not validate, so the template could
+        # never be used
+        body = AXIS_BODY.replace("05-03-2025", "2025-03-05")
+        extraction = dict(AXIS_EXTRACTION, date="2025-03-05")
+
+        assert ExtractionTemplate.learn(body, extraction) is None
+        assert ExtractionTemplate.learn(body, extraction, min_confidence=0.5)
+
+    def test_serialization_round_trip(self):
+        template = ExtractionTemplate.learn(AXIS_BODY, AXIS_EXTRACTION)
+        restored = ExtractionTemplate.from_dict(
+            json.loads(json.dumps(template.to_dict()))
+        )
+        assert restored.match(AXIS_BODY) == template.match(AXIS_BODY)
+
+
+class TestTemplateExtractor:
+    """Test the user and sender keyed template registry"""
+
+    def test_miss_then_hit_after_learning(self):
+        extractor = TemplateExtractor()
+
+        assert extractor.extract(USER_ID, AXIS_SENDER, AXIS_BODY) is None
+        assert extractor.learn(USER_ID, AXIS_SENDER, AXIS_BODY, AXIS_EXTRACTION)
+        assert extractor.extract(USER_ID, "Alerts@AxisBank.com", AXIS_BODY) is not None
+        assert extractor.stats == {"hits": 1, "misses": 1, "learned": 1}
+
+    def test_templates_are_per_sender(self):
+        extractor = TemplateExtractor()
+        extractor.learn(USER_ID, AXIS_SENDER, AXIS_BODY, AXIS_EXTRACTION)
+
+        assert extractor.extract(USER_ID, "alerts@hdfcbank.net", AXIS_BODY) is None
+        assert extractor.extract(USER_ID, None, AXIS_BODY) is None
+
+    def test_templates_are_per_user(self):
+        extractor = TemplateExtractor()
+        extractor.learn(USER_ID, AXIS_SENDER, AXIS_BODY, AXIS_EXTRACTION)
+
+        assert extractor.extract(2, AXIS_SENDER, AXIS_BODY) is None
+        assert extractor.extract(None, AXIS_SENDER, AXIS_BODY) is None
+        assert not extractor.learn(None, AXIS_SENDER, AXIS_BODY, AXIS_EXTRACTION)
+
+    def test_does_not_learn_duplicate_template(self):
+        extractor = TemplateExtractor()
+        assert extractor.learn(USER_ID, AXIS_SENDER, AXIS_BODY, AXIS_EXTRACTION)
+        assert not extractor.learn(USER_ID, AXIS_SENDER, AXIS_BODY, AXIS_EXTRACTION)
+
+    def test_low_confidence_match_is_a_miss(self):
+        extractor = TemplateExtractor()
+        extractor.learn(USER_ID, AXIS_SENDER, AXIS_BODY, AXIS_EXTRACTION)
+        invalid_date_body = AXIS_BODY.replace("05-03-2025", "99-99-9999")
+
+        assert extractor.extract(USER_ID, AXIS_SENDER, invalid_date_body) is None
+
+    def test_templates_persist_to_redis(self):
+        redis_conn = MagicMock()
+        redis_conn.hget.return_value = None
+        extractor = TemplateExtractor(redis_conn=redis_conn)
+        extractor.learn(USER_ID, AXIS_SENDER, AXIS_BODY, AXIS_EXTRACTION)
+
+        key, sender, payload = redis_conn.hset.call_args[0]
+        assert key == f"{REDIS_TEMPLATES_PREFIX}{USER_ID}"
+        assert sender == AXIS_SENDER
+
+        # A fresh extractor (another worker) loads the user's stored templates
+        other_conn = MagicMock()
+        other_conn.hget.return_value = payload
+        other = TemplateExtractor(redis_conn=other_conn)
+        assert other.extract(USER_ID, AXIS_SENDER, AXIS_BODY) is not None
+        other_conn.hget.assert_called_once_with(
+            f"{REDIS_TEMPLATES_PREFIX}{USER_ID}", AXIS_SENDER
+        )
+
+    def test_redis_errors_fall_back_to_memory(self):
+        redis_conn = MagicMock()
+        redis_conn.hget.side_effect = Exception("connection refused")
+        redis_conn.hset.side_effect = Exception("connection refused")
+        extractor = TemplateExtractor(redis_conn=redis_conn)
+
+        assert extractor.learn(USER_ID, AXIS_SENDER, AXIS_BODY, AXIS_EXTRACTION)
+        assert extractor.extract(USER_ID, AXIS_SENDER, AXIS_BODY) is not None
+
+    @patch("banktransactions.core.email_parser._extract_with_llm_cached")
+    def test_learn_from_labelled_samples(self, mock_llm):
+        extractor = TemplateExtractor()
+        samples = [
+            {"from": AXIS_SENDER, "body": AXIS_BODY, "extraction": AXIS_EXTRACTION},
+            {"from": "alerts@hdfcbank.net"},
+            42,
+        ]
+
+        assert extractor.learn_from_samples(USER_ID, samples, [AXIS_SENDER]) == 1
+        assert extractor.extract(USER_ID, AXIS_SENDER, AXIS_BODY) is not None
+        mock_llm.assert_not_called()
+
+    @patch("banktransactions.core.email_parser._extract_with_llm_cached")
+    def test_string_samples_are_labelled_once_with_the_llm(self, mock_llm):
+        mock_llm.return_value = dict(AXIS_EXTRACTION)
+        extractor = TemplateExtractor(redis_conn=_empty_redis())
+        senders = [AXIS_SENDER, "alerts@hdfcbank.net"]
+
+        assert extractor.learn_from_samples(USER_ID, [AXIS_BODY], senders) == 2
+        assert extractor.extract(USER_ID, AXIS_SENDER, AXIS_BODY) is not None
+        assert mock_llm.call_count == 1
+
+        # Later runs find the sample already handled and skip the LLM
+        assert extractor.learn_from_samples(USER_ID, [AXIS_BODY], senders) == 0
+        assert mock_llm.call_count == 1
+
+    @patch("banktransactions.core.email_parser._extract_with_llm_cached")
+    def test_unlearnable_samples_are_not_labelled_again(self, mock_llm):
+        mock_llm.return_value = dict(HDFC_ENDING_EXTRACTION)
+        redis_conn = _empty_redis()
+        extractor = TemplateExtractor(redis_conn=redis_conn)
+        samples = [HDFC_ENDING_BODY]
+
+        assert extractor.learn_from_samples(USER_ID, samples, [HDFC_SENDER]) == 0
+        assert extractor.learn_from_samples(USER_ID, samples, [HDFC_SENDER]) == 0
+        assert mock_llm.call_count == 1
+        pipe = redis_conn.pipeline.return_value
+        key, sample_key = pipe.sadd.call_args[0]
+        assert key == f"{REDIS_UNLEARNABLE_PREFIX}{USER_ID}"
+
+        # Another worker finds the failure in Redis
+        other_conn = _empty_redis()
+        other_conn.sismember.return_value = True
+        other = TemplateExtractor(redis_conn=other_conn)
+        assert other.learn_from_samples(USER_ID, samples, [HDFC_SENDER]) == 0
+        assert mock_llm.call_count == 1
+        other_conn.sismember.assert_called_once_with(key, sample_key)
+
+    @patch("banktransactions.core.email_parser._extract_with_llm_cached")
+    def test_samples_are_not_labelled_without_redis(self, mock_llm):
+        extractor = TemplateExtractor()
+        samples = [
+            AXIS_BODY,
+            {"from": AXIS_SENDER, "body": AXIS_BODY.replace("XX2804", "XX1111")},
+        ]
+
+        assert extractor.learn_from_samples(USER_ID, samples, [AXIS_SENDER]) == 0
+        mock_llm.assert_not_called()
+
+    @patch("banktransactions.core.email_parser._extract_with_llm_cached")
+    def test_samples_without_a_user_are_ignored(self, mock_llm):
+        extractor = TemplateExtractor(redis_conn=_empty_redis())
+
+        assert extractor.learn_from_samples(None, [AXIS_BODY], [AXIS_SENDER]) == 0
+        mock_llm.assert_not_called()
+
+
+class TestTemplateFastPath:
+    """Test that template hits skip the LLM in batch extraction"""
+
+    @patch("banktransactions.core.email_parser._extract_with_llm_few_shot")
+    @patch("banktransactions.core.email_parser._get_gemini_api_key")
+    def test_llm_results_are_learned_and_reused(self, mock_api_key, mock_few_shot):
+        mock_api_key.return_value = None
+        mock_few_shot.return_value = dict(AXIS_EXTRACTION, currency="INR")
+        senders = {"1": AXIS_SENDER}
+
+        first = extract_transaction_details_batch(
+            {"1": AXIS_BODY}, senders=senders, user_id=USER_ID
+        )
+        second = extract_transaction_details_batch(
+            {"1": AXIS_BODY}, senders=senders, user_id=USER_ID
+        )
+
+        assert mock_few_shot.call_count == 1
+        assert first["1"]["amount"] == second["1"]["amount"] == "1234.50"
+        assert second["1"]["date"] == "05-03-2025"
+        assert second["1"]["recipient"] == "SWIGGY BANGALORE"
+
+    def test_template_accuracy_on_synthetic_corpus(self):
+        extractor = TemplateExtractor()
+        # One labelled sample per layout, as a user would configure
+        for sender, body, expected in _corpus(len(BANK_LAYOUTS), seed=1):
+            assert extractor.learn(USER_ID, sender, body, expected)
+
+        corpus = _corpus(400)
+        correct = 0
+        for sender, body, expected in corpus:
+            details = extractor.extract(USER_ID, sender, body)
+            if details and all(
+                details[field].replace(",", "") == value.replace(",", "")
+                for field, value in expected.items()
+            ):
+                correct += 1
+
+        assert correct / len(corpus) >= 0.95
+
+    def test_normalized_layout_is_left_to_the_llm(self):
+        extractor = TemplateExtractor()
+        rng = random.Random(3)
+        for _ in range(5):
+            last4 = str(rng.randint(1000, 9999))
+            amount = f"{rng.randint(1, 9999)}.{rng.randint(0, 99):02d}"
+            body = HDFC_ENDING_BODY.replace("1234", last4).replace("500.00", amount)
+            extraction = dict(
+                HDFC_ENDING_EXTRACTION, amount=amount, account_number=f"XX{last4}"
+            )
+
+            assert not extractor.learn(USER_ID, HDFC_SENDER, body, extraction)
+            assert extractor.extract(USER_ID, HDFC_SENDER, body) is None
+
+    @pytest.mark.slow
+    def test_template_throughput(self):
+        extractor = TemplateExtractor()
+        for sender, body, expected in _corpus(len(BANK_LAYOUTS), seed=1):
+            extractor.learn(USER_ID, sender, body, expected)
+        corpus = _corpus(2000)
+
+        start = time.perf_counter()
+        for sender, body, _ in corpus:
+            extractor.extract(USER_ID, sender, body)
+        per_email = (time.perf_counter() - start) / len(corpus)
+
+        print(f"Template extraction: {per_email * 1e6:.1f} us per email")
+        # A generous bound that still sits far below a single LLM round trip
+        assert per_email < 0.01
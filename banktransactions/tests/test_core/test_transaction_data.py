@@ -9,12 +9,17 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 try:
     from banktransactions.core.transaction_data import (
+        MappingSnapshot,
         construct_transaction_data,
         get_mappings_from_api,
     )
 except ImportError:
     # Fallback to relative import if running from within the directory
-    from transaction_data import construct_transaction_data, get_mappings_from_api
+    from transaction_data import (
+        MappingSnapshot,
+        construct_transaction_data,
+        get_mappings_from_api,
+    )
 
 
 class TestGetMappingsFromApi:
@@ -416,3 +421,60 @@ class TestConstructTransactionData:
 
         for field in required_fields:
             assert field in result, f"Missing required field: {field}"
+
+
+class TestMappingSnapshot:
+    """Test cases for the job-scoped mapping snapshot."""
+
+    @patch("banktransactions.core.transaction_data.get_mappings_from_api")
+    def test_snapshot_shared_across_transactions(self, mock_get_mappings):
+        """Test that one snapshot serves many transactions with one API call."""
+        mock_get_mappings.return_value = {
+            "bank-account-map": {"XX1648": "Assets:Bank:Axis"},
+            "expense-account-map": {"SWIGGY": ["Expenses:Food", "Dinner"]},
+        }
+
+        mappings = MappingSnapshot.load()
+        results = [
+            construct_transaction_data(
+                {
+                    "amount": amount,
+                    "date": "2025-05-18",
+                    "account_number": "XX1648",
+                    "recipient": "SWIGGY",
+                },
+                mappings=mappings,
+            )
+            for amount in range(200)
+        ]
+
+        mock_get_mappings.assert_called_once()
+        assert all(result["to_account"] == "Expenses:Food" for result in results)
+        assert all(result["from_account"] == "Assets:Bank:Axis" for result in results)
+
+    def test_lookup_ignores_case_and_whitespace(self):
+        """Test that the normalized index matches differently formatted keys."""
+        mappings = MappingSnapshot(
+            {"XX1648": "Assets:Bank:Axis"},
+            {"Swiggy  Bangalore": ["Expenses:Food", "Dinner"]},
+        )
+
+        assert mappings.get_bank_account("xx1648") == "Assets:Bank:Axis"
+        assert mappings.get_expense_account(" SWIGGY BANGALORE ") == [
+            "Expenses:Food",
+            "Dinner",
+        ]
+        assert mappings.get_expense_account("ZOMATO", "default") == "default"
+
+    @patch("banktransactions.core.transaction_data.get_mappings_from_api")
+    def test_load_failure_gives_empty_snapshot(self, mock_get_mappings):
+        """Test that a failed export falls back to default accounts."""
+        mock_get_mappings.return_value = None
+
+        result = construct_transaction_data(
+            {"amount": 1, "date": "2025-05-18", "recipient": "X"},
+            mappings=MappingSnapshot.load(),
+        )
+
+        assert result["from_account"] == "Assets:Bank:Axis"
+        assert result["to_account"] == "Expenses:Groceries"
@@ -40,6 +40,9 @@ import {
 } from '@mui/icons-material';
 import axiosInstance from '../../api/axiosInstance';
 
+// Job statuses after which the backend never changes a job again
+const JOB_FINAL_STATUSES = ['finished', 'failed', 'stopped', 'canceled'];
+
 const EmailAutomation = () => {
   const [config, setConfig] = useState({
     is_enabled: false,
@@ -172,6 +175,53 @@ const EmailAutomation = () => {
     }
   };
 
+  const pollJobStatus = async (statusUrl) => {
+    try {
+      const response = await axiosInstance.get(statusUrl);
+      const job = response.data.job;
+
+      if (job.status === 'finished') {
+        const processed = job.result?.processed_count;
+        setSuccess(
+          processed !== undefined
+            ? `Email processing finished. ${processed} new transactions processed.`
+            : 'Email processing finished.'
+        );
+        fetchStatus();
+      } else if (job.status === 'failed') {
+        setSuccess(null);
+        setError(job.error || 'Email processing failed');
+        fetchStatus();
+      } else if (JOB_FINAL_STATUSES.includes(job.status)) {
+        setSuccess(null);
+        setError(`Email processing job was ${job.status}.`);
+        fetchStatus();
+      } else {
+        let message = `Email processing job ${job.status}.`;
+        if (job.position !== null && job.position !== undefined) {
+          message += ` Position in queue: ${job.position + 1}.`;
+        }
+        if (job.progress?.stage) {
+          message += ` Stage: ${job.progress.stage.replace(/_/g, ' ')}.`;
+        }
+        const counts = job.progress?.counts;
+        if (counts?.found) {
+          message += ` ${counts.found} emails found, ${counts.posted} transactions posted.`;
+        }
+        setSuccess(message);
+        setTimeout(() => pollJobStatus(statusUrl), 2000);
+      }
+    } catch (err) {
+      if (err.response?.status === 404) {
+        // The job expired from Redis; its outcome shows in the status below
+        setSuccess('Email processing job is no longer tracked.');
+      } else {
+        console.error('Failed to fetch job status:', err);
+      }
+      fetchStatus();
+    }
+  };
+
   const handleTriggerProcessing = async () => {
     try {
       setTriggering(true);
@@ -182,8 +232,8 @@ const EmailAutomation = () => {
 
       if (response.data.success) {
         setSuccess(`Email processing job queued successfully. Job ID: ${response.data.job_id}`);
-        // Refresh status after a short delay
-        setTimeout(fetchStatus, 2000);
+        // Follow the job until it finishes
+        setTimeout(() => pollJobStatus(response.data.status_url), 2000);
       } else {
         setError(response.data.error || 'Failed to trigger email processing');
       }
@@ -369,6 +419,8 @@ const EmailAutomation = () => {
               >
                 <MenuItem value="hourly">Hourly</MenuItem>
                 <MenuItem value="daily">Daily</MenuItem>
+                <MenuItem value="adaptive">Adaptive (based on email activity)</MenuItem>
+                <MenuItem value="push">Real-time (IMAP IDLE)</MenuItem>
               </Select>
             </FormControl>
           </Grid>
@@ -124,6 +124,17 @@ class DatabaseManager:
         cls._session_factories.clear()
         logger.info("All database connections closed and caches cleared")
 
+    @classmethod
+    def dispose_inherited_connections(cls):
+        """Drop pooled connections inherited from the parent after a fork.
+
+        The engines are kept; the child opens its own connections on next
+        use and leaves the parent's sockets open for the parent.
+        """
+        for engine in cls._engines.values():
+            engine.dispose(close=False)
+        logger.debug(f"Dropped inherited connections for {len(cls._engines)} engines")
+
 
 # Convenience functions for common usage patterns
 def get_database_session(db_url: Optional[str] = None) -> Session:
@@ -292,6 +292,8 @@ class EmailProcessingService(BaseService):
             config.polling_interval = config_data.get("polling_interval", "hourly")
             config.sample_emails = json.dumps(config_data.get("sample_emails", []))
             config.updated_at = datetime.now(timezone.utc)
+            # Let the scheduler recompute the next run from the new settings
+            config.next_run_at = None
         else:
             # Create new
             config = EmailConfiguration(
@@ -52,6 +52,186 @@ class TransactionService(BaseService):
                 error_code="TRANSACTION_CREATE_FAILED",
             )
 
+    @require_user_context
+    @log_service_call("create_transaction_from_postings")
+    def create_transaction_from_postings(self, payload: Dict) -> ServiceResult:
+        """
+        Create a transaction from a transactions API payload.
+
+        Mirrors POST /api/v1/transactions for in-process callers such as the
+        bank email worker: one record per posting in the user's active book,
+        account balances updated and everything committed together.
+
+        Args:
+            payload (dict): {"date": "YYYY-MM-DD", "payee": str, "postings":
+                [{"account": str, "amount": str, "currency": str}, ...]}
+        """
+        try:
+            from shared.imports import Account, Transaction
+
+            validation_result = self._validate_postings_payload(payload)
+            if not validation_result.success:
+                return validation_result
+
+            book_id = self._get_active_book_id()
+            if book_id is None:
+                return ServiceResult.error_result(
+                    "No active book selected", error_code="NO_ACTIVE_BOOK"
+                )
+
+            transaction_date = datetime.strptime(payload["date"], "%Y-%m-%d").date()
+            account_names = {posting["account"] for posting in payload["postings"]}
+            accounts = {
+                account.name: account
+                for account in self.session.query(Account)
+                .filter(
+                    Account.user_id == self.user_id,
+                    Account.book_id == book_id,
+                    Account.name.in_(account_names),
+                )
+                .all()
+            }
+            missing_accounts = sorted(account_names - set(accounts))
+            if missing_accounts:
+                return ServiceResult.error_result(
+                    f"Account not found in the active book: {', '.join(missing_accounts)}",
+                    error_code="ACCOUNT_NOT_FOUND",
+                )
+
+            with self.transaction_scope():
+                transaction_ids = []
+                for posting in payload["postings"]:
+                    amount = float(posting["amount"])
+                    account = accounts[posting["account"]]
+                    transaction = Transaction(
+                        user_id=self.user_id,
+                        book_id=book_id,
+                        account_id=account.id,
+                        date=transaction_date,
+                        description=payload["payee"],
+                        payee=payload["payee"],
+                        amount=amount,
+                        currency=posting.get("currency", "INR"),
+                        status=payload.get("status"),
+                    )
+                    account.balance = (account.balance or 0.0) + amount
+                    self.session.add(transaction)
+                    self.session.flush()
+                    transaction_ids.append(transaction.id)
+
+            return ServiceResult.success_result(
+                data={"transaction_ids": transaction_ids},
+                metadata={"operation": "created", "book_id": book_id},
+            )
+
+        except Exception as e:
+            self.logger.error(f"Failed to create transaction from postings: {e}")
+            return ServiceResult.error_result(
+                f"Failed to create transaction: {str(e)}",
+                error_code="TRANSACTION_CREATE_FAILED",
+            )
+
+    @require_user_context
+    @log_service_call("get_account_mappings")
+    def get_account_mappings(self, book_id: int = None) -> ServiceResult:
+        """
+        Get bank and expense account mappings for a book.
+
+        Returns the same structure as GET /api/v1/mappings/export, defaulting
+        to the user's active book.
+        """
+        try:
+            from shared.imports import BankAccountMapping, ExpenseAccountMapping
+
+            if book_id is None:
+                book_id = self._get_active_book_id()
+            if book_id is None:
+                return ServiceResult.error_result(
+                    "No active book selected", error_code="NO_ACTIVE_BOOK"
+                )
+
+            bank_mappings = (
+                self.session.query(BankAccountMapping)
+                .filter_by(user_id=self.user_id, book_id=book_id)
+                .all()
+            )
+            expense_mappings = (
+                self.session.query(ExpenseAccountMapping)
+                .filter_by(user_id=self.user_id, book_id=book_id)
+                .all()
+            )
+
+            return ServiceResult.success_result(
+                data={
+                    "bank-account-map": {
+                        mapping.account_identifier: mapping.ledger_account
+                        for mapping in bank_mappings
+                    },
+                    "expense-account-map": {
+                        mapping.merchant_name: [
+                            mapping.ledger_account,
+                            mapping.description or "",
+                        ]
+                        for mapping in expense_mappings
+                    },
+                },
+                metadata={"book_id": book_id},
+            )
+
+        except Exception as e:
+            self.logger.error(f"Failed to get account mappings: {e}")
+            return ServiceResult.error_result(
+                "Failed to retrieve account mappings",
+                error_code="MAPPINGS_RETRIEVAL_FAILED",
+            )
+
+    @require_user_context
+    @log_service_call("get_expense_categorizations")
+    def get_expense_categorizations(
+        self, book_id: int = None, limit: int = 2000
+    ) -> ServiceResult:
+        """
+        Get recent (payee, expense account) pairs for learning merchant matches.
+
+        Only postings into "Expenses:" accounts are included, newest first.
+        """
+        try:
+            from shared.imports import Account, Transaction
+
+            if book_id is None:
+                book_id = self._get_active_book_id()
+            if book_id is None:
+                return ServiceResult.error_result(
+                    "No active book selected", error_code="NO_ACTIVE_BOOK"
+                )
+
+            rows = (
+                self.session.query(Transaction.payee, Account.name)
+                .join(Account, Transaction.account_id == Account.id)
+                .filter(
+                    Transaction.user_id == self.user_id,
+                    Transaction.book_id == book_id,
+                    Transaction.amount > 0,
+                    Transaction.payee.isnot(None),
+                    Account.name.like("Expenses:%"),
+                )
+                .order_by(Transaction.id.desc())
+                .limit(limit)
+                .all()
+            )
+
+            return ServiceResult.success_result(
+                data=[(payee, account_name) for payee, account_name in rows],
+                metadata={"book_id": book_id, "count": len(rows)},
+            )
+
+        except Exception as e:
+            self.logger.error(f"Failed to get expense categorizations: {e}")
+            return ServiceResult.error_result(
+                "Failed to retrieve expense categorizations",
+                error_code="CATEGORIZATIONS_RETRIEVAL_FAILED",
+            )
+
     @require_user_context
     @log_service_call("get_transaction")
     def get_transaction(self, transaction_id: int) -> ServiceResult:
@@ -276,6 +456,74 @@ class TransactionService(BaseService):
 
         return ServiceResult.success_result()
 
+    def _validate_postings_payload(self, payload: Dict) -> ServiceResult:
+        """Validate a transactions API payload (date, payee and postings)."""
+        postings = payload.get("postings")
+        missing_fields = [
+            field for field in ("date", "payee") if not payload.get(field)
+        ]
+        if not isinstance(postings, list) or not postings:
+            missing_fields.append("postings")
+        if missing_fields:
+            return ServiceResult.error_result(
+                f"Missing required fields: {', '.join(missing_fields)}",
+                error_code="VALIDATION_FAILED",
+            )
+
+        try:
+            datetime.strptime(payload["date"], "%Y-%m-%d")
+        except (ValueError, TypeError):
+            return ServiceResult.error_result(
+                "Invalid date format. Use YYYY-MM-DD.", error_code="INVALID_DATE"
+            )
+
+        for posting in postings:
+            if not posting.get("account"):
+                return ServiceResult.error_result(
+                    "Missing account name in posting", error_code="VALIDATION_FAILED"
+                )
+            try:
+                float(posting.get("amount"))
+            except (ValueError, TypeError):
+                return ServiceResult.error_result(
+                    "Invalid amount format. Must be a number.",
+                    error_code="INVALID_AMOUNT_FORMAT",
+                )
+
+        # Same rule as the transactions API: a single transaction must not
+        # debit and credit the same account
+        account_directions = {}
+        for posting in postings:
+            amount = float(posting["amount"])
+            if amount == 0:
+                continue
+            direction = "debit" if amount > 0 else "credit"
+            account_name = posting["account"]
+            if account_directions.setdefault(account_name, direction) != direction:
+                return ServiceResult.error_result(
+                    f"Cannot debit and credit the same account '{account_name}' "
+                    "in a single transaction.",
+                    error_code="VALIDATION_FAILED",
+                )
+
+        return ServiceResult.success_result()
+
+    def _get_active_book_id(self):
+        """Return the user's active book ID, falling back to their first book."""
+        from shared.imports import Book, User
+
+        user = self.session.query(User).filter_by(id=self.user_id).first()
+        if user is not None and user.active_book_id:
+            return user.active_book_id
+
+        book = (
+            self.session.query(Book)
+            .filter_by(user_id=self.user_id)
+            .order_by(Book.id)
+            .first()
+        )
+        return book.id if book else None
+
     def _create_transaction_record(self, data: Dict):
         """Create a new transaction record."""
         from shared.imports import Transaction
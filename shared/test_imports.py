@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the lazy shared.imports module.
+"""
+
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from . import PROJECT_ROOT, imports
+
+# Budget for `import shared.imports` in a fresh interpreter; importing every
+# backend and banktransactions module eagerly took well over a second.
+# Wall-clock timing flakes on loaded runners, so it is only checked when
+# RUN_BENCHMARKS is set
+IMPORT_TIME_BUDGET_US = 100_000
+
+# Heavy dependencies that must not be loaded just by importing the module
+HEAVY_MODULES = ["app", "flask", "sqlalchemy", "google.genai", "imapclient"]
+
+
+def _run_importtime(code):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(PROJECT_ROOT), str(PROJECT_ROOT / "backend")]
+    )
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+
+class TestLazyResolution:
+    """Test cases for attribute resolution on first access."""
+
+    def test_name_resolves_to_the_providing_module_object(self):
+        from .database import DatabaseManager
+
+        assert imports.DatabaseManager is DatabaseManager
+
+    def test_resolved_name_is_cached_on_the_module(self):
+        imports.get_database_session
+        assert "get_database_session" in vars(imports)
+
+    def test_unknown_name_raises_attribute_error(self):
+        with pytest.raises(AttributeError):
+            imports.not_an_export
+
+    def test_failed_import_resolves_to_none(self):
+        imports.__dict__.pop("AuthService", None)
+        with patch(
+            "shared.imports.importlib.import_module",
+            side_effect=ImportError("boom"),
+        ):
+            assert imports.AuthService is None
+        # Failures are not cached, so the name resolves once importable
+        assert imports.AuthService is not None
+
+    def test_all_lists_every_lazy_name(self):
+        assert "TransactionService" in imports.__all__
+        assert "get_bank_emails" in imports.__all__
+        assert len(imports.__all__) == len(set(imports.__all__))
+
+
+def test_import_is_side_effect_free():
+    """Importing the module must not load heavy dependencies"""
+    result = _run_importtime(
+        "import sys, shared.imports; "
+        f"print(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert result.stdout.strip() == "[]"
+    assert "Warning" not in result.stdout
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(
+    not os.getenv("RUN_BENCHMARKS"), reason="set RUN_BENCHMARKS=1 to run"
+)
+def test_import_time_benchmark():
+    """Guard worker cold start with python -X importtime"""
+    result = _run_importtime("import shared.imports")
+
+    assert result.returncode == 0, result.stderr[-2000:]
+    cumulative_times = [
+        int(line.split("|")[1])
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and line.rstrip().endswith(" shared.imports")
+    ]
+    assert cumulative_times, "shared.imports missing from -X importtime output"
+    print(f"import shared.imports: {cumulative_times[0] / 1000:.1f} ms")
+    assert cumulative_times[0] < IMPORT_TIME_BUDGET_US